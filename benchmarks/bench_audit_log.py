@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Audit log benchmark.
+
+Scores cases with and without an AuditLog listener to show the logging
+overhead against full-speed batch scoring, then times case-history point
+lookups and a full verification of the hash chain.
+
+Usage: python benchmarks/bench_audit_log.py [--cases 200000] [--lookups 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from audit_log import AuditLog
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit log benchmark')
+    parser.add_argument('--cases', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--block-records', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    detector = CouncilTaxFraudDetector().compile()
+    cases = generate_sample_cases(args.cases, seed=42)
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain = logged = float('inf')
+        for run in range(args.repeat):
+            start = time.perf_counter()
+            detector.batch_analyze(cases)
+            plain = min(plain, time.perf_counter() - start)
+
+            log = AuditLog(os.path.join(directory, f'run-{run}'), detector, block_records=args.block_records)
+            start = time.perf_counter()
+            detector.batch_analyze(cases, listeners=[log])
+            log.close()
+            logged = min(logged, time.perf_counter() - start)
+
+        print(f"Scoring only     : {plain:.2f}s ({args.cases / plain:,.0f} cases/s)")
+        print(f"Scoring + logging: {logged:.2f}s ({args.cases / logged:,.0f} cases/s), "
+              f"{(logged - plain) / args.cases * 1e6:.1f}us per record")
+
+        path = os.path.join(directory, 'run-0')
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        log = AuditLog(path)
+        print(f"Log: {log.records:,} records in {len(log.blocks)} blocks, {size / log.records:.0f} bytes per record")
+
+        rng = random.Random(42)
+        targets = [rng.choice(cases)['case_id'] for _ in range(args.lookups)]
+        start = time.perf_counter()
+        found = sum(len(log.history(case_id)) for case_id in targets)
+        elapsed = time.perf_counter() - start
+        print(f"History lookups  : {elapsed / args.lookups * 1e3:.2f}ms each ({found} records found)")
+
+        start = time.perf_counter()
+        result = log.verify()
+        print(f"Verify           : {time.perf_counter() - start:.2f}s, ok={result.ok}, head {result.head[:16]}")
+        log.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Checkpoint overhead of resumable batch jobs.
+
+Scores the same cases twice - once with a single batch_analyze call
+followed by one JSONL write, once through a checkpointed BatchJob - and
+reports the relative overhead of chunking, per-chunk fsync and manifest
+updates.
+
+Usage: python benchmarks/bench_batch_job.py [--cases 200000] [--chunk-size 10000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from batch_jobs import BatchJob
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch job checkpoint overhead benchmark')
+    parser.add_argument('--cases', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3, help='alternate the two runs and keep the best of each')
+    args = parser.parse_args()
+
+    cases = generate_sample_cases(args.cases, seed=38)
+    detector = CouncilTaxFraudDetector()
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+    plain = checkpointed = float('inf')
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            results = detector.batch_analyze(cases)
+            with open(os.path.join(tmp, 'plain.jsonl'), 'w', encoding='utf-8') as fh:
+                for assessment in results['assessments']:
+                    fh.write(encode(assessment.to_dict()))
+                    fh.write('\n')
+            plain = min(plain, time.perf_counter() - start)
+            del results
+
+            job = BatchJob(os.path.join(tmp, 'job'), detector, chunk_size=args.chunk_size)
+            start = time.perf_counter()
+            job.run(cases)
+            checkpointed = min(checkpointed, time.perf_counter() - start)
+
+    print(f"Plain batch_analyze + write: {plain:.2f}s")
+    print(f"Checkpointed job ({job.completed_chunks} chunks): {checkpointed:.2f}s "
+          f"({(checkpointed / plain - 1) * 100:+.1f}% overhead)")
+
+if __name__ == "__main__":
+    main()
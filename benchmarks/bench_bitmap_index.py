@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Indicator bitmap index benchmark.
+
+Scores a sample of synthetic cases, then indexes their indicator sets
+repeatedly until the index holds --rows accounts, and reports build rate,
+on-disk size per container kind, and cold (first use of each indicator)
+and warm latencies of typical analyst queries. For comparison it times
+the same queries as scans over the sample's case dicts, scaled to --rows.
+
+Usage: python benchmarks/bench_bitmap_index.py [--rows 2000000] [--sample 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bitmap_index import BitmapIndex, BitmapIndexWriter, outcome_names
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+
+QUERIES = (
+    ('electoral_register_mismatch AND multiple_vehicles AND NOT self_reported',
+     lambda c: c.get('electoral_register_mismatch') and c.get('multiple_vehicles') and not c.get('self_reported')),
+    ('employment_income OR post_graduation_claim',
+     lambda c: c.get('employment_income') or c.get('post_graduation_claim')),
+    ('vulnerable_resident AND (antisocial_reports OR police_intelligence) AND NOT first_occurrence',
+     lambda c: c.get('vulnerable_resident') and (c.get('antisocial_reports') or c.get('police_intelligence'))
+     and not c.get('first_occurrence')),
+)
+
+def main():
+    parser = argparse.ArgumentParser(description='Indicator bitmap index benchmark')
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--sample', type=int, default=100000)
+    args = parser.parse_args()
+
+    cases = generate_sample_cases(args.sample, seed=48)
+    assessments = CouncilTaxFraudDetector().batch_analyze(cases)['assessments']
+    names = []
+    for case, assessment in zip(cases, assessments):
+        row = {name for name, value in case.items() if value is True}
+        row.update(indicator.indicator_type for indicator in assessment.indicators)
+        row.update(outcome_names(assessment))
+        names.append(row)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with BitmapIndexWriter(tmp) as writer:
+            for row in range(args.rows):
+                writer.add_row(f'ACC-{row:09d}', names[row % len(names)])
+        elapsed = time.perf_counter() - start
+        print(f"build          : {elapsed:6.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+        index = BitmapIndex(tmp)
+        storage = index.storage()
+        print(f"storage        : {storage['total'] / 1e6:6.2f}MB (array {storage['array'] / 1e6:.2f}, "
+              f"run {storage['run'] / 1e6:.2f}, bitmap {storage['bitmap'] / 1e6:.2f}; "
+              f"uncompressed {storage['uncompressed'] / 1e6:.2f}MB)")
+        for query, predicate in QUERIES:
+            start = time.perf_counter()
+            count = index.count(query)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            index.count(query)
+            warm = time.perf_counter() - start
+            start = time.perf_counter()
+            sum(1 for case in cases if predicate(case))
+            scan = (time.perf_counter() - start) * args.rows / len(cases)
+            print(f"{count:>9} rows: cold {cold * 1e3:6.2f}ms, warm {warm * 1e3:6.2f}ms, "
+                  f"dict scan ~{scan * 1e3:7.0f}ms  {query}")
+
+if __name__ == "__main__":
+    main()
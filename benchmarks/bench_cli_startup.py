@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the fraud-detector batch CLI.
+
+Runs the CLI in fresh interpreters against a small input file, reports
+median wall time per invocation, lists the slowest imports from
+`python -X importtime`, and fails if pandas, plotly or streamlit are loaded.
+
+Usage: python benchmarks/bench_cli_startup.py [--runs 20] [--budget-ms 150]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+CLI = os.path.join(SRC, 'batch_cli.py')
+HEAVY_MODULES = ('pandas', 'plotly', 'streamlit', 'numpy', 'pydantic')
+
+def run_python_baseline():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return (time.perf_counter() - start) * 1000
+
+def run_cli(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, CLI] + args, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+def import_profile(args):
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative_us), name.strip()))
+    return imports
+
+def main():
+    parser = argparse.ArgumentParser(description='fraud-detector CLI cold-start benchmark')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases_path = os.path.join(tmp, 'cases.jsonl')
+        with open(cases_path, 'w') as fh:
+            for i in range(10):
+                fh.write(json.dumps({'case_id': f'BENCH-{i}', 'multiple_utility_accounts': i % 2 == 0}) + '\n')
+        out_path = os.path.join(tmp, 'out.jsonl')
+        score_args = ['score', cases_path, '-o', out_path, '--quiet']
+
+        baseline = [run_python_baseline() for _ in range(args.runs)]
+        version = [run_cli(['--version']) for _ in range(args.runs)]
+        score = [run_cli(score_args) for _ in range(args.runs)]
+
+        imports = import_profile(score_args)
+
+    loaded = {name.split('.')[0] for _, name in imports}
+    heavy = sorted(loaded.intersection(HEAVY_MODULES))
+    median_score = statistics.median(score)
+
+    print(f"Interpreter start (python -c pass): {statistics.median(baseline):7.1f} ms")
+    print(f"fraud-detector --version:            {statistics.median(version):7.1f} ms")
+    print(f"fraud-detector score (10 cases):     {median_score:7.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print("Slowest imports (cumulative):")
+    for cumulative_us, name in sorted(imports, reverse=True)[:8]:
+        print(f"  {cumulative_us / 1000:7.1f} ms  {name}")
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy)}")
+        return 1
+    if median_score > args.budget_ms:
+        print("FAIL: cold start over budget")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Geospatial hotspot benchmark.
+
+Places a council-sized set of cases on synthetic postcode centroids (a
+few planted high-risk clusters over background noise) and times loading
+the centroid file, indexing every case, the hotspot map, rescoring a
+slice of cases and rebuilding it, neighbourhood-risk lookups and radius
+queries - the latter against a brute-force scan for comparison.
+
+Usage: python benchmarks/bench_geospatial.py [--cases 150000] [--postcodes 20000] [--queries 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from geospatial import PostcodeCentroids, SpatialRiskIndex
+
+def synthetic_postcodes(count, rng):
+    """Postcodes spread over roughly a 15km x 12km council area"""
+    postcodes = {}
+    letters = 'ABDEFGHJLNPQRSTUWXYZ'
+    for i in range(count):
+        district, sector, unit = i // 2000 + 1, i // 400 % 5 + 1, i % 400
+        postcode = f'CT{district} {sector}{letters[unit // 20]}{letters[unit % 20]}'
+        postcodes[postcode] = (51.20 + rng.random() * 0.11, 1.00 + rng.random() * 0.21)
+    return postcodes
+
+def main():
+    parser = argparse.ArgumentParser(description='Geospatial hotspot benchmark')
+    parser.add_argument('--cases', type=int, default=150000)
+    parser.add_argument('--postcodes', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--cell', type=float, default=250.0, help='grid cell size in metres')
+    parser.add_argument('--radius', type=float, default=500.0, help='neighbourhood radius in metres')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(46)
+    postcodes = synthetic_postcodes(args.postcodes, rng)
+    names = list(postcodes)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'centroids.csv')
+        with open(path, 'w') as fh:
+            fh.write('postcode,latitude,longitude\n')
+            fh.writelines(f'{p},{lat:.6f},{lon:.6f}\n' for p, (lat, lon) in postcodes.items())
+        start = time.perf_counter()
+        centroids = PostcodeCentroids.load(path)
+        print(f"load centroids   : {(time.perf_counter() - start) * 1e3:8.1f}ms ({len(centroids)} postcodes)")
+
+    # Background risk plus three planted clusters of high-risk postcodes
+    risk = rng.random(args.cases) * 0.4
+    choice = rng.integers(0, len(names), args.cases)
+    coords = np.array([postcodes[name] for name in names])
+    for lat, lon in ((51.25, 1.05), (51.28, 1.15), (51.22, 1.18)):
+        near = np.hypot(coords[choice, 0] - lat, (coords[choice, 1] - lon) * 0.63) < 0.003
+        risk[near] = 0.7 + rng.random(int(near.sum())) * 0.3
+    cases = [{'case_id': f'C{i:07d}', 'postcode': names[code]} for i, code in enumerate(choice.tolist())]
+
+    index = SpatialRiskIndex(centroids, cell_m=args.cell, radius_m=args.radius)
+    start = time.perf_counter()
+    for case, score in zip(cases, risk.tolist()):
+        index.update(case, score)
+    elapsed = time.perf_counter() - start
+    print(f"index cases      : {elapsed:8.2f}s ({len(index) / elapsed:,.0f} cases/s)")
+
+    start = time.perf_counter()
+    spots = index.hotspots()
+    print(f"hotspot map      : {(time.perf_counter() - start) * 1e3:8.1f}ms ({len(spots)} hotspots)")
+    for spot in spots[:3]:
+        print(f"  ({spot.latitude:.4f}, {spot.longitude:.4f}) {spot.cases} cases, "
+              f"mean risk {spot.mean_risk:.2f}, z {spot.peak_z:.1f}")
+
+    start = time.perf_counter()
+    for case in cases[:1000]:
+        index.update(case, 0.95)
+    spots = index.hotspots()
+    print(f"rescore 1k + map : {(time.perf_counter() - start) * 1e3:8.1f}ms")
+
+    probes = [cases[i] for i in rng.integers(0, len(cases), args.queries).tolist()]
+    start = time.perf_counter()
+    for case in probes:
+        index.enrich(case)
+    elapsed = time.perf_counter() - start
+    print(f"enrich           : {elapsed / len(probes) * 1e6:8.1f}us per case")
+
+    points = [centroids.locate(case['postcode']) for case in probes]
+    start = time.perf_counter()
+    found = sum(len(index.neighbours(lat, lon)) for lat, lon in points)
+    grid = (time.perf_counter() - start) / len(points)
+    print(f"radius query     : {grid * 1e6:8.1f}us per query ({found / len(points):.0f} neighbours)")
+
+    xy = np.array([index.project(*centroids.locate(case['postcode'])) for case in cases])
+    start = time.perf_counter()
+    for lat, lon in points[:200]:
+        x, y = index.project(lat, lon)
+        np.flatnonzero((xy[:, 0] - x) ** 2 + (xy[:, 1] - y) ** 2 <= args.radius ** 2)
+    brute = (time.perf_counter() - start) / 200
+    print(f"brute-force scan : {brute * 1e6:8.1f}us per query ({brute / grid:.0f}x slower)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Live feed fan-out benchmark.
+
+Scores cases with a FeedHub listener while a number of SSE viewers read
+GET /events from a LiveFeedServer in the same process, one of them
+deliberately slow. Viewers share the interpreter with the scorer, so the
+scoring slowdown includes their reading. Reports scoring throughput with and without the feed,
+flagged events per second and what each viewer received; the slow viewer
+should lose old batches without holding back the others.
+
+Usage: python benchmarks/bench_live_feed.py [--cases 100000] [--viewers 24]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from live_feed import FeedHub, LiveFeedServer
+
+def viewer(port, received, index, stop, delay=0.0):
+    sock = socket.socket()
+    if delay:
+        # A small receive window so back-pressure reaches the server instead of the kernel buffer
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(('127.0.0.1', port))
+    sock.sendall(b'GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    sock.settimeout(0.5)
+    events = frames = 0
+    buffered = b''
+    while not stop.is_set():
+        try:
+            data = sock.recv(4096 if delay else 1 << 16)
+        except socket.timeout:
+            continue
+        if not data:
+            break
+        buffered += data
+        *complete, buffered = buffered.split(b'\n\n')
+        for frame in complete:
+            if b'event: assessments' in frame:
+                frames += 1
+                events += frame.count(b'"case_id"')
+        if delay:
+            time.sleep(delay)
+    sock.close()
+    received[index] = (frames, events)
+
+def main():
+    parser = argparse.ArgumentParser(description='Live feed fan-out benchmark')
+    parser.add_argument('--cases', type=int, default=100000)
+    parser.add_argument('--viewers', type=int, default=24)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    detector = CouncilTaxFraudDetector().compile()
+    cases = generate_sample_cases(args.cases, seed=45)
+    start = time.perf_counter()
+    detector.batch_analyze(cases)
+    plain = time.perf_counter() - start
+
+    hub = FeedHub(batch_size=args.batch_size, client_buffer=32)
+    server = LiveFeedServer(hub).start()
+    stop = threading.Event()
+    received = {}
+    threads = [threading.Thread(target=viewer, args=(server.port, received, i, stop, 0.2 if i == 0 else 0.0))
+               for i in range(args.viewers)]
+    for thread in threads:
+        thread.start()
+    while hub.stats()['subscribers'] < args.viewers:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    detector.batch_analyze(cases, listeners=[hub])
+    hub.flush()
+    elapsed = time.perf_counter() - start
+    time.sleep(1.0)
+    stats = hub.stats()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.stop()
+
+    print(f"Scoring only   : {args.cases / plain:,.0f} cases/s")
+    print(f"Scoring + feed : {args.cases / elapsed:,.0f} cases/s, {stats['published'] / elapsed:,.0f} flagged events/s "
+          f"in {stats['batches']} batches to {args.viewers} viewers")
+    fast = [received[i][1] for i in range(1, args.viewers)]
+    print(f"Fast viewers   : {min(fast):,}-{max(fast):,} of {stats['published']:,} events each")
+    print(f"Slow viewer    : {received[0][1]:,} events, {stats['dropped_batches']} batches dropped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Assessment object model memory benchmark.
+
+Scores synthetic cases and measures, with tracemalloc, the memory and the
+number of live allocations retained by the resulting assessments: slotted
+FraudAssessments whose IndicatorHits reference shared IndicatorDefinitions.
+The same assessments are then rebuilt in the previous layout (a __dict__
+per assessment and a mutable FraudIndicator copy per detected indicator)
+for comparison, along with the time each layout takes to build.
+
+Usage: python benchmarks/bench_object_model.py [--cases 200000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector, FraudIndicator, FraudType, RiskLevel
+
+@dataclass
+class LegacyAssessment:
+    """FraudAssessment as it was laid out before slots"""
+    case_id: str
+    fraud_type: Optional[FraudType]
+    risk_level: RiskLevel
+    risk_score: float
+    is_likely_fraud: bool
+    is_likely_error: bool
+    indicators: List[FraudIndicator]
+    recommendations: List[str]
+    confidence: float
+
+def legacy(assessment) -> LegacyAssessment:
+    return LegacyAssessment(
+        assessment.case_id, assessment.fraud_type, assessment.risk_level, assessment.risk_score,
+        assessment.is_likely_fraud, assessment.is_likely_error,
+        [FraudIndicator(ind.indicator_type, ind.description, ind.weight, True, ind.evidence)
+         for ind in assessment.indicators],
+        list(assessment.recommendations), assessment.confidence,
+    )
+
+def measure(build):
+    """Retained bytes and live blocks of build()'s result, and how long it took"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    stats = tracemalloc.take_snapshot().compare_to(before, 'filename')
+    tracemalloc.stop()
+    return result, sum(s.size_diff for s in stats), sum(s.count_diff for s in stats), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Assessment object model memory benchmark')
+    parser.add_argument('--cases', type=int, default=200000)
+    args = parser.parse_args()
+
+    cases = generate_sample_cases(args.cases, seed=50)
+    detector = CouncilTaxFraudDetector().compile()
+    assessments, size, blocks, elapsed = measure(lambda: [detector.detect_fraud(case) for case in cases])
+    hits = sum(len(a.indicators) for a in assessments)
+    print(f"{len(cases):,} assessments, {hits:,} detected indicators")
+    print(f"slotted + shared : {size / len(cases):6.0f} B/assessment, {blocks / len(cases):5.1f} allocations/assessment, "
+          f"scored in {elapsed:.2f}s")
+    _, legacy_size, legacy_blocks, legacy_elapsed = measure(lambda: [legacy(a) for a in assessments])
+    print(f"previous layout  : {legacy_size / len(cases):6.0f} B/assessment, "
+          f"{legacy_blocks / len(cases):5.1f} allocations/assessment, rebuilt in {legacy_elapsed:.2f}s")
+    print(f"reduction        : {1 - size / legacy_size:.0%} memory, {1 - blocks / legacy_blocks:.0%} allocations")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Snapshot diff benchmark.
+
+Writes two synthetic run snapshots ("yesterday" and "today") where a few
+percent of cases change risk level, some close and some are new, then
+times the streaming merge-join: summary counts and the full change
+stream. Peak traced memory shows the diff stays within its block size.
+
+Usage: python benchmarks/bench_snapshot_diff.py [--cases 2000000] [--churn 0.05]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from external_ranking import RISK_LEVELS
+from run_snapshots import Snapshot, SnapshotDiff, SnapshotWriter
+
+def write_snapshot(path, ids, levels, scores, memory_mb):
+    writer = SnapshotWriter(path, memory_budget=memory_mb << 20)
+    for case_id, level, score in zip(ids, levels.tolist(), scores.tolist()):
+        writer.add_record(case_id, RISK_LEVELS[level], score, 0.5)
+    return writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot diff benchmark')
+    parser.add_argument('--cases', type=int, default=2000000)
+    parser.add_argument('--churn', type=float, default=0.05, help='fraction of cases that change level')
+    parser.add_argument('--memory-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(43)
+    ids = [f'CASE-{i:09d}' for i in rng.permutation(args.cases)]
+    levels = rng.integers(0, len(RISK_LEVELS), args.cases)
+    scores = rng.random(args.cases)
+    today_levels = levels.copy()
+    moved = rng.random(args.cases) < args.churn
+    today_levels[moved] = rng.integers(0, len(RISK_LEVELS), int(moved.sum()))
+    closing = args.cases // 100
+    new_ids = [f'CASE-{args.cases + i:09d}' for i in range(closing)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        old = write_snapshot(os.path.join(directory, 'old'), ids, levels, scores, args.memory_mb)
+        new = write_snapshot(os.path.join(directory, 'new'), ids[closing:] + new_ids,
+                             np.concatenate([today_levels[closing:], levels[:closing]]),
+                             np.concatenate([scores[closing:], scores[:closing]]), args.memory_mb)
+        print(f"Wrote two snapshots of {args.cases:,} cases in {time.perf_counter() - start:.2f}s")
+
+        diff = SnapshotDiff(Snapshot(old.directory), Snapshot(new.directory))
+        tracemalloc.start()
+        start = time.perf_counter()
+        counts = diff.counts()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"Counts      : {elapsed:.2f}s, peak traced memory {peak / 2 ** 20:.1f} MB")
+        print(f"  escalated {counts['escalated']:,}, de-escalated {counts['de_escalated']:,}, "
+              f"new {counts['new']:,}, closed {counts['closed']:,}")
+
+        start = time.perf_counter()
+        changes = sum(1 for _ in diff.changes())
+        elapsed = time.perf_counter() - start
+        print(f"Change stream: {elapsed:.2f}s for {changes:,} changes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Threshold / error-weight sweep benchmark.
+
+Compares re-running batch_analyze for each grid point against the
+Evaluator, which scores the labelled set once and re-derives outcomes per
+grid point.
+
+Usage: python benchmarks/bench_threshold_sweep.py [--rows 200000] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from data_generator import generate_sample_cases
+from evaluation import Evaluator, best_report, parameter_grid
+from fraud_detector import CouncilTaxFraudDetector, RiskLevel
+
+def main():
+    parser = argparse.ArgumentParser(description='threshold sweep benchmark')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    cases = generate_sample_cases(args.rows, seed=42)
+    grid = parameter_grid(
+        medium=(0.3, 0.4, 0.5), high=(0.5, 0.6, 0.7, 0.75, 0.8),
+        critical=(0.85, 0.9, 0.95), error_weight_factor=(0.2, 0.3, 0.4, 0.5, 0.6, 0.7)
+    )
+
+    # Per-point cost of the object path, extrapolated from one grid point
+    start = time.perf_counter()
+    detector = CouncilTaxFraudDetector(error_weight_factor=grid[0]['error_weight_factor'])
+    for level, value in zip((RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL), grid[0]['thresholds']):
+        detector.risk_thresholds[level] = value
+    detector.batch_analyze(cases)
+    per_point = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluator = Evaluator(cases)
+    prepared = time.perf_counter() - start
+    reports = evaluator.sweep(grid, workers=args.workers)
+    swept = time.perf_counter() - start
+
+    best = best_report(reports)
+    print(f"Rows: {args.rows:,}  grid points: {len(grid)}")
+    print(f"batch_analyze per point: {per_point:.2f}s  (~{per_point * len(grid):.0f}s for the grid)")
+    print(f"Evaluator: {prepared:.2f}s prepare, {swept:.2f}s total")
+    print(f"Best F1 {best.f1:.3f} at thresholds {best.thresholds}, error weight {best.error_weight_factor}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Validation overhead benchmark: bulk case validation vs batch scoring.
+
+Each phase is timed --repeat times and the fastest run is reported. Validation
+is timed twice: inferring column types from every row (JSON input), and with
+the column types declared up front (CSV input, or a typed source such as the
+generator).
+
+Usage: python benchmarks/bench_validation.py [--rows 1000000] [--dirty 0.01] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from case_schema import CaseSchema
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--dirty', type=float, default=0.01,
+                        help='fraction of rows with string/int encoded indicators')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(42)
+    template = generate_sample_cases(5000)
+    cases = [dict(template[i % len(template)]) for i in range(args.rows)]
+    for case in random.sample(cases, int(args.rows * args.dirty)):
+        case['self_reported'] = random.choice(['yes', 'False', '1', 0])
+        case['annual_charge'] = str(case['annual_charge'])
+    declared = {}
+    for case in template:
+        for key, value in case.items():
+            declared.setdefault(key, {type(None)}).add(type(value))
+    if args.dirty:
+        declared['self_reported'] |= {str, int}
+        declared['annual_charge'].add(str)
+
+    detector = CouncilTaxFraudDetector()
+    schema = CaseSchema.for_detector(detector)
+
+    validate_seconds = declared_seconds = score_seconds = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        report = schema.validate(cases)
+        validate_seconds = min(validate_seconds, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        schema.validate(cases, declared)
+        declared_seconds = min(declared_seconds, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        detector.batch_analyze(report.cases)
+        score_seconds = min(score_seconds, time.perf_counter() - start)
+
+    print(f"Rows: {args.rows:,} ({args.dirty:.1%} dirty)")
+    print(f"Validation: {validate_seconds:.2f}s inferred types, {declared_seconds:.2f}s declared types  "
+          f"({report.coerced_values:,} values coerced, {len(report.rejected):,} rows rejected)")
+    print(f"Scoring:    {score_seconds:.2f}s")
+    print(f"Overhead:   {validate_seconds / score_seconds:.1%} inferred, "
+          f"{declared_seconds / score_seconds:.1%} declared, of scoring time")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+sys.path.append('../src')
+import time
+from concurrent.futures import ProcessPoolExecutor
+from adaptive_pipeline import AdaptiveController, AdaptivePipeline
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+
+class TestAdaptivePipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cases = generate_sample_cases(3000, seed=49)
+        cls.expected = CouncilTaxFraudDetector().batch_analyze(cls.cases)
+
+    def test_results_match_batch_analyze(self):
+        """Test assessments arrive in input order with the same statistics as batch_analyze"""
+        seen = []
+        controller = AdaptiveController(initial_batch=100, min_batch=10, max_workers=2)
+        pipeline = AdaptivePipeline(controller=controller, listeners=[lambda case, a: seen.append(case['case_id'])])
+        result = pipeline.run(iter(self.cases))
+        self.assertEqual(result['statistics'], self.expected['statistics'])
+        self.assertEqual([a.risk_score for a in result['assessments']],
+                         [a.risk_score for a in self.expected['assessments']])
+        self.assertEqual(seen, [case['case_id'] for case in self.cases])
+        self.assertEqual(result['metrics']['rows'], len(self.cases))
+
+    def test_process_pool(self):
+        """Test chunks can be scored in worker processes, with latency measured in the parent"""
+        controller = AdaptiveController(initial_batch=200, min_batch=50, max_workers=2)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            result = AdaptivePipeline(controller=controller, executor=pool).run(self.cases)
+        self.assertEqual(result['statistics'], self.expected['statistics'])
+        self.assertEqual([a.risk_score for a in result['assessments']],
+                         [a.risk_score for a in self.expected['assessments']])
+        self.assertEqual(result['metrics']['rows'], len(self.cases))
+        self.assertGreater(result['metrics']['latency_p50'], 0)
+
+    def test_controller_follows_latency_slo(self):
+        """Test a breached SLO halves the chunk size and headroom lets it grow again"""
+        controller = AdaptiveController(target_latency=0.1, initial_batch=400, min_batch=50, window=2)
+        decision = controller.observe(400, 0.2)
+        self.assertEqual((decision.reason, controller.batch_size), ('latency', 200))
+        # A chunk cut before the decrease is still in flight; it must not halve again
+        self.assertIsNone(controller.observe(400, 0.2))
+        self.assertEqual(controller.batch_size, 200)
+        decision = controller.observe(200, 0.01)
+        self.assertEqual(decision.reason, 'grow')
+        # Additive increase after the first breach, not doubling
+        self.assertEqual(controller.batch_size, 200 + controller.step)
+        self.assertEqual(controller.metrics()['decisions'], {'latency': 1, 'grow': 1})
+
+    def test_memory_limit_and_worker_probe(self):
+        """Test RSS over the limit shrinks chunks and an extra worker without a gain is capped"""
+        controller = AdaptiveController(initial_batch=400, memory_limit=1, max_workers=4, window=1)
+        self.assertEqual(controller.observe(400, 0.01).reason, 'memory')
+        self.assertEqual(controller.batch_size, 200)
+
+        controller = AdaptiveController(initial_batch=400, max_workers=4, window=1)
+        self.assertEqual(controller.observe(400, 0.01, backlog=True).reason, 'workers_up')
+        self.assertEqual(controller.workers, 2)
+        # Twice the latency for the same rows: no throughput gain from the second worker
+        time.sleep(0.05)
+        self.assertEqual(controller.observe(400, 0.02).reason, 'workers_no_gain')
+        self.assertEqual((controller.workers, controller.worker_cap), (1, 1))
+        controller.observe(400, 0.01, backlog=True)
+        self.assertEqual(controller.workers, 1)
+
+    def test_backpressure_and_errors(self):
+        """Test a slow sink blocks scoring and failures in any stage are raised from run"""
+        def slow_sink(chunk, assessments):
+            time.sleep(0.01)
+
+        pipeline = AdaptivePipeline(controller=AdaptiveController(initial_batch=50, min_batch=50, max_batch=50),
+                                    queue_depth=1)
+        result = pipeline.run(self.cases[:1000], sink=slow_sink)
+        self.assertNotIn('assessments', result)
+        self.assertEqual(result['statistics']['total_cases'], 1000)
+        self.assertGreater(result['metrics']['write_blocked'] + result['metrics']['read_blocked'], 0)
+
+        def broken_sink(chunk, assessments):
+            raise RuntimeError('sink down')
+
+        with self.assertRaises(RuntimeError):
+            AdaptivePipeline().run(self.cases, sink=broken_sink)
+
+        def broken_reader():
+            yield from self.cases[:10]
+            raise ValueError('bad record')
+
+        with self.assertRaises(ValueError):
+            AdaptivePipeline().run(broken_reader())
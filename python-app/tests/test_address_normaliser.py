@@ -0,0 +1,54 @@
+import unittest
+import sys
+sys.path.append('../src')
+from address_normaliser import AddressNormaliser, BlockingIndex, normalise_address, normalise_postcode
+
+class TestAddressNormaliser(unittest.TestCase):
+
+    def setUp(self):
+        self.normaliser = AddressNormaliser()
+
+    def test_suffixes_and_components(self):
+        """Test suffix abbreviations, house numbers, flats and embedded postcodes are canonicalised"""
+        self.assertEqual(self.normaliser.normalise('12 High St').key,
+                         self.normaliser.normalise('12 HIGH STREET').key)
+        address = self.normaliser.normalise('Flat 3, 45a St Johns Rd., Leeds ls62ab')
+        self.assertEqual(address.flat, '3')
+        self.assertEqual(address.house_number, '45A')
+        self.assertEqual(address.street, 'ST JOHNS ROAD')
+        self.assertEqual(address.locality, 'LEEDS')
+        self.assertEqual(address.postcode, 'LS6 2AB')
+        self.assertEqual(address.sector, 'LS6 2')
+
+    def test_house_name_and_explicit_postcode(self):
+        """Test a house name before the numbered street and an explicit postcode override"""
+        address = self.normaliser.normalise('Rose Cottage, 5 Mill Ln, York YO1 7HH', postcode='yo17hz')
+        self.assertEqual((address.house_number, address.street), ('5', 'MILL LANE'))
+        self.assertEqual(address.postcode, 'YO1 7HZ')
+        self.assertIsNone(normalise_postcode('no postcode here'))
+        self.assertIsNone(normalise_address(None).street)
+
+    def test_line_cache_and_interning(self):
+        """Test repeated streets hit the cache and share one interned string"""
+        results = self.normaliser.normalise_many([f'{i} Park Ave' for i in range(1, 101)])
+        self.assertEqual(self.normaliser.misses, 1)
+        self.assertEqual(self.normaliser.hits, 99)
+        self.assertIs(results[0].street, results[-1].street)
+        self.assertEqual(results[41].house_number, '42')
+
+    def test_blocking_index(self):
+        """Test rows are blocked by postcode, sector and street"""
+        addresses = self.normaliser.normalise_many([
+            '1 High St, Leeds LS6 2AB', '2 High Street, Leeds LS6 2AB', '9 Low Road LS6 2XY',
+            '4 High St, York', '5 High Street, York',
+        ])
+        index = BlockingIndex.build(addresses)
+        self.assertEqual(list(index.by_postcode('ls6 2ab')), [0, 1])
+        self.assertEqual(list(index.by_sector('LS6 2')), [0, 1, 2])
+        self.assertEqual(list(index.by_street('HIGH STREET', 'YORK')), [3, 4])
+        self.assertEqual(list(index.candidates(addresses[3])), [3, 4])
+        self.assertEqual(list(index.by_postcode('ZZ1 1ZZ')), [])
+        self.assertEqual(index.stats()['rows'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import sys
+sys.path.append('../src')
+import threading
+from fraud_detector import CouncilTaxFraudDetector, RiskLevel
+from data_generator import generate_sample_cases
+from assessment_cache import AssessmentCache
+from reference_data import ReferenceData
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingReferenceData(ReferenceData):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def enrich(self, case_data):
+        self.calls += 1
+        return super().enrich(case_data)
+
+class TestAssessmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CouncilTaxFraudDetector()
+        self.cases = generate_sample_cases(300, seed=33)
+
+    def test_cached_assessments_match_detector(self):
+        """Test hits return the same assessment as a fresh detection, with per-case IDs and evidence"""
+        cache = AssessmentCache(self.detector)
+        for _ in range(2):
+            for case in self.cases:
+                self.assertEqual(cache.detect_fraud(case), self.detector.detect_fraud(case))
+        stats = cache.stats()
+        self.assertEqual(stats.hits + stats.misses, 600)
+        self.assertGreaterEqual(stats.hits, 300)
+
+    def test_cases_enriched_once(self):
+        """Test a miss scores the already-enriched case instead of enriching it again"""
+        reference = CountingReferenceData()
+        detector = CouncilTaxFraudDetector(reference_data=reference)
+        case = {'case_id': 'REF-1', 'council_tax_band': 'A', 'property_value': 900000}
+        expected = detector.detect_fraud(case)
+        for cache in (AssessmentCache(detector), AssessmentCache(detector.compile())):
+            reference.calls = 0
+            self.assertEqual(cache.detect_fraud(case), expected)
+            self.assertEqual(cache.detect_fraud(dict(case, case_id='REF-2')).risk_score, expected.risk_score)
+            self.assertEqual((reference.calls, cache.stats().hits), (2, 1))
+
+    def test_signature_shared_across_case_ids(self):
+        """Test cases with the same indicators but different IDs share an entry"""
+        cache = AssessmentCache(self.detector)
+        first = cache.detect_fraud({'case_id': 'A', 'multiple_utility_accounts': True, 'self_reported': True})
+        second = cache.detect_fraud({'case_id': 'B', 'multiple_utility_accounts': True, 'self_reported': True,
+                                     'multiple_utility_accounts_evidence': 'Two supplier accounts',
+                                     'annual_charge': 1500})
+        self.assertEqual(cache.stats().hits, 1)
+        self.assertEqual(first.case_id, 'A')
+        self.assertEqual(second.case_id, 'B')
+        self.assertEqual(second.indicators[0].evidence, 'Two supplier accounts')
+        self.assertEqual(first.risk_score, second.risk_score)
+
+    def test_false_indicators_normalised(self):
+        """Test explicitly false indicators share the signature of absent ones"""
+        cache = AssessmentCache(self.detector)
+        self.assertEqual(cache.signature({'multiple_vehicles': True, 'self_reported': False}),
+                         cache.signature({'multiple_vehicles': True}))
+
+    def test_lru_eviction_and_byte_bound(self):
+        """Test the least recently used entry is evicted first"""
+        cache = AssessmentCache(self.detector, max_entries=2)
+        a, b, c = ({'case_id': k, name: True} for k, name in
+                   (('a', 'multiple_vehicles'), ('b', 'utility_usage'), ('c', 'rental_listings')))
+        cache.detect_fraud(a)
+        cache.detect_fraud(b)
+        cache.detect_fraud(a)
+        cache.detect_fraud(c)
+        self.assertEqual(cache.stats().evictions, 1)
+        cache.detect_fraud(a)
+        self.assertEqual(cache.stats().hits, 2)
+
+        small = AssessmentCache(self.detector, max_entries=None, max_bytes=4000)
+        for case in self.cases:
+            small.detect_fraud(case)
+        self.assertLessEqual(small.stats().bytes, 4000)
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        clock = FakeClock()
+        cache = AssessmentCache(self.detector, ttl=60, clock=clock)
+        case = {'case_id': 'T', 'utility_usage': True}
+        cache.detect_fraud(case)
+        clock.now = 30
+        cache.detect_fraud(case)
+        clock.now = 120
+        cache.detect_fraud(case)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.expirations), (1, 2, 1))
+
+    def test_config_change_requires_refresh(self):
+        """Test the cache keeps one configuration until refresh picks up a changed one"""
+        cache = AssessmentCache(self.detector)
+        case = {'case_id': 'R', 'multiple_utility_accounts': True, 'electoral_register_mismatch': True,
+                'social_media_evidence': True, 'multiple_vehicles': True, 'credit_check_mismatch': True}
+        version = cache.config_version
+        self.assertEqual(cache.detect_fraud(case).risk_level, RiskLevel.HIGH)
+        self.detector.risk_thresholds[RiskLevel.HIGH] = 0.95
+        self.detector.risk_thresholds[RiskLevel.CRITICAL] = 0.99
+        # Until refresh, hits and misses are both scored by the compiled snapshot
+        miss = dict(case, historical_pattern=True)
+        self.assertEqual(cache.detect_fraud(case).risk_level, RiskLevel.HIGH)
+        self.assertEqual(cache.detect_fraud(miss), cache.detector.detect_fraud(miss))
+        self.assertEqual(cache.config_version, version)
+        cache.refresh()
+        self.assertNotEqual(cache.config_version, version)
+        self.assertEqual(cache.detect_fraud(case).risk_level, RiskLevel.MEDIUM)
+
+    def test_concurrent_callers(self):
+        """Test concurrent lookups keep consistent statistics"""
+        cache = AssessmentCache(self.detector, max_entries=50)
+        errors = []
+
+        def worker():
+            try:
+                for case in self.cases:
+                    cache.detect_fraud(case)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual(errors, [])
+        self.assertEqual(stats.hits + stats.misses, 1200)
+        self.assertLessEqual(stats.entries, 50)
+
+if __name__ == '__main__':
+    unittest.main()
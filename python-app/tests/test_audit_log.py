@@ -0,0 +1,99 @@
+import unittest
+import sys
+sys.path.append('../src')
+import os
+import tempfile
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector, RiskLevel
+from audit_log import AuditLog, detector_config
+
+class TestAuditLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.detector = CouncilTaxFraudDetector().compile()
+        self.cases = generate_sample_cases(1000, seed=42)
+        self.clock = iter(range(10 ** 6)).__next__
+        self.log = AuditLog(self.directory, self.detector, block_records=64, clock=self.clock)
+        self.assessments = self.detector.batch_analyze(self.cases, listeners=[self.log])['assessments']
+
+    def tearDown(self):
+        self.log.close()
+        self.tmp.cleanup()
+
+    def test_history_records_configuration(self):
+        """Test a case's history holds its indicators and the full detector configuration"""
+        builder = self.detector.builder()
+        builder.set_threshold(RiskLevel.HIGH, 0.6)
+        stricter = builder.build()
+        fingerprint = self.log.register_config(stricter)
+        for assessment in stricter.batch_analyze(self.cases[:10])['assessments']:
+            self.log.append(assessment, fingerprint)
+
+        target = self.assessments[5]
+        history = self.log.history(target.case_id)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history[0]['config'], self.log.fingerprint)
+        self.assertEqual(history[1]['config'], fingerprint)
+        self.assertEqual(history[0]['risk_score'], target.risk_score)
+        self.assertEqual([ind[0] for ind in history[0]['indicators']],
+                         [ind.indicator_type for ind in target.indicators if ind.detected])
+        self.assertEqual(self.log.config(fingerprint), detector_config(stricter))
+        self.assertEqual(self.log.history('NO-SUCH-CASE'), [])
+
+    def test_reopen_and_time_range(self):
+        """Test records survive a reopen and time-range queries use block times"""
+        self.log.close()
+        self.log = AuditLog(self.directory, block_records=64)
+        self.assertEqual(self.log.records, len(self.cases))
+        self.assertEqual(len(self.log.blocks), 16)
+        records = list(self.log.between(100, 199))
+        self.assertEqual([r['case_id'] for r in records], [a.case_id for a in self.assessments[100:200]])
+        self.assertTrue(self.log.verify().ok)
+
+    def test_tampering_breaks_the_chain(self):
+        """Test a modified byte in any block fails verification"""
+        self.log.flush()
+        head = self.log.head()
+        self.assertEqual(self.log.verify().head, head)
+        entry = self.log.blocks[3]
+        path = os.path.join(self.directory, 'segment-000001.log')
+        with open(path, 'r+b') as fh:
+            fh.seek(entry.offset + entry.length - 5)
+            byte = fh.read(1)
+            fh.seek(-1, 1)
+            fh.write(bytes([byte[0] ^ 1]))
+        result = self.log.verify()
+        self.assertFalse(result.ok)
+        self.assertEqual(result.blocks, 3)
+
+    def test_torn_tail_is_recovered(self):
+        """Test a partial block left by a crash is dropped on reopen and appends continue the chain"""
+        self.log.flush()
+        head = self.log.head()
+        path = os.path.join(self.directory, 'segment-000001.log')
+        with open(path, 'ab') as fh:
+            fh.write(b'ALB1 torn block')
+        self.log.close()
+        log = AuditLog(self.directory, self.detector, block_records=64)
+        self.assertEqual(log.head(), head)
+        log.append(self.assessments[0])
+        log.flush()
+        self.assertNotEqual(log.head(), head)
+        self.assertTrue(log.verify().ok)
+        self.assertEqual(len(log.history(self.assessments[0].case_id)), 2)
+        log.close()
+
+    def test_segments_roll(self):
+        """Test small segments roll over and lookups span them"""
+        with tempfile.TemporaryDirectory() as directory:
+            with AuditLog(directory, self.detector, block_records=32, segment_bytes=4096) as log:
+                for assessment in self.assessments:
+                    log.append(assessment)
+            log = AuditLog(directory)
+            self.assertGreater(log.segment, 2)
+            self.assertTrue(log.verify().ok)
+            last = self.assessments[-1].case_id
+            self.assertEqual(log.history(last)[0]['case_id'], last)
+            log.close()
@@ -0,0 +1,128 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+import sys
+sys.path.append('../src')
+import batch_cli
+
+class TestBatchCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, 'cases.jsonl')
+        with open(self.input_path, 'w') as fh:
+            fh.write(json.dumps({'case_id': 'CLI-001', 'post_graduation_claim': True, 'employment_income': True,
+                                 'fake_documentation': True, 'historical_pattern': True,
+                                 'part_time_status': True}) + '\n')
+            fh.write(json.dumps({'case_id': 'CLI-002', 'self_reported': True}) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            code = batch_cli.main(list(argv))
+        return code, stderr.getvalue()
+
+    def test_score_writes_assessments_and_statistics(self):
+        """Scoring writes one JSON line per case and prints statistics"""
+        output = os.path.join(self.tmp.name, 'out.jsonl')
+        code, stderr = self.run_cli('score', self.input_path, '-o', output)
+        self.assertEqual(code, batch_cli.EXIT_OK)
+        with open(output) as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual([r['case_id'] for r in records], ['CLI-001', 'CLI-002'])
+        self.assertEqual(records[0]['risk_level'], 'critical')
+        self.assertIn('Total Cases Analyzed: 2', stderr)
+
+    def test_exit_codes(self):
+        """Exit codes distinguish risk findings, bad input and rejected rows"""
+        output = os.path.join(self.tmp.name, 'out.csv')
+        code, _ = self.run_cli('score', self.input_path, '-o', output, '-f', 'csv', '--fail-on', 'critical')
+        self.assertEqual(code, batch_cli.EXIT_HIGH_RISK)
+
+        code, stderr = self.run_cli('score', os.path.join(self.tmp.name, 'missing.jsonl'))
+        self.assertEqual(code, batch_cli.EXIT_INPUT_ERROR)
+        self.assertIn('cannot open input', stderr)
+
+        csv_path = os.path.join(self.tmp.name, 'cases.csv')
+        with open(csv_path, 'w') as fh:
+            fh.write('case_id,utility_usage,self_reported\nCSV-1,yes,False\nCSV-2,maybe,\n')
+        code, stderr = self.run_cli('score', csv_path, '-o', output, '--strict')
+        self.assertEqual(code, batch_cli.EXIT_REJECTED_ROWS)
+        self.assertIn('Rejected Rows: 1', stderr)
+
+    def test_csv_corpus_is_validated(self):
+        """A CSV replay corpus stores "False" as an unset flag and rejects unparseable rows"""
+        from replay import ReplayCorpus
+
+        csv_path = os.path.join(self.tmp.name, 'cases.csv')
+        with open(csv_path, 'w') as fh:
+            fh.write('case_id,multiple_utility_accounts,electoral_register_mismatch,social_media_evidence\n'
+                     'CSV-1,False,False,False\nCSV-2,True,yes,0\nCSV-3,maybe,False,False\n')
+        directory = os.path.join(self.tmp.name, 'corpus')
+        code, stderr = self.run_cli('corpus', directory, csv_path)
+        self.assertEqual(code, batch_cli.EXIT_OK)
+        self.assertIn('rejected row 2 (CSV-3)', stderr)
+        corpus = ReplayCorpus.load(directory)
+        self.assertEqual([case_id.decode() for case_id in corpus.case_ids], ['CSV-1', 'CSV-2'])
+        columns = [corpus.columns.index(name) for name in
+                   ('multiple_utility_accounts', 'electoral_register_mismatch', 'social_media_evidence')]
+        self.assertEqual(corpus.flags[:, columns].tolist(), [[0, 0, 0], [1, 1, 0]])
+        code, _ = self.run_cli('corpus', os.path.join(self.tmp.name, 'strict'), csv_path, '--strict')
+        self.assertEqual(code, batch_cli.EXIT_REJECTED_ROWS)
+
+    def test_rank_validates_input(self):
+        """Ranking validates CSV rows, so "False" flags do not raise a case's score"""
+        csv_path = os.path.join(self.tmp.name, 'cases.csv')
+        with open(csv_path, 'w') as fh:
+            fh.write('case_id,post_graduation_claim,employment_income,fake_documentation\n'
+                     'CSV-1,False,False,False\nCSV-2,True,yes,1\nCSV-3,maybe,False,False\n')
+        output = os.path.join(self.tmp.name, 'ranked.jsonl')
+        code, stderr = self.run_cli('rank', csv_path, '-o', output, '--top', '5')
+        self.assertEqual(code, batch_cli.EXIT_OK)
+        self.assertIn('rejected row 2 (CSV-3)', stderr)
+        with open(output) as fh:
+            ranked = [json.loads(line) for line in fh]
+        self.assertEqual([row['case_id'] for row in ranked], ['CSV-2', 'CSV-1'])
+        self.assertEqual(ranked[1]['risk_score'], 0)
+        code, _ = self.run_cli('rank', csv_path, '-o', output, '--strict')
+        self.assertEqual(code, batch_cli.EXIT_REJECTED_ROWS)
+
+    def test_hotspots_validates_input(self):
+        """Hotspot mapping validates CSV rows and drops those that cannot be parsed"""
+        centroids = os.path.join(self.tmp.name, 'centroids.csv')
+        with open(centroids, 'w') as fh:
+            fh.write('pcds,lat,long\nLS1 1AA,53.80,-1.55\nLS1 1AB,53.81,-1.54\n')
+        csv_path = os.path.join(self.tmp.name, 'cases.csv')
+        with open(csv_path, 'w') as fh:
+            fh.write('case_id,postcode,self_reported\nCSV-1,LS1 1AA,False\nCSV-2,LS1 1AB,maybe\n')
+        output = os.path.join(self.tmp.name, 'hotspots.jsonl')
+        code, stderr = self.run_cli('hotspots', csv_path, '--centroids', centroids, '-o', output)
+        self.assertEqual(code, batch_cli.EXIT_OK)
+        self.assertIn('rejected row 1 (CSV-2)', stderr)
+        self.assertIn('from 1 located cases', stderr)
+        code, _ = self.run_cli('hotspots', csv_path, '--centroids', centroids, '-o', output, '--strict')
+        self.assertEqual(code, batch_cli.EXIT_REJECTED_ROWS)
+
+    def test_no_heavy_imports(self):
+        """Scoring does not import pandas, plotly, streamlit or numpy"""
+        src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src')
+        script = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import batch_cli; "
+            "batch_cli.main(['score', sys.argv[2], '-o', sys.argv[3], '-q']); "
+            "print(sorted(m for m in ('pandas', 'plotly', 'streamlit', 'numpy') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script, src, self.input_path, os.path.join(self.tmp.name, 'o.jsonl')],
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+if __name__ == '__main__':
+    unittest.main()
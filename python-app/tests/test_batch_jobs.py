@@ -0,0 +1,87 @@
+import unittest
+import sys
+sys.path.append('../src')
+import io
+import os
+import tempfile
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector, merge_statistics
+from batch_jobs import BatchJob, JobMismatchError
+
+class CrashingDetector(CouncilTaxFraudDetector):
+    """Detector that dies part-way through a chunk, like a process being killed"""
+
+    def __init__(self, fail_after: int):
+        super().__init__()
+        self.remaining = fail_after
+
+    def detect_fraud(self, case_data):
+        self.remaining -= 1
+        if self.remaining == 0:
+            raise RuntimeError("simulated crash")
+        return super().detect_fraud(case_data)
+
+class TestBatchJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cases = generate_sample_cases(1050, seed=38)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def output(self, job):
+        buf = io.StringIO()
+        job.assemble(buf)
+        return buf.getvalue()
+
+    def test_resume_after_crash_matches_uninterrupted_run(self):
+        """Test a job killed mid-chunk resumes to identical output and statistics"""
+        clean = BatchJob(self.path('clean'), chunk_size=200)
+        clean_stats = clean.run(self.cases)
+
+        with self.assertRaises(RuntimeError):
+            BatchJob(self.path('crashed'), CrashingDetector(fail_after=650), chunk_size=200).run(self.cases)
+        resumed = BatchJob(self.path('crashed'), chunk_size=200)
+        self.assertEqual(resumed.completed_chunks, 3)
+        stats = resumed.run(self.cases)
+
+        self.assertTrue(resumed.complete)
+        self.assertEqual(resumed.completed_chunks, 6)
+        self.assertEqual(stats, clean_stats)
+        self.assertEqual(self.output(resumed), self.output(clean))
+
+    def test_statistics_match_batch_analyze(self):
+        """Test merged chunk statistics equal a single batch_analyze run"""
+        job = BatchJob(self.path('job'), chunk_size=300)
+        job.run(self.cases, max_chunks=2)
+        self.assertFalse(job.complete)
+        stats = dict(job.run(self.cases))
+        by_risk_level = stats.pop('by_risk_level')
+        self.assertEqual(stats, CouncilTaxFraudDetector().batch_analyze(self.cases)['statistics'])
+        self.assertEqual(sum(by_risk_level.values()), len(self.cases))
+        self.assertEqual(len(list(job.iter_records())), len(self.cases))
+
+    def test_mismatched_checkpoint_rejected(self):
+        """Test resuming with another chunk size, detector configuration, shorter or reordered input fails"""
+        BatchJob(self.path('job'), chunk_size=200).run(self.cases, max_chunks=2)
+        with self.assertRaises(JobMismatchError):
+            BatchJob(self.path('job'), chunk_size=100)
+        with self.assertRaises(JobMismatchError):
+            BatchJob(self.path('job'), CouncilTaxFraudDetector(error_weight_factor=0.3), chunk_size=200)
+        with self.assertRaises(JobMismatchError):
+            BatchJob(self.path('job'), chunk_size=200).run(self.cases[:100])
+        with self.assertRaises(JobMismatchError):
+            BatchJob(self.path('job'), chunk_size=200).run(self.cases[::-1])
+
+    def test_merge_statistics(self):
+        """Test counts add and nested per-type counts merge by key"""
+        merged = merge_statistics({'total_cases': 2, 'by_type': {'cuckooing': 1}},
+                                  {'total_cases': 3, 'by_type': {'cuckooing': 2, 'student_exemption': 1}})
+        self.assertEqual(merged, {'total_cases': 5, 'by_type': {'cuckooing': 3, 'student_exemption': 1}})
+
+if __name__ == '__main__':
+    unittest.main()
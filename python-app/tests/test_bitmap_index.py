@@ -0,0 +1,71 @@
+import unittest
+import sys
+sys.path.append('../src')
+import tempfile
+import numpy as np
+from bitmap_index import (ARRAY, BITMAP, CHUNK_ROWS, RUN, BitmapIndex, BitmapIndexWriter,
+                          decode_container, encode_container, parse_query)
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+
+class TestBitmapIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        # More than one 65536-row chunk, so queries cross container boundaries
+        cls.cases = generate_sample_cases(70000, seed=48)
+        with BitmapIndexWriter(cls.tmp.name) as writer:
+            cls.assessments = CouncilTaxFraudDetector().batch_analyze(cls.cases, listeners=[writer])['assessments']
+        cls.index = BitmapIndex(cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_containers_round_trip(self):
+        """Test array, run and bitmap containers are chosen by size and decode to the same rows"""
+        rng = np.random.default_rng(48)
+        samples = {
+            ARRAY: np.sort(rng.choice(CHUNK_ROWS, 100, replace=False)),
+            RUN: np.arange(1000, 40000),
+            BITMAP: np.sort(rng.choice(CHUNK_ROWS, 30000, replace=False)),
+        }
+        for expected_kind, positions in samples.items():
+            kind, payload = encode_container(positions)
+            self.assertEqual(kind, expected_kind)
+            words = decode_container(kind, payload)
+            bits = np.unpackbits(words.view(np.uint8), bitorder='little')
+            self.assertTrue(np.array_equal(np.flatnonzero(bits), positions))
+
+    def test_queries_match_case_scan(self):
+        """Test counts and row lists agree with scanning the case dicts"""
+        query = 'electoral_register_mismatch AND multiple_vehicles AND NOT self_reported'
+        expected = [case['case_id'] for case in self.cases if case.get('electoral_register_mismatch')
+                    and case.get('multiple_vehicles') and not case.get('self_reported')]
+        self.assertEqual(self.index.count(query), len(expected))
+        self.assertEqual(self.index.case_ids(query), expected)
+        self.assertEqual(self.index.case_ids(query, limit=3), expected[:3])
+        query = '(risk_level:high | risk_level:critical) & !likely_error & fraud_type:cuckooing'
+        self.assertEqual(self.index.count(query), sum(
+            a.risk_level.value in ('high', 'critical') and not a.is_likely_error
+            and a.fraud_type is not None and a.fraud_type.value == 'cuckooing' for a in self.assessments))
+        self.assertEqual(self.index.count('NOT likely_fraud') + self.index.count('likely_fraud'), len(self.cases))
+
+    def test_parser_precedence_and_errors(self):
+        """Test NOT binds tighter than AND, AND tighter than OR, and bad queries raise ValueError"""
+        self.assertEqual(parse_query('a OR b and not c'),
+                         ('or', ('term', 'a'), ('and', ('term', 'b'), ('not', ('term', 'c')))))
+        for bad in ('a AND', '(a OR b', 'a b', 'AND a', 'a $ b'):
+            with self.assertRaises(ValueError):
+                parse_query(bad)
+        with self.assertRaises(ValueError):
+            self.index.count('no_such_indicator')
+        # Known to the detector but never present is an empty set, not an error
+        self.assertIn('police_intelligence', self.index.names)
+
+    def test_storage_is_compressed(self):
+        """Test the stored containers are smaller than uncompressed bitmaps"""
+        storage = self.index.storage()
+        self.assertLess(storage['total'], storage['uncompressed'])
+        self.assertEqual(len(self.index), len(self.cases))
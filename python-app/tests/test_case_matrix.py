@@ -0,0 +1,70 @@
+import unittest
+import sys
+sys.path.append('../src')
+import random
+from fraud_detector import CouncilTaxFraudDetector
+from data_generator import generate_sample_cases
+from case_matrix import IndicatorLayout, RISK_LEVELS, score_cases
+from reference_data import ReferenceData
+from shared_scoring import score_cases_shared, scoring_pool
+
+class TestCaseMatrix(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(30)
+        self.cases = generate_sample_cases(500)
+        self.detector = CouncilTaxFraudDetector()
+        self.expected = self.detector.batch_analyze(self.cases)
+
+    def assertMatchesBatch(self, results):
+        layout = results['layout']
+        scores = results['scores']
+        for i, assessment in enumerate(self.expected['assessments']):
+            self.assertEqual(layout.fraud_type_of(scores.fraud_type[i]), assessment.fraud_type)
+            self.assertEqual(scores.risk_score[i], assessment.risk_score)
+            self.assertEqual(RISK_LEVELS[scores.risk_level[i]], assessment.risk_level)
+            self.assertEqual(bool(scores.is_likely_fraud[i]), assessment.is_likely_fraud)
+            self.assertEqual(bool(scores.is_likely_error[i]), assessment.is_likely_error)
+            self.assertEqual(scores.confidence[i], assessment.confidence)
+        self.assertEqual(results['statistics'], self.expected['statistics'])
+
+    def test_vectorised_scores_match_detector(self):
+        """Test matrix scoring reproduces detect_fraud exactly"""
+        self.assertMatchesBatch(score_cases(self.cases, self.detector))
+
+    def test_shared_memory_scores_match_detector(self):
+        """Test multi-process shared-memory scoring reproduces detect_fraud exactly"""
+        results = score_cases_shared(self.cases, self.detector, workers=2, slice_size=128)
+        self.assertMatchesBatch(results)
+        self.assertEqual(results['metadata'].shape, (500, 3))
+
+    def test_shared_scoring_pool_is_reused(self):
+        """Test a pool started with the layout scores several batches"""
+        with scoring_pool(self.detector, workers=2) as pool:
+            for _ in range(2):
+                self.assertMatchesBatch(score_cases_shared(self.cases, self.detector, slice_size=128, executor=pool))
+
+    def test_reference_data_is_applied(self):
+        """Test cases are enriched with the detector's reference data before they are encoded"""
+        self.cases = [dict(case, property_value=900000 if i % 3 == 0 else 50000)
+                      for i, case in enumerate(self.cases)]
+        self.detector = CouncilTaxFraudDetector(reference_data=ReferenceData())
+        self.expected = self.detector.batch_analyze(self.cases)
+        self.assertGreater(self.expected['statistics']['by_type'].get('property_banding', 0), 0)
+        self.assertMatchesBatch(score_cases(self.cases, self.detector))
+        self.assertMatchesBatch(score_cases(self.cases, self.detector.compile()))
+
+    def test_layout_covers_all_indicators(self):
+        """Test every fraud and error indicator has a matrix column"""
+        layout = IndicatorLayout(self.detector)
+        names = {ind.indicator_type for inds in self.detector.fraud_patterns.values() for ind in inds}
+        names.update(ind.indicator_type for ind in self.detector.error_patterns)
+        self.assertEqual(set(layout.columns), names)
+
+    def test_empty_batch(self):
+        """Test scoring an empty batch"""
+        results = score_cases_shared([], self.detector, workers=2)
+        self.assertEqual(results['statistics']['total_cases'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
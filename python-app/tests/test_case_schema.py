@@ -0,0 +1,80 @@
+import unittest
+import sys
+sys.path.append('../src')
+from case_schema import CaseSchema
+from fraud_detector import CouncilTaxFraudDetector, FraudType
+
+class TestCaseSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = CaseSchema.for_detector()
+
+    def test_clean_batch_fast_path(self):
+        """Already-typed batches pass through without copies"""
+        cases = [
+            {'case_id': 'SCH-001', 'self_reported': True, 'annual_charge': 1200, 'council_tax_band': 'C'},
+            {'case_id': 'SCH-002', 'multiple_vehicles': False, 'data_quality_score': 0.8}
+        ]
+        report = self.schema.validate(cases)
+        self.assertEqual(report.coerced_fields, 0)
+        self.assertEqual(report.rejected, [])
+        self.assertIs(report.cases[0], cases[0])
+
+    def test_string_indicators_are_coerced(self):
+        """String and integer encoded booleans are coerced, so "False" is no longer a detection"""
+        cases = [
+            {'case_id': 'SCH-003', 'utility_usage': 'yes', 'rental_listings': 'True',
+             'neighbor_reports': 1, 'self_reported': 'False', 'first_occurrence': '0'},
+        ]
+        report = self.schema.validate(cases)
+        case = report.cases[0]
+        self.assertIs(case['utility_usage'], True)
+        self.assertIs(case['neighbor_reports'], True)
+        self.assertIs(case['self_reported'], False)
+        self.assertEqual(report.coerced_values, 5)
+        self.assertEqual(cases[0]['self_reported'], 'False')
+
+        result = CouncilTaxFraudDetector().detect_fraud(case)
+        self.assertEqual(result.fraud_type, FraudType.EMPTY_PROPERTY)
+        self.assertFalse(any(ind.weight < 0 for ind in result.indicators))
+
+    def test_numeric_and_band_coercion(self):
+        """Numbers and bands are normalised; blanks are treated as missing"""
+        cases = [{'case_id': 42, 'annual_charge': '1450.50', 'account_age_years': '7',
+                  'council_tax_band': ' d ', 'declared_income': ''}]
+        case = self.schema.validate(cases).cases[0]
+        self.assertEqual(case['case_id'], '42')
+        self.assertEqual(case['annual_charge'], 1450.5)
+        self.assertEqual(case['account_age_years'], 7)
+        self.assertEqual(case['council_tax_band'], 'D')
+        self.assertNotIn('declared_income', case)
+
+    def test_rejected_rows_report(self):
+        """Rows that cannot be coerced are dropped and reported"""
+        cases = [
+            {'case_id': 'SCH-004', 'utility_usage': 'maybe'},
+            {'case_id': 'SCH-005', 'utility_usage': 'no'},
+            {'case_id': 'SCH-006', 'council_tax_band': 'Z', 'annual_charge': 'lots'}
+        ]
+        report = self.schema.validate(cases)
+        self.assertEqual([c['case_id'] for c in report.cases], ['SCH-005'])
+        self.assertEqual([(r.row, r.case_id) for r in report.rejected], [(0, 'SCH-004'), (2, 'SCH-006')])
+        summary = report.summary()
+        self.assertEqual(summary['rejected_rows'], 2)
+        self.assertEqual(summary['rejections_by_field']['utility_usage'], 1)
+
+    def test_declared_field_types(self):
+        """Declared column types skip inference and give the same result"""
+        cases = [
+            {'case_id': 'SCH-007', 'utility_usage': 'yes', 'annual_charge': '980'},
+            {'case_id': 'SCH-008', 'utility_usage': 'no'},
+            {'case_id': 'SCH-009', 'utility_usage': 'maybe'}
+        ]
+        declared = self.schema.validate(cases, dict.fromkeys(['case_id', 'utility_usage', 'annual_charge'], (str,)))
+        inferred = self.schema.validate(cases)
+        self.assertEqual(declared.cases, inferred.cases)
+        self.assertEqual([r.row for r in declared.rejected], [2])
+        self.assertEqual(declared.cases[0], {'case_id': 'SCH-007', 'utility_usage': True, 'annual_charge': 980.0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+sys.path.append('../src')
+import os
+import random
+import tempfile
+from data_generator import generate_sample_cases
+from cdc_ingestion import CaseStore, IngestionPipeline, SQLiteChangeSource, SOURCE_FIELD_MAPS, field_mapper
+
+class CrashingTransform:
+    """Field mapping that fails once after a number of events, like a process dying mid-batch"""
+
+    def __init__(self, fail_after: int):
+        self.remaining = fail_after
+        self.mapper = field_mapper(SOURCE_FIELD_MAPS['utility_provider'])
+
+    def __call__(self, fields):
+        self.remaining -= 1
+        if self.remaining == 0:
+            raise RuntimeError("simulated crash")
+        return self.mapper(fields)
+
+class TestCdcIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cases = generate_sample_cases(300, seed=36)
+        rng = random.Random(36)
+        self.updates = [(rng.choice(self.cases)['case_id'], {'second_supply_account': True})
+                        for _ in range(200)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def make_sources(self):
+        cases = SQLiteChangeSource(self.path('cases.db'), 'case_management')
+        cases.append_many((case['case_id'], case) for case in self.cases)
+        utility = SQLiteChangeSource(self.path('utility.db'), 'utility_provider')
+        utility.append_many(self.updates)
+        return cases, utility
+
+    def snapshot(self, store):
+        return {case_id: store.get(case_id) for case_id in (c['case_id'] for c in self.cases)}
+
+    def test_ingest_and_rescore(self):
+        """Test events are upserted, mapped and rescored"""
+        cases, utility = self.make_sources()
+        store = CaseStore(self.path('store.db'))
+        stats = IngestionPipeline(store, batch_size=64).register(cases).register(utility).run()
+
+        self.assertEqual(stats.events, 500)
+        self.assertEqual(store.count(), 300)
+        updated = self.updates[0][0]
+        self.assertTrue(store.get(updated)['multiple_utility_accounts'])
+        self.assertEqual(store.checkpoint('utility_provider'), utility.latest_offset())
+        self.assertIsNotNone(store.assessment(updated))
+        self.assertEqual(store.pending_rescore(10), [])
+
+    def test_replay_is_idempotent(self):
+        """Test re-delivered events are skipped and trigger no rescoring"""
+        cases, utility = self.make_sources()
+        store = CaseStore(self.path('store.db'))
+        IngestionPipeline(store).register(cases).register(utility).run()
+        before = self.snapshot(store)
+
+        with store.conn:
+            store.conn.execute("DELETE FROM checkpoints")
+        stats = IngestionPipeline(store).register(cases).register(utility).run()
+        self.assertEqual(stats.duplicates, 500)
+        self.assertEqual(stats.rescored, 0)
+        self.assertEqual(self.snapshot(store), before)
+
+    def test_only_changed_cases_rescored(self):
+        """Test a change that leaves a case as it was does not trigger rescoring"""
+        cases, utility = self.make_sources()
+        store = CaseStore(self.path('store.db'))
+        pipeline = IngestionPipeline(store).register(cases).register(utility)
+        pipeline.run()
+        case_id = self.cases[0]['case_id']
+        cases.append(case_id, {'annual_charge': self.cases[0]['annual_charge']})
+        cases.append(self.cases[1]['case_id'], {'self_reported': True})
+        rescored = pipeline.stats.rescored
+        pipeline.run()
+        self.assertEqual(pipeline.stats.rescored - rescored, 1)
+
+    def test_case_id_fields_ignored(self):
+        """Test a case_id in event fields or transform output cannot rekey a stored case"""
+        store = CaseStore(self.path('store.db'))
+        source = SQLiteChangeSource(self.path('credit.db'), 'credit_reference')
+        source.append('CASE-1', {'case_id': 'CASE-2', 'linked_adult_at_address': True})
+        source.append('CASE-1', {'upstream_ref': 'CASE-3'})
+        pipeline = IngestionPipeline(store).register(source, field_mapper({'upstream_ref': 'case_id'}))
+        pipeline.run()
+        self.assertEqual(store.get('CASE-1'), {'case_id': 'CASE-1', 'linked_adult_at_address': True})
+        self.assertIsNone(store.get('CASE-2'))
+
+    def test_deletes(self):
+        """Test delete events remove the case and its assessment"""
+        cases, utility = self.make_sources()
+        store = CaseStore(self.path('store.db'))
+        pipeline = IngestionPipeline(store).register(cases)
+        pipeline.run()
+        case_id = self.cases[5]['case_id']
+        cases.append(case_id, {}, op='delete')
+        pipeline.run()
+        self.assertIsNone(store.get(case_id))
+        self.assertIsNone(store.assessment(case_id))
+
+    def test_recovery_after_crash(self):
+        """Test a run interrupted mid-batch resumes to the same state as an uninterrupted run"""
+        cases, utility = self.make_sources()
+        clean = CaseStore(self.path('clean.db'))
+        IngestionPipeline(clean, batch_size=50).register(cases).register(utility).run()
+
+        crashed = CaseStore(self.path('crashed.db'))
+        pipeline = IngestionPipeline(crashed, batch_size=50).register(cases).register(
+            utility, CrashingTransform(fail_after=120))
+        with self.assertRaises(RuntimeError):
+            pipeline.run()
+        self.assertLess(crashed.checkpoint('utility_provider'), utility.latest_offset())
+        crashed.close()
+
+        resumed = CaseStore(self.path('crashed.db'))
+        IngestionPipeline(resumed, batch_size=50).register(cases).register(utility).run()
+        self.assertEqual(self.snapshot(resumed), self.snapshot(clean))
+        for case in self.cases:
+            self.assertEqual(resumed.assessment(case['case_id']), clean.assessment(case['case_id']))
+
+if __name__ == '__main__':
+    unittest.main()
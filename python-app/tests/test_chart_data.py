@@ -0,0 +1,60 @@
+import unittest
+import sys
+sys.path.append('../src')
+import numpy as np
+import pandas as pd
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from chart_data import ChartData, ResultColumns, downsample
+
+class TestChartData(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = generate_sample_cases(2000, seed=44)
+        self.store = ResultColumns()
+        self.assessments = CouncilTaxFraudDetector().batch_analyze(
+            self.cases, listeners=[self.store])['assessments']
+        self.charts = ChartData(self.store, max_points=50)
+
+    def test_frames_match_per_case_counts(self):
+        """Test the vectorised frames agree with counting assessments one by one"""
+        distribution = dict(zip(*self.charts.risk_distribution().to_dict('list').values()))
+        for level in ('low', 'medium', 'high', 'critical'):
+            self.assertEqual(distribution[level.capitalize()],
+                             sum(a.risk_level.value == level for a in self.assessments))
+        mix = dict(zip(*self.charts.type_mix().to_dict('list').values()))
+        for fraud_type, count in mix.items():
+            self.assertEqual(count, sum(a.fraud_type is not None and a.fraud_type.value == fraud_type
+                                        for a in self.assessments))
+        impact = self.charts.financial_impact()
+        self.assertEqual(impact['frauds_detected'], sum(a.is_likely_fraud for a in self.assessments))
+        self.assertAlmostEqual(impact['expected_recovery'],
+                               sum(c['annual_charge'] * a.risk_score
+                                   for c, a in zip(self.cases, self.assessments) if a.is_likely_fraud), places=4)
+
+    def test_trend_is_downsampled(self):
+        """Test the review-date trend keeps totals while capping the number of points"""
+        trend = self.charts.trend()
+        self.assertLessEqual(len(trend), 50)
+        self.assertEqual(trend['Cases'].sum(), len(self.cases))
+        self.assertEqual(trend['Likely Fraud'].sum(), sum(a.is_likely_fraud for a in self.assessments))
+        self.assertTrue(trend['Date'].is_monotonic_increasing)
+        self.assertEqual(trend['Date'].iloc[0], pd.Timestamp(min(c['last_review_date'] for c in self.cases)))
+
+    def test_frames_are_cached_until_new_results(self):
+        """Test reruns reuse frames and new results rebuild them"""
+        first = self.charts.risk_distribution()
+        self.assertIs(self.charts.risk_distribution(), first)
+        CouncilTaxFraudDetector().batch_analyze(self.cases[:10], listeners=[self.store])
+        self.assertEqual(self.charts.risk_distribution()['Number of Cases'].sum(), len(self.cases) + 10)
+
+    def test_downsample_and_arrays(self):
+        """Test downsampling sums counts and stores can wrap existing columns"""
+        frame = pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=1000), 'Cases': np.ones(1000, int)})
+        merged = downsample(frame, 300)
+        self.assertLessEqual(len(merged), 300)
+        self.assertEqual(merged['Cases'].sum(), 1000)
+        store = ResultColumns.from_arrays([0, 3, 3], [-1, 0, 0], [0.1, 0.9, 0.95])
+        charts = ChartData(store)
+        self.assertEqual(charts.risk_distribution()['Number of Cases'].tolist(), [1, 0, 0, 2])
+        self.assertEqual(len(charts.trend()), 0)
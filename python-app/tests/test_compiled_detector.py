@@ -0,0 +1,82 @@
+import unittest
+import sys
+sys.path.append('../src')
+import asyncio
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from fraud_detector import CouncilTaxFraudDetector, FraudType, RiskLevel
+from data_generator import generate_sample_cases
+from compiled_detector import CompiledDetector, DetectorBuilder
+
+class TestCompiledDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CouncilTaxFraudDetector()
+        self.compiled = self.detector.compile()
+        self.cases = generate_sample_cases(400, seed=34)
+
+    def test_matches_mutable_detector(self):
+        """Test the compiled detector produces identical assessments"""
+        for case in self.cases:
+            self.assertEqual(self.compiled.detect_fraud(case), self.detector.detect_fraud(case))
+
+    def test_immutable(self):
+        """Test configuration cannot be changed in place"""
+        with self.assertRaises(AttributeError):
+            self.compiled.error_weight_factor = 0.9
+        with self.assertRaises(TypeError):
+            self.compiled.risk_thresholds[RiskLevel.HIGH] = 0.1
+        with self.assertRaises(TypeError):
+            self.compiled.fraud_patterns[FraudType.CUCKOOING] = ()
+        with self.assertRaises(AttributeError):
+            self.compiled.error_patterns.append(None)
+
+    def test_builder_produces_new_detector(self):
+        """Test builder changes leave the original detector untouched"""
+        case = {'case_id': 'B-1', 'multiple_utility_accounts': True, 'electoral_register_mismatch': True,
+                'social_media_evidence': True}
+        changed = (self.compiled.builder()
+                   .set_threshold(RiskLevel.MEDIUM, 0.3)
+                   .set_weight('social_media_evidence', 0.95)
+                   .build())
+        self.assertNotEqual(changed.fingerprint, self.compiled.fingerprint)
+        self.assertEqual(self.compiled.detect_fraud(case), self.detector.detect_fraud(case))
+        self.assertGreater(changed.detect_fraud(case).risk_score, self.compiled.detect_fraud(case).risk_score)
+        self.assertEqual(DetectorBuilder().build().fingerprint, self.compiled.fingerprint)
+
+    def test_builder_validation(self):
+        """Test invalid configurations are rejected"""
+        with self.assertRaises(ValueError):
+            DetectorBuilder().set_threshold(RiskLevel.HIGH, 0.95).build()
+        with self.assertRaises(ValueError):
+            DetectorBuilder().set_weight('self_reported', 0.4).build()
+        with self.assertRaises(KeyError):
+            DetectorBuilder().set_weight('no_such_indicator', 0.4)
+
+    def test_pickle_round_trip(self):
+        """Test compiled detectors can be sent to worker processes"""
+        restored = pickle.loads(pickle.dumps(self.compiled))
+        self.assertIsInstance(restored, CompiledDetector)
+        self.assertEqual(restored.fingerprint, self.compiled.fingerprint)
+
+    def test_concurrent_stress(self):
+        """Test one shared detector gives identical results from many threads and tasks"""
+        expected = [self.detector.detect_fraud(case) for case in self.cases]
+
+        def score_all(_):
+            return [self.compiled.detect_fraud(case) for case in self.cases]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for result in pool.map(score_all, range(16)):
+                self.assertEqual(result, expected)
+
+        async def score_async():
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(
+                loop.run_in_executor(None, self.compiled.detect_fraud, case) for case in self.cases
+            ))
+
+        self.assertEqual(asyncio.run(score_async()), expected)
+
+if __name__ == '__main__':
+    unittest.main()
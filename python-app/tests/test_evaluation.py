@@ -0,0 +1,62 @@
+import unittest
+import sys
+sys.path.append('../src')
+from fraud_detector import CouncilTaxFraudDetector, RiskLevel
+from data_generator import generate_sample_cases
+from evaluation import Evaluator, best_report, encode_labels, parameter_grid
+
+class TestEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = generate_sample_cases(600, seed=32)
+        self.evaluator = Evaluator(self.cases)
+
+    def test_seeded_generator_keeps_labels(self):
+        """Test seeded generation is reproducible and labelled"""
+        self.assertEqual(generate_sample_cases(50, seed=32), self.cases[:50])
+        for case in self.cases:
+            self.assertIn(case['ground_truth'], ('fraud', 'error', 'legitimate'))
+            self.assertEqual(case['ground_truth'] == 'fraud', case['ground_truth_fraud_type'] is not None)
+
+    def test_flagged_counts_match_detector(self):
+        """Test evaluation counts agree with per-case detection under a custom configuration"""
+        detector = CouncilTaxFraudDetector(error_weight_factor=0.3)
+        detector.risk_thresholds[RiskLevel.HIGH] = 0.6
+        assessments = detector.batch_analyze(self.cases)['assessments']
+        flagged_fraud = sum(
+            1 for case, a in zip(self.cases, assessments)
+            if a.risk_level in (RiskLevel.HIGH, RiskLevel.CRITICAL) and case['ground_truth'] == 'fraud'
+        )
+        report = self.evaluator.evaluate(thresholds=(0.5, 0.6, 0.9), error_weight_factor=0.3)
+        self.assertEqual(report.flagged['tp'], flagged_fraud)
+        self.assertEqual(sum(report.flagged.values()), len(self.cases))
+        self.assertEqual(int(report.confusion_matrix.sum()), len(self.cases))
+
+    def test_per_type_metrics(self):
+        """Test per-type support matches the labels"""
+        report = self.evaluator.evaluate()
+        per_type = report.per_type()
+        for fraud_type, metrics in per_type.items():
+            support = sum(1 for case in self.cases if case['ground_truth_fraud_type'] == fraud_type)
+            self.assertEqual(metrics['support'], support)
+            self.assertGreaterEqual(metrics['precision'], 0.0)
+            self.assertLessEqual(metrics['recall'], 1.0)
+        self.assertEqual(int(report.calibration['count'].sum()), len(self.cases))
+        self.assertLessEqual(report.brier_score, 1.0)
+
+    def test_parameter_sweep(self):
+        """Test parallel sweeps return reports in grid order"""
+        grid = parameter_grid(medium=(0.3, 0.5), high=(0.5, 0.7), critical=(0.9,), error_weight_factor=(0.2, 0.5))
+        self.assertEqual(len(grid), 6)
+        serial = self.evaluator.sweep(grid, workers=1)
+        parallel = self.evaluator.sweep(grid, workers=2)
+        self.assertEqual([r.flagged for r in serial], [r.flagged for r in parallel])
+        self.assertEqual(best_report(serial).f1, max(r.f1 for r in serial))
+
+    def test_unlabelled_cases_rejected(self):
+        """Test cases without ground truth are reported"""
+        with self.assertRaises(ValueError):
+            encode_labels([{'case_id': 'X-1'}], self.evaluator.layout)
+
+if __name__ == '__main__':
+    unittest.main()
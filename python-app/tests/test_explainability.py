@@ -0,0 +1,78 @@
+import io
+import json
+import unittest
+import sys
+sys.path.append('../src')
+from fraud_detector import CouncilTaxFraudDetector
+from data_generator import generate_sample_cases
+from explainability import ExplanationBuilder, HtmlReportWriter, write_jsonl
+from reference_data import ReferenceData
+
+class TestExplainability(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CouncilTaxFraudDetector()
+        self.builder = ExplanationBuilder(self.detector)
+
+    def test_explanations_match_detector(self):
+        """Explanations reproduce the detector's scores and classifications"""
+        for case in generate_sample_cases(200):
+            assessment = self.detector.detect_fraud(case)
+            explanation = self.builder.explain(case)
+            self.assertEqual(explanation['risk_score'], assessment.risk_score)
+            self.assertEqual(explanation['risk_level'], assessment.risk_level.value)
+            self.assertEqual(explanation['is_likely_fraud'], assessment.is_likely_fraud)
+            self.assertEqual(explanation['confidence'], assessment.confidence)
+            self.assertEqual(explanation['recommendations'], assessment.recommendations)
+            self.assertEqual(explanation, self.builder.explain_assessment(assessment))
+
+    def test_reference_data_indicators_explained(self):
+        """Indicators derived from reference data are explained the way the detector scores them"""
+        detector = CouncilTaxFraudDetector(reference_data=ReferenceData())
+        case = {'case_id': 'EXP-REF', 'council_tax_band': 'A', 'property_value': 900000,
+                'unreported_extension': True}
+        assessment = detector.detect_fraud(case)
+        for builder in (ExplanationBuilder(detector), ExplanationBuilder(detector.compile())):
+            explanation = builder.explain(case)
+            self.assertEqual(explanation, builder.explain_assessment(assessment))
+            self.assertEqual((explanation['risk_score'], explanation['risk_level']),
+                             (assessment.risk_score, assessment.risk_level.value))
+            self.assertIn('valuation_band_mismatch', [c['indicator'] for c in explanation['contributions']])
+        self.assertNotIn('valuation_band_mismatch', case)
+
+    def test_contributions_sum_to_score(self):
+        """Indicator contributions and mitigating factors add up to the final score"""
+        case = {
+            'case_id': 'EXP-001',
+            'utility_usage': True,
+            'rental_listings': True,
+            'rental_listings_evidence': 'Listed on two letting sites',
+            'first_occurrence': True
+        }
+        explanation = self.builder.explain(case)
+        total = sum(c['contribution'] for c in explanation['contributions'])
+        total += sum(m['contribution'] for m in explanation['mitigating_factors'])
+        self.assertAlmostEqual(total, explanation['risk_score'])
+        evidence = {c['indicator']: c['evidence'] for c in explanation['contributions']}
+        self.assertEqual(evidence['rental_listings'], 'Listed on two letting sites')
+        self.assertEqual(evidence['utility_usage'], 'Detected in analysis')
+
+    def test_streaming_writers(self):
+        """JSONL and HTML reports are written one case at a time"""
+        cases = [
+            {'case_id': 'EXP-<1>', 'multiple_vehicles': True},
+            {'case_id': 'EXP-2', 'self_reported': True}
+        ]
+        buffer = io.StringIO()
+        self.assertEqual(write_jsonl(self.builder.explain_batch(cases), buffer), 2)
+        lines = buffer.getvalue().splitlines()
+        self.assertEqual(json.loads(lines[0])['case_id'], 'EXP-<1>')
+
+        page = io.StringIO()
+        with HtmlReportWriter(page) as writer:
+            writer.write_all(self.builder.explain_batch(cases))
+        self.assertIn('EXP-&lt;1&gt;', page.getvalue())
+        self.assertTrue(page.getvalue().rstrip().endswith('</html>'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+sys.path.append('../src')
+import os
+import random
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from external_ranking import ExternalRanker
+
+class TestExternalRanking(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = generate_sample_cases(3000, seed=40)
+        self.ranker = ExternalRanker(memory_budget=20000)
+        self.assessments = CouncilTaxFraudDetector().batch_analyze(
+            self.cases, listeners=[self.ranker])['assessments']
+
+    def tearDown(self):
+        self.ranker.close()
+
+    def expected_order(self, key):
+        values = []
+        for i, (case, assessment) in enumerate(zip(self.cases, self.assessments)):
+            value = {'risk_score': assessment.risk_score, 'confidence': assessment.confidence,
+                     'expected_recovery': case['annual_charge'] * assessment.risk_score}[key]
+            values.append((-value, i, assessment.case_id))
+        return [case_id for _, _, case_id in sorted(values)]
+
+    def test_merge_matches_in_memory_sort(self):
+        """Test spilled runs merge into the same order as an in-memory stable sort"""
+        self.assertGreaterEqual(self.ranker.run_count, 10)
+        for key in ('risk_score', 'confidence', 'expected_recovery'):
+            ranking = self.ranker.ranking(key)
+            self.assertEqual([row['case_id'] for row in ranking.page(0, len(ranking))], self.expected_order(key))
+
+    def test_top_k_without_full_sort(self):
+        """Test the single-pass top-K agrees with the sorted ranking"""
+        top = self.ranker.top_k(25, 'expected_recovery')
+        self.assertEqual([row['case_id'] for row in top], self.expected_order('expected_recovery')[:25])
+        self.assertEqual(top, self.ranker.ranking('expected_recovery').top(25))
+
+    def test_percentiles_and_counts(self):
+        """Test percentile and threshold-count queries on the merged file"""
+        ranking = self.ranker.ranking('risk_score')
+        scores = sorted(a.risk_score for a in self.assessments)
+        self.assertEqual(ranking.percentile(100), scores[-1])
+        self.assertEqual(ranking.percentile(0), scores[0])
+        self.assertEqual(ranking.percentile(90), scores[round(0.9 * (len(scores) - 1))])
+        self.assertEqual(ranking.count_at_least(0.5), sum(s >= 0.5 for s in scores))
+
+    def test_rebuilt_ranking_replaces_file(self):
+        """Test ranking again after new records keeps one ranked file per key"""
+        first = self.ranker.ranking('risk_score')
+        self.ranker.add_record('LATE-1', 0.99, 0.9, 100.0, 'critical')
+        second = self.ranker.ranking('risk_score')
+        self.assertEqual(second.top(1)[0]['case_id'], 'LATE-1')
+        ranked = [name for name in os.listdir(self.ranker.directory) if name.startswith('ranked-risk_score')]
+        self.assertEqual(ranked, [os.path.basename(second.path)])
+        if os.name == 'posix':
+            self.assertEqual(len(first), len(second) - 1)
+
+    def test_multi_pass_merge_and_ties(self):
+        """Test more runs than the merge fan-in, with heavy ties, keeps insertion order within ties"""
+        ranker = ExternalRanker(memory_budget=1)
+        rng = random.Random(40)
+        for i in range(80 * ranker.buffer_rows):
+            ranker.add_record(f'R{i}', rng.choice([0.1, 0.5, 0.9]), 0.5, 0.0, 'low')
+        self.assertGreater(ranker.run_count, 64)
+        rows = ranker.ranking('risk_score').rows
+        keys = [(-row['risk_score'], row['seq']) for row in rows]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(rows), ranker.count)
+        ranker.close()
+
+    def test_skewed_runs_merge_within_budget(self):
+        """Test runs covering disjoint score ranges merge without holding more than the memory budget"""
+        budget = 1 << 20
+        ranker = ExternalRanker(memory_budget=budget)
+        rows = 120000
+        for i in range(rows):
+            ranker.add_record(f'K{i}', 1 - i / rows, 0.5, 0.0, 'low')
+        self.assertGreater(ranker.run_count, 10)
+        ranking = ranker.ranking('risk_score')
+        self.assertEqual([row['case_id'] for row in ranking.page(0, 3)], ['K0', 'K1', 'K2'])
+        self.assertTrue((ranking.rows['seq'] == range(rows)).all())
+        self.assertLessEqual(ranker.merge_peak, budget // 2)
+        ranker.close()
+
+    def test_rejects_long_case_ids(self):
+        with self.assertRaises(ValueError):
+            self.ranker.add_record('X' * 40, 0.5, 0.5, 0.0, 'low')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -78,6 +78,21 @@ class TestFraudDetector(unittest.TestCase):
         self.assertEqual(result.fraud_type, FraudType.EMPTY_PROPERTY)
         self.assertTrue(result.is_likely_fraud)
     
+    def test_council_tax_reduction_fraud(self):
+        """Test detection of council tax reduction fraud"""
+        case = {
+            'case_id': 'TEST-011',
+            'undeclared_income': True,
+            'undeclared_capital': True,
+            'undeclared_partner': True,
+            'lifestyle_mismatch': True
+        }
+
+        result = self.detector.detect_fraud(case)
+
+        self.assertEqual(result.fraud_type, FraudType.COUNCIL_TAX_REDUCTION)
+        self.assertTrue(result.is_likely_fraud)
+
     def test_risk_scoring(self):
         """Test risk scoring algorithm"""
         # Low risk case
@@ -169,5 +184,19 @@ class TestFraudDetector(unittest.TestCase):
             'educational' in low_recommendations.lower()
         )
 
+    def test_string_indicator_values(self):
+        """Test that unvalidated "False"/"0" strings are not counted as detections"""
+        case = {
+            'case_id': 'TEST-011',
+            'multiple_utility_accounts': 'False',
+            'electoral_register_mismatch': '0',
+            'social_media_evidence': 'no',
+            'multiple_vehicles': 'True'
+        }
+        result = self.detector.detect_fraud(case)
+        self.assertEqual([ind.indicator_type for ind in result.indicators], ['multiple_vehicles'])
+        compiled = self.detector.compile().detect_fraud(case)
+        self.assertEqual([ind.indicator_type for ind in compiled.indicators], ['multiple_vehicles'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
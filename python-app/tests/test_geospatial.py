@@ -0,0 +1,145 @@
+import unittest
+import sys
+sys.path.append('../src')
+import os
+import random
+import tempfile
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector, FraudType
+from geospatial import HOTSPOT_INDICATOR, PostcodeCentroids, SpatialRiskIndex, with_hotspot_indicator
+
+def _write_centroids(path, postcodes):
+    with open(path, 'w') as fh:
+        fh.write('pcds,lat,long\n')
+        for postcode, (lat, lon) in postcodes.items():
+            fh.write(f'{postcode},{lat},{lon}\n')
+
+class TestGeospatial(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(46)
+        self.postcodes = {}
+        for i in range(400):
+            self.postcodes[f'LS{i // 100 + 1} {i % 10}{chr(65 + i // 10 % 10)}{chr(65 + i % 26)}'] = (
+                53.78 + rng.random() * 0.06, -1.58 + rng.random() * 0.1)
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'centroids.csv')
+        _write_centroids(path, self.postcodes)
+        self.centroids = PostcodeCentroids.load(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _cases(self, count, seed):
+        names = sorted(self.postcodes)
+        rng = random.Random(seed)
+        cases = generate_sample_cases(count, seed=seed)
+        for case in cases:
+            case['postcode'] = rng.choice(names).lower().replace(' ', '')
+        return cases
+
+    def test_centroids_and_neighbour_queries(self):
+        """Test postcodes resolve (with sector fallback) and grid queries match a brute-force scan"""
+        self.assertEqual(len(self.centroids), len(self.postcodes))
+        postcode = sorted(self.postcodes)[0]
+        self.assertEqual(self.centroids.locate(postcode.lower()), self.postcodes[postcode])
+        self.assertIsNotNone(self.centroids.locate(postcode[:-2] + 'ZZ'))
+        self.assertIsNone(self.centroids.locate('not a postcode'))
+        index = SpatialRiskIndex(self.centroids, cell_m=200, radius_m=600)
+        cases = self._cases(500, seed=46)
+        for case in cases:
+            index.update(case, 0.5)
+        lat, lon = 53.81, -1.53
+        found = index.neighbours(lat, lon)
+        x, y = index.project(lat, lon)
+        expected = set()
+        for case in cases:
+            px, py = index.project(*self.centroids.locate(case['postcode']))
+            if (px - x) ** 2 + (py - y) ** 2 <= 600 ** 2:
+                expected.add(case['case_id'])
+        self.assertEqual({case_id for case_id, _, _ in found}, expected)
+        self.assertEqual([d for _, d, _ in found], sorted(d for _, d, _ in found))
+
+    def test_incremental_updates(self):
+        """Test rescoring and removing cases keeps the neighbourhood totals exact"""
+        index = SpatialRiskIndex(self.centroids, cell_m=250, radius_m=500, min_cases=1)
+        cases = self._cases(300, seed=47)
+        for case in cases:
+            index.update(case, 0.2)
+        probe = cases[0]
+        before, count = index.neighbourhood_risk(probe)
+        self.assertAlmostEqual(before, 0.2)
+        neighbour = next(c for c in cases[1:] if index._where[c['case_id']] == index._where[probe['case_id']])
+        index.update(neighbour, 0.2 + count)
+        self.assertAlmostEqual(index.neighbourhood_risk(probe)[0], 0.2 + 1.0)
+        index.remove(neighbour['case_id'])
+        self.assertEqual(index.neighbourhood_risk(probe)[1], count - 1)
+        self.assertEqual(len(index), len(cases) - 1)
+        moved = cases[2]
+        self.assertFalse(index.update(dict(moved, postcode='not a postcode'), 0.9))
+        self.assertFalse(index.update(dict(cases[3], latitude=48.85, longitude=2.35), 0.9))
+        self.assertNotIn(moved['case_id'], index._where)
+        self.assertNotIn(cases[3]['case_id'], index._where)
+        self.assertEqual(len(index), len(cases) - 3)
+
+    def test_hotspot_detection(self):
+        """Test a planted cluster of high-risk cases is reported as the top hotspot"""
+        index = SpatialRiskIndex(self.centroids, cell_m=250, radius_m=500)
+        rng = random.Random(48)
+        for i in range(2000):
+            index.update({'case_id': f'B{i}', 'latitude': 53.78 + rng.random() * 0.06,
+                          'longitude': -1.58 + rng.random() * 0.1}, rng.random() * 0.3)
+        for i in range(60):
+            index.update({'case_id': f'H{i}', 'latitude': 53.80 + rng.random() * 0.003,
+                          'longitude': -1.55 + rng.random() * 0.004}, 0.9)
+        spots = index.hotspots()
+        self.assertTrue(spots)
+        self.assertAlmostEqual(spots[0].latitude, 53.8015, delta=0.004)
+        self.assertAlmostEqual(spots[0].longitude, -1.548, delta=0.006)
+        self.assertGreaterEqual(spots[0].cases, 60)
+        enriched = index.enrich({'case_id': 'new', 'latitude': 53.8015, 'longitude': -1.548})
+        self.assertTrue(enriched[HOTSPOT_INDICATOR])
+        self.assertFalse(index.enrich({'case_id': 'far', 'latitude': 53.835, 'longitude': -1.49})
+                         .get(HOTSPOT_INDICATOR))
+
+    def test_hotspot_feature_feeds_scoring(self):
+        """Test the hotspot indicator is scored for cases located in a hotspot and absent otherwise"""
+        index = SpatialRiskIndex(self.centroids, min_cases=1, hotspot_risk=0.0)
+        detector = CouncilTaxFraudDetector()
+        cases = self._cases(200, seed=49)
+        detector.batch_analyze(cases, listeners=[index])
+        scored = with_hotspot_indicator(detector, index, weight=0.4)
+        located = {'case_id': 'Y', 'postcode': cases[0]['postcode']}
+        self.assertEqual(detector.detect_fraud(located).risk_score, 0)
+        boosted = scored.detect_fraud(located)
+        self.assertEqual(boosted.fraud_type, FraudType.CUCKOOING)
+        self.assertGreater(boosted.risk_score, 0)
+        self.assertEqual([i.indicator_type for i in boosted.indicators], [HOTSPOT_INDICATOR])
+        self.assertIn('cases within', boosted.indicators[0].evidence)
+        unlocated = scored.detect_fraud(dict(located, postcode=None))
+        self.assertEqual(unlocated.risk_score, 0)
+        self.assertEqual(unlocated.indicators, [])
+
+    def test_extent_and_sparse_grid(self):
+        """Test coordinates outside the extent are rejected and a far-off case does not change the hotspots"""
+        index = SpatialRiskIndex(self.centroids, extent=None)
+        rng = random.Random(50)
+        for i in range(1500):
+            index.update({'case_id': f'B{i}', 'latitude': 53.78 + rng.random() * 0.06,
+                          'longitude': -1.58 + rng.random() * 0.1}, rng.random() * 0.3)
+        for i in range(60):
+            index.update({'case_id': f'H{i}', 'latitude': 53.80 + rng.random() * 0.003,
+                          'longitude': -1.55 + rng.random() * 0.004}, 0.9)
+        before = index.hotspots()
+        self.assertTrue(before)
+        self.assertTrue(index.update({'case_id': 'ZERO', 'latitude': 0.0, 'longitude': 0.0}, 0.5))
+        after = index.hotspots()
+        # One more occupied cell nudges the Gi* mean, but the clusters are the same
+        self.assertEqual([(spot.cells, spot.cases) for spot in after], [(spot.cells, spot.cases) for spot in before])
+        self.assertAlmostEqual(after[0].peak_z, before[0].peak_z, places=1)
+
+        bounded = SpatialRiskIndex(self.centroids)
+        self.assertFalse(bounded.update({'case_id': 'ZERO', 'latitude': 0.0, 'longitude': 0.0}, 0.5))
+        self.assertTrue(bounded.update({'case_id': 'LS', 'latitude': 53.8, 'longitude': -1.55}, 0.5))
+        self.assertEqual((len(bounded), bounded.out_of_extent, bounded.unlocated), (1, 1, 0))
+        self.assertIsNone(bounded.neighbourhood_risk({'case_id': 'X', 'latitude': 0.0, 'longitude': 0.0}))
@@ -0,0 +1,102 @@
+import unittest
+import sys
+sys.path.append('../src')
+import json
+import socket
+import time
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from live_feed import FeedHub, LiveFeedServer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestLiveFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = generate_sample_cases(2000, seed=45)
+        self.detector = CouncilTaxFraudDetector()
+        self.flagged = [a.case_id for a in self.detector.batch_analyze(self.cases)['assessments']
+                        if a.risk_level.value in ('high', 'critical')]
+
+    def test_batches_flagged_cases_in_order(self):
+        """Test only HIGH/CRITICAL assessments are published, coalesced into batches"""
+        hub = FeedHub(batch_size=25, client_buffer=1000)
+        subscription = hub.subscribe()
+        self.detector.batch_analyze(self.cases, listeners=[hub])
+        hub.flush()
+        batches = subscription.poll()
+        self.assertEqual([e['case_id'] for b in batches for e in b.events], self.flagged)
+        self.assertTrue(all(len(b.events) == 25 for b in batches[:-1]))
+        self.assertEqual([b.seq for b in batches], list(range(1, len(batches) + 1)))
+        self.assertEqual(hub.stats()['seen'], len(self.cases))
+
+    def test_partial_batch_waits_for_max_delay(self):
+        """Test a partial batch is held until max_delay and then flushed by a poll"""
+        clock = FakeClock()
+        hub = FeedHub(batch_size=1000, max_delay=0.05, clock=clock)
+        subscription = hub.subscribe()
+        self.detector.batch_analyze(self.cases[:200], listeners=[hub])
+        self.assertEqual(subscription.poll(), [])
+        clock.now = 0.06
+        self.assertEqual(len(subscription.poll()), 1)
+
+    def test_slow_consumer_loses_oldest_batches_only(self):
+        """Test a full subscriber buffer drops its oldest batches without affecting other subscribers"""
+        hub = FeedHub(batch_size=10)
+        slow = hub.subscribe(max_batches=3)
+        fast = hub.subscribe(max_batches=1000)
+        self.detector.batch_analyze(self.cases, listeners=[hub])
+        hub.flush()
+        received = fast.poll()
+        kept = slow.poll()
+        self.assertEqual(len(kept), 3)
+        self.assertEqual(slow.dropped, len(received) - 3)
+        self.assertEqual([b.seq for b in kept], [b.seq for b in received[-3:]])
+
+    def test_idle_subscriptions_expire(self):
+        """Test a subscription that stops polling is dropped by the hub while active ones are kept"""
+        clock = FakeClock()
+        hub = FeedHub(batch_size=10, clock=clock)
+        idle = hub.subscribe(idle_timeout=0.05)
+        active = hub.subscribe(idle_timeout=0.05)
+        forever = hub.subscribe()
+        clock.now = 0.06
+        active.poll()
+        self.detector.batch_analyze(self.cases[:500], listeners=[hub])
+        self.assertTrue(idle.closed)
+        self.assertFalse(active.closed or forever.closed)
+        self.assertEqual(idle.poll(), [])
+        self.assertEqual(len(active.poll()), len(forever.poll()))
+        self.assertEqual((hub.stats()['subscribers'], hub.stats()['expired_subscribers']), (2, 1))
+        active.close()
+        self.assertTrue(active.closed)
+        self.assertEqual(hub.stats()['subscribers'], 1)
+
+    def test_server_streams_sse_frames(self):
+        """Test GET /events streams the shared SSE frames to a connected client"""
+        hub = FeedHub(batch_size=5)
+        server = LiveFeedServer(hub).start()
+        try:
+            sock = socket.create_connection(('127.0.0.1', server.port), timeout=5)
+            sock.sendall(b'GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            deadline = time.time() + 5
+            while hub.stats()['subscribers'] < 1 and time.time() < deadline:
+                time.sleep(0.01)
+            self.detector.batch_analyze(self.cases[:300], listeners=[hub])
+            data = b''
+            while b'\n\n' not in data.split(b'\r\n\r\n', 1)[-1] and time.time() < deadline:
+                data += sock.recv(65536)
+            sock.close()
+            headers, body = data.split(b'\r\n\r\n', 1)
+            self.assertIn(b'text/event-stream', headers)
+            frame = body.split(b'\n\n')[0].decode()
+            self.assertTrue(frame.startswith('id: 1\nevent: assessments\ndata: '))
+            payload = json.loads(frame.split('data: ', 1)[1])
+            self.assertEqual([e['case_id'] for e in payload['events']], self.flagged[:5])
+        finally:
+            server.stop()
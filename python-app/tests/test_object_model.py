@@ -0,0 +1,65 @@
+import unittest
+import sys
+sys.path.append('../src')
+import pickle
+from assessment_cache import AssessmentCache
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector, FraudIndicator, FraudType, IndicatorDefinition, IndicatorHit
+
+class TestObjectModel(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CouncilTaxFraudDetector()
+        self.compiled = self.detector.compile()
+        self.case = {'case_id': 'OM-1', 'multiple_utility_accounts': True, 'electoral_register_mismatch': True,
+                     'electoral_register_mismatch_evidence': 'Two adults on the 2024 register',
+                     'self_reported': True}
+
+    def test_hits_reference_shared_definitions(self):
+        """Test hits point at the detector's definitions instead of copying them"""
+        definitions = {ind.indicator_type: ind for ind in self.compiled.fraud_patterns[FraudType.SINGLE_PERSON_DISCOUNT]}
+        definitions.update((ind.indicator_type, ind) for ind in self.compiled.error_patterns)
+        first = self.compiled.detect_fraud(self.case)
+        second = self.compiled.detect_fraud(dict(self.case, case_id='OM-2'))
+        for hit in first.indicators:
+            self.assertIsInstance(hit, IndicatorHit)
+            self.assertIs(hit.definition, definitions[hit.indicator_type])
+        # Mitigating hits carry no per-case evidence, so the same record is reused
+        self.assertIs(first.indicators[-1], second.indicators[-1])
+
+    def test_assessment_api_unchanged(self):
+        """Test hits expose the old FraudIndicator attributes and assessments still compare and pickle"""
+        assessment = self.detector.detect_fraud(self.case)
+        by_type = {ind.indicator_type: ind for ind in assessment.indicators}
+        hit = by_type['electoral_register_mismatch']
+        self.assertEqual((hit.description, hit.weight, hit.detected, hit.evidence),
+                         ('Electoral register shows multiple adults', 0.9, True, 'Two adults on the 2024 register'))
+        self.assertEqual(by_type['multiple_utility_accounts'].evidence, 'Detected in analysis')
+        self.assertEqual(by_type['self_reported'].weight, -0.4)
+        self.assertEqual(assessment.to_dict()['indicators'],
+                         ['multiple_utility_accounts', 'electoral_register_mismatch', 'self_reported'])
+        self.assertEqual(pickle.loads(pickle.dumps(assessment)), assessment)
+        self.assertEqual(self.compiled.detect_fraud(self.case), assessment)
+        self.assertFalse(hasattr(assessment, '__dict__'))
+
+    def test_definitions_are_immutable(self):
+        """Test definitions cannot be changed in place and legacy FraudIndicator patterns still compile"""
+        definition = self.detector.error_patterns[0]
+        self.assertIsInstance(definition, IndicatorDefinition)
+        with self.assertRaises(AttributeError):
+            definition.weight = 0.0
+        self.assertFalse(hasattr(definition, '__dict__'))
+
+        self.detector.fraud_patterns[FraudType.CUCKOOING].append(
+            FraudIndicator('county_lines_referral', 'Referred by county lines taskforce', 0.9))
+        compiled = self.detector.compile()
+        self.assertIsInstance(compiled.fraud_patterns[FraudType.CUCKOOING][-1], IndicatorDefinition)
+        assessment = compiled.detect_fraud({'case_id': 'OM-3', 'county_lines_referral': True})
+        self.assertEqual(assessment.fraud_type, FraudType.CUCKOOING)
+
+    def test_cached_assessments_match(self):
+        """Test assessments materialised from the cache equal freshly scored ones"""
+        cache = AssessmentCache(self.detector)
+        for case in generate_sample_cases(300, seed=50) * 2:
+            self.assertEqual(cache.detect_fraud(case), self.compiled.detect_fraud(case))
+        self.assertGreater(cache.stats().hits, 0)
@@ -0,0 +1,47 @@
+import unittest
+import sys
+sys.path.append('../src')
+import random
+from fraud_detector import CouncilTaxFraudDetector, FraudType
+from data_generator import generate_sample_cases
+from outcome_table import OutcomeTable
+
+class TestOutcomeTable(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CouncilTaxFraudDetector()
+
+    def test_lazy_table_matches_detector(self):
+        """Test table lookups reproduce detect_fraud, including evidence and case IDs"""
+        table = OutcomeTable(self.detector)
+        for case in generate_sample_cases(500, seed=35):
+            self.assertEqual(table.detect_fraud(case), self.detector.detect_fraud(case))
+        self.assertLess(len(table), 500)
+
+    def test_random_combinations(self):
+        """Test arbitrary indicator combinations, including ties between types"""
+        table = OutcomeTable(self.detector)
+        names = sorted(table._index)
+        rng = random.Random(35)
+        for i in range(3000):
+            case = {'case_id': f'R-{i}'}
+            for name in rng.sample(names, rng.randint(0, 14)):
+                case[name] = rng.choice([True, 1, 'yes', False, 0, ''])
+            self.assertEqual(table.detect_fraud(case), self.detector.detect_fraud(case))
+
+    def test_eager_table_covers_key_space(self):
+        """Test eager mode fills every combination"""
+        table = OutcomeTable(self.detector, eager=True)
+        self.assertEqual(len(table), table.capacity)
+        self.assertEqual(table.capacity, (1 + 5 * 31 + 63) * 64)
+
+    def test_overlapping_patterns_rejected(self):
+        """Test configurations sharing an indicator between patterns are refused"""
+        compiled = (self.detector.compile().builder()
+                    .add_indicator(FraudType.CUCKOOING, 'multiple_vehicles', 'Vehicles', 0.5)
+                    .build())
+        with self.assertRaises(ValueError):
+            OutcomeTable(compiled)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+sys.path.append('../src')
+import json
+import os
+import tempfile
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from profiling import BatchProfiler
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CouncilTaxFraudDetector()
+        self.cases = generate_sample_cases(400, seed=39)
+
+    def test_profiled_batch_matches_plain_batch(self):
+        """Test profiling times every case without changing the results"""
+        with BatchProfiler(sample_rate=0.1, outliers=5, seed=39) as profiler:
+            profiled = self.detector.batch_analyze(self.cases, profiler=profiler)
+        plain = self.detector.batch_analyze(self.cases)
+        self.assertEqual(profiled['statistics'], plain['statistics'])
+        self.assertEqual(profiled['assessments'], plain['assessments'])
+
+        summary = profiler.summary()
+        self.assertEqual(summary['cases'], 400)
+        self.assertGreater(profiler.sampled, 0)
+        self.assertLessEqual(summary['p50_latency_us'], summary['max_latency_us'])
+
+    def test_outliers_carry_signatures(self):
+        """Test the slowest cases are kept, slowest first, with their detected indicators"""
+        with BatchProfiler(sample_rate=0, outliers=5) as profiler:
+            results = self.detector.batch_analyze(self.cases, profiler=profiler)
+        outliers = profiler.outliers()
+        self.assertEqual(len(outliers), 5)
+        self.assertEqual([o.latency for o in outliers], sorted((o.latency for o in outliers), reverse=True))
+        by_id = {a.case_id: a for a in results['assessments']}
+        for outlier in outliers:
+            detected = [ind.indicator_type for ind in by_id[outlier.case_id].indicators if ind.detected]
+            self.assertEqual(list(outlier.signature), detected)
+
+    def test_profiled_cases_stay_out_of_latencies(self):
+        """Test cases run under cProfile are traced but kept out of the latency sketch and outliers"""
+        with BatchProfiler(sample_rate=0.5, outliers=400, seed=39) as profiler:
+            self.detector.batch_analyze(self.cases, profiler=profiler)
+        self.assertGreater(profiler.sampled, 0)
+        self.assertEqual(profiler.latencies.count, len(self.cases) - profiler.sampled)
+        self.assertEqual(profiler.summary()['timed'], profiler.latencies.count)
+        sampled = {e['name'] for e in profiler.chrome_trace()['traceEvents'] if e.get('cat') == 'sampled'}
+        self.assertEqual(len(sampled), profiler.sampled)
+        outliers = {timing.case_id for timing in profiler.outliers()}
+        self.assertEqual(len(outliers), profiler.latencies.count)
+        self.assertFalse(outliers & sampled)
+
+    def test_exports(self):
+        """Test collapsed stacks name the detector's functions and the trace is valid trace-event JSON"""
+        with BatchProfiler(sample_rate=1.0) as profiler:
+            self.detector.batch_analyze(self.cases, profiler=profiler)
+        stacks = profiler.collapsed_stacks()
+        self.assertTrue(any(stack.startswith('fraud_detector.py:detect_fraud') for stack in stacks))
+        self.assertTrue(any('_check_indicator' in stack for stack in stacks))
+        self.assertTrue(all(weight > 0 for weight in stacks.values()))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+            profiler.write_chrome_trace(path)
+            with open(path) as fh:
+                trace = json.load(fh)
+            collapsed = os.path.join(tmp, 'run.collapsed')
+            self.assertEqual(profiler.write_collapsed(collapsed), len(stacks))
+        events = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual(len([e for e in events if e['cat'] == 'sampled']), 400)
+        self.assertTrue(all(e['dur'] >= 0 and 'signature' in e['args'] for e in events))
+
+    def test_sampling_mode_and_spans(self):
+        """Test the sampling profiler and stage spans"""
+        with BatchProfiler(mode='sampling', interval=0.001) as profiler:
+            with profiler.span('scoring', cases=len(self.cases)):
+                for _ in range(5):
+                    self.detector.batch_analyze(self.cases, profiler=profiler)
+        self.assertEqual(profiler.cases, 2000)
+        stages = [e for e in profiler.chrome_trace()['traceEvents'] if e.get('cat') == 'stage']
+        self.assertEqual(stages[0]['args'], {'cases': 400})
+        with self.assertRaises(ValueError):
+            BatchProfiler(mode='perf')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+import sys
+sys.path.append('../src')
+from fraud_detector import CouncilTaxFraudDetector, FraudType
+from reference_data import BandTable, NeighbourhoodIndex, ReferenceData, neighbourhood_key
+
+def street_cases(street, band, count, charge=2000, income=30000):
+    return [
+        {'case_id': f'REF-{street}-{i}', 'address': f'{i} {street}', 'council_tax_band': band,
+         'annual_charge': charge, 'declared_income': income}
+        for i in range(1, count + 1)
+    ]
+
+class TestReferenceData(unittest.TestCase):
+
+    def setUp(self):
+        comparables = street_cases('Park Street', 'E', 10) + street_cases('Mill Lane', 'B', 10, 1400, 18000)
+        self.index = NeighbourhoodIndex.build(comparables)
+        self.reference = ReferenceData(neighbourhoods=self.index)
+
+    def test_band_table_lookup(self):
+        """Valuations map to bands by binary search over band boundaries"""
+        table = BandTable(band_d_charge=1800)
+        self.assertEqual(table.band_for_value(40000), 'A')
+        self.assertEqual(table.band_for_value(40001), 'B')
+        self.assertEqual(table.band_for_value(1000000), 'H')
+        self.assertAlmostEqual(table.expected_charge('A'), 1200)
+
+    def test_neighbourhood_keys(self):
+        """Cases group by neighbourhood, postcode sector or street"""
+        self.assertEqual(neighbourhood_key({'address': '12 Park Street'}), 'PARK STREET')
+        self.assertEqual(neighbourhood_key({'postcode': 'sw1a 1aa', 'address': '1 Mall'}), 'SW1A 1')
+        self.assertIsNone(neighbourhood_key({}))
+
+    def test_property_banding_detection(self):
+        """Properties banded well below their neighbours are flagged as banding fraud"""
+        detector = CouncilTaxFraudDetector(reference_data=self.reference)
+        case = {
+            'case_id': 'REF-001',
+            'address': '99 Park Street',
+            'council_tax_band': 'B',
+            'annual_charge': 900,
+            'property_value': 150000,
+            'unreported_extension': True
+        }
+        result = detector.detect_fraud(case)
+        self.assertEqual(result.fraud_type, FraudType.PROPERTY_BANDING)
+        detected = {ind.indicator_type: ind.evidence for ind in result.indicators}
+        self.assertIn('band_below_neighbours', detected)
+        self.assertIn('valuation_band_mismatch', detected)
+        self.assertIn('charge_below_neighbours', detected)
+        self.assertIn('band F', detected['valuation_band_mismatch'])
+
+    def test_income_mismatch(self):
+        """Declared income far below the neighbourhood median is flagged"""
+        case = {'address': '3 Park Street', 'council_tax_band': 'E', 'declared_income': 4000}
+        derived = self.reference.derive_indicators(case)
+        self.assertTrue(derived['income_below_neighbourhood'])
+        self.assertNotIn('band_below_neighbours', derived)
+        self.assertIs(self.reference.enrich({'address': '1 Unknown Road', 'council_tax_band': 'C'}).get('band_below_neighbours'), None)
+
+    def test_memory_mapped_round_trip(self):
+        """Saved indexes load memory-mapped with identical lookups"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.index.save(directory)
+            loaded = NeighbourhoodIndex.load(directory)
+            self.assertEqual(len(loaded), 2)
+            self.assertEqual(list(loaded.lookup('MILL LANE')), list(self.index.lookup('MILL LANE')))
+            self.assertIsNone(loaded.lookup('NOWHERE'))
+            del loaded
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import sys
+sys.path.append('../src')
+import random
+import tempfile
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from run_snapshots import Snapshot, SnapshotDiff, SnapshotWriter
+
+LEVELS = ('low', 'medium', 'high', 'critical')
+
+class TestRunSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.detector = CouncilTaxFraudDetector()
+        rng = random.Random(43)
+        cases = generate_sample_cases(3000, seed=43)
+        rng.shuffle(cases)
+        self.old_cases = cases[:2800]
+        # Today: 200 cases closed, 200 new, and some cases pick up an extra indicator
+        self.new_cases = [dict(case) for case in cases[200:]]
+        for case in rng.sample(self.new_cases, 300):
+            case['multiple_utility_accounts'] = True
+        self.old = self.snapshot('old', self.old_cases)
+        self.new = self.snapshot('new', self.new_cases)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def snapshot(self, name, cases):
+        writer = SnapshotWriter(f'{self.tmp.name}/{name}', memory_budget=30000)
+        self.detector.batch_analyze(cases, listeners=[writer])
+        self.assertGreater(len(writer._runs), 1)
+        return writer.close()
+
+    def levels(self, cases):
+        return {a.case_id: a.risk_level.value for a in self.detector.batch_analyze(cases)['assessments']}
+
+    def test_snapshot_is_sorted_and_reopens(self):
+        """Test spilled runs merge into one case_id-sorted snapshot"""
+        snapshot = Snapshot(self.old.directory)
+        ids = [case_id.decode() for case_id in snapshot.case_ids]
+        self.assertEqual(ids, sorted(case['case_id'] for case in self.old_cases))
+        case_id = self.old_cases[7]['case_id']
+        self.assertEqual(snapshot.lookup(case_id)['risk_level'], self.levels(self.old_cases)[case_id])
+        self.assertIsNone(snapshot.lookup('NO-SUCH-CASE'))
+
+    def test_diff_matches_dictionary_comparison(self):
+        """Test the streaming merge-join agrees with comparing two in-memory dicts"""
+        before, after = self.levels(self.old_cases), self.levels(self.new_cases)
+        expected = {'new': set(after) - set(before), 'closed': set(before) - set(after),
+                    'escalated': set(), 'de_escalated': set()}
+        for case_id in set(before) & set(after):
+            old, new = LEVELS.index(before[case_id]), LEVELS.index(after[case_id])
+            if new > old:
+                expected['escalated'].add(case_id)
+            elif new < old:
+                expected['de_escalated'].add(case_id)
+
+        diff = SnapshotDiff(self.old, self.new, block_rows=97)
+        changes = list(diff.changes())
+        for kind, case_ids in expected.items():
+            self.assertEqual({c.case_id for c in changes if c.kind == kind}, case_ids)
+        self.assertEqual([c.case_id for c in changes], sorted(c.case_id for c in changes))
+        counts = diff.counts()
+        self.assertEqual({kind: counts[kind] for kind in expected},
+                         {kind: len(case_ids) for kind, case_ids in expected.items()})
+        self.assertGreater(counts['escalated'], 0)
+        self.assertEqual(sum(counts['transitions'].values()), counts['escalated'] + counts['de_escalated'])
+
+    def test_last_write_wins(self):
+        """Test a case written twice keeps its latest assessment"""
+        writer = SnapshotWriter(f'{self.tmp.name}/repeat', memory_budget=1)
+        for i in range(600):
+            writer.add_record(f'C{i % 300:04d}', 'low' if i < 300 else 'high', 0.1, 0.5)
+        snapshot = writer.close()
+        self.assertEqual(len(snapshot), 300)
+        self.assertEqual(snapshot.by_risk_level(), {'low': 0, 'medium': 0, 'high': 300, 'critical': 0})
+
+    def test_sorted_input_merge_stays_within_budget(self):
+        """Test the final merge of runs written in case_id order holds no more than the memory budget"""
+        budget = 1 << 20
+        writer = SnapshotWriter(f'{self.tmp.name}/sorted', memory_budget=budget)
+        for i in range(200000):
+            writer.add_record(f'S{i:07d}', LEVELS[i % 4], 0.5, 0.5)
+        snapshot = writer.close()
+        self.assertGreater(len(writer._runs), 20)
+        self.assertEqual(len(snapshot), 200000)
+        self.assertEqual(snapshot.case_ids[-1], b'S0199999')
+        self.assertLessEqual(writer.merge_peak, budget // 2)
@@ -0,0 +1,99 @@
+import unittest
+import sys
+sys.path.append('../src')
+import random
+from datetime import date
+from fraud_detector import CouncilTaxFraudDetector
+from data_generator import generate_sample_cases
+from streaming_stats import KLLSketch, StreamingStatistics
+
+class TestKLLSketch(unittest.TestCase):
+
+    def test_quantiles_within_error_bound(self):
+        """Test sketch quantiles stay close to the exact ranks"""
+        values = list(range(100000))
+        random.Random(7).shuffle(values)
+        sketch = KLLSketch(seed=7)
+        for value in values:
+            sketch.update(value)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            self.assertAlmostEqual(sketch.quantile(q) / len(values), q, delta=0.02)
+        self.assertEqual(sketch.quantile(0), 0)
+        self.assertEqual(sketch.quantile(1), 99999)
+
+    def test_merge(self):
+        """Test merged sketches match a sketch over the combined stream"""
+        left, right = KLLSketch(seed=1), KLLSketch(seed=2)
+        for value in range(50000):
+            (left if value % 2 else right).update(value)
+        left.merge(right)
+        self.assertEqual(left.count, 50000)
+        self.assertAlmostEqual(left.quantile(0.5), 25000, delta=1000)
+
+    def test_empty(self):
+        """Test an empty sketch has no quantiles"""
+        self.assertIsNone(KLLSketch().quantile(0.5))
+
+class TestStreamingStatistics(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(31)
+        self.cases = generate_sample_cases(400)
+        self.detector = CouncilTaxFraudDetector()
+
+    def test_listener_matches_batch_statistics(self):
+        """Test streamed counters equal batch_analyze statistics"""
+        stats = StreamingStatistics()
+        results = self.detector.batch_analyze(self.cases, listeners=[stats])
+        self.assertEqual(stats.statistics(), results['statistics'])
+        self.assertEqual(stats.snapshot()['total_cases'], 400)
+
+    def test_merge_across_workers(self):
+        """Test statistics from separate workers merge into the combined totals"""
+        first = StreamingStatistics(day_field='last_review_date')
+        second = StreamingStatistics(day_field='last_review_date')
+        self.detector.batch_analyze(self.cases[:150], listeners=[first])
+        self.detector.batch_analyze(self.cases[150:], listeners=[second])
+        combined = StreamingStatistics(day_field='last_review_date')
+        expected = self.detector.batch_analyze(self.cases, listeners=[combined])['statistics']
+
+        first.merge(second)
+        self.assertEqual(first.statistics(), expected)
+        self.assertEqual(sorted(first.days), sorted(combined.days))
+        for day, bucket in combined.days.items():
+            self.assertEqual(first.days[day].statistics(), bucket.statistics())
+
+    def test_day_buckets(self):
+        """Test assessments are bucketed by day and old days are dropped"""
+        stats = StreamingStatistics(day_field='assessed_on', max_days=2, today=lambda: date(2024, 3, 1))
+        case = {'case_id': 'DAY-001', 'multiple_utility_accounts': True}
+        assessment = self.detector.detect_fraud(case)
+        for day in ('2024-01-01', '2024-01-02', '2024-01-02', '2024-01-03'):
+            stats.observe(dict(case, assessed_on=day), assessment)
+        stats.observe(case, assessment)
+        days, totals = stats.daily_series()
+        self.assertEqual(days, ['2024-01-03', '2024-03-01'])
+        self.assertEqual(totals, [1, 1])
+        self.assertEqual(stats.statistics()['total_cases'], 5)
+
+    def test_late_day_older_than_retained_days(self):
+        """Test a late assessment for a dropped day counts in the totals without evicting a retained day"""
+        stats = StreamingStatistics(day_field='assessed_on', max_days=2)
+        case = {'case_id': 'DAY-002', 'multiple_utility_accounts': True}
+        assessment = self.detector.detect_fraud(case)
+        for day in ('2024-01-02', '2024-01-03', '2024-01-01'):
+            stats.observe(dict(case, assessed_on=day), assessment)
+        self.assertEqual(stats.daily_series(), (['2024-01-02', '2024-01-03'], [1, 1]))
+        self.assertEqual(stats.statistics()['total_cases'], 3)
+
+    def test_snapshot_is_cached_until_new_data(self):
+        """Test snapshot is reused until another assessment is observed"""
+        stats = StreamingStatistics()
+        self.detector.batch_analyze(self.cases[:10], listeners=[stats])
+        snapshot = stats.snapshot()
+        self.assertIs(stats.snapshot(), snapshot)
+        stats.observe(self.cases[10], self.detector.detect_fraud(self.cases[10]))
+        self.assertEqual(stats.snapshot()['total_cases'], 11)
+
+if __name__ == '__main__':
+    unittest.main()
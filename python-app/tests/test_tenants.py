@@ -0,0 +1,76 @@
+import unittest
+import sys
+sys.path.append('../src')
+import random
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector
+from tenants import TenantRegistry, TenantScheduler, partition
+
+CONFIGS = [
+    {'council_id': 'LEEDS', 'thresholds': {'high': 0.5}},
+    {'council_id': 'YORK', 'weights': {'multiple_vehicles': 0.3}, 'disabled_indicators': ['historical_pattern']},
+    {'council_id': 'HULL', 'thresholds': {'high': 0.5}},
+]
+
+class TestTenants(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = TenantRegistry.from_configs(CONFIGS)
+        self.cases = generate_sample_cases(2000, seed=41)
+        rng = random.Random(41)
+        for case in self.cases:
+            case['council_id'] = rng.choices(['LEEDS', 'YORK', 'HULL', 'SELBY'], weights=[85, 5, 5, 5])[0]
+
+    def test_configs_compiled_once_and_shared(self):
+        """Test identical tenant configs share one compiled detector"""
+        self.assertIs(self.registry.detector_for('LEEDS'), self.registry.detector_for('HULL'))
+        self.assertIsNot(self.registry.detector_for('LEEDS'), self.registry.detector_for('YORK'))
+        self.assertIs(self.registry.detector_for('SELBY'), self.registry.base)
+        self.assertEqual(self.registry.distinct_configs, 3)
+        self.assertNotIn('historical_pattern', [
+            ind.indicator_type for inds in self.registry.detector_for('YORK').fraud_patterns.values() for ind in inds])
+        with self.assertRaises(KeyError):
+            TenantRegistry(strict=True).detector_for('SELBY')
+        with self.assertRaises(ValueError):
+            TenantRegistry.from_configs([{'council_id': 'X', 'threshold': {}}])
+
+    def test_routed_results_match_per_tenant_detectors(self):
+        """Test each case is scored with its council's configuration, in input order"""
+        seen = []
+        results = TenantScheduler(self.registry, workers=3, slice_size=64).run(
+            self.cases, listeners=[lambda case, assessment: seen.append(case['case_id'])])
+        for case, assessment in zip(self.cases, results['assessments']):
+            self.assertEqual(assessment, self.registry.detector_for(case['council_id']).detect_fraud(case))
+        self.assertEqual(sorted(seen), sorted(case['case_id'] for case in self.cases))
+
+    def test_rollup(self):
+        """Test tenant statistics add up to the combined view"""
+        results = TenantScheduler(self.registry, workers=2, slice_size=100).run(self.cases)
+        by_tenant = results['by_tenant']
+        self.assertEqual(set(by_tenant), {'LEEDS', 'YORK', 'HULL', 'SELBY'})
+        self.assertEqual(results['statistics']['total_cases'], len(self.cases))
+        self.assertEqual(results['statistics']['tenants'], 4)
+        self.assertEqual(results['statistics']['high_risk'], sum(s['high_risk'] for s in by_tenant.values()))
+        counts = {tenant: len(positions) for tenant, positions in partition(self.cases).items()}
+        self.assertEqual({tenant: s['total_cases'] for tenant, s in by_tenant.items()}, counts)
+
+    def test_small_tenants_not_starved(self):
+        """Test small councils finish before the large one even when it comes first in the input"""
+        cases = sorted(self.cases, key=lambda case: case['council_id'] != 'LEEDS')
+        scheduler = TenantScheduler(self.registry, workers=1, slice_size=50)
+        scheduler.run(cases)
+        self.assertEqual(scheduler.completion_order[-1], 'LEEDS')
+        leeds = scheduler.progress['LEEDS']
+        for tenant in ('YORK', 'HULL', 'SELBY'):
+            self.assertLess(scheduler.progress[tenant].finished_at, leeds.finished_at)
+
+    def test_default_tenant(self):
+        """Test cases without a council_id use the base configuration"""
+        case = dict(self.cases[0])
+        del case['council_id']
+        results = TenantScheduler(self.registry, workers=1).run([case])
+        self.assertEqual(results['assessments'][0], CouncilTaxFraudDetector().detect_fraud(case))
+        self.assertIn('default', results['by_tenant'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,19 @@
+from pathlib import Path
 from setuptools import setup, find_packages
 
-with open("docs/README.md", "r", encoding="utf-8") as fh:
-    long_description = fh.read()
+HERE = Path(__file__).resolve().parent
+
+long_description = (HERE / "docs" / "README.md").read_text(encoding="utf-8")
+
+# Top-level modules under src/ installed for the fraud-detector CLI and library use;
+# the Streamlit dashboard (dashboard, chart_data) is deployed from the source tree
+MODULES = [
+    "adaptive_pipeline", "address_normaliser", "assessment_cache", "audit_log", "batch_cli",
+    "batch_jobs", "bitmap_index", "case_matrix", "case_schema", "cdc_ingestion", "cli_demo",
+    "compiled_detector", "data_generator", "evaluation", "explainability", "external_ranking",
+    "fraud_detector", "geospatial", "live_feed", "outcome_table", "profiling", "reference_data",
+    "replay", "run_snapshots", "shared_scoring", "streaming_stats", "tenants",
+]
 
 setup(
     name="council-tax-fraud-prevention",
@@ -14,6 +26,7 @@ setup(
     url="https://github.com/council/council-tax-fraud-prevention",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    py_modules=MODULES,
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Government",
@@ -58,7 +71,7 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "fraud-detector=src.cli_demo:main",
+            "fraud-detector=batch_cli:main",
             "fraud-dashboard=src.dashboard:main",
         ],
     },
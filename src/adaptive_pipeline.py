@@ -0,0 +1,334 @@
+"""
+Adaptive batch sizing and backpressure around batch_analyze.
+
+AdaptivePipeline runs three stages connected by bounded queues: a reader
+thread cuts the input into chunks, a dispatcher scores chunks on a worker
+pool (threads by default; any Executor, including a ProcessPoolExecutor,
+can be passed in) with a limited number in flight, and a writer delivers assessments
+to the sink and listeners in input order. A full queue blocks the stage
+feeding it, so a slow writer throttles scoring and slow scoring throttles
+reading; memory held in the pipeline is bounded by the queue depths times
+the chunk size.
+
+AdaptiveController chooses the chunk size and the number of chunks in
+flight from per-chunk measurements (latency, rows, process RSS):
+
+- a chunk over the latency SLO, or RSS over the memory limit, halves the
+  chunk size (multiplicative decrease);
+- otherwise the chunk size doubles until the first breach (slow start)
+  and then grows by a fixed step (additive increase), while latency stays
+  under 80% of the SLO;
+- when chunks are queued waiting for a worker, one more worker is tried;
+  it is kept only if throughput rises by at least 5%, and otherwise the
+  worker count is capped there;
+- with a throughput target and no latency SLO, growth stops once the
+  target is met.
+
+Every change is recorded as a Decision and summarised by metrics().
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+from fraud_detector import CouncilTaxFraudDetector, FraudAssessment, merge_statistics
+
+HEADROOM = 0.8
+WORKER_GAIN = 0.05
+_DONE = object()
+EMPTY_STATISTICS = {'total_cases': 0, 'high_risk': 0, 'likely_fraud': 0, 'likely_error': 0, 'by_type': {}}
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class Decision(NamedTuple):
+    chunk: int
+    reason: str
+    batch_size: int
+    workers: int
+    latency: float
+    throughput: float
+    rss: int
+
+class AdaptiveController:
+    """AIMD controller for chunk size and concurrency; thread-safe"""
+
+    def __init__(self, target_latency: Optional[float] = None, target_throughput: Optional[float] = None,
+                 initial_batch: int = 500, min_batch: int = 50, max_batch: int = 100000, step: Optional[int] = None,
+                 max_workers: Optional[int] = None, memory_limit: Optional[int] = None, window: int = 4):
+        if not 1 <= min_batch <= initial_batch <= max_batch:
+            raise ValueError("batch sizes must satisfy 1 <= min_batch <= initial_batch <= max_batch")
+        self.target_latency = target_latency
+        self.target_throughput = target_throughput
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.step = step or max(min_batch, initial_batch // 4)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+        self.window = window
+        self.batch_size = initial_batch
+        self.workers = 1
+        self.worker_cap = self.max_workers
+        self.slow_start = True
+        self.decisions: List[Decision] = []
+        self.chunks = 0
+        self.rows = 0
+        self.rss = 0
+        self._lock = threading.Lock()
+        self._recent: Deque = deque(maxlen=window + 1)
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self._since_change = 0
+        self._probe: Optional[float] = None
+        self._started: Optional[float] = None
+
+    def observe(self, rows: int, latency: float, backlog: bool = False) -> Optional[Decision]:
+        """Record one scored chunk and adjust the settings; returns the decision if anything changed"""
+        now = time.perf_counter()
+        rss = current_rss()
+        with self._lock:
+            if self._started is None:
+                self._started = now - latency
+            self.chunks += 1
+            self.rows += rows
+            self.rss = rss
+            self._recent.append((rows, now))
+            self._latencies.append(latency)
+            self._since_change += 1
+            throughput = self._throughput(rows, latency)
+            reason = self._decide(rows, latency, throughput, rss, backlog)
+            if reason is None:
+                return None
+            self._since_change = 0
+            self._recent.clear()
+            self._recent.append((rows, now))
+            decision = Decision(self.chunks, reason, self.batch_size, self.workers, latency, throughput, rss)
+            self.decisions.append(decision)
+            return decision
+
+    def _throughput(self, rows: int, latency: float) -> float:
+        """Rows per second over the recent window of chunk completions"""
+        if len(self._recent) > 1:
+            elapsed = self._recent[-1][1] - self._recent[0][1]
+            if elapsed > 0:
+                return sum(count for count, _ in list(self._recent)[1:]) / elapsed
+        return rows / latency if latency > 0 else 0.0
+
+    def _shrink(self):
+        self.slow_start = False
+        self.batch_size = max(self.min_batch, self.batch_size // 2)
+
+    def _decide(self, rows: int, latency: float, throughput: float, rss: int, backlog: bool) -> Optional[str]:
+        # Chunks cut before the last decrease are still in flight; their breaches were already acted on
+        stale = rows > self.batch_size
+        if self.memory_limit and rss > self.memory_limit:
+            if stale or (self.batch_size == self.min_batch and self.workers == 1):
+                return None
+            self._shrink()
+            self.workers = max(1, self.workers - 1)
+            self._probe = None
+            return 'memory'
+        if self.target_latency and latency > self.target_latency:
+            if stale or self.batch_size == self.min_batch:
+                return None
+            self._shrink()
+            return 'latency'
+        if self._since_change < self.window:
+            return None
+        if self._probe is not None:
+            before, self._probe = self._probe, None
+            if throughput < before * (1 + WORKER_GAIN):
+                self.workers -= 1
+                self.worker_cap = self.workers
+                return 'workers_no_gain'
+            return 'workers_kept'
+        if self.target_throughput and not self.target_latency and throughput >= self.target_throughput:
+            return None
+        if backlog and self.workers < min(self.max_workers, self.worker_cap):
+            self._probe = throughput
+            self.workers += 1
+            return 'workers_up'
+        if self.batch_size < self.max_batch and (not self.target_latency or latency < self.target_latency * HEADROOM):
+            grown = self.batch_size * 2 if self.slow_start else self.batch_size + self.step
+            self.batch_size = min(self.max_batch, grown)
+            return 'grow'
+        return None
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            elapsed = self._recent[-1][1] - self._started if self._recent and self._started is not None else 0.0
+            return {
+                'batch_size': self.batch_size,
+                'workers': self.workers,
+                'worker_cap': self.worker_cap,
+                'chunks': self.chunks,
+                'rows': self.rows,
+                'rows_per_second': self.rows / elapsed if elapsed > 0 else 0.0,
+                'latency_p50': latencies[len(latencies) // 2] if latencies else None,
+                'latency_p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+                'rss': self.rss,
+                'target_latency': self.target_latency,
+                'target_throughput': self.target_throughput,
+                'memory_limit': self.memory_limit,
+                'decisions': dict(Counter(decision.reason for decision in self.decisions)),
+            }
+
+class AdaptivePipeline:
+    """Read -> score -> write with bounded queues, sized and paced by an AdaptiveController"""
+
+    def __init__(self, detector=None, controller: Optional[AdaptiveController] = None, queue_depth: int = 4,
+                 executor: Optional[Executor] = None, listeners: Optional[List[Callable]] = None):
+        self.detector = (detector or CouncilTaxFraudDetector()).compile()
+        self.controller = controller or AdaptiveController()
+        self.queue_depth = queue_depth
+        self.executor = executor
+        self.listeners = listeners or []
+        # Seconds each stage spent blocked because the next stage was behind (backpressure)
+        self.read_blocked = 0.0
+        self.slot_wait = 0.0
+        self.write_blocked = 0.0
+
+    def run(self, cases: Iterable[Dict],
+            sink: Optional[Callable[[List[Dict], List[FraudAssessment]], None]] = None) -> Dict:
+        """Score every case; assessments go to sink(chunk, assessments) in input order, or are returned"""
+        controller = self.controller
+        reads: queue.Queue = queue.Queue(self.queue_depth)
+        writes: queue.Queue = queue.Queue(self.queue_depth + controller.max_workers)
+        stop = threading.Event()
+        slots = threading.Condition()
+        in_flight = [0]
+        failure: List[BaseException] = []
+        collected: List[FraudAssessment] = []
+        statistics: List[Dict] = []
+
+        def put(target: queue.Queue, item) -> float:
+            """Blocking put that gives up once the pipeline stops; returns the time spent blocked"""
+            start = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.05)
+                    break
+                except queue.Full:
+                    pass
+            return time.perf_counter() - start
+
+        def get(source: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            return _DONE
+
+        def fail(exc: BaseException):
+            failure.append(exc)
+            stop.set()
+
+        def read():
+            try:
+                iterator = iter(cases)
+                while not stop.is_set():
+                    # The chunk size is read per chunk, so controller decisions apply immediately
+                    chunk = list(islice(iterator, controller.batch_size))
+                    if not chunk:
+                        break
+                    self.read_blocked += put(reads, chunk)
+            except BaseException as exc:
+                fail(exc)
+            put(reads, _DONE)
+
+        def finished(rows: int, started: float, future):
+            # Timed here in the parent so the pool only ever runs a picklable batch_analyze call
+            try:
+                if not future.cancelled() and future.exception() is None:
+                    controller.observe(rows, time.perf_counter() - started, reads.full())
+            except BaseException as exc:
+                fail(exc)
+            with slots:
+                in_flight[0] -= 1
+                slots.notify()
+
+        def write():
+            try:
+                while True:
+                    item = get(writes)
+                    if item is _DONE:
+                        return
+                    chunk, future = item
+                    result = future.result()
+                    assessments = result['assessments']
+                    for listener in self.listeners:
+                        for case, assessment in zip(chunk, assessments):
+                            listener(case, assessment)
+                    if sink is not None:
+                        sink(chunk, assessments)
+                    else:
+                        collected.extend(assessments)
+                    statistics.append(result['statistics'])
+            except BaseException as exc:
+                fail(exc)
+
+        own_executor = self.executor is None
+        pool = self.executor or ThreadPoolExecutor(max_workers=controller.max_workers)
+        reader = threading.Thread(target=read, name='pipeline-read', daemon=True)
+        writer = threading.Thread(target=write, name='pipeline-write', daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            while True:
+                chunk = get(reads)
+                if chunk is _DONE:
+                    break
+                start = time.perf_counter()
+                with slots:
+                    while in_flight[0] >= controller.workers and not stop.is_set():
+                        slots.wait(0.05)
+                    in_flight[0] += 1
+                self.slot_wait += time.perf_counter() - start
+                try:
+                    future = pool.submit(self.detector.batch_analyze, chunk)
+                except BaseException:
+                    with slots:
+                        in_flight[0] -= 1
+                    raise
+                future.add_done_callback(partial(finished, len(chunk), time.perf_counter()))
+                self.write_blocked += put(writes, (chunk, future))
+            put(writes, _DONE)
+        except BaseException as exc:
+            fail(exc)
+        finally:
+            writer.join()
+            stop.set()
+            reader.join()
+            # A future's result is visible before its done callback has recorded the chunk
+            with slots:
+                while in_flight[0]:
+                    slots.wait(0.05)
+            if own_executor:
+                pool.shutdown()
+        if failure:
+            raise failure[0]
+        result = {'statistics': merge_statistics(EMPTY_STATISTICS, *statistics), 'metrics': self.metrics()}
+        if sink is None:
+            result['assessments'] = collected
+        return result
+
+    def metrics(self) -> Dict:
+        """Controller metrics plus the time each stage spent blocked by backpressure"""
+        metrics = self.controller.metrics()
+        metrics.update(read_blocked=self.read_blocked, slot_wait=self.slot_wait, write_blocked=self.write_blocked)
+        return metrics
@@ -0,0 +1,245 @@
+"""
+Bulk address normalisation and postcode/street blocking.
+
+Free-text addresses ("12a High St., Leeds LS6 2AB") are split into house
+number, flat, street, locality and postcode, with street suffixes and flat
+prefixes canonicalised so that "12 High St" and "12 HIGH STREET" agree.
+Street lines repeat heavily across a council's records, so each distinct
+raw line is parsed once and its tokens interned; normalising millions of
+addresses is dominated by dictionary lookups rather than regex work.
+
+The blocking index groups row numbers by postcode, postcode sector and
+street so that neighbour comparison and duplicate matching only compare
+records within a block.
+"""
+
+import re
+import sys
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+STREET_SUFFIXES = {
+    'ST': 'STREET', 'STR': 'STREET', 'RD': 'ROAD', 'AVE': 'AVENUE', 'AV': 'AVENUE',
+    'LN': 'LANE', 'DR': 'DRIVE', 'CL': 'CLOSE', 'CT': 'COURT', 'CRES': 'CRESCENT',
+    'CRESC': 'CRESCENT', 'GDNS': 'GARDENS', 'GRN': 'GREEN', 'GR': 'GROVE', 'GRO': 'GROVE',
+    'GRV': 'GROVE', 'PL': 'PLACE', 'SQ': 'SQUARE', 'TER': 'TERRACE', 'TERR': 'TERRACE',
+    'PK': 'PARK', 'PDE': 'PARADE', 'WY': 'WAY', 'HWY': 'HIGHWAY', 'BLVD': 'BOULEVARD',
+    'MT': 'MOUNT', 'RI': 'RISE', 'WK': 'WALK', 'ESP': 'ESPLANADE',
+}
+
+FLAT_PREFIXES = {'FLAT': 'FLAT', 'FLT': 'FLAT', 'APT': 'FLAT', 'APARTMENT': 'FLAT',
+                 'UNIT': 'FLAT', 'APPT': 'FLAT'}
+
+_POSTCODE = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?)\s*(\d[A-Z]{2})\b')
+_HOUSE_NUMBER = re.compile(r'^(\d+[A-Z]?)(?:-(\d+[A-Z]?))?$')
+_SEPARATORS = re.compile(r"[^A-Z0-9\-/' ]+")
+_LEADING = re.compile(r'\s*(?:(?:FLAT|FLT|APT|APPT|APARTMENT|UNIT)\s+(\w+)[\s,]*)?'
+                      r'(?:(\d+[A-Z]?(?:-\d+[A-Z]?)?)(?!\w)[\s,]*)?')
+
+class NormalisedAddress(NamedTuple):
+    house_number: Optional[str]
+    flat: Optional[str]
+    street: Optional[str]
+    locality: Optional[str]
+    postcode: Optional[str]
+
+    @property
+    def sector(self) -> Optional[str]:
+        """Postcode sector, e.g. 'LS6 2' for 'LS6 2AB'"""
+        return self.postcode[:-2] if self.postcode else None
+
+    @property
+    def outward(self) -> Optional[str]:
+        return self.postcode.split(' ', 1)[0] if self.postcode else None
+
+    @property
+    def key(self) -> str:
+        """Canonical single-line form used for exact duplicate matching"""
+        parts = [f'FLAT {self.flat}' if self.flat else None, self.house_number,
+                 self.street, self.locality, self.postcode]
+        return ' '.join(part for part in parts if part)
+
+def normalise_postcode(text: Optional[str]) -> Optional[str]:
+    """'sw1a1aa' -> 'SW1A 1AA'; None when no postcode is present"""
+    if not text:
+        return None
+    match = _POSTCODE.search(str(text).upper())
+    return f'{match.group(1)} {match.group(2)}' if match else None
+
+class AddressNormaliser:
+    """Normalises addresses, memoising each distinct street line and interning its tokens"""
+
+    def __init__(self, max_cached_lines: int = 200000):
+        self.max_cached_lines = max_cached_lines
+        self._lines: Dict[str, Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]] = {}
+        self._tokens: Dict[str, str] = {}
+        self._postcodes: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _token(self, token: str) -> str:
+        canonical = self._tokens.get(token)
+        if canonical is None:
+            canonical = sys.intern(STREET_SUFFIXES.get(token, token))
+            self._tokens[sys.intern(token)] = canonical
+        return canonical
+
+    def _postcode(self, outward: str, inward: str) -> str:
+        raw = outward + inward
+        postcode = self._postcodes.get(raw)
+        if postcode is None:
+            postcode = self._postcodes[raw] = sys.intern(f'{outward} {inward}')
+        return postcode
+
+    def _parse_line(self, line: str):
+        """(house number, flat, street, locality) for an address with its postcode removed"""
+        house_number = flat = None
+        street: List[str] = []
+        named = False
+        locality: List[str] = []
+        for part in line.split(','):
+            tokens = _SEPARATORS.sub(' ', part).split()
+            if not tokens:
+                continue
+            if flat is None and tokens[0] in FLAT_PREFIXES and len(tokens) > 1:
+                flat = sys.intern(tokens[1])
+                tokens = tokens[2:]
+            numbered = False
+            if house_number is None and tokens and _HOUSE_NUMBER.match(tokens[0]):
+                house_number = sys.intern(tokens[0])
+                tokens = tokens[1:]
+                numbered = True
+            if not tokens:
+                continue
+            if not street or (numbered and named):
+                # "Rose Cottage, 5 Mill Lane": the numbered part is the street, not the house name
+                named = not numbered and house_number is None
+                street = tokens
+            else:
+                locality.extend(tokens)
+
+        canonical = []
+        last = len(street) - 1
+        for i, token in enumerate(street):
+            # Only a trailing abbreviation is a suffix: "St Johns Rd" keeps its leading "ST"
+            canonical.append(self._token(token) if i == last and i > 0 else sys.intern(token))
+        return (house_number, flat,
+                sys.intern(' '.join(canonical)) if canonical else None,
+                sys.intern(' '.join(locality)) if locality else None)
+
+    def normalise(self, address: Optional[str], postcode: Optional[str] = None) -> NormalisedAddress:
+        """Normalise one address; an explicit postcode wins over one embedded in the text"""
+        text = str(address).upper() if address else ''
+        found = None
+        match = _POSTCODE.search(text) if text else None
+        if match:
+            found = self._postcode(match.group(1), match.group(2))
+            text = text[:match.start()] + text[match.end():]
+        if postcode:
+            found = normalise_postcode(postcode) or found
+
+        # Strip the per-property flat and house number so the rest of the line is shared by the street
+        lead = _LEADING.match(text)
+        flat, house_number = lead.groups()
+        rest = text[lead.end():]
+        parsed = self._lines.get(rest)
+        if parsed is None:
+            self.misses += 1
+            parsed = self._parse_line(rest)
+            if len(self._lines) < self.max_cached_lines:
+                self._lines[rest] = parsed
+        else:
+            self.hits += 1
+        return NormalisedAddress(house_number or parsed[0], flat or parsed[1], parsed[2], parsed[3], found)
+
+    def normalise_many(self, addresses: Iterable, postcodes: Optional[Iterable] = None) -> List[NormalisedAddress]:
+        """Normalise a column of addresses, optionally with a parallel postcode column"""
+        normalise = self.normalise
+        if postcodes is None:
+            return [normalise(address) for address in addresses]
+        return [normalise(address, postcode) for address, postcode in zip(addresses, postcodes)]
+
+    def normalise_cases(self, cases: Iterable[Dict]) -> List[NormalisedAddress]:
+        normalise = self.normalise
+        return [normalise(case.get('address'), case.get('postcode')) for case in cases]
+
+    def clear(self):
+        self._lines.clear()
+        self._tokens.clear()
+        self._postcodes.clear()
+
+_default = AddressNormaliser()
+
+def normalise_address(address: Optional[str], postcode: Optional[str] = None) -> NormalisedAddress:
+    """Normalise one address with the shared module-level cache"""
+    return _default.normalise(address, postcode)
+
+class BlockingIndex:
+    """Row numbers grouped by postcode, postcode sector and street for constant-time candidate lookup"""
+
+    def __init__(self):
+        self.postcodes: Dict[str, array] = {}
+        self.sectors: Dict[str, array] = {}
+        self.streets: Dict[Tuple[str, Optional[str]], array] = {}
+        self.size = 0
+
+    @staticmethod
+    def street_key(address: NormalisedAddress) -> Optional[Tuple[str, Optional[str]]]:
+        """Street qualified by outward code (or locality) so same-named streets in different towns stay apart"""
+        if not address.street:
+            return None
+        return address.street, address.outward or address.locality
+
+    def add(self, address: NormalisedAddress, row: Optional[int] = None) -> int:
+        if row is None:
+            row = self.size
+        self.size = max(self.size, row + 1)
+        if address.postcode:
+            block = self.postcodes.get(address.postcode)
+            if block is None:
+                block = self.postcodes[address.postcode] = array('I')
+            block.append(row)
+            sector = address.postcode[:-2]
+            block = self.sectors.get(sector)
+            if block is None:
+                block = self.sectors[sector] = array('I')
+            block.append(row)
+        street = self.street_key(address)
+        if street is not None:
+            block = self.streets.get(street)
+            if block is None:
+                block = self.streets[street] = array('I')
+            block.append(row)
+        return row
+
+    @classmethod
+    def build(cls, addresses: Iterable[NormalisedAddress]) -> 'BlockingIndex':
+        index = cls()
+        for row, address in enumerate(addresses):
+            index.add(address, row)
+        return index
+
+    def by_postcode(self, postcode: str) -> Sequence[int]:
+        return self.postcodes.get(normalise_postcode(postcode) or postcode, ())
+
+    def by_sector(self, sector: str) -> Sequence[int]:
+        return self.sectors.get(' '.join(str(sector).upper().split()), ())
+
+    def by_street(self, street: str, area: Optional[str] = None) -> Sequence[int]:
+        return self.streets.get((street, area), ())
+
+    def candidates(self, address: NormalisedAddress) -> Sequence[int]:
+        """Rows sharing this address's postcode, or failing that its street block"""
+        if address.postcode:
+            return self.postcodes.get(address.postcode, ())
+        street = self.street_key(address)
+        return self.streets.get(street, ()) if street else ()
+
+    def stats(self) -> Dict:
+        return {
+            'rows': self.size,
+            'postcodes': len(self.postcodes),
+            'sectors': len(self.sectors),
+            'streets': len(self.streets),
+            'largest_street_block': max(map(len, self.streets.values()), default=0),
+        }
@@ -0,0 +1,221 @@
+"""
+Opt-in assessment cache for repeated single-case lookups.
+
+An assessment depends only on which indicators are present (plus the
+detector configuration); case_id and evidence text are copied in
+afterwards. The cache is therefore keyed on the case's indicator
+signature - a bitmask over the detector's indicators - and the config
+version, so cases with different IDs but the same indicator combination
+share one entry.
+
+The cache scores with a compiled (immutable) snapshot of the detector and
+uses the snapshot's fingerprint as the config version, so entries always
+match the configuration that scores misses. Changes to the wrapped
+detector take effect on refresh().
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fraud_detector import (
+    CouncilTaxFraudDetector, FraudAssessment, FraudType, IndicatorDefinition, IndicatorHit, RiskLevel, EVIDENCE_KEYS, as_definition,
+    indicator_present, run_batch
+)
+
+ERROR_EVIDENCE = "Mitigating factor detected"
+DEFAULT_EVIDENCE = 'Detected in analysis'
+
+class CachedOutcome:
+    """Everything in an assessment that is determined by the indicator signature"""
+    __slots__ = ('fraud_type', 'risk_level', 'risk_score', 'is_likely_fraud', 'is_likely_error',
+                 'confidence', 'recommendations', 'fraud_indicators', 'error_indicators', 'size')
+
+    def __init__(self, fraud_type: Optional[FraudType], risk_level: RiskLevel, risk_score: float,
+                 is_likely_fraud: bool, is_likely_error: bool, confidence: float,
+                 recommendations: Tuple[str, ...],
+                 fraud_indicators: Tuple[Tuple[IndicatorDefinition, str], ...],
+                 error_indicators: Tuple[IndicatorHit, ...]):
+        self.fraud_type = fraud_type
+        self.risk_level = risk_level
+        self.risk_score = risk_score
+        self.is_likely_fraud = is_likely_fraud
+        self.is_likely_error = is_likely_error
+        self.confidence = confidence
+        self.recommendations = recommendations
+        # (definition, evidence key) pairs / ready-made error hits, which carry no per-case evidence
+        self.fraud_indicators = fraud_indicators
+        self.error_indicators = error_indicators
+        self.size = _estimate_size(self)
+
+    @classmethod
+    def from_assessment(cls, assessment: FraudAssessment) -> 'CachedOutcome':
+        fraud_indicators = []
+        error_indicators = []
+        for ind in assessment.indicators:
+            definition = as_definition(ind)
+            if ind.weight < 0:
+                error_indicators.append(IndicatorHit(definition, ERROR_EVIDENCE))
+            else:
+                fraud_indicators.append((definition, EVIDENCE_KEYS[ind.indicator_type]))
+        return cls(
+            assessment.fraud_type, assessment.risk_level, assessment.risk_score,
+            assessment.is_likely_fraud, assessment.is_likely_error, assessment.confidence,
+            tuple(assessment.recommendations), tuple(fraud_indicators), tuple(error_indicators)
+        )
+
+    def materialise(self, case_data: Dict) -> FraudAssessment:
+        """Build the assessment for one case, with its own case_id and evidence"""
+        get = case_data.get
+        indicators = [
+            IndicatorHit(definition, get(evidence_key, DEFAULT_EVIDENCE))
+            for definition, evidence_key in self.fraud_indicators
+        ]
+        indicators.extend(self.error_indicators)
+        return FraudAssessment(
+            case_id=get('case_id', 'UNKNOWN'),
+            fraud_type=self.fraud_type,
+            risk_level=self.risk_level,
+            risk_score=self.risk_score,
+            is_likely_fraud=self.is_likely_fraud,
+            is_likely_error=self.is_likely_error,
+            indicators=indicators,
+            recommendations=list(self.recommendations),
+            confidence=self.confidence
+        )
+
+def _estimate_size(outcome: CachedOutcome) -> int:
+    # Shared strings (descriptions, recommendation text) are counted per entry,
+    # which over-estimates slightly and keeps the byte bound conservative
+    size = sys.getsizeof(outcome) + sys.getsizeof(outcome.recommendations)
+    size += sum(map(sys.getsizeof, outcome.recommendations))
+    size += sys.getsizeof(outcome.fraud_indicators) + sys.getsizeof(outcome.error_indicators)
+    size += 64 * (len(outcome.fraud_indicators) + len(outcome.error_indicators))
+    return size
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class AssessmentCache:
+    """Thread-safe LRU/TTL cache of assessment outcomes keyed on indicator signature and config version"""
+
+    def __init__(self, detector: Optional[CouncilTaxFraudDetector] = None,
+                 max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if not max_entries and not max_bytes:
+            raise ValueError("AssessmentCache needs max_entries or max_bytes")
+        self.source = detector or CouncilTaxFraudDetector()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, int], Tuple[float, CachedOutcome]]' = OrderedDict()
+        self._stats = CacheStats()
+        self.refresh()
+
+    def refresh(self):
+        """Compile the wrapped detector's current configuration; entries for an older one stop matching"""
+        detector = self.source.compile()
+        indicator_types = []
+        for indicators in detector.fraud_patterns.values():
+            indicator_types.extend(ind.indicator_type for ind in indicators)
+        indicator_types.extend(ind.indicator_type for ind in detector.error_patterns)
+        with self._lock:
+            self.detector = detector
+            self._bits = {name: 1 << bit for bit, name in enumerate(dict.fromkeys(indicator_types))}
+            self._indicator_set = frozenset(self._bits)
+            self.config_version = detector.fingerprint
+            self._entries.clear()
+            self._stats.entries = 0
+            self._stats.bytes = 0
+
+    def signature(self, case_data: Dict) -> int:
+        """Bitmask of the indicators present (see indicator_present) in the case"""
+        present = [name for name in self._indicator_set.intersection(case_data) if indicator_present(case_data[name])]
+        return sum(map(self._bits.__getitem__, present))
+
+    def detect_fraud(self, case_data: Dict) -> FraudAssessment:
+        # One snapshot per lookup, so a concurrent refresh() cannot pair its version with the old scorer
+        detector = self.detector
+        if detector.reference_data is not None:
+            case_data = detector.reference_data.enrich(case_data)
+        key = (detector.fingerprint, self.signature(case_data))
+        outcome = self._get(key)
+        if outcome is not None:
+            return outcome.materialise(case_data)
+        # Already enriched above; scoring it through detect_fraud would derive the indicators again
+        assessment = detector.detect_enriched(case_data)
+        self._put(key, CachedOutcome.from_assessment(assessment))
+        return assessment
+
+    def batch_analyze(self, cases: List[Dict], listeners: Optional[List[Callable]] = None,
+                      profiler=None) -> Dict:
+        return run_batch(self.detect_fraud, cases, listeners, profiler)
+
+    def _get(self, key) -> Optional[CachedOutcome]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._stats.misses += 1
+                return None
+            expires, outcome = item
+            if expires and self.clock() >= expires:
+                self._remove(key, outcome)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return outcome
+
+    def _put(self, key, outcome: CachedOutcome):
+        expires = self.clock() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            if key[0] != self.config_version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._stats.bytes -= previous[1].size
+            self._entries[key] = (expires, outcome)
+            self._stats.bytes += outcome.size
+            while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries)
+                or (self.max_bytes and self._stats.bytes > self.max_bytes)
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._stats.bytes -= evicted.size
+                self._stats.evictions += 1
+            self._stats.entries = len(self._entries)
+
+    def _remove(self, key, outcome: CachedOutcome):
+        del self._entries[key]
+        self._stats.bytes -= outcome.size
+        self._stats.entries = len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.entries = 0
+            self._stats.bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    def __len__(self):
+        return len(self._entries)
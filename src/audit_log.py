@@ -0,0 +1,423 @@
+"""
+Append-only, tamper-evident audit log of assessments.
+
+Every assessment is recorded with the fingerprint of the detector
+configuration that produced it; the configuration itself (indicator
+weights, thresholds, error weight factor) is stored once per fingerprint
+in configs.jsonl and is self-verifying, since the fingerprint is a hash of
+it. Records are grouped into zlib-compressed blocks appended to segment
+files. Each block carries the SHA-256 of the previous block, so any edit,
+reordering or truncation breaks the chain; head() gives the latest hash
+for anchoring outside the log.
+
+Each segment has a sidecar index with one entry per block: offset, time
+range, hash, and a small bloom filter of the block's case IDs. A case's
+history is found by testing the bloom filters in memory and decompressing
+only candidate blocks; a time range by binary search over block times.
+fsync is batched every few blocks (and on flush/close).
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from compiled_detector import CompiledDetector
+from fraud_detector import FraudAssessment, FraudType, IndicatorDefinition, RiskLevel
+
+BLOCK_MAGIC = b'ALB1'
+# magic, payload length, record count, previous block hash
+BLOCK_HEADER = struct.Struct('<4sII32s')
+# offset, length, count, first ts, last ts, block hash, bloom length
+INDEX_ENTRY = struct.Struct('<QIIdd32sH')
+GENESIS = b'\0' * 32
+BLOOM_HASHES = 4
+SEGMENT_NAME = 'segment-{:06d}'
+
+# A block's payload is a JSON array of rows in this field order
+RECORD_FIELDS = ('case_id', 'ts', 'config', 'fraud_type', 'risk_level', 'risk_score', 'confidence',
+                 'likely_fraud', 'likely_error', 'indicators', 'recommendations')
+
+class BlockEntry(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+    count: int
+    first_ts: float
+    last_ts: float
+    hash: bytes
+    bloom: int
+    bloom_bits: int
+
+class VerificationResult(NamedTuple):
+    ok: bool
+    blocks: int
+    records: int
+    head: str
+    error: Optional[str] = None
+
+def detector_config(detector) -> Dict:
+    """JSON-serialisable configuration of a detector"""
+    # Drop-in wrappers (OutcomeTable, AssessmentCache) hold the scoring detector as .detector
+    detector = getattr(detector, 'detector', detector)
+    return {
+        'fraud_patterns': {
+            fraud_type.value: [[ind.indicator_type, ind.description, ind.weight] for ind in indicators]
+            for fraud_type, indicators in detector.fraud_patterns.items()
+        },
+        'error_patterns': [[ind.indicator_type, ind.description, ind.weight] for ind in detector.error_patterns],
+        'risk_thresholds': {level.value: value for level, value in detector.risk_thresholds.items()},
+        'error_weight_factor': detector.error_weight_factor,
+    }
+
+def config_fingerprint(config: Dict) -> str:
+    """Fingerprint of a stored configuration, computed the same way as for live detectors"""
+    detector = CompiledDetector(
+        {FraudType(name): [IndicatorDefinition(*ind) for ind in indicators]
+         for name, indicators in config['fraud_patterns'].items()},
+        [IndicatorDefinition(*ind) for ind in config['error_patterns']],
+        {RiskLevel(level): value for level, value in config['risk_thresholds'].items()},
+        config['error_weight_factor'],
+    )
+    return detector.fingerprint
+
+def _bloom_positions(case_id: str, bits: int) -> Tuple[int, ...]:
+    # Double hashing from two cheap stable checksums (hash() is salted per process)
+    data = case_id.encode('utf-8')
+    h1 = zlib.crc32(data)
+    h2 = zlib.adler32(data) | 1
+    return tuple((h1 + i * h2) % bits for i in range(BLOOM_HASHES))
+
+def _decode(payload: bytes) -> List[list]:
+    return json.loads(zlib.decompress(payload))
+
+def _record(row: list) -> Dict:
+    return dict(zip(RECORD_FIELDS, row))
+
+def _block_hash(prev_hash: bytes, count: int, payload: bytes) -> bytes:
+    return hashlib.sha256(prev_hash + count.to_bytes(4, 'little') + payload).digest()
+
+class AuditLog:
+    """Append-only assessment log; usable as a batch_analyze listener"""
+
+    def __init__(self, directory: str, detector=None, block_records: int = 512,
+                 segment_bytes: int = 64 << 20, fsync_blocks: int = 16, compression: int = 1,
+                 cache_blocks: int = 32, clock=time.time):
+        self.directory = directory
+        self.block_records = block_records
+        self.segment_bytes = segment_bytes
+        self.fsync_blocks = fsync_blocks
+        self.compression = compression
+        self.clock = clock
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        os.makedirs(directory, exist_ok=True)
+
+        self.blocks: List[BlockEntry] = []
+        self._block_times: List[float] = []
+        self._configs: Dict[str, Dict] = {}
+        self._pending: List[list] = []
+        self._pending_first = self._pending_last = 0.0
+        self._unsynced = 0
+        self._cache: 'OrderedDict[Tuple[int, int], List[list]]' = OrderedDict()
+        self._cache_blocks = cache_blocks
+        self._log = self._index = None
+        self.records = 0
+
+        self._load_configs()
+        self._open_segments()
+        self.fingerprint = None
+        if detector is not None:
+            self.fingerprint = self.register_config(detector)
+
+    # -- files ------------------------------------------------------------
+
+    def _path(self, segment: int, suffix: str) -> str:
+        return os.path.join(self.directory, SEGMENT_NAME.format(segment) + suffix)
+
+    def _segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith('segment-') and name.endswith('.log'):
+                segments.append(int(name[len('segment-'):-len('.log')]))
+        return sorted(segments)
+
+    def _read_index(self, segment: int) -> List[BlockEntry]:
+        entries = []
+        try:
+            with open(self._path(segment, '.idx'), 'rb') as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return entries
+        position = 0
+        while position + INDEX_ENTRY.size <= len(data):
+            offset, length, count, first_ts, last_ts, block_hash, bloom_len = INDEX_ENTRY.unpack_from(data, position)
+            end = position + INDEX_ENTRY.size + bloom_len
+            if end > len(data):
+                break
+            bloom = int.from_bytes(data[position + INDEX_ENTRY.size:end], 'little')
+            entries.append(BlockEntry(segment, offset, length, count, first_ts, last_ts, block_hash,
+                                      bloom, bloom_len * 8))
+            position = end
+        return entries
+
+    def _open_segments(self):
+        segments = self._segments()
+        for segment in segments:
+            self.blocks.extend(self._read_index(segment))
+        self.segment = segments[-1] if segments else 1
+        self._recover()
+        self._block_times = [entry.first_ts for entry in self.blocks]
+        self.records = sum(entry.count for entry in self.blocks)
+        self._log = open(self._path(self.segment, '.log'), 'ab')
+        self._index = open(self._path(self.segment, '.idx'), 'ab')
+
+    def _recover(self):
+        """Drop a torn tail left by a crash: index entries without a complete block, and unindexed bytes"""
+        log_path = self._path(self.segment, '.log')
+        size = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+        while self.blocks and self.blocks[-1].segment == self.segment and \
+                self.blocks[-1].offset + self.blocks[-1].length > size:
+            self.blocks.pop()
+        tail = [entry for entry in self.blocks if entry.segment == self.segment]
+        end = tail[-1].offset + tail[-1].length if tail else 0
+        if size > end:
+            with open(log_path, 'r+b') as fh:
+                fh.truncate(end)
+        index_path = self._path(self.segment, '.idx')
+        if os.path.exists(index_path):
+            valid = sum(INDEX_ENTRY.size + entry.bloom_bits // 8 for entry in tail)
+            if os.path.getsize(index_path) > valid:
+                with open(index_path, 'r+b') as fh:
+                    fh.truncate(valid)
+
+    def _load_configs(self):
+        try:
+            with open(os.path.join(self.directory, 'configs.jsonl'), encoding='utf-8') as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._configs[entry['fingerprint']] = entry['config']
+        except FileNotFoundError:
+            pass
+
+    def register_config(self, detector) -> str:
+        """Store a detector's configuration (once) and return its fingerprint"""
+        config = detector_config(detector)
+        fingerprint = config_fingerprint(config)
+        if fingerprint not in self._configs:
+            with open(os.path.join(self.directory, 'configs.jsonl'), 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps({'fingerprint': fingerprint, 'config': config}) + '\n')
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._configs[fingerprint] = config
+        return fingerprint
+
+    def config(self, fingerprint: str) -> Optional[Dict]:
+        return self._configs.get(fingerprint)
+
+    # -- writing ----------------------------------------------------------
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.append(assessment)
+
+    def append(self, assessment: FraudAssessment, fingerprint: Optional[str] = None):
+        fingerprint = fingerprint or self.fingerprint
+        if fingerprint is None:
+            raise ValueError("no detector configuration registered; pass detector= or register_config() first")
+        ts = self.clock()
+        # Keep block times monotonic even if the wall clock steps back
+        if self._pending:
+            ts = max(ts, self._pending_last)
+        elif self.blocks:
+            ts = max(ts, self.blocks[-1].last_ts)
+        row = [
+            assessment.case_id, ts, fingerprint,
+            assessment.fraud_type.value if assessment.fraud_type else None,
+            assessment.risk_level.value, assessment.risk_score, assessment.confidence,
+            assessment.is_likely_fraud, assessment.is_likely_error,
+            [[ind.indicator_type, ind.weight, ind.evidence] for ind in assessment.indicators if ind.detected],
+            assessment.recommendations,
+        ]
+        if not self._pending:
+            self._pending_first = ts
+        self._pending_last = ts
+        self._pending.append(row)
+        if len(self._pending) >= self.block_records:
+            self._write_block()
+
+    def _write_block(self):
+        if not self._pending:
+            return
+        # One encoder call per block rather than per record
+        payload = zlib.compress(self._encode(self._pending).encode('utf-8'), self.compression)
+        count = len(self._pending)
+        prev_hash = self.blocks[-1].hash if self.blocks else GENESIS
+        block_hash = _block_hash(prev_hash, count, payload)
+
+        if self._log.tell() >= self.segment_bytes:
+            self._roll()
+        bloom_bits = max(64, 1 << (count * 10 - 1).bit_length())
+        bloom = 0
+        for row in self._pending:
+            for position in _bloom_positions(row[0], bloom_bits):
+                bloom |= 1 << position
+
+        offset = self._log.tell()
+        self._log.write(BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload), count, prev_hash))
+        self._log.write(payload)
+        length = BLOCK_HEADER.size + len(payload)
+        entry = BlockEntry(self.segment, offset, length, count, self._pending_first, self._pending_last,
+                           block_hash, bloom, bloom_bits)
+        self._index.write(INDEX_ENTRY.pack(offset, length, count, entry.first_ts, entry.last_ts,
+                                           block_hash, bloom_bits // 8))
+        self._index.write(bloom.to_bytes(bloom_bits // 8, 'little'))
+        self.blocks.append(entry)
+        self._block_times.append(entry.first_ts)
+        self.records += count
+        self._pending = []
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_blocks:
+            self._sync()
+
+    def _sync(self):
+        # Data before index: an index entry must never point at unsynced data
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._unsynced = 0
+
+    def _roll(self):
+        self._sync()
+        self._log.close()
+        self._index.close()
+        self.segment += 1
+        self._log = open(self._path(self.segment, '.log'), 'ab')
+        self._index = open(self._path(self.segment, '.idx'), 'ab')
+
+    def flush(self):
+        """Write any partial block and fsync"""
+        self._write_block()
+        self._sync()
+
+    def close(self):
+        if self._log is None:
+            return
+        self.flush()
+        self._log.close()
+        self._index.close()
+        self._log = self._index = None
+
+    def __enter__(self) -> 'AuditLog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- reading ----------------------------------------------------------
+
+    def _read_block(self, entry: BlockEntry) -> List[list]:
+        """Rows of a block; callers build record dicts only for the rows they return"""
+        key = (entry.segment, entry.offset)
+        rows = self._cache.get(key)
+        if rows is not None:
+            self._cache.move_to_end(key)
+            return rows
+        if entry.segment == self.segment and self._log is not None:
+            self._log.flush()
+        with open(self._path(entry.segment, '.log'), 'rb') as fh:
+            fh.seek(entry.offset)
+            data = fh.read(entry.length)
+        rows = _decode(data[BLOCK_HEADER.size:])
+        self._cache[key] = rows
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return rows
+
+    def history(self, case_id: str) -> List[Dict]:
+        """Every logged assessment of a case, oldest first"""
+        found = []
+        positions_by_bits: Dict[int, Tuple[int, ...]] = {}
+        for entry in self.blocks:
+            positions = positions_by_bits.get(entry.bloom_bits)
+            if positions is None:
+                positions = positions_by_bits[entry.bloom_bits] = _bloom_positions(case_id, entry.bloom_bits)
+            bloom = entry.bloom
+            if all(bloom >> p & 1 for p in positions):
+                found.extend(_record(row) for row in self._read_block(entry) if row[0] == case_id)
+        found.extend(_record(row) for row in self._pending if row[0] == case_id)
+        return found
+
+    def between(self, start: float, end: float) -> Iterator[Dict]:
+        """Logged assessments with start <= ts <= end, in log order"""
+        first = max(0, bisect_right(self._block_times, start) - 1)
+        last = bisect_right(self._block_times, end)
+        for entry in self.blocks[first:last]:
+            if entry.last_ts < start:
+                continue
+            for row in self._read_block(entry):
+                if start <= row[1] <= end:
+                    yield _record(row)
+        for row in self._pending:
+            if start <= row[1] <= end:
+                yield _record(row)
+
+    def head(self) -> str:
+        """Hash of the latest written block, for anchoring outside the log"""
+        return (self.blocks[-1].hash if self.blocks else GENESIS).hex()
+
+    def verify(self) -> VerificationResult:
+        """Re-read every segment and check block hashes, the chain, the index and stored configs"""
+        if self._log is not None:
+            self._log.flush()
+            self._index.flush()
+        prev_hash = GENESIS
+        blocks = records = 0
+        indexed = iter(self.blocks)
+
+        def fail(message):
+            return VerificationResult(False, blocks, records, prev_hash.hex(), message)
+
+        for fingerprint, config in self._configs.items():
+            if config_fingerprint(config) != fingerprint:
+                return fail(f"stored configuration {fingerprint} does not match its fingerprint")
+        for segment in self._segments():
+            with open(self._path(segment, '.log'), 'rb') as fh:
+                data = fh.read()
+            position = 0
+            while position < len(data):
+                if position + BLOCK_HEADER.size > len(data):
+                    return fail(f"segment {segment}: truncated block header at {position}")
+                magic, length, count, stored_prev = BLOCK_HEADER.unpack_from(data, position)
+                if magic != BLOCK_MAGIC:
+                    return fail(f"segment {segment}: bad block magic at {position}")
+                payload = data[position + BLOCK_HEADER.size:position + BLOCK_HEADER.size + length]
+                if len(payload) != length:
+                    return fail(f"segment {segment}: truncated block at {position}")
+                if stored_prev != prev_hash:
+                    return fail(f"segment {segment}: block at {position} does not chain from the previous block")
+                block_hash = _block_hash(prev_hash, count, payload)
+                entry = next(indexed, None)
+                if entry is None or entry.hash != block_hash or (entry.segment, entry.offset) != (segment, position):
+                    return fail(f"segment {segment}: block at {position} does not match the index")
+                try:
+                    rows = _decode(payload)
+                except (zlib.error, ValueError):
+                    return fail(f"segment {segment}: block at {position} is corrupt")
+                if len(rows) != count:
+                    return fail(f"segment {segment}: block at {position} holds {len(rows)} records, not {count}")
+                if any(row[2] not in self._configs for row in rows):
+                    return fail(f"segment {segment}: record references an unknown configuration")
+                prev_hash = block_hash
+                blocks += 1
+                records += count
+                position += BLOCK_HEADER.size + length
+        if next(indexed, None) is not None:
+            return fail("index lists blocks missing from the segments")
+        return VerificationResult(True, blocks, records, prev_hash.hex())
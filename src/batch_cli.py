@@ -0,0 +1,852 @@
+#!/usr/bin/env python3
+"""
+Council Tax Fraud Detection batch CLI
+Scores case files and writes assessments for scheduled jobs.
+
+Only the standard library is imported at start-up; detector, validation and
+report modules are imported by the commands that need them, and pandas,
+plotly and streamlit are never imported.
+"""
+
+import argparse
+import sys
+import time
+
+__version__ = "1.0.0"
+
+EXIT_OK = 0
+EXIT_HIGH_RISK = 1
+EXIT_USAGE = 2
+EXIT_INPUT_ERROR = 3
+EXIT_REJECTED_ROWS = 4
+EXIT_OUTPUT_ERROR = 5
+
+FAIL_ON_LEVELS = {
+    'none': (),
+    'high': ('high', 'critical'),
+    'critical': ('critical',),
+}
+
+class CliError(Exception):
+    def __init__(self, message: str, exit_code: int):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+def _input_format(path: str, explicit=None) -> str:
+    if explicit:
+        return explicit
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        return 'csv'
+    if lower.endswith('.json'):
+        return 'json'
+    return 'jsonl'
+
+def iter_cases(path: str, fmt=None):
+    """Yield case dicts from a JSONL, JSON array or CSV file ('-' reads JSONL from stdin)"""
+    import json
+    fmt = _input_format(path, fmt)
+    try:
+        fh = sys.stdin if path == '-' else open(path, newline='' if fmt == 'csv' else None, encoding='utf-8')
+    except OSError as exc:
+        raise CliError(f"cannot open input {path}: {exc.strerror}", EXIT_INPUT_ERROR)
+    try:
+        if fmt == 'csv':
+            import csv
+            for row in csv.DictReader(fh):
+                # Empty cells mean "not present" rather than an empty string value
+                yield {k: v for k, v in row.items() if v != ''}
+        elif fmt == 'json':
+            data = json.load(fh)
+            if not isinstance(data, list):
+                raise CliError(f"{path}: expected a JSON array of cases", EXIT_INPUT_ERROR)
+            yield from data
+        else:
+            for line_number, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    case = json.loads(line)
+                except ValueError as exc:
+                    raise CliError(f"{path}:{line_number}: invalid JSON: {exc}", EXIT_INPUT_ERROR)
+                yield case
+    except ValueError as exc:
+        raise CliError(f"{path}: invalid {fmt} input: {exc}", EXIT_INPUT_ERROR)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+def _declared_types(path: str, fmt=None):
+    """Value types of each input column when the format fixes them (every CSV cell is text), else None"""
+    if path == '-' or _input_format(path, fmt) != 'csv':
+        return None
+    import csv
+    try:
+        with open(path, newline='', encoding='utf-8') as fh:
+            header = next(csv.reader(fh), [])
+    except OSError as exc:
+        raise CliError(f"cannot open input {path}: {exc.strerror}", EXIT_INPUT_ERROR)
+    return dict.fromkeys(header, (str,))
+
+def _open_output(path: str, newline=None):
+    if path == '-':
+        return sys.stdout
+    try:
+        return open(path, 'w', encoding='utf-8', newline=newline)
+    except OSError as exc:
+        raise CliError(f"cannot write output {path}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+
+def _write_assessments(assessments, path: str, fmt: str):
+    import json
+    fh = _open_output(path, newline='' if fmt == 'csv' else None)
+    try:
+        if fmt == 'csv':
+            import csv
+            writer = None
+            for assessment in assessments:
+                record = assessment.to_dict()
+                record['indicators'] = ';'.join(record['indicators'])
+                record['recommendations'] = ';'.join(record['recommendations'])
+                if writer is None:
+                    writer = csv.DictWriter(fh, fieldnames=list(record))
+                    writer.writeheader()
+                writer.writerow(record)
+        else:
+            encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+            for assessment in assessments:
+                fh.write(encode(assessment.to_dict()))
+                fh.write('\n')
+    except OSError as exc:
+        raise CliError(f"failed writing {path}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+
+def _print_statistics(stats, elapsed: float, rejected: int = 0, stream=None):
+    stream = stream or sys.stderr
+    total = stats['total_cases']
+    rate = total / elapsed if elapsed > 0 else 0.0
+
+    def pct(n):
+        return f"{n / total * 100:.1f}%" if total else "0.0%"
+
+    print(f"Total Cases Analyzed: {total}", file=stream)
+    if rejected:
+        print(f"Rejected Rows: {rejected}", file=stream)
+    print(f"High Risk Cases: {stats['high_risk']} ({pct(stats['high_risk'])})", file=stream)
+    print(f"Likely Fraud: {stats['likely_fraud']} ({pct(stats['likely_fraud'])})", file=stream)
+    print(f"Likely Errors: {stats['likely_error']} ({pct(stats['likely_error'])})", file=stream)
+    for fraud_type, count in sorted(stats['by_type'].items()):
+        print(f"  • {fraud_type.replace('_', ' ').title()}: {count} cases", file=stream)
+    print(f"Elapsed: {elapsed:.2f}s ({rate:,.0f} cases/s)", file=stream)
+
+def _make_profiler(args):
+    if not args.profile:
+        return None
+    from profiling import BatchProfiler
+    return BatchProfiler(sample_rate=args.profile_rate, mode=args.profile_mode)
+
+def _finish_profile(profiler, args):
+    """Write PREFIX.collapsed and PREFIX.trace.json and summarise the profile on stderr"""
+    if profiler is None:
+        return
+    profiler.close()
+    try:
+        profiler.write_collapsed(f'{args.profile}.collapsed')
+        profiler.write_chrome_trace(f'{args.profile}.trace.json')
+    except OSError as exc:
+        raise CliError(f"cannot write profile {args.profile}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+    if args.quiet:
+        return
+    summary = profiler.summary()
+    print(f"Profile: {summary['timed']} cases timed, {summary['sampled']} sampled ({summary['mode']}); "
+          f"p50 {summary['p50_latency_us'] or 0:.1f}us, p99 {summary['p99_latency_us'] or 0:.1f}us, "
+          f"max {summary['max_latency_us'] or 0:.1f}us", file=sys.stderr)
+    for row in profiler.top_functions(5):
+        print(f"  {row['tottime'] * 1e3:8.2f}ms {row['ncalls']:>8} {row['function']}", file=sys.stderr)
+    for timing in profiler.outliers()[:5]:
+        print(f"  slow: {timing.case_id} {timing.latency * 1e6:.0f}us [{','.join(timing.signature)}]",
+              file=sys.stderr)
+    print(f"  wrote {args.profile}.collapsed and {args.profile}.trace.json", file=sys.stderr)
+
+def _load_cases(args):
+    cases = list(iter_cases(args.input, args.input_format))
+    rejected = []
+    if args.validate or _input_format(args.input, args.input_format) == 'csv':
+        from case_schema import validate_cases
+        report = validate_cases(cases, field_types=_declared_types(args.input, args.input_format))
+        cases, rejected = report.cases, report.rejected
+        _print_rejections(rejected)
+    return cases, rejected
+
+def _print_rejections(rejected, offset: int = 0, limit: int = 10):
+    for rejection in rejected[:limit]:
+        print(f"rejected row {rejection.row + offset} ({rejection.case_id}): "
+              f"{rejection.field}={rejection.value}: {rejection.error}", file=sys.stderr)
+
+class _CaseChunks:
+    """Input cases read in chunks, each validated like _load_cases when --validate is given or the input is CSV"""
+
+    def __init__(self, args, size: int):
+        self.args = args
+        self.size = size
+        self.rejected = 0
+
+    def __iter__(self):
+        from itertools import islice
+        args = self.args
+        cases = iter_cases(args.input, args.input_format)
+        chunks = iter(lambda: list(islice(cases, self.size)), [])
+        if not (args.validate or _input_format(args.input, args.input_format) == 'csv'):
+            yield from chunks
+            return
+        # CSV values are strings; unvalidated, "False" would be stored as a set flag
+        from case_schema import validate_cases
+        field_types = _declared_types(args.input, args.input_format)
+        offset = 0
+        for chunk in chunks:
+            report = validate_cases(chunk, field_types=field_types)
+            _print_rejections(report.rejected, offset, max(0, 10 - self.rejected))
+            self.rejected += len(report.rejected)
+            offset += len(chunk)
+            yield report.cases
+
+def cmd_score(args) -> int:
+    from fraud_detector import CouncilTaxFraudDetector
+
+    start = time.perf_counter()
+    cases, rejected = _load_cases(args)
+    detector = CouncilTaxFraudDetector()
+    if args.outcome_table:
+        from outcome_table import OutcomeTable
+        detector = OutcomeTable(detector)
+    profiler = _make_profiler(args)
+    audit = _open_audit_log(args)
+    try:
+        if args.adaptive and (args.job_dir or args.tenant_config or profiler):
+            raise CliError("--adaptive cannot be combined with --job-dir, --tenant-config or --profile", EXIT_USAGE)
+        if args.job_dir:
+            return _score_job(args, cases, rejected, detector, start, profiler, audit)
+        if args.tenant_config:
+            results = _score_tenants(args, cases, audit)
+        else:
+            if audit is not None:
+                audit.fingerprint = audit.register_config(detector)
+            if args.adaptive:
+                results = _score_adaptive(args, cases, detector, audit)
+            else:
+                results = detector.batch_analyze(cases, [audit] if audit else None, profiler)
+    finally:
+        if audit is not None:
+            audit.close()
+    _finish_profile(profiler, args)
+    _write_assessments(results['assessments'], args.output, args.format)
+    _write_snapshot(args, lambda writer: [writer.add(a) for a in results['assessments']])
+    _write_bitmap_index(args, lambda writer: [writer.add(c, a) for c, a in zip(cases, results['assessments'])])
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        _print_statistics(results['statistics'], elapsed, len(rejected))
+    if rejected and args.strict:
+        return EXIT_REJECTED_ROWS
+    fail_levels = FAIL_ON_LEVELS[args.fail_on]
+    if fail_levels and any(a.risk_level.value in fail_levels for a in results['assessments']):
+        return EXIT_HIGH_RISK
+    return EXIT_OK
+
+def _score_adaptive(args, cases, detector, audit=None):
+    import json
+    from adaptive_pipeline import AdaptiveController, AdaptivePipeline
+
+    controller = AdaptiveController(
+        target_latency=args.target_latency / 1000 if args.target_latency else None,
+        target_throughput=args.target_throughput,
+        max_workers=args.workers,
+        memory_limit=args.memory_limit_mb << 20 if args.memory_limit_mb else None,
+    )
+    pipeline = AdaptivePipeline(detector, controller, listeners=[audit] if audit else None)
+    results = pipeline.run(cases)
+    metrics = results['metrics']
+    if args.metrics:
+        try:
+            with open(args.metrics, 'w', encoding='utf-8') as fh:
+                json.dump(dict(metrics, history=[d._asdict() for d in controller.decisions]), fh, indent=2)
+        except OSError as exc:
+            raise CliError(f"cannot write metrics {args.metrics}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+    if not args.quiet:
+        print(f"Adaptive: settled at {metrics['batch_size']} cases x {metrics['workers']} workers after "
+              f"{metrics['chunks']} chunks; p95 chunk latency {(metrics['latency_p95'] or 0) * 1e3:.1f}ms; "
+              f"decisions {metrics['decisions']}", file=sys.stderr)
+    return results
+
+def _open_audit_log(args):
+    if not args.audit_log:
+        return None
+    from audit_log import AuditLog
+    try:
+        return AuditLog(args.audit_log)
+    except OSError as exc:
+        raise CliError(f"cannot open audit log {args.audit_log}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+
+def _write_snapshot(args, fill):
+    """Write a run snapshot for `diff`; fill(writer) adds the run's assessments"""
+    if not args.snapshot:
+        return
+    from run_snapshots import SnapshotWriter
+    try:
+        with SnapshotWriter(args.snapshot) as writer:
+            fill(writer)
+    except OSError as exc:
+        raise CliError(f"failed writing snapshot {args.snapshot}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+
+def _write_bitmap_index(args, fill):
+    """Write an indicator bitmap index for `query`; fill(writer) adds the run's cases and assessments"""
+    if not args.bitmap_index:
+        return
+    from bitmap_index import BitmapIndexWriter
+    try:
+        with BitmapIndexWriter(args.bitmap_index) as writer:
+            fill(writer)
+    except OSError as exc:
+        raise CliError(f"failed writing bitmap index {args.bitmap_index}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+
+def _score_tenants(args, cases, audit=None):
+    from tenants import TenantRegistry, TenantScheduler, tenant_of
+
+    try:
+        registry = TenantRegistry.load(args.tenant_config)
+    except OSError as exc:
+        raise CliError(f"cannot read tenant config {args.tenant_config}: {exc.strerror}", EXIT_INPUT_ERROR)
+    except (ValueError, KeyError) as exc:
+        raise CliError(f"invalid tenant config {args.tenant_config}: {exc}", EXIT_INPUT_ERROR)
+    listeners = None
+    if audit is not None:
+        fingerprints = {}
+
+        def log_assessment(case, assessment):
+            tenant = tenant_of(case)
+            fingerprint = fingerprints.get(tenant)
+            if fingerprint is None:
+                fingerprint = fingerprints[tenant] = audit.register_config(registry.detector_for(tenant))
+            audit.append(assessment, fingerprint)
+        listeners = [log_assessment]
+    results = TenantScheduler(registry, workers=args.workers).run(cases, listeners)
+    if not args.quiet:
+        for tenant, stats in sorted(results['by_tenant'].items()):
+            print(f"{tenant}: {stats['total_cases']} cases, {stats['high_risk']} high risk, "
+                  f"{stats['likely_fraud']} likely fraud", file=sys.stderr)
+    return results
+
+def _score_job(args, cases, rejected, detector, start, profiler=None, audit=None) -> int:
+    from batch_jobs import BatchJob, JobMismatchError
+
+    if args.format != 'jsonl':
+        raise CliError("--job-dir writes JSONL output only", EXIT_USAGE)
+    if args.tenant_config:
+        raise CliError("--job-dir cannot be combined with --tenant-config", EXIT_USAGE)
+    if audit is not None:
+        audit.fingerprint = audit.register_config(detector)
+    try:
+        job = BatchJob(args.job_dir, detector, chunk_size=args.chunk_size, profiler=profiler,
+                       listeners=[audit] if audit else None)
+    except JobMismatchError as exc:
+        raise CliError(str(exc), EXIT_USAGE)
+    if job.completed_chunks and not args.quiet:
+        print(f"Resuming after {job.completed_chunks} chunks ({job.completed_cases} cases)", file=sys.stderr)
+    try:
+        stats = job.run(cases)
+    except JobMismatchError as exc:
+        raise CliError(str(exc), EXIT_INPUT_ERROR)
+    except OSError as exc:
+        raise CliError(f"failed writing job {args.job_dir}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+    _finish_profile(profiler, args)
+    fh = _open_output(args.output)
+    try:
+        job.assemble(fh)
+    except OSError as exc:
+        raise CliError(f"failed writing {args.output}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    _write_snapshot(args, lambda writer: writer.extend(job.iter_records()))
+    _write_bitmap_index(args, lambda writer: [writer.add_record(c, r) for c, r in zip(cases, job.iter_records())])
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        _print_statistics(stats, elapsed, len(rejected))
+    if rejected and args.strict:
+        return EXIT_REJECTED_ROWS
+    fail_levels = FAIL_ON_LEVELS[args.fail_on]
+    if any(stats['by_risk_level'].get(level) for level in fail_levels):
+        return EXIT_HIGH_RISK
+    return EXIT_OK
+
+def cmd_explain(args) -> int:
+    from explainability import ExplanationBuilder, HtmlReportWriter, write_jsonl
+
+    cases, rejected = _load_cases(args)
+    explanations = ExplanationBuilder().explain_batch(cases)
+    fh = _open_output(args.output)
+    try:
+        if args.format == 'html':
+            with HtmlReportWriter(fh) as writer:
+                count = writer.write_all(explanations)
+        else:
+            count = write_jsonl(explanations, fh)
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    if not args.quiet:
+        print(f"Explained {count} cases", file=sys.stderr)
+    if rejected and args.strict:
+        return EXIT_REJECTED_ROWS
+    return EXIT_OK
+
+def cmd_generate(args) -> int:
+    import json
+    from data_generator import generate_sample_cases
+
+    fh = _open_output(args.output)
+    try:
+        for case in generate_sample_cases(args.count, seed=args.seed):
+            fh.write(json.dumps(case))
+            fh.write('\n')
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    return EXIT_OK
+
+def cmd_ingest(args) -> int:
+    import os
+    from cdc_ingestion import CaseStore, IngestionPipeline, SQLiteChangeSource
+
+    store = CaseStore(args.store)
+    profiler = _make_profiler(args)
+    server = None
+    listeners = []
+    if args.live_feed is not None:
+        from live_feed import FeedHub, LiveFeedServer
+        host, _, port = args.live_feed.rpartition(':')
+        hub = FeedHub()
+        try:
+            server = LiveFeedServer(hub, host or '127.0.0.1', int(port)).start()
+        except (OSError, ValueError) as exc:
+            raise CliError(f"cannot serve live feed on {args.live_feed}: {exc}", EXIT_USAGE)
+        listeners.append(hub)
+        if not args.quiet:
+            print(f"Live feed: http://{server.host}:{server.port}/events", file=sys.stderr)
+    pipeline = IngestionPipeline(store, batch_size=args.batch_size, listeners=listeners, profiler=profiler)
+    for spec in args.sources:
+        name, _, path = spec.rpartition('=')
+        if not os.path.exists(path):
+            raise CliError(f"change source not found: {path}", EXIT_INPUT_ERROR)
+        pipeline.register(SQLiteChangeSource(path, name or os.path.splitext(os.path.basename(path))[0]))
+    try:
+        stats = pipeline.run(args.max_batches)
+    finally:
+        if server is not None:
+            hub.flush()
+            server.stop()
+    store.close()
+    _finish_profile(profiler, args)
+    if not args.quiet:
+        print(f"Events: {stats.events} ({stats.duplicates} already applied) in {stats.batches} batches", file=sys.stderr)
+        for name, count in sorted(stats.by_source.items()):
+            print(f"  • {name}: {count}", file=sys.stderr)
+        print(f"Cases changed: {stats.changed_cases}  rescored: {stats.rescored}", file=sys.stderr)
+        print(f"Elapsed: {stats.elapsed:.2f}s ({stats.events_per_second:,.0f} events/s)", file=sys.stderr)
+    return EXIT_OK
+
+def cmd_rank(args) -> int:
+    import json
+    from external_ranking import ExternalRanker
+    from fraud_detector import CouncilTaxFraudDetector
+
+    detector = CouncilTaxFraudDetector().compile()
+    ranker = ExternalRanker(args.spill_dir, memory_budget=args.memory_mb << 20)
+    chunks = _CaseChunks(args, 10000)
+    try:
+        for chunk in chunks:
+            detector.batch_analyze(chunk, listeners=[ranker])
+        if args.top_only:
+            top = ranker.top_k(args.top, args.by)
+        else:
+            ranking = ranker.ranking(args.by)
+            top = ranking.top(args.top)
+        fh = _open_output(args.output)
+        try:
+            for row in top:
+                fh.write(json.dumps(row))
+                fh.write('\n')
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
+        if not args.quiet:
+            print(f"Ranked {ranker.count} cases by {args.by} ({ranker.run_count} spilled runs"
+                  + (f", {chunks.rejected} rows rejected)" if chunks.rejected else ')'), file=sys.stderr)
+            if not args.top_only:
+                for q, value in ranking.percentiles(args.percentiles).items():
+                    print(f"  p{q:g}: {value}", file=sys.stderr)
+    finally:
+        ranker.close()
+    if chunks.rejected and args.strict:
+        return EXIT_REJECTED_ROWS
+    return EXIT_OK
+
+def cmd_audit(args) -> int:
+    import json
+    import os
+    from audit_log import AuditLog
+
+    if not os.path.isdir(args.log):
+        raise CliError(f"no audit log at {args.log}", EXIT_INPUT_ERROR)
+    if not args.case and not args.verify:
+        raise CliError("audit needs --case and/or --verify", EXIT_USAGE)
+    with AuditLog(args.log) as log:
+        if args.verify:
+            result = log.verify()
+            print(f"{'OK' if result.ok else 'FAILED'}: {result.blocks} blocks, {result.records} records, "
+                  f"head {result.head}" + (f" - {result.error}" if result.error else ''), file=sys.stderr)
+            if not result.ok:
+                return EXIT_INPUT_ERROR
+        if args.case:
+            fh = _open_output(args.output)
+            try:
+                for case_id in args.case:
+                    for record in log.history(case_id):
+                        if args.with_config:
+                            record = dict(record, config_detail=log.config(record['config']))
+                        fh.write(json.dumps(record))
+                        fh.write('\n')
+            finally:
+                if fh is not sys.stdout:
+                    fh.close()
+    return EXIT_OK
+
+def cmd_diff(args) -> int:
+    from run_snapshots import Snapshot, SnapshotDiff
+
+    snapshots = []
+    for path in (args.old, args.new):
+        try:
+            snapshots.append(Snapshot(path))
+        except (OSError, ValueError) as exc:
+            raise CliError(f"cannot open snapshot {path}: {exc}", EXIT_INPUT_ERROR)
+    diff = SnapshotDiff(*snapshots)
+    fh = _open_output(args.output)
+    try:
+        diff.write_jsonl(fh, args.kinds)
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    if not args.quiet:
+        counts = diff.counts()
+        print(f"{len(snapshots[0])} -> {len(snapshots[1])} cases: {counts['escalated']} escalated, "
+              f"{counts['de_escalated']} de-escalated, {counts['new']} new, {counts['closed']} closed",
+              file=sys.stderr)
+        for transition, count in sorted(counts['transitions'].items()):
+            print(f"  {transition}: {count}", file=sys.stderr)
+    return EXIT_OK
+
+def cmd_query(args) -> int:
+    from bitmap_index import BitmapIndex
+
+    try:
+        index = BitmapIndex(args.index)
+    except (OSError, ValueError) as exc:
+        raise CliError(f"cannot open bitmap index {args.index}: {exc}", EXIT_INPUT_ERROR)
+    if args.list:
+        for name in index.names:
+            print(f"{name}\t{index.cardinality(name)}")
+        return EXIT_OK
+    if not args.queries:
+        raise CliError("query needs at least one expression (or --list)", EXIT_USAGE)
+    for query in args.queries:
+        start = time.perf_counter()
+        try:
+            count = index.count(query)
+        except ValueError as exc:
+            raise CliError(str(exc), EXIT_USAGE)
+        elapsed = time.perf_counter() - start
+        print(f"{count}\t{query}")
+        if args.ids:
+            for case_id in index.case_ids(query, args.limit):
+                print(case_id)
+        if not args.quiet:
+            print(f"  {count} of {len(index)} cases ({elapsed * 1e3:.2f}ms)", file=sys.stderr)
+    return EXIT_OK
+
+def cmd_hotspots(args) -> int:
+    import json
+    from fraud_detector import CouncilTaxFraudDetector
+    from geospatial import PostcodeCentroids, SpatialRiskIndex
+
+    try:
+        centroids = PostcodeCentroids.load(args.centroids)
+    except (OSError, ValueError) as exc:
+        raise CliError(f"cannot load postcode centroids {args.centroids}: {exc}", EXIT_INPUT_ERROR)
+    spatial = SpatialRiskIndex(centroids, cell_m=args.cell, radius_m=args.radius, min_cases=args.min_cases)
+    detector = CouncilTaxFraudDetector().compile()
+    chunks = _CaseChunks(args, 10000)
+    for chunk in chunks:
+        detector.batch_analyze(chunk, listeners=[spatial])
+    spots = spatial.hotspots(args.z)
+    fh = _open_output(args.output)
+    try:
+        for spot in spots:
+            fh.write(json.dumps(spot._asdict()))
+            fh.write('\n')
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    if not args.quiet:
+        print(f"{len(spots)} hotspots from {len(spatial)} located cases ({spatial.unlocated} without coordinates, "
+              f"{spatial.out_of_extent} outside the UK)"
+              + (f"; {chunks.rejected} rows rejected" if chunks.rejected else ''), file=sys.stderr)
+    if chunks.rejected and args.strict:
+        return EXIT_REJECTED_ROWS
+    return EXIT_OK
+
+def cmd_corpus(args) -> int:
+    from replay import ReplayCorpus
+
+    rejected = 0
+    if args.generate is not None:
+        corpus = ReplayCorpus.generate(args.generate, seed=args.seed)
+    elif args.input:
+        chunks = _CaseChunks(args, 50000)
+        corpus = ReplayCorpus.from_cases(chunks)
+        rejected = chunks.rejected
+        if rejected and args.strict:
+            raise CliError(f"{rejected} rows rejected by validation", EXIT_REJECTED_ROWS)
+    else:
+        raise CliError("corpus needs an input file or --generate N", EXIT_USAGE)
+    try:
+        corpus.save(args.directory)
+    except OSError as exc:
+        raise CliError(f"cannot write corpus {args.directory}: {exc.strerror}", EXIT_OUTPUT_ERROR)
+    if not args.quiet:
+        print(f"Stored {len(corpus)} cases x {len(corpus.columns)} indicators in {args.directory}"
+              + (f"; {rejected} rows rejected" if rejected else ''), file=sys.stderr)
+    return EXIT_OK
+
+def cmd_replay(args) -> int:
+    import json
+    from replay import ReplayCorpus, load_config, replay
+
+    try:
+        corpus = ReplayCorpus.load(args.corpus)
+    except (OSError, ValueError) as exc:
+        raise CliError(f"cannot open corpus {args.corpus}: {exc}", EXIT_INPUT_ERROR)
+    try:
+        old, new = load_config(args.old), load_config(args.new)
+    except (OSError, ValueError, KeyError) as exc:
+        raise CliError(f"invalid detector config: {exc}", EXIT_INPUT_ERROR)
+    report = replay(corpus, old, new, workers=args.workers)
+    if args.output:
+        fh = _open_output(args.output)
+        try:
+            report.write_jsonl(fh, args.limit)
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
+    if args.report:
+        print(json.dumps(report.to_dict(), indent=2))
+    if not args.quiet:
+        print(f"{report.changed} of {report.rows} cases changed outcome "
+              f"({report.fraud_flags['gained']} likely-fraud gained, {report.fraud_flags['lost']} lost)",
+              file=sys.stderr)
+        for transition, count in sorted(report.level_transitions.items()):
+            print(f"  {transition}: {count}", file=sys.stderr)
+        for fraud_type, counts in report.by_type.items():
+            print(f"  {fraud_type}: {counts['escalated']} escalated, {counts['de_escalated']} de-escalated, "
+                  f"{counts['gained']} gained, {counts['lost']} lost", file=sys.stderr)
+        print(f"Throughput: old {report.throughput['old']:,.0f} cases/s, new {report.throughput['new']:,.0f} cases/s "
+              f"({report.elapsed:.2f}s wall)", file=sys.stderr)
+    return EXIT_HIGH_RISK if args.fail_on_change and report.changed else EXIT_OK
+
+def cmd_demo(args) -> int:
+    from cli_demo import demonstrate_detection
+    demonstrate_detection()
+    return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='fraud-detector',
+        description='Council tax fraud detection batch runner',
+        epilog='Exit codes: 0 ok, 1 --fail-on risk found, 2 usage error, '
+               '3 input error, 4 rejected rows with --strict, 5 output error',
+    )
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    def add_input_options(command):
+        command.add_argument('input', help="case file (.jsonl, .json or .csv); '-' reads JSONL from stdin")
+        command.add_argument('--input-format', choices=['jsonl', 'json', 'csv'],
+                             help='override format detection from the file extension')
+        command.add_argument('--validate', action='store_true',
+                             help='validate and coerce case fields before scoring (always on for CSV)')
+        command.add_argument('--strict', action='store_true',
+                             help='exit with code 4 if any rows were rejected by validation')
+        command.add_argument('-q', '--quiet', action='store_true', help='do not print statistics')
+
+    def add_profile_options(command):
+        command.add_argument('--profile', metavar='PREFIX',
+                             help='time every case and write PREFIX.collapsed and PREFIX.trace.json')
+        command.add_argument('--profile-rate', type=float, default=0.01,
+                             help='fraction of cases run under cProfile (default 0.01)')
+        command.add_argument('--profile-mode', choices=['cprofile', 'sampling'], default='cprofile')
+
+    score = commands.add_parser('score', help='score a case file and write assessments')
+    add_input_options(score)
+    score.add_argument('-o', '--output', default='-', help="output file (default '-': stdout)")
+    score.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl')
+    score.add_argument('--fail-on', choices=sorted(FAIL_ON_LEVELS), default='none',
+                       help='exit with code 1 if any case reaches this risk level')
+    score.add_argument('--outcome-table', action='store_true',
+                       help='score by lookup in a memoised table of indicator-combination outcomes')
+    score.add_argument('--job-dir', help='checkpoint chunks in this directory and resume from it after a restart')
+    score.add_argument('--chunk-size', type=int, default=10000, help='cases per checkpointed chunk (with --job-dir)')
+    score.add_argument('--tenant-config', metavar='FILE',
+                       help='JSON list of per-council configs; cases are routed by council_id')
+    score.add_argument('--workers', type=int, default=4,
+                       help='worker threads for --tenant-config runs (the ceiling with --adaptive)')
+    score.add_argument('--adaptive', action='store_true',
+                       help='score through bounded read/score/write stages with adaptive chunk size and concurrency')
+    score.add_argument('--target-latency', type=float, metavar='MS', help='per-chunk latency SLO for --adaptive')
+    score.add_argument('--target-throughput', type=float, metavar='CASES_PER_S',
+                       help='stop growing chunks once --adaptive reaches this throughput')
+    score.add_argument('--memory-limit-mb', type=int, help='shrink chunks while RSS is above this (--adaptive)')
+    score.add_argument('--metrics', metavar='FILE', help='write the --adaptive controller metrics and decisions as JSON')
+    score.add_argument('--audit-log', metavar='DIR',
+                       help='append every assessment and its detector configuration to an audit log')
+    score.add_argument('--snapshot', metavar='DIR', help='write a columnar run snapshot for later diffs')
+    score.add_argument('--bitmap-index', metavar='DIR',
+                       help='write a compressed per-indicator bitmap index for population queries')
+    add_profile_options(score)
+    score.set_defaults(handler=cmd_score)
+
+    explain = commands.add_parser('explain', help='write per-case score explanations')
+    add_input_options(explain)
+    explain.add_argument('-o', '--output', default='-', help="output file (default '-': stdout)")
+    explain.add_argument('-f', '--format', choices=['jsonl', 'html'], default='jsonl')
+    explain.set_defaults(handler=cmd_explain)
+
+    generate = commands.add_parser('generate', help='write synthetic sample cases as JSONL')
+    generate.add_argument('count', type=int)
+    generate.add_argument('-o', '--output', default='-')
+    generate.add_argument('--seed', type=int)
+    generate.set_defaults(handler=cmd_generate)
+
+    ingest = commands.add_parser('ingest', help='apply change-data-capture sources to a case store and rescore')
+    ingest.add_argument('store', help='SQLite case store (created if missing)')
+    ingest.add_argument('sources', nargs='+', metavar='[NAME=]SOURCE',
+                        help='SQLite change source; NAME defaults to the file name')
+    ingest.add_argument('--batch-size', type=int, default=1000)
+    ingest.add_argument('--max-batches', type=int, help='stop after this many polls')
+    ingest.add_argument('-q', '--quiet', action='store_true')
+    ingest.add_argument('--live-feed', metavar='[HOST:]PORT',
+                        help='stream newly flagged HIGH/CRITICAL assessments as Server-Sent Events')
+    add_profile_options(ingest)
+    ingest.set_defaults(handler=cmd_ingest)
+
+    rank = commands.add_parser('rank', help='score a case file and rank it out of core within a memory budget')
+    rank.add_argument('input', help="case file (.jsonl, .json or .csv); '-' reads JSONL from stdin")
+    rank.add_argument('--input-format', choices=['jsonl', 'json', 'csv'])
+    rank.add_argument('--validate', action='store_true', help='validate and coerce case fields (always on for CSV)')
+    rank.add_argument('--strict', action='store_true', help='exit with code 4 if any rows were rejected by validation')
+    rank.add_argument('--by', choices=['risk_score', 'confidence', 'expected_recovery'], default='risk_score')
+    rank.add_argument('--top', type=int, default=20, help='number of top-ranked cases to write')
+    rank.add_argument('--percentiles', type=float, nargs='*', default=[50, 90, 99])
+    rank.add_argument('--top-only', action='store_true', help='single-pass top-K without a full external sort')
+    rank.add_argument('--memory-mb', type=int, default=64, help='memory budget for buffering and merging')
+    rank.add_argument('--spill-dir', help='directory for run files (default: a temporary directory)')
+    rank.add_argument('-o', '--output', default='-')
+    rank.add_argument('-q', '--quiet', action='store_true')
+    rank.set_defaults(handler=cmd_rank)
+
+    audit = commands.add_parser('audit', help='look up or verify an audit log written by score --audit-log')
+    audit.add_argument('log', help='audit log directory')
+    audit.add_argument('--case', action='append', default=[], metavar='CASE_ID',
+                       help='write every logged assessment of this case (repeatable)')
+    audit.add_argument('--verify', action='store_true', help='check the hash chain, index and stored configs')
+    audit.add_argument('--with-config', action='store_true',
+                       help='include the detector configuration with each record')
+    audit.add_argument('-o', '--output', default='-')
+    audit.set_defaults(handler=cmd_audit)
+
+    diff = commands.add_parser('diff', help='cases that changed risk level between two run snapshots')
+    diff.add_argument('old', help='earlier snapshot directory (score --snapshot)')
+    diff.add_argument('new', help='later snapshot directory')
+    diff.add_argument('--kinds', nargs='+', choices=['escalated', 'de_escalated', 'new', 'closed'],
+                      default=['escalated', 'de_escalated', 'new', 'closed'], help='changes to write')
+    diff.add_argument('-o', '--output', default='-')
+    diff.add_argument('-q', '--quiet', action='store_true')
+    diff.set_defaults(handler=cmd_diff)
+
+    query = commands.add_parser('query', help='count or list cases matching a boolean indicator query')
+    query.add_argument('index', help='bitmap index directory (score --bitmap-index)')
+    query.add_argument('queries', nargs='*', metavar='QUERY',
+                       help="e.g. 'electoral_register_mismatch AND multiple_vehicles AND NOT self_reported'")
+    query.add_argument('--ids', action='store_true', help='also print the matching case ids')
+    query.add_argument('--limit', type=int, help='print at most this many case ids per query')
+    query.add_argument('--list', action='store_true', help='list indexed indicators and their counts')
+    query.add_argument('-q', '--quiet', action='store_true')
+    query.set_defaults(handler=cmd_query)
+
+    hotspots = commands.add_parser('hotspots', help='score a case file and map geographic clusters of risk')
+    hotspots.add_argument('input', help="case file (.jsonl, .json or .csv); '-' reads JSONL from stdin")
+    hotspots.add_argument('--input-format', choices=['jsonl', 'json', 'csv'])
+    hotspots.add_argument('--validate', action='store_true', help='validate and coerce case fields (always on for CSV)')
+    hotspots.add_argument('--strict', action='store_true',
+                          help='exit with code 4 if any rows were rejected by validation')
+    hotspots.add_argument('--centroids', required=True, metavar='FILE',
+                          help='postcode centroid CSV (postcode, latitude, longitude)')
+    hotspots.add_argument('--cell', type=float, default=250.0, help='grid cell size in metres')
+    hotspots.add_argument('--radius', type=float, default=500.0, help='neighbourhood radius in metres')
+    hotspots.add_argument('--min-cases', type=int, default=5, help='fewest cases in a hot neighbourhood')
+    hotspots.add_argument('--z', type=float, default=1.96, help='Gi* z-score a hot cell must reach')
+    hotspots.add_argument('-o', '--output', default='-')
+    hotspots.add_argument('-q', '--quiet', action='store_true')
+    hotspots.set_defaults(handler=cmd_hotspots)
+
+    corpus = commands.add_parser('corpus', help='store case inputs as a replay corpus')
+    corpus.add_argument('directory', help='corpus directory (created if missing)')
+    corpus.add_argument('input', nargs='?', help="case file (.jsonl, .json or .csv); '-' reads JSONL from stdin")
+    corpus.add_argument('--input-format', choices=['jsonl', 'json', 'csv'])
+    corpus.add_argument('--validate', action='store_true', help='validate and coerce case fields (always on for CSV)')
+    corpus.add_argument('--strict', action='store_true', help='exit with code 4 without writing if any rows were rejected')
+    corpus.add_argument('--generate', type=int, metavar='N', help='generate N synthetic cases instead of reading a file')
+    corpus.add_argument('--seed', type=int, default=0, help='seed for --generate')
+    corpus.add_argument('-q', '--quiet', action='store_true')
+    corpus.set_defaults(handler=cmd_corpus)
+
+    replay = commands.add_parser('replay', help='diff outcomes of two detector configurations over a corpus')
+    replay.add_argument('corpus', help='corpus directory written by the corpus command')
+    replay.add_argument('--old', metavar='CONFIG', help='JSON config (tenant-config format); default: built-in')
+    replay.add_argument('--new', metavar='CONFIG', help='JSON config (tenant-config format); default: built-in')
+    replay.add_argument('--workers', type=int, default=2, help='scoring threads')
+    replay.add_argument('-o', '--output', help='write changed cases as JSONL')
+    replay.add_argument('--limit', type=int, help='write at most this many changed cases')
+    replay.add_argument('--report', action='store_true', help='print the full report as JSON on stdout')
+    replay.add_argument('--fail-on-change', action='store_true', help='exit with code 1 if any outcome changed')
+    replay.add_argument('-q', '--quiet', action='store_true')
+    replay.set_defaults(handler=cmd_replay)
+
+    demo = commands.add_parser('demo', help='run the interactive demonstration')
+    demo.set_defaults(handler=cmd_demo)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except CliError as exc:
+        print(f"fraud-detector: error: {exc}", file=sys.stderr)
+        return exc.exit_code
+    except BrokenPipeError:
+        return EXIT_OUTPUT_ERROR
+
+if __name__ == "__main__":
+    sys.exit(main())
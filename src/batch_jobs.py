@@ -0,0 +1,202 @@
+"""
+Checkpointed, resumable batch scoring jobs.
+
+A job scores its input in numbered chunks. Each chunk's assessments are
+written to their own JSONL file and then recorded in a manifest that is
+replaced atomically (write to a temporary file, fsync, os.replace), so a
+crash leaves either the previous manifest or the new one - never a torn
+one. On restart the job skips the chunks the manifest records as complete
+and carries on; chunk files are written the same way, so the assembled
+output and merged statistics are identical to an uninterrupted run.
+
+Resuming requires the input to be replayed in the same order and the
+detector configuration to be unchanged; both are checked against the
+manifest, which records a digest of each chunk's case ids.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from itertools import islice
+from operator import methodcaller
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from fraud_detector import CouncilTaxFraudDetector, detector_fingerprint, merge_statistics
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 2
+
+def _fsync_replace(tmp_path: str, path: str):
+    os.replace(tmp_path, path)
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def atomic_write(path: str, data: bytes, fsync: bool = True):
+    """Write a file so readers see either its old or its new contents"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(data)
+        if fsync:
+            fh.flush()
+            os.fsync(fh.fileno())
+    if fsync:
+        _fsync_replace(tmp_path, path)
+    else:
+        os.replace(tmp_path, path)
+
+def chunk_digest(cases: List[Dict]) -> str:
+    """Digest of a chunk's case ids in input order, to recognise the same chunk on resume"""
+    ids = '\n'.join(map(str, map(methodcaller('get', 'case_id'), cases)))
+    return hashlib.blake2b(ids.encode('utf-8'), digest_size=16).hexdigest()
+
+def _risk_levels(assessments) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for assessment in assessments:
+        level = assessment.risk_level.value
+        counts[level] = counts.get(level, 0) + 1
+    return counts
+
+class JobMismatchError(ValueError):
+    """The job directory holds a checkpoint from a different configuration"""
+
+class BatchJob:
+    """Scores cases chunk by chunk into a job directory, resuming from its manifest"""
+
+    def __init__(self, job_dir: str, detector=None, chunk_size: int = 10000,
+                 listeners: Optional[List[Callable]] = None, fsync: bool = True, profiler=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.job_dir = job_dir
+        self.detector = detector or CouncilTaxFraudDetector()
+        self.chunk_size = chunk_size
+        self.listeners = listeners
+        self.fsync = fsync
+        self.profiler = profiler
+        self.fingerprint = getattr(self.detector, 'fingerprint', None) or detector_fingerprint(self.detector)
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        os.makedirs(job_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.job_dir, MANIFEST)
+
+    def chunk_path(self, index: int) -> str:
+        return os.path.join(self.job_dir, f'chunk-{index:06d}.jsonl')
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, encoding='utf-8') as fh:
+                manifest = json.load(fh)
+        except FileNotFoundError:
+            return {
+                'version': MANIFEST_VERSION,
+                'fingerprint': self.fingerprint,
+                'chunk_size': self.chunk_size,
+                'chunks': [],
+                'statistics': {},
+                'complete': False,
+            }
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise JobMismatchError(f"{self.manifest_path}: unsupported manifest version {manifest.get('version')}")
+        if manifest['chunk_size'] != self.chunk_size:
+            raise JobMismatchError(f"{self.job_dir}: checkpoint was written with chunk_size "
+                                   f"{manifest['chunk_size']}, not {self.chunk_size}")
+        if manifest['fingerprint'] != self.fingerprint:
+            raise JobMismatchError(f"{self.job_dir}: checkpoint was written by a detector with a different "
+                                   f"configuration ({manifest['fingerprint']} != {self.fingerprint})")
+        return manifest
+
+    def _save_manifest(self):
+        data = json.dumps(self.manifest, indent=1, sort_keys=True).encode('utf-8')
+        atomic_write(self.manifest_path, data, self.fsync)
+
+    @property
+    def completed_chunks(self) -> int:
+        return len(self.manifest['chunks'])
+
+    @property
+    def completed_cases(self) -> int:
+        return sum(chunk['cases'] for chunk in self.manifest['chunks'])
+
+    @property
+    def complete(self) -> bool:
+        return self.manifest['complete']
+
+    def statistics(self) -> Dict:
+        return self.manifest['statistics']
+
+    def run_chunk(self, index: int, cases: List[Dict]) -> Dict:
+        """Score one chunk, write its output and checkpoint it"""
+        results = self.detector.batch_analyze(cases, self.listeners, self.profiler)
+        assessments = results['assessments']
+        stats = results['statistics']
+        stats['by_risk_level'] = _risk_levels(assessments)
+        encode = self._encode
+        data = ''.join(f'{encode(a.to_dict())}\n' for a in assessments).encode('utf-8')
+        atomic_write(self.chunk_path(index), data, self.fsync)
+
+        self.manifest['chunks'].append({'index': index, 'cases': len(cases), 'bytes': len(data),
+                                        'digest': chunk_digest(cases)})
+        self.manifest['statistics'] = merge_statistics(self.manifest['statistics'], stats)
+        self._save_manifest()
+        return stats
+
+    def run(self, cases: Iterable[Dict], max_chunks: Optional[int] = None,
+            on_chunk: Optional[Callable[[int, Dict], None]] = None) -> Dict:
+        """Score the input, skipping chunks already checkpointed; returns the merged statistics"""
+        if self.complete:
+            return self.statistics()
+        iterator = iter(cases)
+        for done in self.manifest['chunks']:
+            chunk = list(islice(iterator, done['cases']))
+            if len(chunk) < done['cases']:
+                raise JobMismatchError(f"{self.job_dir}: input is shorter than the "
+                                       f"{self.completed_cases} cases already checkpointed")
+            if chunk_digest(chunk) != done['digest']:
+                raise JobMismatchError(f"{self.job_dir}: input chunk {done['index']} does not hold the cases "
+                                       f"checkpointed for it; replay the input in its original order")
+
+        index = self.completed_chunks
+        run_chunks = 0
+        while max_chunks is None or run_chunks < max_chunks:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                self.manifest['complete'] = True
+                self._save_manifest()
+                break
+            stats = self.run_chunk(index, chunk)
+            if on_chunk:
+                on_chunk(index, stats)
+            index += 1
+            run_chunks += 1
+        return self.statistics()
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Assessment records of all completed chunks, in input order"""
+        for chunk in self.manifest['chunks']:
+            with open(self.chunk_path(chunk['index']), encoding='utf-8') as fh:
+                for line in fh:
+                    yield json.loads(line)
+
+    def assemble(self, fh):
+        """Concatenate completed chunk outputs into a single JSONL text stream"""
+        for chunk in self.manifest['chunks']:
+            with open(self.chunk_path(chunk['index']), encoding='utf-8') as src:
+                shutil.copyfileobj(src, fh)
+
+    def clear(self):
+        """Remove the job's chunks and manifest to start over"""
+        for chunk in self.manifest['chunks']:
+            try:
+                os.remove(self.chunk_path(chunk['index']))
+            except FileNotFoundError:
+                pass
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        self.manifest = self._load_manifest()
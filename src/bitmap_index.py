@@ -0,0 +1,359 @@
+"""
+Compressed on-disk indicator bitmap index for population queries.
+
+BitmapIndexWriter is a batch_analyze listener that records, for every
+scored case, which indicators were present (boolean case fields and the
+indicators the detector reported) and its outcome, as the pseudo-
+indicators risk_level:<level>, fraud_type:<type>, likely_fraud and
+likely_error. Row numbers follow scoring order.
+
+Storage is roaring-style: rows are split into 65536-row chunks and each
+(indicator, chunk) pair is stored as whichever container is smallest -
+a sorted uint16 array for sparse chunks, runs of (start, length - 1) for
+clustered ones, or a 1024-word bitmap for dense ones. Chunks are written
+as they fill, so memory is bounded by one chunk. The container directory
+and row count go to index.json, written last.
+
+BitmapIndex memory-maps the container file and answers boolean queries:
+
+    index = BitmapIndex('index/')
+    index.count('electoral_register_mismatch AND multiple_vehicles AND NOT self_reported')
+    index.case_ids('risk_level:critical AND (police_intelligence OR vulnerable_resident)', limit=20)
+
+Operators are AND, OR and NOT (or &, | and !), with parentheses; NOT binds
+tightest, then AND, then OR. Each indicator used is decompressed once into
+8KB words per chunk and cached, so a query is a few numpy bitwise
+operations and a popcount however many accounts are indexed.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from fraud_detector import CouncilTaxFraudDetector, FraudAssessment, RiskLevel
+
+INDEX_VERSION = 1
+META = 'index.json'
+CONTAINERS = 'containers.bin'
+CASE_IDS = 'case_ids.bin'
+CHUNK_BITS = 16
+CHUNK_ROWS = 1 << CHUNK_BITS
+CHUNK_WORDS = CHUNK_ROWS // 64
+
+ARRAY, RUN, BITMAP = 0, 1, 2
+BITMAP_BYTES = CHUNK_ROWS // 8
+
+def outcome_names(assessment: FraudAssessment) -> List[str]:
+    """Pseudo-indicators for an assessment's outcome"""
+    names = [f'risk_level:{assessment.risk_level.value}']
+    if assessment.fraud_type is not None:
+        names.append(f'fraud_type:{assessment.fraud_type.value}')
+    if assessment.is_likely_fraud:
+        names.append('likely_fraud')
+    if assessment.is_likely_error:
+        names.append('likely_error')
+    return names
+
+def _known_names(detector) -> List[str]:
+    names = [ind.indicator_type for indicators in detector.fraud_patterns.values() for ind in indicators]
+    names += [ind.indicator_type for ind in detector.error_patterns]
+    names += [f'risk_level:{level.value}' for level in RiskLevel]
+    names += [f'fraud_type:{fraud_type.value}' for fraud_type in detector.fraud_patterns]
+    return names + ['likely_fraud', 'likely_error']
+
+def encode_container(positions: np.ndarray) -> Tuple[int, bytes]:
+    """Smallest of array, run and bitmap encodings of sorted, distinct uint16 positions"""
+    positions = positions.astype('<u2')
+    breaks = np.flatnonzero(np.diff(positions.astype(np.int32)) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    run_bytes = 4 * len(starts)
+    array_bytes = 2 * len(positions)
+    if run_bytes < array_bytes and run_bytes < BITMAP_BYTES:
+        ends = np.concatenate((breaks, [len(positions)]))
+        runs = np.empty((len(starts), 2), dtype='<u2')
+        runs[:, 0] = positions[starts]
+        runs[:, 1] = ends - starts - 1
+        return RUN, runs.tobytes()
+    if array_bytes < BITMAP_BYTES:
+        return ARRAY, positions.tobytes()
+    bits = np.zeros(CHUNK_ROWS, dtype=bool)
+    bits[positions] = True
+    return BITMAP, np.packbits(bits, bitorder='little').tobytes()
+
+def decode_container(kind: int, payload) -> np.ndarray:
+    """CHUNK_WORDS uint64 words (bit i of the chunk is bit i % 64 of word i // 64)"""
+    if kind == BITMAP:
+        return np.frombuffer(payload, dtype='<u8').copy()
+    bits = np.zeros(CHUNK_ROWS, dtype=bool)
+    if kind == ARRAY:
+        bits[np.frombuffer(payload, dtype='<u2')] = True
+    else:
+        runs = np.frombuffer(payload, dtype='<u2').reshape(-1, 2).astype(np.int64)
+        delta = np.zeros(CHUNK_ROWS + 1, dtype=np.int32)
+        np.add.at(delta, runs[:, 0], 1)
+        np.add.at(delta, runs[:, 0] + runs[:, 1] + 1, -1)
+        bits = np.cumsum(delta[:CHUNK_ROWS]) > 0
+    return np.packbits(bits, bitorder='little').view('<u8')
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words: np.ndarray) -> int:
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words: np.ndarray) -> int:
+        return int(_BYTE_COUNTS[np.ascontiguousarray(words).view(np.uint8)].sum(dtype=np.int64))
+
+class BitmapIndexWriter:
+    """Builds a bitmap index chunk by chunk; usable as a batch_analyze listener"""
+
+    def __init__(self, directory: str, detector=None, id_width: int = 32):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.id_width = id_width
+        self.rows = 0
+        # Every indicator the detector knows is queryable, even if no case has it
+        known = _known_names(detector or CouncilTaxFraudDetector())
+        self._directory: Dict[str, List[list]] = {name: [] for name in known}
+        self._chunk: Dict[str, List[int]] = {}
+        self._ids: List[bytes] = []
+        self._offset = 0
+        self._containers = open(os.path.join(directory, CONTAINERS), 'wb')
+        self._case_ids = open(os.path.join(directory, CASE_IDS), 'wb')
+        self.closed = False
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.add(case, assessment)
+
+    def add(self, case: Dict, assessment: FraudAssessment):
+        names = {name for name, value in case.items() if value is True}
+        names.update(indicator.indicator_type for indicator in assessment.indicators)
+        names.update(outcome_names(assessment))
+        self.add_row(assessment.case_id, names)
+
+    def add_record(self, case: Dict, record: Dict):
+        """Add a case with its assessment record (FraudAssessment.to_dict() shape)"""
+        names = {name for name, value in case.items() if value is True}
+        names.update(record.get('indicators', ()))
+        names.add(f"risk_level:{record['risk_level']}")
+        if record.get('fraud_type'):
+            names.add(f"fraud_type:{record['fraud_type']}")
+        if record.get('is_likely_fraud'):
+            names.add('likely_fraud')
+        if record.get('is_likely_error'):
+            names.add('likely_error')
+        self.add_row(record['case_id'], names)
+
+    def add_row(self, case_id: str, names: Iterable[str]):
+        offset = self.rows & (CHUNK_ROWS - 1)
+        chunk = self._chunk
+        for name in names:
+            rows = chunk.get(name)
+            if rows is None:
+                rows = chunk[name] = []
+            rows.append(offset)
+        encoded = str(case_id).encode('utf-8')
+        if len(encoded) > self.id_width:
+            raise ValueError(f"case_id {case_id!r} is longer than id_width={self.id_width} bytes")
+        self._ids.append(encoded)
+        self.rows += 1
+        if offset == CHUNK_ROWS - 1:
+            self._flush()
+
+    def _flush(self):
+        key = (self.rows - 1) >> CHUNK_BITS
+        for name, rows in self._chunk.items():
+            kind, payload = encode_container(np.array(rows, dtype=np.uint16))
+            self._containers.write(payload)
+            self._directory.setdefault(name, []).append([key, kind, self._offset, len(payload), len(rows)])
+            self._offset += len(payload)
+        self._case_ids.write(np.array(self._ids, dtype=f'S{self.id_width}').tobytes())
+        self._chunk = {}
+        self._ids = []
+
+    def close(self):
+        if self.closed:
+            return
+        if self._ids:
+            self._flush()
+        self._containers.close()
+        self._case_ids.close()
+        meta = {'version': INDEX_VERSION, 'rows': self.rows, 'id_width': self.id_width,
+                'chunk_bits': CHUNK_BITS, 'indicators': self._directory}
+        with open(os.path.join(self.directory, META), 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh, separators=(',', ':'))
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|(&|\|)|(!)|([A-Za-z_][\w:.\-]*))')
+_OPERATORS = {'and': '&', 'or': '|', 'not': '!', '&': '&', '|': '|', '!': '!'}
+
+def _tokens(text: str) -> List[str]:
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected input at position {position}: {text[position:position + 10]!r}")
+        token = match.group(match.lastindex)
+        tokens.append(_OPERATORS.get(token.lower(), token))
+        position = match.end()
+    return tokens
+
+@lru_cache(maxsize=256)
+def parse_query(text: str) -> tuple:
+    """AST of nested tuples: ('or', a, b), ('and', a, b), ('not', a) and ('term', name)"""
+    tokens = _tokens(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ValueError(f"incomplete query: {text!r}")
+        position += 1
+        return token
+
+    def disjunction():
+        node = conjunction()
+        while peek() == '|':
+            take()
+            node = ('or', node, conjunction())
+        return node
+
+    def conjunction():
+        node = negation()
+        while peek() == '&':
+            take()
+            node = ('and', node, negation())
+        return node
+
+    def negation():
+        token = take()
+        if token == '!':
+            return ('not', negation())
+        if token == '(':
+            node = disjunction()
+            if take() != ')':
+                raise ValueError(f"missing ')' in query: {text!r}")
+            return node
+        if token in ('&', '|', ')'):
+            raise ValueError(f"unexpected '{token}' in query: {text!r}")
+        return ('term', token)
+
+    node = disjunction()
+    if peek() is not None:
+        raise ValueError(f"unexpected '{peek()}' in query: {text!r}")
+    return node
+
+class BitmapIndex:
+    """Read side of a bitmap index directory; answers boolean population queries"""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META), encoding='utf-8') as fh:
+            meta = json.load(fh)
+        if meta.get('version') != INDEX_VERSION or meta.get('chunk_bits') != CHUNK_BITS:
+            raise ValueError(f"{directory}: unsupported bitmap index format")
+        self.directory = directory
+        self.rows = meta['rows']
+        self.id_width = meta['id_width']
+        self._entries = meta['indicators']
+        self.chunks = (self.rows + CHUNK_ROWS - 1) >> CHUNK_BITS
+        path = os.path.join(directory, CONTAINERS)
+        self._data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, np.uint8)
+        ids = os.path.join(directory, CASE_IDS)
+        self._ids = (np.memmap(ids, dtype=f'S{self.id_width}', mode='r') if os.path.getsize(ids)
+                     else np.zeros(0, dtype=f'S{self.id_width}'))
+        self._dense: Dict[str, np.ndarray] = {}
+        self._universe = self._all_rows()
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._entries)
+
+    def cardinality(self, name: str) -> int:
+        return sum(entry[4] for entry in self._entry_list(name))
+
+    def _entry_list(self, name: str) -> List[list]:
+        entries = self._entries.get(name)
+        if entries is None:
+            raise ValueError(f"unknown indicator '{name}'")
+        return entries
+
+    def _all_rows(self) -> np.ndarray:
+        words = np.zeros((self.chunks, CHUNK_WORDS), dtype=np.uint64)
+        bits = np.zeros(self.chunks * CHUNK_ROWS, dtype=bool)
+        bits[:self.rows] = True
+        words.reshape(-1)[:] = np.packbits(bits, bitorder='little').view('<u8')
+        return words
+
+    def bitmap(self, name: str) -> np.ndarray:
+        """Decompressed (chunks, 1024) uint64 words of one indicator, cached"""
+        words = self._dense.get(name)
+        if words is None:
+            words = np.zeros((self.chunks, CHUNK_WORDS), dtype=np.uint64)
+            for key, kind, offset, length, _ in self._entry_list(name):
+                words[key] = decode_container(kind, self._data[offset:offset + length].tobytes())
+            words.setflags(write=False)
+            self._dense[name] = words
+        return words
+
+    def evaluate(self, query: str) -> np.ndarray:
+        """Matching rows of a query as (chunks, 1024) uint64 words"""
+        return self._evaluate(parse_query(query))
+
+    def _evaluate(self, node: tuple) -> np.ndarray:
+        op = node[0]
+        if op == 'term':
+            return self.bitmap(node[1])
+        if op == 'not':
+            return self._universe & ~self._evaluate(node[1])
+        left = node[1]
+        right = node[2]
+        if op == 'and' and right[0] == 'not':
+            # a AND NOT b without materialising NOT b against every row
+            return self._evaluate(left) & ~self._evaluate(right[1])
+        if op == 'and':
+            return self._evaluate(left) & self._evaluate(right)
+        return self._evaluate(left) | self._evaluate(right)
+
+    def count(self, query: str) -> int:
+        node = parse_query(query)
+        if node[0] == 'term':
+            return self.cardinality(node[1])
+        return popcount(self._evaluate(node))
+
+    def rows_matching(self, query: str, limit: Optional[int] = None) -> np.ndarray:
+        """Row numbers (scoring order) of matching cases, ascending"""
+        words = self.evaluate(query).reshape(-1)
+        rows = np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder='little'))
+        return rows[:limit]
+
+    def case_ids(self, query: str, limit: Optional[int] = None) -> List[str]:
+        return [case_id.decode('utf-8') for case_id in self._ids[self.rows_matching(query, limit)]]
+
+    def storage(self) -> Dict[str, int]:
+        """Bytes on disk per container kind, against an uncompressed bitmap per indicator"""
+        sizes = {'array': 0, 'run': 0, 'bitmap': 0}
+        labels = ('array', 'run', 'bitmap')
+        for entries in self._entries.values():
+            for _, kind, _, length, _ in entries:
+                sizes[labels[kind]] += length
+        sizes['total'] = sum(sizes.values())
+        sizes['uncompressed'] = len(self._entries) * self.chunks * BITMAP_BYTES
+        return sizes
@@ -0,0 +1,224 @@
+"""
+Typed case schema with bulk, column-wise validation and coercion.
+
+Each field is checked over a whole batch at once. Columns whose values
+already have the expected types take a fast path; only the offending
+values are handed to pydantic for coercion ("yes" -> True, "0" -> False,
+"1200" -> 1200.0). Rows that cannot be coerced are reported and dropped.
+"""
+
+from dataclasses import dataclass, field
+from collections import deque
+from itertools import chain, compress, count, repeat, starmap
+from operator import not_
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ConfigDict, TypeAdapter, ValidationError
+from pydantic.types import StringConstraints
+from typing_extensions import Annotated
+
+from fraud_detector import CouncilTaxFraudDetector
+
+BANDS = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'H')
+
+NUMERIC_FIELDS = {
+    'annual_charge': float,
+    'account_age_years': int,
+    'data_quality_score': float,
+    'last_contact_days_ago': int,
+    'num_previous_investigations': int,
+    'declared_income': float,
+    'property_value': float,
+}
+
+STRING_FIELDS = ('case_id', 'property_id', 'account_holder', 'address', 'postcode', 'council_id')
+
+_Band = Annotated[str, StringConstraints(strip_whitespace=True, to_upper=True, pattern='^[A-Ha-h]$')]
+_NONE_TYPE = type(None)
+_STR_TYPES = frozenset((str, _NONE_TYPE))
+
+@dataclass
+class _FieldRule:
+    name: str
+    adapter: TypeAdapter
+    clean_types: frozenset
+    clean_values: Optional[frozenset] = None
+    blank_is_missing: bool = True
+
+@dataclass
+class RejectedRow:
+    row: int
+    case_id: Optional[str]
+    field: str
+    value: str
+    error: str
+
+@dataclass
+class ValidationReport:
+    cases: List[Dict]
+    rejected: List[RejectedRow] = field(default_factory=list)
+    coerced_values: int = 0
+    total_rows: int = 0
+    clean_fields: int = 0
+    coerced_fields: int = 0
+
+    @property
+    def accepted_rows(self) -> int:
+        return len(self.cases)
+
+    def summary(self) -> Dict:
+        by_field = {}
+        for rejection in self.rejected:
+            by_field[rejection.field] = by_field.get(rejection.field, 0) + 1
+        return {
+            'total_rows': self.total_rows,
+            'accepted_rows': self.accepted_rows,
+            'rejected_rows': self.total_rows - self.accepted_rows,
+            'coerced_values': self.coerced_values,
+            'rejections_by_field': by_field,
+        }
+
+class CaseSchema:
+    """Case fields and their types, compiled into one validator per column"""
+
+    def __init__(self, boolean_fields: Iterable[str],
+                 numeric_fields: Optional[Dict[str, type]] = None,
+                 string_fields: Iterable[str] = STRING_FIELDS):
+        rules = []
+        bool_adapter = TypeAdapter(List[Optional[bool]])
+        for name in boolean_fields:
+            rules.append(_FieldRule(name, bool_adapter, frozenset((bool, _NONE_TYPE))))
+
+        numeric_adapters = {
+            float: TypeAdapter(List[Optional[float]]),
+            int: TypeAdapter(List[Optional[int]]),
+        }
+        numeric_types = {float: frozenset((float, int, _NONE_TYPE)), int: frozenset((int, _NONE_TYPE))}
+        for name, kind in (NUMERIC_FIELDS if numeric_fields is None else numeric_fields).items():
+            rules.append(_FieldRule(name, numeric_adapters[kind], numeric_types[kind]))
+
+        str_adapter = TypeAdapter(List[Optional[str]], config=ConfigDict(coerce_numbers_to_str=True))
+        for name in string_fields:
+            rules.append(_FieldRule(name, str_adapter, frozenset((str, _NONE_TYPE)), blank_is_missing=False))
+        rules.append(_FieldRule('council_tax_band', TypeAdapter(List[Optional[_Band]]),
+                                frozenset(), frozenset(BANDS + (None,))))
+        self.rules: Tuple[_FieldRule, ...] = tuple(rules)
+
+    @classmethod
+    def for_detector(cls, detector: Optional[CouncilTaxFraudDetector] = None, **kwargs) -> 'CaseSchema':
+        """Schema whose boolean fields are every indicator the detector checks"""
+        detector = detector or CouncilTaxFraudDetector()
+        names = [ind.indicator_type for indicators in detector.fraud_patterns.values() for ind in indicators]
+        names.extend(ind.indicator_type for ind in detector.error_patterns)
+        return cls(dict.fromkeys(names), **kwargs)
+
+    def validate(self, cases: List[Dict],
+                 field_types: Optional[Dict[str, Iterable[type]]] = None) -> ValidationReport:
+        """Check and coerce a batch; field_types declares the value types each column can
+        hold (every CSV cell is a str), so they need not be inferred from every row"""
+        report = ValidationReport(cases=[], total_rows=len(cases))
+        rejected_rows = {}
+        coerced_rows = {}
+
+        candidates = None
+        if field_types is None:
+            row_shapes, shapes = self._shapes(cases)
+            field_types = {}
+            for key, value_type in set(chain.from_iterable(starmap(zip, shapes))):
+                field_types.setdefault(key, set()).add(value_type)
+            # Rows whose shape holds a value of an unexpected type for some field; only these are inspected
+            suspect_pairs = {(rule.name, value_type) for rule in self.rules if rule.clean_values is None
+                             for value_type in field_types.get(rule.name, ()) if value_type not in rule.clean_types}
+            candidates = []
+            if suspect_pairs:
+                suspect = {shape_id for (keys, types), shape_id in shapes.items()
+                           if not suspect_pairs.isdisjoint(zip(keys, types))}
+                candidates = list(compress(count(), map(suspect.__contains__, row_shapes)))
+        else:
+            # Declared types: a column that may hold other types is checked whole, row shapes are never built
+            field_types = {key: set(types) for key, types in field_types.items()}
+
+        for rule in self.rules:
+            name = rule.name
+            seen = field_types.get(name)
+            if not seen or (seen <= rule.clean_types and rule.clean_values is None):
+                report.clean_fields += 1
+                continue
+            if (rule.clean_values is not None and seen <= _STR_TYPES
+                    and set(map(dict.get, cases, repeat(name))) <= rule.clean_values):
+                report.clean_fields += 1
+                continue
+            report.coerced_fields += 1
+
+            if rule.clean_values is not None:
+                clean_values = rule.clean_values
+                dirty = [i for i, value in enumerate(map(dict.get, cases, repeat(name)))
+                         if not (value is None or (type(value) is str and value in clean_values))]
+            else:
+                is_clean = rule.clean_types.__contains__
+                if candidates is None:
+                    rows, column = count(), map(dict.get, cases, repeat(name))
+                else:
+                    rows, column = candidates, map(dict.get, map(cases.__getitem__, candidates), repeat(name))
+                dirty = list(compress(rows, map(not_, map(is_clean, map(type, column)))))
+            originals = list(map(dict.get, map(cases.__getitem__, dirty), repeat(name)))
+            if rule.blank_is_missing:
+                values = [None if isinstance(v, str) and not v.strip() else v for v in originals]
+            else:
+                values = list(originals)
+
+            try:
+                coerced = rule.adapter.validate_python(values)
+            except ValidationError as exc:
+                failed = {}
+                for error in exc.errors():
+                    position = error['loc'][0]
+                    failed.setdefault(position, error['msg'])
+                for position, message in failed.items():
+                    row = dirty[position]
+                    if row not in rejected_rows:
+                        rejected_rows[row] = RejectedRow(
+                            row, cases[row].get('case_id'), name, repr(originals[position]), message
+                        )
+                    values[position] = None
+                coerced = rule.adapter.validate_python(values)
+
+            if rejected_rows:
+                keep = list(map(not_, map(rejected_rows.__contains__, dirty)))
+                dirty = list(compress(dirty, keep))
+                coerced = list(compress(coerced, keep))
+            # Each coerced row is copied once, however many of its fields are fixed
+            copies = list(compress(dirty, map(not_, map(coerced_rows.__contains__, dirty))))
+            coerced_rows.update(zip(copies, map(dict, map(cases.__getitem__, copies))))
+            targets = map(coerced_rows.__getitem__, dirty)
+            if None in coerced:
+                for case, value in zip(targets, coerced):
+                    if value is None:
+                        case.pop(name, None)
+                    else:
+                        case[name] = value
+            else:
+                deque(map(dict.__setitem__, targets, repeat(name), coerced), maxlen=0)
+            report.coerced_values += len(dirty)
+
+        report.rejected = sorted(rejected_rows.values(), key=lambda r: r.row)
+        accepted = list(cases)
+        for row, case in coerced_rows.items():
+            accepted[row] = case
+        if rejected_rows:
+            accepted = [case for row, case in enumerate(accepted) if row not in rejected_rows]
+        report.cases = accepted
+        return report
+
+    @staticmethod
+    def _shapes(cases: List[Dict]) -> Tuple[List[int], Dict[Tuple[tuple, tuple], int]]:
+        """Shape id of every row, and the distinct (keys, value types) shapes with their ids"""
+        # Rows from one export share a limited number of shapes, so they are interned at
+        # C speed in one pass; setdefault keeps the first row index seen as the shape's id
+        shapes = {}
+        pairs = zip(map(tuple, cases), map(tuple, map(map, repeat(type), map(dict.values, cases))))
+        return list(map(shapes.setdefault, pairs, count())), shapes
+
+def validate_cases(cases: List[Dict], schema: Optional[CaseSchema] = None,
+                   field_types: Optional[Dict[str, Iterable[type]]] = None) -> ValidationReport:
+    return (schema or CaseSchema.for_detector()).validate(cases, field_types)
@@ -0,0 +1,177 @@
+"""
+Pre-aggregated chart data for the dashboard.
+
+ResultColumns holds a scored run as numpy columns (risk level and fraud
+type codes, risk score, fraud/error flags, annual charge, day). It can be
+filled as a batch_analyze listener, from assessments, or from a run
+snapshot. ChartData turns the columns into the small DataFrames the
+dashboard plots - risk distribution, fraud type mix, trend buckets and
+financial impact - with bincounts rather than Python loops, and caches
+each frame, so a rerun costs a dictionary lookup however many cases were
+scored. Long trends are merged into wider buckets so that Plotly never
+receives more than a few hundred points.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from external_ranking import FRAUD_TYPES, RISK_LEVELS
+from fraud_detector import FraudAssessment
+
+DEFAULT_MAX_POINTS = 300
+AVERAGE_FRAUD_AMOUNT = 2500
+
+_RISK_LEVEL_CODES = {value: code for code, value in enumerate(RISK_LEVELS)}
+_FRAUD_TYPE_CODES = {value: code for code, value in enumerate(FRAUD_TYPES)}
+_ROW_DTYPE = np.dtype([('risk_level', 'u1'), ('fraud_type', 'i1'), ('risk_score', '<f8'),
+                       ('likely_fraud', '?'), ('likely_error', '?'), ('annual_charge', '<f8')])
+
+class ResultColumns:
+    """Columnar store of a scored run; usable as a batch_analyze listener"""
+
+    def __init__(self, day_field: Optional[str] = 'last_review_date'):
+        self.day_field = day_field
+        self._rows: List[tuple] = []
+        self._days: List[Optional[str]] = []
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self.version = 0
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.add(case, assessment)
+
+    def __len__(self):
+        return len(self.columns['risk_level'])
+
+    def add(self, case: Dict, assessment: FraudAssessment):
+        self._rows.append((
+            _RISK_LEVEL_CODES[assessment.risk_level.value],
+            _FRAUD_TYPE_CODES[assessment.fraud_type.value] if assessment.fraud_type else -1,
+            assessment.risk_score, assessment.is_likely_fraud, assessment.is_likely_error,
+            float(case.get('annual_charge') or 0.0),
+        ))
+        self._days.append(case.get(self.day_field) if self.day_field else None)
+        self._columns = None
+        self.version += 1
+
+    @classmethod
+    def from_results(cls, cases: List[Dict], assessments: List[FraudAssessment], **kwargs) -> 'ResultColumns':
+        store = cls(**kwargs)
+        for case, assessment in zip(cases, assessments):
+            store.add(case, assessment)
+        return store
+
+    @classmethod
+    def from_arrays(cls, risk_level, fraud_type, risk_score, likely_fraud=None, likely_error=None,
+                    annual_charge=None, day=None) -> 'ResultColumns':
+        """Store over existing columns, e.g. a run snapshot's memory-mapped files"""
+        store = cls(day_field=None)
+        size = len(risk_level)
+        store._columns = {
+            'risk_level': np.asarray(risk_level, dtype=np.uint8),
+            'fraud_type': np.asarray(fraud_type, dtype=np.int8),
+            'risk_score': np.asarray(risk_score, dtype=np.float64),
+            'likely_fraud': np.zeros(size, bool) if likely_fraud is None else np.asarray(likely_fraud, bool),
+            'likely_error': np.zeros(size, bool) if likely_error is None else np.asarray(likely_error, bool),
+            'annual_charge': np.zeros(size) if annual_charge is None else np.asarray(annual_charge, np.float64),
+            'day': np.full(size, np.datetime64('NaT'), 'datetime64[D]') if day is None
+            else np.asarray(day, dtype='datetime64[D]'),
+        }
+        return store
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'ResultColumns':
+        columns = snapshot.columns
+        return cls.from_arrays(columns['risk_level'], columns['fraud_type'], columns['risk_score'])
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        if self._columns is None:
+            rows = np.array(self._rows, dtype=_ROW_DTYPE)
+            columns = {name: rows[name] for name in _ROW_DTYPE.names}
+            # Missing or malformed days become NaT and drop out of the trend
+            columns['day'] = pd.to_datetime(pd.Series(self._days, dtype=object), errors='coerce') \
+                .to_numpy(dtype='datetime64[D]')
+            self._columns = columns
+        return self._columns
+
+def downsample(frame: pd.DataFrame, max_points: int = DEFAULT_MAX_POINTS, on: str = 'Date') -> pd.DataFrame:
+    """Merge adjacent rows of a count series so at most max_points remain (counts are summed)"""
+    if len(frame) <= max_points:
+        return frame
+    factor = math.ceil(len(frame) / max_points)
+    groups = np.arange(len(frame)) // factor
+    merged = frame.drop(columns=[on]).groupby(groups).sum()
+    merged.insert(0, on, frame[on].to_numpy()[::factor])
+    return merged.reset_index(drop=True)
+
+class ChartData:
+    """Cached, pre-aggregated DataFrames for the dashboard charts"""
+
+    def __init__(self, store: ResultColumns, max_points: int = DEFAULT_MAX_POINTS):
+        self.store = store
+        self.max_points = max_points
+        self._frames: Dict[tuple, object] = {}
+        self._version = store.version
+
+    def _cached(self, key: tuple, build):
+        # Frames are rebuilt only after new results reach the store
+        if self._version != self.store.version:
+            self._frames.clear()
+            self._version = self.store.version
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = build()
+        return frame
+
+    def risk_distribution(self) -> pd.DataFrame:
+        def build():
+            counts = np.bincount(self.store.columns['risk_level'], minlength=len(RISK_LEVELS))
+            return pd.DataFrame({'Risk Level': [level.capitalize() for level in RISK_LEVELS],
+                                 'Number of Cases': counts[:len(RISK_LEVELS)]})
+        return self._cached(('risk_distribution',), build)
+
+    def type_mix(self) -> pd.DataFrame:
+        """Cases per detected fraud type, largest first; cases without a type are left out"""
+        def build():
+            codes = self.store.columns['fraud_type']
+            counts = np.bincount(codes[codes >= 0], minlength=len(FRAUD_TYPES))
+            frame = pd.DataFrame({'Fraud Type': list(FRAUD_TYPES), 'Count': counts[:len(FRAUD_TYPES)]})
+            return frame[frame['Count'] > 0].sort_values('Count', ascending=False, kind='stable') \
+                .reset_index(drop=True)
+        return self._cached(('type_mix',), build)
+
+    def trend(self, max_points: Optional[int] = None) -> pd.DataFrame:
+        """Cases, likely fraud and likely error per day, merged into wider buckets beyond max_points"""
+        max_points = max_points or self.max_points
+
+        def build():
+            columns = self.store.columns
+            days = columns['day']
+            known = ~np.isnat(days)
+            if not known.any():
+                return pd.DataFrame({'Date': pd.to_datetime([]), 'Cases': [], 'Likely Fraud': [], 'Likely Error': []})
+            offsets = (days[known] - days[known].min()).astype(np.int64)
+            span = int(offsets.max()) + 1
+            frame = pd.DataFrame({
+                'Date': days[known].min() + np.arange(span),
+                'Cases': np.bincount(offsets, minlength=span),
+                'Likely Fraud': np.bincount(offsets, weights=columns['likely_fraud'][known], minlength=span).astype(int),
+                'Likely Error': np.bincount(offsets, weights=columns['likely_error'][known], minlength=span).astype(int),
+            })
+            frame['Date'] = pd.to_datetime(frame['Date'])
+            return downsample(frame, max_points)
+        return self._cached(('trend', max_points), build)
+
+    def financial_impact(self, average_fraud_amount: float = AVERAGE_FRAUD_AMOUNT) -> Dict[str, float]:
+        """Likely fraud count, estimate at a flat amount per case, and annual charge weighted by risk score"""
+        def build():
+            columns = self.store.columns
+            fraud = columns['likely_fraud']
+            detected = int(np.count_nonzero(fraud))
+            expected = float(np.dot(columns['annual_charge'][fraud], columns['risk_score'][fraud]))
+            return {'frauds_detected': detected, 'average_fraud_amount': average_fraud_amount,
+                    'total_prevented': detected * average_fraud_amount, 'expected_recovery': expected}
+        return dict(self._cached(('financial_impact', average_fraud_amount), build))
@@ -0,0 +1,234 @@
+"""
+Immutable compiled detector for concurrent serving.
+
+CompiledDetector freezes a detector configuration into tuples and
+read-only mappings, so one instance can be shared by any number of threads
+or asyncio tasks with no locks on the scoring path. Configuration changes
+go through DetectorBuilder, which produces a new CompiledDetector.
+"""
+
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from fraud_detector import (
+    CouncilTaxFraudDetector, FraudAssessment, FraudType, IndicatorDefinition, IndicatorHit, RiskLevel,
+    ERROR_SCORE_FACTOR, EVIDENCE_KEYS, as_definition, detector_fingerprint, finalise_score, generate_recommendations,
+    indicator_present, run_batch
+)
+
+ERROR_EVIDENCE = "Mitigating factor detected"
+DEFAULT_EVIDENCE = 'Detected in analysis'
+
+class CompiledDetector:
+    """Frozen detector configuration; safe to share across threads without locking"""
+
+    __slots__ = ('fraud_patterns', 'error_patterns', 'risk_thresholds', 'error_weight_factor',
+                 'reference_data', 'fingerprint', '_fraud_table', '_error_table', '_levels',
+                 '_recommendations')
+
+    def __init__(self, fraud_patterns: Mapping[FraudType, Iterable], error_patterns: Iterable,
+                 risk_thresholds: Mapping[RiskLevel, float],
+                 error_weight_factor: float = ERROR_SCORE_FACTOR, reference_data=None):
+        init = object.__setattr__
+        init(self, 'fraud_patterns', MappingProxyType({
+            fraud_type: tuple(map(as_definition, indicators)) for fraud_type, indicators in fraud_patterns.items()
+        }))
+        init(self, 'error_patterns', tuple(map(as_definition, error_patterns)))
+        init(self, 'risk_thresholds', MappingProxyType({level: risk_thresholds[level] for level in RiskLevel}))
+        init(self, 'error_weight_factor', error_weight_factor)
+        init(self, 'reference_data', reference_data)
+        init(self, 'fingerprint', detector_fingerprint(self))
+
+        # Hot-path tables: (fraud_type, indicator count, ((type, weight, evidence key, definition), ...))
+        init(self, '_fraud_table', tuple(
+            (fraud_type, len(indicators), tuple(
+                (ind.indicator_type, ind.weight, EVIDENCE_KEYS[ind.indicator_type], ind) for ind in indicators
+            ))
+            for fraud_type, indicators in self.fraud_patterns.items()
+        ))
+        # Error hits carry fixed evidence, so one immutable hit per indicator is shared by every assessment
+        init(self, '_error_table', tuple(
+            (ind.indicator_type, abs(ind.weight), IndicatorHit(ind, ERROR_EVIDENCE)) for ind in self.error_patterns
+        ))
+        init(self, '_levels', tuple(
+            (self.risk_thresholds[level], level)
+            for level in (RiskLevel.CRITICAL, RiskLevel.HIGH, RiskLevel.MEDIUM)
+        ))
+        # Every (type, level, fraud?, error?) combination is known up front
+        init(self, '_recommendations', MappingProxyType({
+            (fraud_type, level, is_fraud, is_error): tuple(generate_recommendations(fraud_type, level, is_fraud, is_error))
+            for fraud_type in (None,) + tuple(self.fraud_patterns)
+            for level in RiskLevel
+            for is_fraud in (False, True)
+            for is_error in (False, True)
+        }))
+
+    @classmethod
+    def from_detector(cls, detector: CouncilTaxFraudDetector) -> 'CompiledDetector':
+        return cls(detector.fraud_patterns, detector.error_patterns, detector.risk_thresholds,
+                   detector.error_weight_factor, detector.reference_data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CompiledDetector is immutable; use builder() to change '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"CompiledDetector is immutable; cannot delete '{name}'")
+
+    def __reduce__(self):
+        return (CompiledDetector, (dict(self.fraud_patterns), self.error_patterns, dict(self.risk_thresholds),
+                                   self.error_weight_factor, self.reference_data))
+
+    def __repr__(self):
+        return f"CompiledDetector(fingerprint={self.fingerprint!r})"
+
+    def compile(self) -> 'CompiledDetector':
+        return self
+
+    def builder(self) -> 'DetectorBuilder':
+        return DetectorBuilder.from_detector(self)
+
+    def _calculate_risk_level(self, score: float) -> RiskLevel:
+        for threshold, level in self._levels:
+            if score >= threshold:
+                return level
+        return RiskLevel.LOW
+
+    def detect_fraud(self, case_data: Dict) -> FraudAssessment:
+        if self.reference_data is not None:
+            case_data = self.reference_data.enrich(case_data)
+        return self.detect_enriched(case_data)
+
+    def detect_enriched(self, case_data: Dict) -> FraudAssessment:
+        """Assess a case that already carries its reference-data indicators"""
+        get = case_data.get
+        detected_fraud_type = None
+        best_hits = ()
+        fraud_score = 0
+        max_type_score = 0
+
+        for fraud_type, size, indicators in self._fraud_table:
+            type_score = 0
+            hits = []
+            for row in indicators:
+                value = get(row[0])
+                # True and absent are the common cases; anything else is parsed like _check_indicator
+                if value is True or (value and indicator_present(value)):
+                    hits.append(row)
+                    type_score += row[1]
+            if type_score > max_type_score:
+                max_type_score = type_score
+                detected_fraud_type = fraud_type
+                best_hits = hits
+                fraud_score = min(type_score / size, 1.0) if size else 0
+
+        detected_indicators = [
+            IndicatorHit(definition, get(evidence_key, DEFAULT_EVIDENCE))
+            for _, _, evidence_key, definition in best_hits
+        ]
+        error_score = 0
+        for indicator_type, magnitude, hit in self._error_table:
+            value = get(indicator_type)
+            if value is True or (value and indicator_present(value)):
+                detected_indicators.append(hit)
+                error_score += magnitude
+
+        final_score, is_likely_fraud, is_likely_error, confidence = finalise_score(
+            fraud_score, error_score, len(detected_indicators), self.error_weight_factor
+        )
+        risk_level = self._calculate_risk_level(final_score)
+
+        return FraudAssessment(
+            case_id=get('case_id', 'UNKNOWN'),
+            fraud_type=detected_fraud_type,
+            risk_level=risk_level,
+            risk_score=final_score,
+            is_likely_fraud=is_likely_fraud,
+            is_likely_error=is_likely_error,
+            indicators=detected_indicators,
+            recommendations=list(self._recommendations[detected_fraud_type, risk_level, is_likely_fraud, is_likely_error]),
+            confidence=confidence
+        )
+
+    def batch_analyze(self, cases: List[Dict], listeners: Optional[List[Callable]] = None,
+                      profiler=None) -> Dict:
+        return run_batch(self.detect_fraud, cases, listeners, profiler)
+
+class DetectorBuilder:
+    """Mutable staging area for a detector configuration; build() returns a CompiledDetector"""
+
+    def __init__(self):
+        defaults = CouncilTaxFraudDetector()
+        self._load(defaults.fraud_patterns, defaults.error_patterns, defaults.risk_thresholds,
+                   defaults.error_weight_factor, defaults.reference_data)
+
+    @classmethod
+    def from_detector(cls, detector) -> 'DetectorBuilder':
+        builder = cls.__new__(cls)
+        builder._load(detector.fraud_patterns, detector.error_patterns, detector.risk_thresholds,
+                      detector.error_weight_factor, detector.reference_data)
+        return builder
+
+    def _load(self, fraud_patterns, error_patterns, risk_thresholds, error_weight_factor, reference_data):
+        self.fraud_patterns: Dict[FraudType, List[IndicatorDefinition]] = {
+            fraud_type: list(map(as_definition, indicators)) for fraud_type, indicators in fraud_patterns.items()
+        }
+        self.error_patterns: List[IndicatorDefinition] = list(map(as_definition, error_patterns))
+        self.risk_thresholds: Dict[RiskLevel, float] = dict(risk_thresholds)
+        self.error_weight_factor = error_weight_factor
+        self.reference_data = reference_data
+
+    def _find(self, indicator_type: str) -> Tuple[List[IndicatorDefinition], int]:
+        for indicators in list(self.fraud_patterns.values()) + [self.error_patterns]:
+            for position, ind in enumerate(indicators):
+                if ind.indicator_type == indicator_type:
+                    return indicators, position
+        raise KeyError(f"unknown indicator '{indicator_type}'")
+
+    def set_threshold(self, level: RiskLevel, value: float) -> 'DetectorBuilder':
+        self.risk_thresholds[level] = value
+        return self
+
+    def set_error_weight_factor(self, factor: float) -> 'DetectorBuilder':
+        self.error_weight_factor = factor
+        return self
+
+    def set_weight(self, indicator_type: str, weight: float) -> 'DetectorBuilder':
+        indicators, position = self._find(indicator_type)
+        indicators[position] = indicators[position]._replace(weight=weight)
+        return self
+
+    def add_indicator(self, fraud_type: FraudType, indicator_type: str, description: str,
+                      weight: float) -> 'DetectorBuilder':
+        self.fraud_patterns.setdefault(fraud_type, []).append(IndicatorDefinition(indicator_type, description, weight))
+        return self
+
+    def add_error_indicator(self, indicator_type: str, description: str, weight: float) -> 'DetectorBuilder':
+        self.error_patterns.append(IndicatorDefinition(indicator_type, description, -abs(weight)))
+        return self
+
+    def remove_indicator(self, indicator_type: str) -> 'DetectorBuilder':
+        indicators, position = self._find(indicator_type)
+        del indicators[position]
+        return self
+
+    def set_reference_data(self, reference_data) -> 'DetectorBuilder':
+        self.reference_data = reference_data
+        return self
+
+    def build(self) -> CompiledDetector:
+        medium, high, critical = (self.risk_thresholds[level]
+                                  for level in (RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL))
+        if not 0 <= medium <= high <= critical <= 1:
+            raise ValueError(f"risk thresholds must satisfy 0 <= medium <= high <= critical <= 1, "
+                             f"got {medium}, {high}, {critical}")
+        if self.error_weight_factor < 0:
+            raise ValueError("error_weight_factor must not be negative")
+        for fraud_type, indicators in self.fraud_patterns.items():
+            for ind in indicators:
+                if ind.weight <= 0:
+                    raise ValueError(f"{fraud_type.value}.{ind.indicator_type}: fraud indicator weights must be positive")
+        for ind in self.error_patterns:
+            if ind.weight >= 0:
+                raise ValueError(f"{ind.indicator_type}: error indicator weights must be negative")
+        return CompiledDetector(self.fraud_patterns, self.error_patterns, self.risk_thresholds,
+                                self.error_weight_factor, self.reference_data)
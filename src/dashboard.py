@@ -4,6 +4,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 from fraud_detector import CouncilTaxFraudDetector, FraudType, RiskLevel
 from data_generator import generate_sample_cases
+from streaming_stats import StreamingStatistics
+from assessment_cache import AssessmentCache
+from chart_data import ChartData, ResultColumns
+from live_feed import FeedHub
+from collections import deque
+import threading
+import time
 import json
 from datetime import datetime
 
@@ -13,10 +20,96 @@ st.set_page_config(
     layout="wide"
 )
 
+# The live feed fragment polls every two seconds; a session silent this long has gone away
+FEED_IDLE_SECONDS = 30
+
 @st.cache_data
 def load_sample_data():
     return generate_sample_cases(100)
 
+@st.cache_resource
+def get_assessment_cache():
+    """Shared across sessions so re-analysing a case (or an identical indicator mix) is a cache hit"""
+    return AssessmentCache(CouncilTaxFraudDetector(), max_entries=5000, ttl=3600)
+
+@st.cache_resource
+def load_monitoring_data():
+    """Score the sample once and keep streaming statistics and chart columns across reruns"""
+    monitor = StreamingStatistics(day_field='last_review_date')
+    store = ResultColumns(day_field='last_review_date')
+    results = CouncilTaxFraudDetector().batch_analyze(load_sample_data(), listeners=[monitor, store])
+    return results, monitor, ChartData(store)
+
+@st.cache_resource
+def load_statistics_data(count=500):
+    """Pre-aggregated chart frames for the Statistics tab, scored once per process"""
+    store = ResultColumns(day_field='last_review_date')
+    CouncilTaxFraudDetector().compile().batch_analyze(generate_sample_cases(count), listeners=[store])
+    return ChartData(store)
+
+@st.cache_resource
+def fraud_type_figure():
+    _, _, charts = load_monitoring_data()
+    return px.pie(charts.type_mix(), values='Count', names='Fraud Type',
+                  title="Detected Fraud Types",
+                  color_discrete_sequence=px.colors.sequential.RdBu)
+
+@st.cache_resource
+def risk_distribution_figure():
+    frame = load_statistics_data().risk_distribution()
+    return px.bar(frame, x='Risk Level', y='Number of Cases',
+                  title="Risk Level Distribution",
+                  color='Number of Cases',
+                  color_continuous_scale='RdYlGn_r')
+
+@st.cache_resource
+def detection_trend_figure():
+    return px.line(load_statistics_data().trend(), x='Date', y=['Likely Fraud', 'Likely Error'],
+                   title="Detection Trends by Review Date")
+
+@st.cache_resource
+def get_feed_hub():
+    """One hub per process; every viewer subscribes to it"""
+    return FeedHub(batch_size=20, max_delay=0.5)
+
+@st.cache_resource
+def start_feed_simulation():
+    """Score freshly generated cases in small batches in the background, publishing to the hub"""
+    hub = get_feed_hub()
+    detector = CouncilTaxFraudDetector().compile()
+
+    def run():
+        seed = 0
+        while True:
+            seed += 1
+            detector.batch_analyze(generate_sample_cases(50, seed=seed), listeners=[hub])
+            time.sleep(1.0)
+    thread = threading.Thread(target=run, name='feed-simulation', daemon=True)
+    thread.start()
+    return thread
+
+@st.fragment(run_every=2)
+def live_feed_panel():
+    """Reruns on its own every two seconds without rerunning the rest of the page"""
+    subscription = st.session_state.get('feed_subscription')
+    if subscription is None or subscription.closed:
+        # Sessions end without notice, so the hub expires subscriptions that stop polling
+        st.session_state.feed_subscription = get_feed_hub().subscribe(idle_timeout=FEED_IDLE_SECONDS)
+        st.session_state.setdefault('feed_events', deque(maxlen=50))
+    events = st.session_state.feed_events
+    for batch in st.session_state.feed_subscription.poll():
+        events.extendleft(batch.events)
+    if not events:
+        st.caption("Waiting for newly flagged HIGH/CRITICAL assessments...")
+        return
+    feed_df = pd.DataFrame(list(events))
+    feed_df['ts'] = pd.to_datetime(feed_df['ts'], unit='s').dt.strftime('%H:%M:%S')
+    st.dataframe(feed_df[['ts', 'case_id', 'risk_level', 'risk_score', 'fraud_type', 'likely_fraud']],
+                 use_container_width=True, hide_index=True)
+    dropped = st.session_state.feed_subscription.dropped
+    if dropped:
+        st.caption(f"{dropped} batches skipped while this view was behind")
+
 def display_risk_gauge(risk_score):
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
@@ -84,38 +177,54 @@ def main():
         
         # Load sample data
         sample_cases = load_sample_data()
-        results = detector.batch_analyze(sample_cases)
+        results, monitor, charts = load_monitoring_data()
+        snapshot = monitor.snapshot()
+        total = snapshot['total_cases'] or 1
         
         # Key metrics
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Cases", results['statistics']['total_cases'])
+            st.metric("Total Cases", snapshot['total_cases'])
         with col2:
-            st.metric("High Risk", results['statistics']['high_risk'], 
-                     delta=f"{(results['statistics']['high_risk']/results['statistics']['total_cases']*100):.1f}%")
+            st.metric("High Risk", snapshot['high_risk'], 
+                     delta=f"{(snapshot['high_risk']/total*100):.1f}%")
         with col3:
-            st.metric("Likely Fraud", results['statistics']['likely_fraud'],
-                     delta=f"{(results['statistics']['likely_fraud']/results['statistics']['total_cases']*100):.1f}%")
+            st.metric("Likely Fraud", snapshot['likely_fraud'],
+                     delta=f"{(snapshot['likely_fraud']/total*100):.1f}%")
         with col4:
-            st.metric("Likely Error", results['statistics']['likely_error'],
-                     delta=f"{(results['statistics']['likely_error']/results['statistics']['total_cases']*100):.1f}%")
+            st.metric("Likely Error", snapshot['likely_error'],
+                     delta=f"{(snapshot['likely_error']/total*100):.1f}%")
+        
+        # Risk score quantiles
+        quantiles = snapshot['risk_score_quantiles']
+        col1, col2, col3 = st.columns(3)
+        for col, q in zip((col1, col2, col3), sorted(quantiles)):
+            with col:
+                st.metric(f"P{q * 100:g} Risk Score", f"{quantiles[q] or 0:.2f}")
         
         # Fraud type distribution
         st.subheader("Fraud Type Distribution")
-        if results['statistics']['by_type']:
-            fraud_df = pd.DataFrame(
-                list(results['statistics']['by_type'].items()),
-                columns=['Fraud Type', 'Count']
-            )
-            fig = px.pie(fraud_df, values='Count', names='Fraud Type', 
-                        title="Detected Fraud Types",
-                        color_discrete_sequence=px.colors.sequential.RdBu)
-            st.plotly_chart(fig, use_container_width=True, key="fraud_type_distribution")
+        if len(charts.type_mix()):
+            st.plotly_chart(fraud_type_figure(), use_container_width=True, key="fraud_type_distribution")
+        
+        # Daily buckets
+        days, totals = monitor.daily_series('total_cases')
+        if days:
+            _, fraud = monitor.daily_series('likely_fraud')
+            daily_df = pd.DataFrame({'Date': pd.to_datetime(days), 'Cases': totals, 'Likely Fraud': fraud})
+            fig_daily = px.line(daily_df, x='Date', y=['Cases', 'Likely Fraud'],
+                                title="Assessments by Review Date")
+            st.plotly_chart(fig_daily, use_container_width=True, key="daily_assessments_chart")
+        
+        # Live feed of newly flagged cases
+        st.subheader("📡 Live High-Risk Feed")
+        if st.toggle("Stream simulated cases", key="feed_simulation"):
+            start_feed_simulation()
+        live_feed_panel()
         
         # Recent high-risk cases
         st.subheader("🚨 High-Risk Cases Requiring Attention")
-        high_risk_cases = [a for a in results['assessments'] 
-                          if a.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]][:5]
+        high_risk_cases = list(monitor.recent_high_risk)[-5:]
         
         for case in high_risk_cases:
             with st.expander(f"Case {case.case_id} - {case.risk_level.value.upper()} RISK"):
@@ -325,6 +434,10 @@ def main():
                 employment_income = st.checkbox("Employment during study")
                 part_time_status = st.checkbox("Part-time claimed as full-time")
                 
+                st.write("**Property Banding Indicators**")
+                band_below_neighbours = st.checkbox("Band well below neighbouring properties")
+                unreported_extension = st.checkbox("Unreported extension or conversion")
+                
             with col2:
                 st.write("**Empty Property Indicators**")
                 utility_usage = st.checkbox("Utility usage detected")
@@ -337,6 +450,10 @@ def main():
                 antisocial_reports = st.checkbox("Antisocial behavior reports")
                 vulnerable_resident = st.checkbox("Vulnerable resident")
                 
+                st.write("**Council Tax Reduction Indicators**")
+                undeclared_income = st.checkbox("Undeclared income")
+                undeclared_partner = st.checkbox("Undeclared partner in household")
+                
                 st.write("**Error Indicators**")
                 immediate_cooperation = st.checkbox("Immediate cooperation")
                 consistent_explanation = st.checkbox("Consistent explanations")
@@ -355,6 +472,8 @@ def main():
                     'post_graduation_claim': post_graduation,
                     'employment_income': employment_income,
                     'part_time_status': part_time_status,
+                    'band_below_neighbours': band_below_neighbours,
+                    'unreported_extension': unreported_extension,
                     'utility_usage': utility_usage,
                     'rental_listings': rental_listings,
                     'neighbor_reports': neighbor_reports,
@@ -362,13 +481,15 @@ def main():
                     'behavior_change': behavior_change,
                     'antisocial_reports': antisocial_reports,
                     'vulnerable_resident': vulnerable_resident,
+                    'undeclared_income': undeclared_income,
+                    'undeclared_partner': undeclared_partner,
                     'immediate_cooperation': immediate_cooperation,
                     'consistent_explanation': consistent_explanation,
                     'self_reported': self_reported
                 }
                 
                 # Analyze
-                assessment = detector.detect_fraud(case_data)
+                assessment = get_assessment_cache().detect_fraud(case_data)
                 
                 # Display results
                 st.divider()
@@ -476,54 +597,25 @@ def main():
     with tab5:
         st.header("Statistical Analysis")
         
-        # Generate more sample data for statistics
-        large_sample = generate_sample_cases(500)
-        large_results = detector.batch_analyze(large_sample)
-        
-        # Risk distribution
-        risk_distribution = {'Low': 0, 'Medium': 0, 'High': 0, 'Critical': 0}
-        for assessment in large_results['assessments']:
-            risk_distribution[assessment.risk_level.value.capitalize()] += 1
-        
-        fig_risk = px.bar(
-            x=list(risk_distribution.keys()),
-            y=list(risk_distribution.values()),
-            title="Risk Level Distribution",
-            labels={'x': 'Risk Level', 'y': 'Number of Cases'},
-            color=list(risk_distribution.values()),
-            color_continuous_scale='RdYlGn_r'
-        )
-        st.plotly_chart(fig_risk, use_container_width=True, key="risk_distribution_chart")
-        
-        # Time series simulation
-        st.subheader("Detection Trends (Simulated)")
-        dates = pd.date_range(start='2024-01-01', periods=30, freq='D')
-        fraud_counts = [int(20 + 10 * (i/30) + 5 * (i % 7)) for i in range(30)]
-        error_counts = [int(15 + 5 * (i/30) + 3 * ((i+3) % 5)) for i in range(30)]
-        
-        trend_df = pd.DataFrame({
-            'Date': dates,
-            'Fraud Cases': fraud_counts,
-            'Error Cases': error_counts
-        })
-        
-        fig_trend = px.line(trend_df, x='Date', y=['Fraud Cases', 'Error Cases'],
-                           title="Detection Trends Over Time")
-        st.plotly_chart(fig_trend, use_container_width=True, key="detection_trends_chart")
+        # Charts read cached, pre-aggregated frames rather than per-case objects
+        charts = load_statistics_data()
+        st.plotly_chart(risk_distribution_figure(), use_container_width=True, key="risk_distribution_chart")
+        
+        st.subheader("Detection Trends")
+        st.plotly_chart(detection_trend_figure(), use_container_width=True, key="detection_trends_chart")
         
         # Financial impact
         st.subheader("Estimated Financial Impact")
-        avg_fraud_amount = 2500  # Average fraud amount in pounds
-        detected_fraud = results['statistics']['likely_fraud']
-        total_prevented = detected_fraud * avg_fraud_amount
+        impact = charts.financial_impact()
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Frauds Detected", detected_fraud)
+            st.metric("Frauds Detected", impact['frauds_detected'])
         with col2:
-            st.metric("Avg Fraud Amount", f"£{avg_fraud_amount:,}")
+            st.metric("Avg Fraud Amount", f"£{impact['average_fraud_amount']:,}")
         with col3:
-            st.metric("Total Prevented", f"£{total_prevented:,}")
+            st.metric("Total Prevented", f"£{impact['total_prevented']:,}")
+        st.caption(f"Risk-weighted annual charge of likely fraud cases: £{impact['expected_recovery']:,.0f}")
     
     with tab6:
         st.header("System Settings")
@@ -1,10 +1,11 @@
 import random
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 
-def generate_sample_cases(num_cases: int = 100) -> List[Dict]:
-    """Generate sample council tax cases for testing"""
+def generate_sample_cases(num_cases: int = 100, seed: Optional[int] = None) -> List[Dict]:
+    """Generate sample council tax cases for testing, labelled with their ground truth"""
     
+    rng = random if seed is None else random.Random(seed)
     cases = []
     
     # Fraud patterns for realistic data
@@ -28,6 +29,16 @@ def generate_sample_cases(num_cases: int = 100) -> List[Dict]:
             'indicators': ['sudden_payment_regularity', 'behavior_change', 'antisocial_reports',
                           'vulnerable_resident', 'payment_source_change', 'police_intelligence'],
             'probability': 0.10
+        },
+        'property_banding': {
+            'indicators': ['valuation_band_mismatch', 'band_below_neighbours', 'charge_below_neighbours',
+                          'unreported_extension', 'planning_enlargement'],
+            'probability': 0.05
+        },
+        'council_tax_reduction': {
+            'indicators': ['undeclared_income', 'undeclared_capital', 'undeclared_partner',
+                          'income_below_neighbourhood', 'lifestyle_mismatch'],
+            'probability': 0.10
         }
     }
     
@@ -38,40 +49,43 @@ def generate_sample_cases(num_cases: int = 100) -> List[Dict]:
     for i in range(num_cases):
         case = {
             'case_id': f'CASE-2024-{i+1:04d}',
-            'property_id': f'PROP-{random.randint(1000, 9999)}',
+            'property_id': f'PROP-{rng.randint(1000, 9999)}',
             'account_holder': f'Person_{i+1}',
-            'address': f'{random.randint(1, 999)} {random.choice(["High", "Main", "Church", "Park", "Victoria"])} Street',
-            'council_tax_band': random.choice(['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']),
-            'annual_charge': random.randint(800, 3500),
-            'current_discount': random.choice(['None', 'Single Person', 'Student', 'Empty', 'Disability']),
-            'payment_history': random.choice(['Regular', 'Irregular', 'Delinquent', 'Recently Improved']),
-            'account_age_years': random.randint(1, 20),
-            'last_review_date': (datetime.now() - timedelta(days=random.randint(30, 730))).strftime('%Y-%m-%d')
+            'address': f'{rng.randint(1, 999)} {rng.choice(["High", "Main", "Church", "Park", "Victoria"])} Street',
+            'council_tax_band': rng.choice(['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']),
+            'annual_charge': rng.randint(800, 3500),
+            'current_discount': rng.choice(['None', 'Single Person', 'Student', 'Empty', 'Disability']),
+            'payment_history': rng.choice(['Regular', 'Irregular', 'Delinquent', 'Recently Improved']),
+            'account_age_years': rng.randint(1, 20),
+            'last_review_date': (datetime.now() - timedelta(days=rng.randint(30, 730))).strftime('%Y-%m-%d')
         }
         
         # Determine if this is a fraud, error, or legitimate case
-        case_type = random.choices(['fraud', 'error', 'legitimate'], 
+        case_type = rng.choices(['fraud', 'error', 'legitimate'], 
                                   weights=[0.3, 0.2, 0.5])[0]
+        case['ground_truth'] = case_type
+        case['ground_truth_fraud_type'] = None
         
         if case_type == 'fraud':
             # Select fraud type
-            fraud_type = random.choice(list(fraud_patterns.keys()))
+            fraud_type = rng.choice(list(fraud_patterns.keys()))
+            case['ground_truth_fraud_type'] = fraud_type
             pattern = fraud_patterns[fraud_type]
             
             # Add fraud indicators (70-90% of them)
-            num_indicators = random.randint(
+            num_indicators = rng.randint(
                 int(len(pattern['indicators']) * 0.7),
                 len(pattern['indicators'])
             )
-            selected_indicators = random.sample(pattern['indicators'], num_indicators)
+            selected_indicators = rng.sample(pattern['indicators'], num_indicators)
             
             for indicator in selected_indicators:
                 case[indicator] = True
                 case[f'{indicator}_evidence'] = f'Evidence for {indicator.replace("_", " ")}'
             
             # Low chance of error indicators in fraud cases
-            if random.random() < 0.1:
-                error_ind = random.choice(error_indicators)
+            if rng.random() < 0.1:
+                error_ind = rng.choice(error_indicators)
                 case[error_ind] = True
                 
         elif case_type == 'error':
@@ -80,8 +94,8 @@ def generate_sample_cases(num_cases: int = 100) -> List[Dict]:
             for pattern in fraud_patterns.values():
                 all_fraud_indicators.extend(pattern['indicators'])
             
-            num_fraud_indicators = random.randint(1, 3)
-            selected_fraud = random.sample(all_fraud_indicators, 
+            num_fraud_indicators = rng.randint(1, 3)
+            selected_fraud = rng.sample(all_fraud_indicators, 
                                          min(num_fraud_indicators, len(all_fraud_indicators)))
             
             for indicator in selected_fraud:
@@ -89,36 +103,36 @@ def generate_sample_cases(num_cases: int = 100) -> List[Dict]:
                 case[f'{indicator}_evidence'] = f'Possible {indicator.replace("_", " ")}'
             
             # Add error indicators (60-80%)
-            num_error_indicators = random.randint(
+            num_error_indicators = rng.randint(
                 int(len(error_indicators) * 0.6),
                 int(len(error_indicators) * 0.8)
             )
-            selected_errors = random.sample(error_indicators, num_error_indicators)
+            selected_errors = rng.sample(error_indicators, num_error_indicators)
             
             for indicator in selected_errors:
                 case[indicator] = True
         
         else:  # legitimate
             # Very few or no indicators
-            if random.random() < 0.2:
+            if rng.random() < 0.2:
                 # Add 1-2 benign indicators
                 all_indicators = error_indicators.copy()
-                num_indicators = random.randint(1, 2)
-                selected = random.sample(all_indicators, num_indicators)
+                num_indicators = rng.randint(1, 2)
+                selected = rng.sample(all_indicators, num_indicators)
                 for indicator in selected:
                     case[indicator] = True
         
         # Add metadata
-        case['data_quality_score'] = random.uniform(0.6, 1.0)
-        case['last_contact_days_ago'] = random.randint(0, 365)
-        case['num_previous_investigations'] = random.choices([0, 1, 2, 3], 
+        case['data_quality_score'] = rng.uniform(0.6, 1.0)
+        case['last_contact_days_ago'] = rng.randint(0, 365)
+        case['num_previous_investigations'] = rng.choices([0, 1, 2, 3], 
                                                             weights=[0.7, 0.2, 0.08, 0.02])[0]
         
         # Special handling for cuckooing cases
         if 'vulnerable_resident' in case and case.get('vulnerable_resident'):
-            case['resident_age'] = random.choice([random.randint(70, 95), random.randint(18, 25)])
-            case['disability_registered'] = random.choice([True, False])
-            case['social_services_involved'] = random.choice([True, False])
+            case['resident_age'] = rng.choice([rng.randint(70, 95), rng.randint(18, 25)])
+            case['disability_registered'] = rng.choice([True, False])
+            case['social_services_involved'] = rng.choice([True, False])
         
         cases.append(case)
     
@@ -158,12 +172,12 @@ def generate_historical_data(days: int = 30) -> Dict:
     
     return data
 
-def generate_performance_metrics() -> Dict:
-    """Generate system performance metrics"""
+def generate_performance_metrics(evaluation=None) -> Dict:
+    """Generate system performance metrics; accuracy comes from an EvaluationReport when given"""
     
     return {
-        'detection_accuracy': random.uniform(0.85, 0.95),
-        'false_positive_rate': random.uniform(0.05, 0.15),
+        'detection_accuracy': evaluation.accuracy if evaluation else random.uniform(0.85, 0.95),
+        'false_positive_rate': evaluation.false_positive_rate if evaluation else random.uniform(0.05, 0.15),
         'average_processing_time_ms': random.randint(50, 200),
         'cases_processed_today': random.randint(200, 500),
         'alerts_generated': random.randint(20, 50),
@@ -0,0 +1,225 @@
+"""
+Detection-accuracy evaluation against labelled cases.
+
+Cases produced by generate_sample_cases carry their ground truth
+('ground_truth' and 'ground_truth_fraud_type'). An Evaluator packs a
+labelled set into the case matrix once and computes the threshold-
+independent score components once; every parameter setting after that is
+a handful of numpy operations, and a parameter grid can be spread across
+worker processes.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from case_matrix import IndicatorLayout, RISK_LEVEL_CODES
+from fraud_detector import CouncilTaxFraudDetector, RiskLevel
+
+TRUTH_CLASSES = ('fraud', 'error', 'legitimate')
+PREDICTED_CLASSES = ('fraud', 'error', 'uncertain')
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return float(numerator) / float(denominator) if denominator else 0.0
+
+def _f1(precision: float, recall: float) -> float:
+    return 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+def encode_labels(cases: Sequence[Dict], layout: IndicatorLayout) -> Tuple[np.ndarray, np.ndarray]:
+    """Ground-truth class codes and fraud type codes (index into layout.fraud_types, -1 for none)"""
+    class_codes = {name: code for code, name in enumerate(TRUTH_CLASSES)}
+    type_codes = {fraud_type.value: code for code, fraud_type in enumerate(layout.fraud_types)}
+    type_codes[None] = -1
+    truth_class = np.empty(len(cases), dtype=np.int8)
+    truth_type = np.empty(len(cases), dtype=np.int8)
+    for row, case in enumerate(cases):
+        try:
+            truth_class[row] = class_codes[case.get('ground_truth')]
+            truth_type[row] = type_codes[case.get('ground_truth_fraud_type')]
+        except KeyError as exc:
+            raise ValueError(f"case {case.get('case_id', row)} has an unknown ground-truth label {exc}") from None
+    return truth_class, truth_type
+
+@dataclass
+class EvaluationReport:
+    """Accuracy of one detector configuration on a labelled set"""
+    thresholds: Tuple[float, float, float]    # medium, high, critical
+    error_weight_factor: float
+    fraud_types: Tuple[str, ...]
+    confusion_matrix: np.ndarray    # TRUTH_CLASSES x PREDICTED_CLASSES
+    type_confusion: np.ndarray      # (types + none) x (types + none), flagged cases only predict a type
+    flagged: Dict[str, int]         # tp/fp/fn/tn of "flagged at flag level" against "is fraud"
+    calibration: Dict[str, np.ndarray]
+    brier_score: float
+    expected_calibration_error: float
+
+    @property
+    def precision(self) -> float:
+        return _ratio(self.flagged['tp'], self.flagged['tp'] + self.flagged['fp'])
+
+    @property
+    def recall(self) -> float:
+        return _ratio(self.flagged['tp'], self.flagged['tp'] + self.flagged['fn'])
+
+    @property
+    def f1(self) -> float:
+        return _f1(self.precision, self.recall)
+
+    @property
+    def accuracy(self) -> float:
+        return _ratio(self.flagged['tp'] + self.flagged['tn'], sum(self.flagged.values()))
+
+    @property
+    def false_positive_rate(self) -> float:
+        return _ratio(self.flagged['fp'], self.flagged['fp'] + self.flagged['tn'])
+
+    def per_type(self) -> Dict[str, Dict]:
+        """Precision, recall and F1 for each fraud type"""
+        matrix = self.type_confusion
+        predicted = matrix.sum(axis=0)
+        actual = matrix.sum(axis=1)
+        metrics = {}
+        for code, fraud_type in enumerate(self.fraud_types):
+            precision = _ratio(matrix[code, code], predicted[code])
+            recall = _ratio(matrix[code, code], actual[code])
+            metrics[fraud_type] = {
+                'precision': precision,
+                'recall': recall,
+                'f1': _f1(precision, recall),
+                'support': int(actual[code]),
+            }
+        return metrics
+
+    def to_dict(self) -> Dict:
+        return {
+            'thresholds': list(self.thresholds),
+            'error_weight_factor': self.error_weight_factor,
+            'precision': self.precision,
+            'recall': self.recall,
+            'f1': self.f1,
+            'accuracy': self.accuracy,
+            'false_positive_rate': self.false_positive_rate,
+            'brier_score': self.brier_score,
+            'expected_calibration_error': self.expected_calibration_error,
+            'flagged': dict(self.flagged),
+            'confusion_matrix': {
+                truth: dict(zip(PREDICTED_CLASSES, map(int, row)))
+                for truth, row in zip(TRUTH_CLASSES, self.confusion_matrix)
+            },
+            'per_type': self.per_type(),
+            'calibration': {name: values.tolist() for name, values in self.calibration.items()},
+        }
+
+class Evaluator:
+    """Scores a labelled case set under any threshold / error-weight setting"""
+
+    def __init__(self, cases: Sequence[Dict], detector: Optional[CouncilTaxFraudDetector] = None,
+                 flag_level: RiskLevel = RiskLevel.HIGH, calibration_bins: int = 10):
+        self.layout = IndicatorLayout(detector)
+        self.components = self.layout.components(self.layout.build_matrix(cases))
+        self.truth_class, self.truth_type = encode_labels(cases, self.layout)
+        self.is_fraud = self.truth_class == TRUTH_CLASSES.index('fraud')
+        self.flag_code = RISK_LEVEL_CODES[flag_level]
+        self.calibration_bins = calibration_bins
+
+    def __len__(self):
+        return len(self.truth_class)
+
+    def evaluate(self, thresholds: Optional[Sequence[float]] = None,
+                 error_weight_factor: Optional[float] = None) -> EvaluationReport:
+        layout = self.layout
+        thresholds = tuple(layout.thresholds if thresholds is None else thresholds)
+        factor = layout.error_weight_factor if error_weight_factor is None else error_weight_factor
+        scores = layout.finalise(self.components, error_weight_factor=factor, thresholds=thresholds)
+        n = len(self)
+        is_fraud = self.is_fraud
+
+        predicted_class = np.where(scores.is_likely_fraud, 0, np.where(scores.is_likely_error, 1, 2))
+        confusion = np.bincount(
+            self.truth_class.astype(np.intp) * len(PREDICTED_CLASSES) + predicted_class,
+            minlength=len(TRUTH_CLASSES) * len(PREDICTED_CLASSES)
+        ).reshape(len(TRUTH_CLASSES), len(PREDICTED_CLASSES))
+
+        flagged = scores.risk_level >= self.flag_code
+        tp = int(np.count_nonzero(flagged & is_fraud))
+        fp = int(np.count_nonzero(flagged)) - tp
+        fn = int(np.count_nonzero(is_fraud)) - tp
+
+        # "No type" is the last row/column; unflagged cases predict no type
+        types = len(layout.fraud_types)
+        truth_type = np.where(self.truth_type < 0, types, self.truth_type).astype(np.intp)
+        predicted_type = np.where(flagged & (scores.fraud_type >= 0), scores.fraud_type, types).astype(np.intp)
+        type_confusion = np.bincount(
+            truth_type * (types + 1) + predicted_type, minlength=(types + 1) ** 2
+        ).reshape(types + 1, types + 1)
+
+        bins = self.calibration_bins
+        risk_score = scores.risk_score
+        bin_index = np.minimum((risk_score * bins).astype(np.intp), bins - 1)
+        count = np.bincount(bin_index, minlength=bins)
+        score_sum = np.bincount(bin_index, weights=risk_score, minlength=bins)
+        fraud_sum = np.bincount(bin_index, weights=is_fraud, minlength=bins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_score = np.where(count > 0, score_sum / count, np.nan)
+            fraud_rate = np.where(count > 0, fraud_sum / count, np.nan)
+        occupied = count > 0
+        ece = float(np.sum(count[occupied] / n * np.abs(mean_score[occupied] - fraud_rate[occupied]))) if n else 0.0
+        brier = float(np.mean((risk_score - is_fraud) ** 2)) if n else 0.0
+
+        return EvaluationReport(
+            thresholds=thresholds,
+            error_weight_factor=factor,
+            fraud_types=tuple(fraud_type.value for fraud_type in layout.fraud_types),
+            confusion_matrix=confusion,
+            type_confusion=type_confusion,
+            flagged={'tp': tp, 'fp': fp, 'fn': fn, 'tn': n - tp - fp - fn},
+            calibration={
+                'bin_edges': np.linspace(0, 1, bins + 1),
+                'mean_score': mean_score,
+                'fraud_rate': fraud_rate,
+                'count': count,
+            },
+            brier_score=brier,
+            expected_calibration_error=ece,
+        )
+
+    def sweep(self, grid: Iterable[Dict], workers: Optional[int] = None) -> List[EvaluationReport]:
+        """Evaluate every parameter setting in the grid, in grid order"""
+        grid = list(grid)
+        workers = min(workers or os.cpu_count() or 1, len(grid))
+        if workers <= 1:
+            return [self.evaluate(**params) for params in grid]
+        # Each worker receives the evaluator once; tasks only carry parameters
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            chunksize = max(1, len(grid) // (workers * 4))
+            return list(pool.map(_evaluate_params, grid, chunksize=chunksize))
+
+_worker_evaluator: Optional[Evaluator] = None
+
+def _init_worker(evaluator: Evaluator):
+    global _worker_evaluator
+    _worker_evaluator = evaluator
+
+def _evaluate_params(params: Dict) -> EvaluationReport:
+    return _worker_evaluator.evaluate(**params)
+
+def parameter_grid(medium: Iterable[float] = (0.50,), high: Iterable[float] = (0.75,),
+                   critical: Iterable[float] = (0.90,),
+                   error_weight_factor: Iterable[float] = (0.5,)) -> List[Dict]:
+    """All increasing (medium, high, critical) thresholds crossed with the error weight factors"""
+    return [
+        {'thresholds': (float(m), float(h), float(c)), 'error_weight_factor': float(f)}
+        for m, h, c, f in itertools.product(medium, high, critical, error_weight_factor)
+        if m < h < c
+    ]
+
+def best_report(reports: Iterable[EvaluationReport], metric: str = 'f1') -> EvaluationReport:
+    return max(reports, key=lambda report: getattr(report, metric))
+
+def evaluate_cases(cases: Sequence[Dict], detector: Optional[CouncilTaxFraudDetector] = None) -> EvaluationReport:
+    """Evaluate the detector's own configuration on labelled cases"""
+    return Evaluator(cases, detector).evaluate()
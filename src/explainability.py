@@ -0,0 +1,247 @@
+"""
+Bulk explainability reports for council tax fraud assessments.
+
+Explanations are computed straight from case data (enriched with the
+detector's reference data, if any) using indicator tables compiled once per
+detector, so no per-case indicator records are made.
+Reports are streamed to JSONL or HTML one case at a time.
+"""
+
+import html
+import json
+from string import Template
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from fraud_detector import (
+    CouncilTaxFraudDetector, FraudAssessment, EVIDENCE_KEYS, finalise_score, generate_recommendations, indicator_present
+)
+
+class ExplanationBuilder:
+    """Builds per-case score breakdowns: indicator contributions and mitigating factors"""
+
+    def __init__(self, detector: Optional[CouncilTaxFraudDetector] = None):
+        self.detector = detector or CouncilTaxFraudDetector()
+        # (fraud_type, indicator count, ((type, evidence key, description, weight), ...))
+        self._fraud_tables = tuple(
+            (fraud_type, len(indicators), tuple(
+                (ind.indicator_type, EVIDENCE_KEYS[ind.indicator_type], ind.description, ind.weight)
+                for ind in indicators
+            ))
+            for fraud_type, indicators in self.detector.fraud_patterns.items()
+        )
+        self._error_table = tuple(
+            (ind.indicator_type, ind.description, ind.weight)
+            for ind in self.detector.error_patterns
+        )
+        self._type_sizes = {fraud_type: count for fraud_type, count, _ in self._fraud_tables}
+        reference_data = getattr(self.detector, 'reference_data', None)
+        self._enrich = reference_data.enrich if reference_data is not None else None
+
+    def explain(self, case_data: Dict) -> Dict:
+        # Derived indicators are added exactly as detect_fraud adds them, so both see the same case
+        if self._enrich is not None:
+            case_data = self._enrich(case_data)
+        best_type = None
+        best_rows = ()
+        best_count = 0
+        max_type_score = 0
+
+        for fraud_type, count, table in self._fraud_tables:
+            type_score = 0
+            rows = []
+            for indicator_type, evidence_key, description, weight in table:
+                if indicator_present(case_data.get(indicator_type, False)):
+                    rows.append((indicator_type, evidence_key, description, weight))
+                    type_score += weight
+            if type_score > max_type_score:
+                max_type_score = type_score
+                best_type = fraud_type
+                best_rows = rows
+                best_count = count
+
+        contributions = [
+            {
+                'indicator': indicator_type,
+                'description': description,
+                'weight': weight,
+                'contribution': weight / best_count,
+                'evidence': case_data.get(evidence_key, 'Detected in analysis'),
+            }
+            for indicator_type, evidence_key, description, weight in best_rows
+        ]
+
+        mitigating = []
+        error_score = 0
+        for indicator_type, description, weight in self._error_table:
+            if indicator_present(case_data.get(indicator_type, False)):
+                error_score += abs(weight)
+                mitigating.append({
+                    'indicator': indicator_type,
+                    'description': description,
+                    'weight': weight,
+                    'contribution': -abs(weight) * self.detector.error_weight_factor,
+                })
+
+        raw_fraud_score = max_type_score / best_count if best_count else 0
+        return self._finish(
+            case_data.get('case_id', 'UNKNOWN'), best_type, raw_fraud_score,
+            error_score, contributions, mitigating
+        )
+
+    def explain_assessment(self, assessment: FraudAssessment) -> Dict:
+        """Explain an assessment that has already been produced by the detector"""
+        count = self._type_sizes.get(assessment.fraud_type, 0)
+        contributions = []
+        mitigating = []
+        type_score = 0
+        error_score = 0
+        for ind in assessment.indicators:
+            if ind.weight < 0:
+                error_score += abs(ind.weight)
+                mitigating.append({
+                    'indicator': ind.indicator_type,
+                    'description': ind.description,
+                    'weight': ind.weight,
+                    'contribution': -abs(ind.weight) * self.detector.error_weight_factor,
+                })
+            else:
+                type_score += ind.weight
+                contributions.append({
+                    'indicator': ind.indicator_type,
+                    'description': ind.description,
+                    'weight': ind.weight,
+                    'contribution': ind.weight / count if count else 0,
+                    'evidence': ind.evidence,
+                })
+        raw_fraud_score = type_score / count if count else 0
+        return self._finish(
+            assessment.case_id, assessment.fraud_type, raw_fraud_score,
+            error_score, contributions, mitigating
+        )
+
+    def explain_batch(self, cases: Iterable[Dict]) -> Iterator[Dict]:
+        explain = self.explain
+        for case in cases:
+            yield explain(case)
+
+    def _finish(self, case_id, fraud_type, raw_fraud_score, error_score,
+                contributions: List[Dict], mitigating: List[Dict]) -> Dict:
+        detector = self.detector
+        fraud_score = min(raw_fraud_score, 1.0)
+        final_score, is_likely_fraud, is_likely_error, confidence = finalise_score(
+            fraud_score, error_score, len(contributions) + len(mitigating), detector.error_weight_factor
+        )
+        risk_level = detector._calculate_risk_level(final_score)
+
+        return {
+            'case_id': case_id,
+            'fraud_type': fraud_type.value if fraud_type else None,
+            'risk_level': risk_level.value,
+            'risk_score': final_score,
+            'raw_fraud_score': raw_fraud_score,
+            'fraud_score': fraud_score,
+            'error_score': error_score,
+            'error_adjustment': -(error_score * detector.error_weight_factor),
+            'is_likely_fraud': is_likely_fraud,
+            'is_likely_error': is_likely_error,
+            'confidence': confidence,
+            'contributions': contributions,
+            'mitigating_factors': mitigating,
+            'recommendations': generate_recommendations(
+                fraud_type, risk_level, is_likely_fraud, is_likely_error
+            ),
+        }
+
+def write_jsonl(explanations: Iterable[Dict], fh: TextIO) -> int:
+    """Stream explanations to a JSONL file, returning the number of lines written"""
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    write = fh.write
+    count = 0
+    for explanation in explanations:
+        write(encode(explanation))
+        write('\n')
+        count += 1
+    return count
+
+class HtmlReportWriter:
+    """Streams explanations into a single HTML audit pack using pre-compiled templates"""
+
+    HEADER = Template(
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>$title</title>\n'
+        '<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1em}'
+        'td,th{border:1px solid #ccc;padding:2px 6px}.neg{color:#2e7d32}</style>\n'
+        '</head><body>\n<h1>$title</h1>\n'
+    )
+    CASE = Template(
+        '<section><h2>$case_id &mdash; $risk_level ($risk_score)</h2>\n'
+        '<p>Fraud type: $fraud_type | Classification: $classification | Confidence: $confidence</p>\n'
+        '<table><tr><th>Indicator</th><th>Weight</th><th>Contribution</th><th>Evidence</th></tr>\n'
+        '$rows</table>\n<p>Recommendations: $recommendations</p></section>\n'
+    )
+    ROW = Template(
+        '<tr class="$css"><td>$description</td><td>$weight</td><td>$contribution</td><td>$evidence</td></tr>\n'
+    )
+    FOOTER = Template('<p>$count cases</p>\n</body></html>\n')
+
+    def __init__(self, fh: TextIO, title: str = "Fraud Assessment Explanations"):
+        self.fh = fh
+        self.title = title
+        self.count = 0
+        self._started = False
+        self._closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        if not self._started:
+            self.fh.write(self.HEADER.substitute(title=html.escape(self.title)))
+            self._started = True
+
+    def write(self, explanation: Dict):
+        self.start()
+        escape = html.escape
+        row = self.ROW.substitute
+        rows = [
+            row(css='pos', description=escape(c['description']), weight=f"{c['weight']:.2f}",
+                contribution=f"{c['contribution']:+.3f}", evidence=escape(str(c['evidence'])))
+            for c in explanation['contributions']
+        ]
+        rows.extend(
+            row(css='neg', description=escape(m['description']), weight=f"{m['weight']:.2f}",
+                contribution=f"{m['contribution']:+.3f}", evidence='Mitigating factor')
+            for m in explanation['mitigating_factors']
+        )
+        if explanation['is_likely_fraud']:
+            classification = 'FRAUD'
+        elif explanation['is_likely_error']:
+            classification = 'ERROR'
+        else:
+            classification = 'UNCERTAIN'
+        self.fh.write(self.CASE.substitute(
+            case_id=escape(str(explanation['case_id'])),
+            risk_level=explanation['risk_level'].upper(),
+            risk_score=f"{explanation['risk_score']:.1%}",
+            fraud_type=escape(explanation['fraud_type'] or 'None'),
+            classification=classification,
+            confidence=f"{explanation['confidence']:.1%}",
+            rows=''.join(rows),
+            recommendations=escape('; '.join(explanation['recommendations'])),
+        ))
+        self.count += 1
+
+    def write_all(self, explanations: Iterable[Dict]) -> int:
+        for explanation in explanations:
+            self.write(explanation)
+        return self.count
+
+    def close(self):
+        if self._closed:
+            return
+        self.start()
+        self.fh.write(self.FOOTER.substitute(count=self.count))
+        self._closed = True
@@ -0,0 +1,306 @@
+"""
+Out-of-core ranking of scored cases.
+
+Ranking records (case id, risk score, confidence, expected recovery, risk
+level, fraud type) are buffered up to a memory budget and spilled to run
+files. Ranking by a key sorts each run and then k-way merges the sorted
+runs block by block through memory-mapped reads, so peak memory is bounded
+by the budget however many cases were scored. The merged ranking is itself
+a memory-mapped file: top-K is a slice, a percentile is one row, and a page
+of the Case Explorer is a slice at an offset.
+
+Expected recovery is annual_charge * risk_score, the amount at stake if the
+case is confirmed.
+"""
+
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from fraud_detector import FraudAssessment, FraudType, RiskLevel
+
+RANK_KEYS = ('risk_score', 'confidence', 'expected_recovery')
+RISK_LEVELS = tuple(level.value for level in RiskLevel)
+FRAUD_TYPES = tuple(fraud_type.value for fraud_type in FraudType)
+_RISK_LEVEL_CODES = {value: code for code, value in enumerate(RISK_LEVELS)}
+_FRAUD_TYPE_CODES = {value: code for code, value in enumerate(FRAUD_TYPES)}
+
+DEFAULT_MEMORY_BUDGET = 64 << 20
+MAX_FAN_IN = 64
+STAGE_ROWS = 4096
+
+def record_dtype(id_width: int = 32) -> np.dtype:
+    return np.dtype([
+        ('case_id', f'S{id_width}'),
+        ('seq', '<u8'),
+        ('risk_score', '<f8'),
+        ('confidence', '<f8'),
+        ('expected_recovery', '<f8'),
+        ('risk_level', 'u1'),
+        ('fraud_type', 'i1'),
+    ])
+
+def _sort_order(block: np.ndarray, key: str) -> np.ndarray:
+    # Highest value first; ties keep insertion order so rankings are deterministic
+    return np.lexsort((block['seq'], -block[key]))
+
+def _as_dict(row) -> Dict:
+    fraud_type = int(row['fraud_type'])
+    return {
+        'case_id': row['case_id'].decode('utf-8'),
+        'risk_score': float(row['risk_score']),
+        'confidence': float(row['confidence']),
+        'expected_recovery': float(row['expected_recovery']),
+        'risk_level': RISK_LEVELS[int(row['risk_level'])],
+        'fraud_type': FRAUD_TYPES[fraud_type] if fraud_type >= 0 else None,
+    }
+
+class Ranking:
+    """Memory-mapped, fully sorted ranking for one key"""
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        self.rows = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def top(self, k: int) -> List[Dict]:
+        return [_as_dict(row) for row in self.rows[:k]]
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        return [_as_dict(row) for row in self.rows[offset:offset + limit]]
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Value at percentile q (0-100) of the key, nearest-rank on the sorted file"""
+        if not len(self.rows):
+            return None
+        if not 0 <= q <= 100:
+            raise ValueError("percentile must be between 0 and 100")
+        # Rows are descending, so the q-th percentile counts from the end
+        index = int(round((1 - q / 100) * (len(self.rows) - 1)))
+        return float(self.rows[index][self.key])
+
+    def percentiles(self, qs: Iterable[float]) -> Dict[float, Optional[float]]:
+        return {q: self.percentile(q) for q in qs}
+
+    def count_at_least(self, value: float) -> int:
+        """Number of cases whose key is >= value (binary search on the sorted file)"""
+        lo, hi = 0, len(self.rows)
+        column = self.rows[self.key]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if column[mid] >= value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+class ExternalRanker:
+    """Collects ranking records within a memory budget; usable as a batch_analyze listener"""
+
+    def __init__(self, directory: Optional[str] = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 id_width: int = 32):
+        self._tmp = tempfile.TemporaryDirectory(prefix='ranking-') if directory is None else None
+        self.directory = directory or self._tmp.name
+        os.makedirs(self.directory, exist_ok=True)
+        self.dtype = record_dtype(id_width)
+        self.id_width = id_width
+        self.memory_budget = memory_budget
+        # Half the budget buffers incoming records; sorting a run needs room for its index and copy
+        self.buffer_rows = max(256, memory_budget // 2 // self.dtype.itemsize)
+        self._buffer = np.empty(self.buffer_rows, dtype=self.dtype)
+        self._filled = 0
+        self._staged: List[tuple] = []
+        self._stage_rows = min(STAGE_ROWS, self.buffer_rows)
+        self._runs: List[str] = []
+        self._rankings: Dict[str, Ranking] = {}
+        self._ranked_paths: Dict[str, str] = {}
+        self.count = 0
+        # Largest number of bytes held by a merge at once (run buffers plus the merged block)
+        self.merge_peak = 0
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.add(case, assessment)
+
+    def add(self, case: Dict, assessment: FraudAssessment):
+        charge = case.get('annual_charge') or 0.0
+        self.add_record(assessment.case_id, assessment.risk_score, assessment.confidence,
+                        float(charge) * assessment.risk_score, assessment.risk_level.value,
+                        assessment.fraud_type.value if assessment.fraud_type else None)
+
+    def add_record(self, case_id: str, risk_score: float, confidence: float, expected_recovery: float,
+                   risk_level: str, fraud_type: Optional[str] = None):
+        encoded = str(case_id).encode('utf-8')
+        if len(encoded) > self.id_width:
+            raise ValueError(f"case_id {case_id!r} is longer than id_width={self.id_width} bytes")
+        self._staged.append((encoded, self.count, risk_score, confidence, expected_recovery,
+                             _RISK_LEVEL_CODES[risk_level],
+                             _FRAUD_TYPE_CODES[fraud_type] if fraud_type else -1))
+        self.count += 1
+        if len(self._staged) == self._stage_rows:
+            self._unstage()
+        if self._rankings:
+            self._rankings.clear()
+
+    def _unstage(self):
+        # Per-row assignment into a structured array is slow; convert small batches at once
+        staged = self._staged
+        while staged:
+            if self._filled == self.buffer_rows:
+                self._spill()
+            take = min(len(staged), self.buffer_rows - self._filled)
+            self._buffer[self._filled:self._filled + take] = np.array(staged[:take], dtype=self.dtype)
+            self._filled += take
+            del staged[:take]
+
+    def extend(self, records: Iterable[Dict]):
+        """Add assessment records (FraudAssessment.to_dict() shape, optionally with annual_charge)"""
+        for record in records:
+            expected = record.get('expected_recovery')
+            if expected is None:
+                expected = float(record.get('annual_charge') or 0.0) * record['risk_score']
+            self.add_record(record['case_id'], record['risk_score'], record['confidence'], expected,
+                            record['risk_level'], record.get('fraud_type'))
+
+    def flush(self):
+        """Spill buffered records to a run file"""
+        self._unstage()
+        self._spill()
+
+    def _spill(self):
+        if not self._filled:
+            return
+        path = os.path.join(self.directory, f'run-{len(self._runs):05d}.npy')
+        np.save(path, self._buffer[:self._filled])
+        self._runs.append(path)
+        self._filled = 0
+
+    def _sorted_runs(self, key: str) -> List[str]:
+        self.flush()
+        paths = []
+        for i, run in enumerate(self._runs):
+            block = np.load(run, mmap_mode='r')
+            path = os.path.join(self.directory, f'{key}-sorted-{i:05d}.npy')
+            np.save(path, block[_sort_order(block, key)])
+            paths.append(path)
+        return paths
+
+    def _merge(self, paths: List[str], key: str, out_path: str):
+        """k-way merge of sorted runs, a block per run at a time"""
+        runs = [np.load(path, mmap_mode='r') for path in paths]
+        total = sum(len(run) for run in runs)
+        out = np.lib.format.open_memmap(out_path, mode='w+', dtype=self.dtype, shape=(total,))
+        block_rows = max(256, self.memory_budget // 3 // (len(runs) + 1) // self.dtype.itemsize)
+        positions = [0] * len(runs)
+        buffers: List[np.ndarray] = [np.empty(0, dtype=self.dtype)] * len(runs)
+        # Negated keys of each buffer, ascending, for binary search against the frontier
+        negated: List[np.ndarray] = [np.empty(0)] * len(runs)
+        written = 0
+        while True:
+            # Only runs whose buffered rows have all been emitted are read again
+            for i, run in enumerate(runs):
+                if not len(buffers[i]) and positions[i] < len(run):
+                    buffers[i] = np.asarray(run[positions[i]:positions[i] + block_rows])
+                    negated[i] = -buffers[i][key]
+                    positions[i] += len(buffers[i])
+            bound = min(((negated[i][-1], buffers[i][-1]['seq'])
+                         for i, run in enumerate(runs) if positions[i] < len(run)), default=None)
+            parts = []
+            for i, buffer in enumerate(buffers):
+                if not len(buffer):
+                    continue
+                if bound is None:
+                    ready = len(buffer)
+                else:
+                    # Everything up to the smallest unread-run frontier is final
+                    low = int(np.searchsorted(negated[i], bound[0], 'left'))
+                    high = int(np.searchsorted(negated[i], bound[0], 'right'))
+                    ready = low + int(np.searchsorted(buffer['seq'][low:high], bound[1], 'right'))
+                if ready:
+                    parts.append(buffer[:ready])
+                    buffers[i] = buffer[ready:]
+                    negated[i] = negated[i][ready:]
+            if not parts:
+                break
+            merged = np.concatenate(parts)
+            self.merge_peak = max(self.merge_peak, merged.nbytes + sum(buffer.nbytes for buffer in buffers))
+            merged = merged[_sort_order(merged, key)]
+            out[written:written + len(merged)] = merged
+            written += len(merged)
+        out.flush()
+        del out
+
+    def ranking(self, key: str = 'risk_score') -> Ranking:
+        """Fully sorted ranking by key (descending), built out of core and cached until new records arrive"""
+        if key not in RANK_KEYS:
+            raise ValueError(f"key must be one of {RANK_KEYS}, not {key!r}")
+        if key in self._rankings:
+            return self._rankings[key]
+        runs = self._sorted_runs(key)
+        generation = 0
+        while len(runs) > MAX_FAN_IN:
+            merged = []
+            for start in range(0, len(runs), MAX_FAN_IN):
+                path = os.path.join(self.directory, f'{key}-merge-{generation}-{start:05d}.npy')
+                self._merge(runs[start:start + MAX_FAN_IN], key, path)
+                merged.append(path)
+            for path in runs:
+                os.remove(path)
+            runs = merged
+            generation += 1
+        # A fresh file per record count: an earlier Ranking may still have the old one mapped
+        out_path = os.path.join(self.directory, f'ranked-{key}-{self.count}.npy')
+        if runs:
+            self._merge(runs, key, out_path)
+            for path in runs:
+                os.remove(path)
+        else:
+            np.save(out_path, np.empty(0, dtype=self.dtype))
+        previous = self._ranked_paths.get(key)
+        if previous is not None and previous != out_path:
+            # Unlinking leaves an existing mapping readable on POSIX; where the OS refuses
+            # (Windows, file still mapped) it stays until the spill directory is removed
+            try:
+                os.remove(previous)
+            except OSError:
+                pass
+        self._ranked_paths[key] = out_path
+        ranking = self._rankings[key] = Ranking(out_path, key)
+        return ranking
+
+    def top_k(self, k: int, key: str = 'risk_score') -> List[Dict]:
+        """Best k records by key without a full sort; one pass over the runs with O(k) extra memory"""
+        if key not in RANK_KEYS:
+            raise ValueError(f"key must be one of {RANK_KEYS}, not {key!r}")
+        if key in self._rankings:
+            return self._rankings[key].top(k)
+        best = np.empty(0, dtype=self.dtype)
+        for block in self._blocks():
+            candidates = np.concatenate([best, block])
+            if len(candidates) > k:
+                order = _sort_order(candidates, key)[:k]
+                candidates = candidates[order]
+            best = candidates
+        return [_as_dict(row) for row in best[_sort_order(best, key)][:k]]
+
+    def _blocks(self) -> Iterator[np.ndarray]:
+        self._unstage()
+        for run in self._runs:
+            data = np.load(run, mmap_mode='r')
+            for start in range(0, len(data), self.buffer_rows // 4 or 1):
+                yield np.asarray(data[start:start + self.buffer_rows // 4])
+        if self._filled:
+            yield self._buffer[:self._filled]
+
+    @property
+    def run_count(self) -> int:
+        return len(self._runs)
+
+    def close(self):
+        self._rankings.clear()
+        if self._tmp is not None:
+            self._tmp.cleanup()
@@ -1,9 +1,7 @@
-from typing import Dict, List, Tuple, Optional
+import hashlib
+from typing import Callable, Dict, List, NamedTuple, Tuple, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
-import json
-from datetime import datetime, timedelta
-import random
 
 class FraudType(Enum):
     SINGLE_PERSON_DISCOUNT = "single_person_discount"
@@ -19,28 +17,212 @@ class RiskLevel(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+# Mitigating (error) indicators reduce the fraud score by this fraction of their weight
+ERROR_SCORE_FACTOR = 0.5
+
+# Text spellings of a present indicator (as the case schema coerces them); any other string is absent
+TRUE_STRINGS = frozenset(('true', 't', 'yes', 'y', 'on', '1'))
+
+def indicator_present(value) -> bool:
+    """Whether an indicator value counts as detected; strings such as "False" or "0" are parsed, not taken as truthy"""
+    if value.__class__ is str:
+        return value.strip().lower() in TRUE_STRINGS
+    return bool(value)
+
+# Outcome rules shared by every scorer (see finalise_score; case_matrix applies them vectorised)
+LIKELY_FRAUD_MIN_SCORE = 0.6
+LIKELY_FRAUD_MAX_ERROR = 0.3
+LIKELY_ERROR_MAX_SCORE = 0.4
+LIKELY_ERROR_MIN_ERROR = 0.5
+MAX_CONFIDENCE = 0.95
+
+class _EvidenceKeyTable(dict):
+    """Maps indicator types to their '<indicator>_evidence' case keys, built once per type"""
+
+    def __missing__(self, indicator_type: str) -> str:
+        key = self[indicator_type] = f'{indicator_type}_evidence'
+        return key
+
+EVIDENCE_KEYS = _EvidenceKeyTable()
+
+class IndicatorDefinition(NamedTuple):
+    """One configured indicator; immutable and shared by reference by every hit on it"""
+    indicator_type: str
+    description: str
+    weight: float
+
+class IndicatorHit(NamedTuple):
+    """A detected indicator in one assessment: its definition plus the case's evidence"""
+    definition: IndicatorDefinition
+    evidence: Optional[str]
+
+    @property
+    def indicator_type(self) -> str:
+        return self.definition.indicator_type
+
+    @property
+    def description(self) -> str:
+        return self.definition.description
+
+    @property
+    def weight(self) -> float:
+        return self.definition.weight
+
+    @property
+    def detected(self) -> bool:
+        return True
+
 @dataclass
 class FraudIndicator:
+    """Legacy mutable indicator record, still accepted wherever an indicator definition is"""
     indicator_type: str
     description: str
     weight: float
     detected: bool = False
     evidence: Optional[str] = None
 
+def as_definition(indicator) -> IndicatorDefinition:
+    """The IndicatorDefinition behind a definition, hit or legacy FraudIndicator"""
+    if isinstance(indicator, IndicatorDefinition):
+        return indicator
+    if isinstance(indicator, IndicatorHit):
+        return indicator.definition
+    return IndicatorDefinition(indicator.indicator_type, indicator.description, indicator.weight)
+
 @dataclass
 class FraudAssessment:
+    __slots__ = ('case_id', 'fraud_type', 'risk_level', 'risk_score', 'is_likely_fraud', 'is_likely_error',
+                 'indicators', 'recommendations', 'confidence')
     case_id: str
     fraud_type: Optional[FraudType]
     risk_level: RiskLevel
     risk_score: float
     is_likely_fraud: bool
     is_likely_error: bool
-    indicators: List[FraudIndicator]
+    indicators: List[Union[IndicatorHit, FraudIndicator]]
     recommendations: List[str]
     confidence: float
 
+    def to_dict(self) -> Dict:
+        """JSON-ready summary of the assessment"""
+        return {
+            'case_id': self.case_id,
+            'fraud_type': self.fraud_type.value if self.fraud_type else None,
+            'risk_level': self.risk_level.value,
+            'risk_score': self.risk_score,
+            'is_likely_fraud': self.is_likely_fraud,
+            'is_likely_error': self.is_likely_error,
+            'confidence': self.confidence,
+            'indicators': [ind.indicator_type for ind in self.indicators if ind.detected],
+            'recommendations': list(self.recommendations),
+        }
+
+def finalise_score(fraud_score: float, error_score: float, indicator_count: int,
+                   error_weight_factor: float = ERROR_SCORE_FACTOR) -> Tuple[float, bool, bool, float]:
+    """Final risk score, likely-fraud and likely-error flags and confidence from one case's score parts"""
+    final_score = max(0, min(1, fraud_score - (error_score * error_weight_factor)))
+    is_likely_fraud = final_score > LIKELY_FRAUD_MIN_SCORE and error_score < LIKELY_FRAUD_MAX_ERROR
+    is_likely_error = final_score < LIKELY_ERROR_MAX_SCORE or error_score > LIKELY_ERROR_MIN_ERROR
+    confidence = min(MAX_CONFIDENCE, (indicator_count / 10) + (final_score * 0.5))
+    return final_score, is_likely_fraud, is_likely_error, confidence
+
+def generate_recommendations(fraud_type: Optional[FraudType],
+                             risk_level: RiskLevel,
+                             is_likely_fraud: bool,
+                             is_likely_error: bool) -> List[str]:
+    recommendations = []
+
+    if is_likely_error:
+        recommendations.append("Send educational letter about council tax obligations")
+        recommendations.append("Offer support to correct the error")
+    elif is_likely_fraud:
+        if risk_level == RiskLevel.CRITICAL:
+            recommendations.append("Immediate investigation required")
+            recommendations.append("Consider prosecution if amount > £2000")
+            recommendations.append("Issue formal caution")
+        elif risk_level == RiskLevel.HIGH:
+            recommendations.append("Schedule property inspection")
+            recommendations.append("Request supporting documentation")
+            recommendations.append("Cross-reference with other departments")
+        elif risk_level == RiskLevel.MEDIUM:
+            recommendations.append("Send compliance review letter")
+            recommendations.append("Monitor account for 6 months")
+        else:
+            recommendations.append("Add to watchlist")
+            recommendations.append("Review at next annual check")
+
+    if fraud_type == FraudType.CUCKOOING:
+        recommendations.insert(0, "Alert adult safeguarding team")
+        recommendations.insert(1, "Coordinate with police")
+
+    return recommendations
+
+def merge_statistics(*parts: Dict) -> Dict:
+    """Combine batch_analyze statistics from disjoint batches; counts add, nested counts merge by key"""
+    merged: Dict = {}
+    for part in parts:
+        for key, value in part.items():
+            if isinstance(value, dict):
+                merged[key] = merge_statistics(merged.get(key, {}), value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+def detector_fingerprint(detector: 'CouncilTaxFraudDetector') -> str:
+    """Short stable hash of everything in a detector's configuration that affects scoring"""
+    config = (
+        tuple(
+            (fraud_type.value, tuple((ind.indicator_type, ind.description, ind.weight) for ind in indicators))
+            for fraud_type, indicators in detector.fraud_patterns.items()
+        ),
+        tuple((ind.indicator_type, ind.description, ind.weight) for ind in detector.error_patterns),
+        tuple(sorted((level.value, value) for level, value in detector.risk_thresholds.items())),
+        detector.error_weight_factor,
+    )
+    return hashlib.sha1(repr(config).encode('utf-8')).hexdigest()[:16]
+
+def run_batch(detect: Callable[[Dict], 'FraudAssessment'], cases: List[Dict],
+              listeners: Optional[List[Callable]] = None, profiler=None) -> Dict:
+    """The batch_analyze loop shared by every detector: assess each case with detect and tally statistics"""
+    if profiler is not None:
+        detect = profiler.wrap(detect)
+    results = []
+    stats = {
+        'total_cases': len(cases),
+        'high_risk': 0,
+        'likely_fraud': 0,
+        'likely_error': 0,
+        'by_type': {}
+    }
+
+    for case in cases:
+        assessment = detect(case)
+        results.append(assessment)
+        if listeners:
+            for listener in listeners:
+                listener(case, assessment)
+
+        if assessment.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
+            stats['high_risk'] += 1
+        if assessment.is_likely_fraud:
+            stats['likely_fraud'] += 1
+        if assessment.is_likely_error:
+            stats['likely_error'] += 1
+
+        if assessment.fraud_type:
+            fraud_type_str = assessment.fraud_type.value
+            stats['by_type'][fraud_type_str] = stats['by_type'].get(fraud_type_str, 0) + 1
+
+    return {
+        'assessments': results,
+        'statistics': stats
+    }
+
 class CouncilTaxFraudDetector:
-    def __init__(self):
+    def __init__(self, reference_data=None, error_weight_factor: float = ERROR_SCORE_FACTOR):
+        # Optional reference_data.ReferenceData used to derive banding/reduction indicators
+        self.reference_data = reference_data
+        self.error_weight_factor = error_weight_factor
         self.fraud_patterns = self._initialize_fraud_patterns()
         self.error_patterns = self._initialize_error_patterns()
         self.risk_thresholds = {
@@ -53,47 +235,67 @@ class CouncilTaxFraudDetector:
     def _initialize_fraud_patterns(self) -> Dict:
         return {
             FraudType.SINGLE_PERSON_DISCOUNT: [
-                FraudIndicator("multiple_utility_accounts", "Multiple utility accounts in different names", 0.8),
-                FraudIndicator("electoral_register_mismatch", "Electoral register shows multiple adults", 0.9),
-                FraudIndicator("social_media_evidence", "Social media indicates cohabitation", 0.7),
-                FraudIndicator("multiple_vehicles", "Multiple vehicles registered at property", 0.6),
-                FraudIndicator("credit_check_mismatch", "Credit checks show multiple residents", 0.85),
+                IndicatorDefinition("multiple_utility_accounts", "Multiple utility accounts in different names", 0.8),
+                IndicatorDefinition("electoral_register_mismatch", "Electoral register shows multiple adults", 0.9),
+                IndicatorDefinition("social_media_evidence", "Social media indicates cohabitation", 0.7),
+                IndicatorDefinition("multiple_vehicles", "Multiple vehicles registered at property", 0.6),
+                IndicatorDefinition("credit_check_mismatch", "Credit checks show multiple residents", 0.85),
             ],
             FraudType.STUDENT_EXEMPTION: [
-                FraudIndicator("post_graduation_claim", "Claim continues after graduation date", 0.95),
-                FraudIndicator("employment_income", "Employment records during claimed study", 0.9),
-                FraudIndicator("part_time_status", "Part-time course claimed as full-time", 0.85),
-                FraudIndicator("fake_documentation", "Suspected fraudulent enrollment docs", 0.98),
-                FraudIndicator("historical_pattern", "Previous false student claims", 0.9),
+                IndicatorDefinition("post_graduation_claim", "Claim continues after graduation date", 0.95),
+                IndicatorDefinition("employment_income", "Employment records during claimed study", 0.9),
+                IndicatorDefinition("part_time_status", "Part-time course claimed as full-time", 0.85),
+                IndicatorDefinition("fake_documentation", "Suspected fraudulent enrollment docs", 0.98),
+                IndicatorDefinition("historical_pattern", "Previous false student claims", 0.9),
             ],
             FraudType.EMPTY_PROPERTY: [
-                FraudIndicator("utility_usage", "Utility usage in 'empty' property", 0.9),
-                FraudIndicator("rental_listings", "Property on rental platforms", 0.95),
-                FraudIndicator("neighbor_reports", "Neighbors report occupancy", 0.7),
-                FraudIndicator("maintenance_activity", "Regular maintenance observed", 0.6),
-                FraudIndicator("postal_deliveries", "Regular mail deliveries", 0.65),
+                IndicatorDefinition("utility_usage", "Utility usage in 'empty' property", 0.9),
+                IndicatorDefinition("rental_listings", "Property on rental platforms", 0.95),
+                IndicatorDefinition("neighbor_reports", "Neighbors report occupancy", 0.7),
+                IndicatorDefinition("maintenance_activity", "Regular maintenance observed", 0.6),
+                IndicatorDefinition("postal_deliveries", "Regular mail deliveries", 0.65),
             ],
             FraudType.CUCKOOING: [
-                FraudIndicator("sudden_payment_regularity", "Sudden payment regularization", 0.8),
-                FraudIndicator("behavior_change", "Significant property usage change", 0.85),
-                FraudIndicator("antisocial_reports", "Increased antisocial behavior reports", 0.9),
-                FraudIndicator("vulnerable_resident", "Resident is vulnerable person", 0.7),
-                FraudIndicator("payment_source_change", "Unexplained payment source change", 0.75),
-                FraudIndicator("police_intelligence", "Police intelligence indicators", 0.95),
+                IndicatorDefinition("sudden_payment_regularity", "Sudden payment regularization", 0.8),
+                IndicatorDefinition("behavior_change", "Significant property usage change", 0.85),
+                IndicatorDefinition("antisocial_reports", "Increased antisocial behavior reports", 0.9),
+                IndicatorDefinition("vulnerable_resident", "Resident is vulnerable person", 0.7),
+                IndicatorDefinition("payment_source_change", "Unexplained payment source change", 0.75),
+                IndicatorDefinition("police_intelligence", "Police intelligence indicators", 0.95),
+            ],
+            FraudType.PROPERTY_BANDING: [
+                IndicatorDefinition("valuation_band_mismatch", "Valuation implies a higher band", 0.9),
+                IndicatorDefinition("band_below_neighbours", "Band well below neighbouring properties", 0.8),
+                IndicatorDefinition("charge_below_neighbours", "Charge well below neighbouring properties", 0.6),
+                IndicatorDefinition("unreported_extension", "Extension or conversion not reported", 0.85),
+                IndicatorDefinition("planning_enlargement", "Planning records show enlargement", 0.7),
+            ],
+            FraudType.COUNCIL_TAX_REDUCTION: [
+                IndicatorDefinition("undeclared_income", "Undeclared employment or pension income", 0.9),
+                IndicatorDefinition("undeclared_capital", "Capital above reduction scheme limit", 0.85),
+                IndicatorDefinition("undeclared_partner", "Undeclared partner or non-dependant", 0.85),
+                IndicatorDefinition("income_below_neighbourhood", "Declared income far below neighbourhood", 0.6),
+                IndicatorDefinition("lifestyle_mismatch", "Assets or spending inconsistent with income", 0.75),
             ],
         }
     
-    def _initialize_error_patterns(self) -> List[FraudIndicator]:
+    def _initialize_error_patterns(self) -> List[IndicatorDefinition]:
         return [
-            FraudIndicator("immediate_cooperation", "Immediate cooperation when contacted", -0.3),
-            FraudIndicator("consistent_explanation", "Consistent explanations provided", -0.25),
-            FraudIndicator("documentation_provided", "Willingly provides documentation", -0.2),
-            FraudIndicator("self_reported", "Self-reported the change", -0.4),
-            FraudIndicator("first_occurrence", "First time occurrence", -0.15),
-            FraudIndicator("recent_life_change", "Recent bereavement/separation", -0.2),
+            IndicatorDefinition("immediate_cooperation", "Immediate cooperation when contacted", -0.3),
+            IndicatorDefinition("consistent_explanation", "Consistent explanations provided", -0.25),
+            IndicatorDefinition("documentation_provided", "Willingly provides documentation", -0.2),
+            IndicatorDefinition("self_reported", "Self-reported the change", -0.4),
+            IndicatorDefinition("first_occurrence", "First time occurrence", -0.15),
+            IndicatorDefinition("recent_life_change", "Recent bereavement/separation", -0.2),
         ]
     
     def detect_fraud(self, case_data: Dict) -> FraudAssessment:
+        if self.reference_data is not None:
+            case_data = self.reference_data.enrich(case_data)
+        return self.detect_enriched(case_data)
+    
+    def detect_enriched(self, case_data: Dict) -> FraudAssessment:
+        """Assess a case that already carries its reference-data indicators"""
         case_id = case_data.get('case_id', 'UNKNOWN')
         detected_indicators = []
         fraud_score = 0
@@ -108,14 +310,9 @@ class CouncilTaxFraudDetector:
             
             for indicator in indicators:
                 if self._check_indicator(indicator, case_data):
-                    indicator_copy = FraudIndicator(
-                        indicator.indicator_type,
-                        indicator.description,
-                        indicator.weight,
-                        True,
-                        case_data.get(f'{indicator.indicator_type}_evidence', 'Detected in analysis')
-                    )
-                    type_indicators.append(indicator_copy)
+                    type_indicators.append(IndicatorHit(
+                        indicator, case_data.get(EVIDENCE_KEYS[indicator.indicator_type], 'Detected in analysis')
+                    ))
                     type_score += indicator.weight
             
             if type_score > max_type_score:
@@ -127,34 +324,22 @@ class CouncilTaxFraudDetector:
         # Check error patterns
         for error_indicator in self.error_patterns:
             if self._check_indicator(error_indicator, case_data):
-                error_indicator_copy = FraudIndicator(
-                    error_indicator.indicator_type,
-                    error_indicator.description,
-                    error_indicator.weight,
-                    True,
-                    "Mitigating factor detected"
-                )
-                detected_indicators.append(error_indicator_copy)
+                detected_indicators.append(IndicatorHit(error_indicator, "Mitigating factor detected"))
                 error_score += abs(error_indicator.weight)
         
-        # Calculate final risk score
-        final_score = max(0, min(1, fraud_score - (error_score * 0.5)))
+        # Calculate final risk score, fraud/error flags and confidence
+        final_score, is_likely_fraud, is_likely_error, confidence = finalise_score(
+            fraud_score, error_score, len(detected_indicators), self.error_weight_factor
+        )
         
         # Determine risk level
         risk_level = self._calculate_risk_level(final_score)
         
-        # Determine if fraud or error
-        is_likely_fraud = final_score > 0.6 and error_score < 0.3
-        is_likely_error = final_score < 0.4 or error_score > 0.5
-        
         # Generate recommendations
         recommendations = self._generate_recommendations(
             detected_fraud_type, risk_level, is_likely_fraud, is_likely_error
         )
         
-        # Calculate confidence
-        confidence = min(0.95, (len(detected_indicators) / 10) + (final_score * 0.5))
-        
         return FraudAssessment(
             case_id=case_id,
             fraud_type=detected_fraud_type,
@@ -167,9 +352,14 @@ class CouncilTaxFraudDetector:
             confidence=confidence
         )
     
-    def _check_indicator(self, indicator: FraudIndicator, case_data: Dict) -> bool:
+    def compile(self):
+        """Frozen, thread-safe snapshot of this detector's configuration"""
+        from compiled_detector import CompiledDetector
+        return CompiledDetector.from_detector(self)
+    
+    def _check_indicator(self, indicator: IndicatorDefinition, case_data: Dict) -> bool:
         # Simplified check - in production would use complex rules
-        return case_data.get(indicator.indicator_type, False)
+        return indicator_present(case_data.get(indicator.indicator_type, False))
     
     def _calculate_risk_level(self, score: float) -> RiskLevel:
         if score >= self.risk_thresholds[RiskLevel.CRITICAL]:
@@ -185,59 +375,12 @@ class CouncilTaxFraudDetector:
                                  risk_level: RiskLevel,
                                  is_likely_fraud: bool,
                                  is_likely_error: bool) -> List[str]:
-        recommendations = []
-        
-        if is_likely_error:
-            recommendations.append("Send educational letter about council tax obligations")
-            recommendations.append("Offer support to correct the error")
-        elif is_likely_fraud:
-            if risk_level == RiskLevel.CRITICAL:
-                recommendations.append("Immediate investigation required")
-                recommendations.append("Consider prosecution if amount > £2000")
-                recommendations.append("Issue formal caution")
-            elif risk_level == RiskLevel.HIGH:
-                recommendations.append("Schedule property inspection")
-                recommendations.append("Request supporting documentation")
-                recommendations.append("Cross-reference with other departments")
-            elif risk_level == RiskLevel.MEDIUM:
-                recommendations.append("Send compliance review letter")
-                recommendations.append("Monitor account for 6 months")
-            else:
-                recommendations.append("Add to watchlist")
-                recommendations.append("Review at next annual check")
-        
-        if fraud_type == FraudType.CUCKOOING:
-            recommendations.insert(0, "Alert adult safeguarding team")
-            recommendations.insert(1, "Coordinate with police")
-        
-        return recommendations
+        return generate_recommendations(fraud_type, risk_level, is_likely_fraud, is_likely_error)
     
-    def batch_analyze(self, cases: List[Dict]) -> Dict:
-        results = []
-        stats = {
-            'total_cases': len(cases),
-            'high_risk': 0,
-            'likely_fraud': 0,
-            'likely_error': 0,
-            'by_type': {}
-        }
-        
-        for case in cases:
-            assessment = self.detect_fraud(case)
-            results.append(assessment)
-            
-            if assessment.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
-                stats['high_risk'] += 1
-            if assessment.is_likely_fraud:
-                stats['likely_fraud'] += 1
-            if assessment.is_likely_error:
-                stats['likely_error'] += 1
-            
-            if assessment.fraud_type:
-                fraud_type_str = assessment.fraud_type.value
-                stats['by_type'][fraud_type_str] = stats['by_type'].get(fraud_type_str, 0) + 1
-        
-        return {
-            'assessments': results,
-            'statistics': stats
-        }
\ No newline at end of file
+    def batch_analyze(self, cases: List[Dict], listeners: Optional[List[Callable]] = None,
+                      profiler=None) -> Dict:
+        """Assess every case; each listener is called as listener(case, assessment).
+
+        An optional profiling.BatchProfiler times each case and profiles a sample.
+        """
+        return run_batch(self.detect_fraud, cases, listeners, profiler)
@@ -0,0 +1,377 @@
+"""
+Geospatial risk hotspots.
+
+Cases are placed by their own latitude/longitude or by the centroid of
+their postcode (falling back to the postcode sector's centroid) from a
+local centroid CSV, projected to metres and bucketed into a uniform grid.
+Coordinates outside the configured extent (Great Britain and Northern
+Ireland by default) are rejected, so a stray (0, 0) cannot stretch the map.
+The grid is sparse - only occupied cells are stored - and keeps per-cell
+risk sums and counts, so adding, rescoring or removing a case is O(1). A
+hotspot map is recomputed from the occupied cells only: window totals are
+found by sorted-key lookups of each neighbouring cell, and a Getis-Ord Gi*
+z-score marks cells whose neighbourhood carries significantly more risk
+than the occupied area as a whole. Adjacent hot cells are merged into
+hotspots.
+
+Neighbourhood risk (mean risk of other cases within the window) is fed
+back into scoring through the reference-data enrich() hook as the
+risk_hotspot_location indicator; see with_hotspot_indicator().
+"""
+
+import csv
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from address_normaliser import normalise_postcode
+from fraud_detector import FraudAssessment, FraudType
+
+EARTH_RADIUS_M = 6371008.8
+HOTSPOT_INDICATOR = 'risk_hotspot_location'
+_LAT_FIELDS = ('latitude', 'lat')
+_LON_FIELDS = ('longitude', 'long', 'lon', 'lng')
+# (min lat, min lon, max lat, max lon) covering the UK mainland, islands and Northern Ireland
+UK_EXTENT = (49.8, -8.7, 60.9, 1.8)
+
+class PostcodeCentroids:
+    """Postcode -> (lat, lon) from a centroid file, with sector centroids as a fallback"""
+
+    def __init__(self, centroids: Dict[str, Tuple[float, float]]):
+        self.centroids = centroids
+        sectors: Dict[str, List[float]] = {}
+        for postcode, (lat, lon) in centroids.items():
+            total = sectors.setdefault(postcode[:-2], [0.0, 0.0, 0])
+            total[0] += lat
+            total[1] += lon
+            total[2] += 1
+        self.sectors = {sector: (lat / n, lon / n) for sector, (lat, lon, n) in sectors.items()}
+
+    @classmethod
+    def load(cls, path: str) -> 'PostcodeCentroids':
+        """CSV with a postcode column and latitude/longitude (or lat/long) columns, e.g. ONS NSPL extracts"""
+        centroids = {}
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            reader = csv.DictReader(fh)
+            fields = {name.lower().strip(): name for name in reader.fieldnames or ()}
+            postcode_field = next((fields[f] for f in ('postcode', 'pcds', 'pcd') if f in fields), None)
+            lat_field = next((fields[f] for f in _LAT_FIELDS if f in fields), None)
+            lon_field = next((fields[f] for f in _LON_FIELDS if f in fields), None)
+            if not (postcode_field and lat_field and lon_field):
+                raise ValueError(f"{path}: expected postcode, latitude and longitude columns")
+            for row in reader:
+                postcode = normalise_postcode(row[postcode_field])
+                try:
+                    lat, lon = float(row[lat_field]), float(row[lon_field])
+                except (TypeError, ValueError):
+                    continue
+                if postcode and -90 <= lat <= 90 and -180 <= lon <= 180:
+                    centroids[postcode] = (lat, lon)
+        return cls(centroids)
+
+    def __len__(self):
+        return len(self.centroids)
+
+    def locate(self, postcode: Optional[str]) -> Optional[Tuple[float, float]]:
+        postcode = normalise_postcode(postcode)
+        if postcode is None:
+            return None
+        return self.centroids.get(postcode) or self.sectors.get(postcode[:-2])
+
+class Hotspot(NamedTuple):
+    cells: int
+    cases: int
+    total_risk: float
+    mean_risk: float
+    peak_z: float
+    latitude: float
+    longitude: float
+
+class SpatialRiskIndex:
+    """Uniform grid of case risk with incremental updates; usable as a batch_analyze listener"""
+
+    def __init__(self, centroids: Optional[PostcodeCentroids] = None, cell_m: float = 250.0,
+                 radius_m: float = 500.0, reference_lat: float = 53.0, min_cases: int = 5,
+                 hotspot_risk: float = 0.5, extent: Optional[Tuple[float, float, float, float]] = UK_EXTENT):
+        self.centroids = centroids
+        self.extent = extent
+        self.cell_m = cell_m
+        self.radius_m = radius_m
+        self.window = max(0, math.ceil(radius_m / cell_m))
+        self.min_cases = min_cases
+        self.hotspot_risk = hotspot_risk
+        self._x_scale = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(reference_lat))
+        self._y_scale = math.radians(1) * EARTH_RADIUS_M
+        # cell -> {case_id: (x, y, risk)}; cell totals are kept alongside
+        self._cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float, float]]] = {}
+        self._totals: Dict[Tuple[int, int], List[float]] = {}
+        self._where: Dict[str, Tuple[int, int]] = {}
+        # Per-cell (ids, xy, risk) arrays for radius queries, dropped when a cell changes
+        self._arrays: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.unlocated = 0
+        self.out_of_extent = 0
+        self._grid = None
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.update(case, assessment.risk_score)
+
+    def __len__(self):
+        return len(self._where)
+
+    # -- placement --------------------------------------------------------
+
+    def project(self, lat: float, lon: float) -> Tuple[float, float]:
+        """Equirectangular projection to metres; accurate to well under a cell across a council"""
+        return lon * self._x_scale, lat * self._y_scale
+
+    def unproject(self, x: float, y: float) -> Tuple[float, float]:
+        return y / self._y_scale, x / self._x_scale
+
+    def locate(self, case: Dict) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of a case, or None if it has none or it falls outside the extent"""
+        location = self._coordinates(case)
+        if location is None or not self.in_extent(*location):
+            return None
+        return location
+
+    def in_extent(self, lat: float, lon: float) -> bool:
+        if self.extent is None:
+            return True
+        min_lat, min_lon, max_lat, max_lon = self.extent
+        return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+    def _coordinates(self, case: Dict) -> Optional[Tuple[float, float]]:
+        for lat_field, lon_field in zip(_LAT_FIELDS, _LON_FIELDS):
+            lat, lon = case.get(lat_field), case.get(lon_field)
+            if lat is not None and lon is not None:
+                return float(lat), float(lon)
+        if self.centroids is not None:
+            return self.centroids.locate(case.get('postcode') or case.get('address'))
+        return None
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x // self.cell_m), int(y // self.cell_m)
+
+    # -- updates ----------------------------------------------------------
+
+    def update(self, case: Dict, risk: float) -> bool:
+        """Add or rescore a case; False if it cannot be located (any earlier entry for it is dropped)"""
+        case_id = str(case.get('case_id'))
+        self.remove(case_id)
+        location = self._coordinates(case)
+        if location is None:
+            self.unlocated += 1
+            return False
+        if not self.in_extent(*location):
+            self.out_of_extent += 1
+            return False
+        x, y = self.project(*location)
+        cell = self._cell(x, y)
+        self._cells.setdefault(cell, {})[case_id] = (x, y, risk)
+        total = self._totals.setdefault(cell, [0.0, 0])
+        total[0] += risk
+        total[1] += 1
+        self._where[case_id] = cell
+        self._arrays.pop(cell, None)
+        self._grid = None
+        return True
+
+    def remove(self, case_id: str):
+        cell = self._where.pop(case_id, None)
+        if cell is None:
+            return
+        members = self._cells[cell]
+        risk = members.pop(case_id)[2]
+        total = self._totals[cell]
+        total[0] -= risk
+        total[1] -= 1
+        if not members:
+            del self._cells[cell]
+            del self._totals[cell]
+        self._arrays.pop(cell, None)
+        self._grid = None
+
+    def extend(self, cases: Iterable[Dict], assessments: Iterable[FraudAssessment]):
+        for case, assessment in zip(cases, assessments):
+            self.update(case, assessment.risk_score)
+
+    # -- queries ----------------------------------------------------------
+
+    def _cell_arrays(self, cell: Tuple[int, int]):
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            members = self._cells[cell]
+            values = np.array(list(members.values()), dtype=np.float64).reshape(-1, 3)
+            arrays = self._arrays[cell] = (np.array(list(members), dtype=object), values[:, :2], values[:, 2])
+        return arrays
+
+    def neighbours(self, lat: float, lon: float, radius_m: Optional[float] = None) -> List[Tuple[str, float, float]]:
+        """(case_id, distance in metres, risk) of cases within radius, nearest first"""
+        radius = self.radius_m if radius_m is None else radius_m
+        x, y = self.project(lat, lon)
+        cx, cy = self._cell(x, y)
+        reach = math.ceil(radius / self.cell_m)
+        window = [self._cell_arrays((ix, iy))
+                  for ix in range(cx - reach, cx + reach + 1)
+                  for iy in range(cy - reach, cy + reach + 1) if (ix, iy) in self._cells]
+        if not window:
+            return []
+        ids, xy, risk = (np.concatenate(column) for column in zip(*window))
+        distance = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+        within = np.flatnonzero(distance <= radius)
+        within = within[np.argsort(distance[within], kind='stable')]
+        return list(zip(ids[within].tolist(), distance[within].tolist(), risk[within].tolist()))
+
+    def _occupied(self):
+        """Occupied cells with their risk/count totals and window sums, rebuilt after updates"""
+        if self._grid is not None:
+            return self._grid
+        cells = np.array(list(self._totals), dtype=np.int64).reshape(-1, 2)
+        totals = np.array(list(self._totals.values()), dtype=np.float64).reshape(-1, 2)
+        risk, count = totals[:, 0], totals[:, 1]
+        window_risk, window_count, window_cells = _window_sums(cells, (risk, count, np.ones(len(cells))),
+                                                               self.window)
+        positions = dict(zip(self._totals, range(len(cells))))
+        self._grid = (cells, risk, count, window_risk, window_count, window_cells, positions)
+        return self._grid
+
+    def neighbourhood_risk(self, case: Dict) -> Optional[Tuple[float, int]]:
+        """(mean risk, number) of other indexed cases in the case's window; None if it cannot be located"""
+        location = self.locate(case)
+        if location is None:
+            return None
+        cx, cy = self._cell(*self.project(*location))
+        _, _, _, window_risk, window_count, _, positions = self._occupied()
+        position = positions.get((cx, cy))
+        if position is not None:
+            total, count = float(window_risk[position]), int(window_count[position])
+        else:
+            # An empty cell has no precomputed window; sum its occupied neighbours directly
+            total, count = 0.0, 0
+            for ix in range(cx - self.window, cx + self.window + 1):
+                for iy in range(cy - self.window, cy + self.window + 1):
+                    cell = self._totals.get((ix, iy))
+                    if cell is not None:
+                        total += cell[0]
+                        count += cell[1]
+        own = self._cells.get((cx, cy), {}).get(str(case.get('case_id')))
+        if own is not None:
+            total -= own[2]
+            count -= 1
+        return (total / count if count else 0.0), int(count)
+
+    def hotspots(self, z_threshold: float = 1.96) -> List[Hotspot]:
+        """Clusters of adjacent cells whose window risk has a Gi* z-score >= z_threshold, hottest first"""
+        cells, risk, count, window_risk, window_count, weights, _ = self._occupied()
+        n = len(cells)
+        if n < 2:
+            return []
+        # Getis-Ord Gi* with binary weights over the occupied cells of each window
+        mean = risk.mean()
+        std = math.sqrt(max((risk ** 2).mean() - mean ** 2, 0.0))
+        if std == 0:
+            return []
+        denominator = std * np.sqrt(np.maximum(n * weights - weights ** 2, 0) / (n - 1))
+        z = (window_risk - mean * weights) / np.where(denominator > 0, denominator, np.inf)
+        hot = (z >= z_threshold) & (count > 0) & (window_count >= self.min_cases)
+        return sorted((self._cluster(members, cells, risk, count, z) for members in _components(cells, hot)),
+                      key=lambda spot: (-spot.peak_z, -spot.total_risk))
+
+    def _cluster(self, members, cells, risk, count, z) -> Hotspot:
+        weights = count[members]
+        cases = int(weights.sum())
+        total = float(risk[members].sum())
+        # Case-weighted centre of the cluster's cells
+        cx = float(((cells[members, 0] + 0.5) * weights).sum() / cases) * self.cell_m
+        cy = float(((cells[members, 1] + 0.5) * weights).sum() / cases) * self.cell_m
+        lat, lon = self.unproject(cx, cy)
+        return Hotspot(len(members), cases, total, total / cases, float(z[members].max()), lat, lon)
+
+    # -- feedback into scoring --------------------------------------------
+
+    def derive_indicators(self, case: Dict) -> Dict:
+        result = self.neighbourhood_risk(case)
+        if result is None:
+            return {}
+        mean, count = result
+        derived = {'neighbourhood_risk': round(mean, 4)}
+        if count >= self.min_cases and mean >= self.hotspot_risk:
+            derived[HOTSPOT_INDICATOR] = True
+            derived[f'{HOTSPOT_INDICATOR}_evidence'] = (
+                f'Mean risk {mean:.2f} across {count} cases within {self.radius_m:.0f}m'
+            )
+        return derived
+
+    def enrich(self, case: Dict) -> Dict:
+        derived = self.derive_indicators(case)
+        if not derived:
+            return case
+        enriched = dict(case)
+        for key, value in derived.items():
+            if not enriched.get(key):
+                enriched[key] = value
+        return enriched
+
+def _cell_keys(cells: np.ndarray) -> np.ndarray:
+    # Orders like (x, y) for any cell an int32 can hold; shifting a cell shifts its key by (dx << 32) + dy
+    return (cells[:, 0] << 32) + (cells[:, 1] + (1 << 31))
+
+def _window_sums(cells: np.ndarray, values: Tuple[np.ndarray, ...], k: int) -> List[np.ndarray]:
+    """Sum of each value over the occupied cells in the (2k+1)x(2k+1) window around every occupied cell"""
+    order = np.argsort(_cell_keys(cells))
+    keys = _cell_keys(cells)[order]
+    ordered = [value[order] for value in values]
+    sums = [np.zeros(len(cells)) for _ in values]
+    last = len(cells) - 1
+    for dx in range(-k, k + 1):
+        for dy in range(-k, k + 1):
+            # Shifted sorted keys stay sorted, so each lookup is a cheap sorted search
+            shifted = keys + ((dx << 32) + dy)
+            position = np.minimum(np.searchsorted(keys, shifted), last)
+            found = keys[position] == shifted
+            source = position[found]
+            for total, value in zip(sums, ordered):
+                total[order[found]] += value[source]
+    return sums
+
+def _components(cells: np.ndarray, mask: np.ndarray):
+    """8-connected components of the masked cells, as index arrays into cells"""
+    index = {(int(x), int(y)): i for i, (x, y) in enumerate(cells[mask].tolist())}
+    positions = np.flatnonzero(mask)
+    seen = set()
+    for start in index:
+        if start in seen:
+            continue
+        seen.add(start)
+        stack, members = [start], []
+        while stack:
+            x, y = stack.pop()
+            members.append(positions[index[(x, y)]])
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    neighbour = (x + dx, y + dy)
+                    if neighbour in index and neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+        yield np.array(members)
+
+class ChainedReferenceData:
+    """Applies several enrich() sources in turn (e.g. band/neighbourhood reference data, then spatial risk)"""
+
+    def __init__(self, *sources):
+        self.sources = [source for source in sources if source is not None]
+
+    def enrich(self, case: Dict) -> Dict:
+        for source in self.sources:
+            case = source.enrich(case)
+        return case
+
+def with_hotspot_indicator(detector, spatial: SpatialRiskIndex, weight: float = 0.4,
+                           fraud_type: FraudType = FraudType.CUCKOOING):
+    """Compiled detector that also scores location in a risk hotspot (as a cuckooing indicator by default)"""
+    compiled = detector.compile()
+    builder = compiled.builder()
+    builder.add_indicator(fraud_type, HOTSPOT_INDICATOR, "Property in a high-risk neighbourhood", weight)
+    builder.set_reference_data(ChainedReferenceData(compiled.reference_data, spatial))
+    return builder.build()
@@ -0,0 +1,311 @@
+"""
+Live feed of newly flagged high-risk assessments.
+
+FeedHub is a batch_analyze / IngestionPipeline listener that keeps only
+HIGH and CRITICAL assessments and coalesces them into small batches - a
+batch goes out when it reaches batch_size events or its oldest event is
+max_delay seconds old. Each batch is encoded once, as a Server-Sent
+Events frame, and that same frame is shared by every subscriber, so the
+fan-out cost does not grow with the event payload.
+
+Every subscriber has a bounded buffer of batches. A slow consumer never
+blocks the scorer or the other viewers: when its buffer is full, the
+oldest batch is dropped and the gap is reported in the next batch it
+receives (batches carry sequence numbers). A subscription created with an
+idle_timeout is dropped by the hub once it has gone that long without
+polling, so viewers that go away without closing do not accumulate.
+
+LiveFeedServer serves the hub over HTTP from an asyncio loop in a
+background thread (GET /events for the SSE stream, GET /stats for
+counters), using only the standard library. The dashboard polls a
+Subscription directly from a fragment.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Set
+
+from fraud_detector import FraudAssessment
+
+DEFAULT_LEVELS = ('high', 'critical')
+KEEPALIVE_SECONDS = 15.0
+# Per-connection socket and transport buffers; beyond them a slow viewer backs up into its bounded queue
+SOCKET_BUFFER = 64 << 10
+
+class FeedBatch(NamedTuple):
+    seq: int
+    events: List[Dict]
+    frame: bytes
+
+def feed_event(case: Dict, assessment: FraudAssessment) -> Dict:
+    """Compact event for one flagged assessment"""
+    return {
+        'case_id': assessment.case_id,
+        'risk_level': assessment.risk_level.value,
+        'risk_score': assessment.risk_score,
+        'fraud_type': assessment.fraud_type.value if assessment.fraud_type else None,
+        'confidence': assessment.confidence,
+        'likely_fraud': assessment.is_likely_fraud,
+        'council_id': case.get('council_id'),
+        'ts': time.time(),
+    }
+
+class Subscription:
+    """One viewer's bounded queue of batches"""
+
+    def __init__(self, hub: 'FeedHub', max_batches: int, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 idle_timeout: Optional[float] = None):
+        self.hub = hub
+        self.max_batches = max_batches
+        self.loop = loop
+        self.idle_timeout = idle_timeout
+        self.last_active = hub.clock()
+        self.closed = False
+        self.dropped = 0
+        self.last_seq = 0
+        self._batches: Deque[FeedBatch] = deque()
+        self._ready = threading.Condition()
+        self._async_ready = asyncio.Event() if loop is not None else None
+
+    def offer(self, batch: FeedBatch):
+        with self._ready:
+            if len(self._batches) >= self.max_batches:
+                # Slow consumer: drop its oldest batch rather than block the scorer
+                self._batches.popleft()
+                self.dropped += 1
+            self._batches.append(batch)
+            self._ready.notify()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._async_ready.set)
+
+    def _take(self) -> List[FeedBatch]:
+        with self._ready:
+            batches = list(self._batches)
+            self._batches.clear()
+        if batches:
+            self.last_seq = batches[-1].seq
+        return batches
+
+    def poll(self, timeout: float = 0.0) -> List[FeedBatch]:
+        """Batches received since the last poll, waiting up to timeout for the first one"""
+        self.last_active = self.hub.clock()
+        self.hub.flush_due()
+        with self._ready:
+            if not self._batches and timeout > 0:
+                self._ready.wait(timeout)
+        return self._take()
+
+    async def next_batches(self, timeout: float) -> List[FeedBatch]:
+        """Async poll for subscriptions created with a loop"""
+        self.last_active = self.hub.clock()
+        if not self._batches:
+            try:
+                await asyncio.wait_for(self._async_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._async_ready.clear()
+        return self._take()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+class FeedHub:
+    """Coalesces flagged assessments into batches and fans them out to subscribers"""
+
+    def __init__(self, levels: Sequence[str] = DEFAULT_LEVELS, batch_size: int = 100, max_delay: float = 0.05,
+                 client_buffer: int = 64, clock: Callable[[], float] = time.monotonic):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.levels = frozenset(levels)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.client_buffer = client_buffer
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._pending_since = 0.0
+        self._subscribers: Set[Subscription] = set()
+        self._seq = 0
+        self.seen = 0
+        self.published = 0
+        self.batches = 0
+        self.expired = 0
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.seen += 1
+        if assessment.risk_level.value not in self.levels:
+            return
+        event = feed_event(case, assessment)
+        with self._lock:
+            if not self._pending:
+                self._pending_since = self.clock()
+            self._pending.append(event)
+            if len(self._pending) < self.batch_size:
+                return
+            events, self._pending = self._pending, []
+        self._publish(events)
+
+    def flush(self):
+        """Publish whatever is pending now"""
+        with self._lock:
+            events, self._pending = self._pending, []
+        if events:
+            self._publish(events)
+
+    def flush_due(self):
+        """Publish pending events whose batch has waited max_delay"""
+        if self._pending and self.clock() - self._pending_since >= self.max_delay:
+            self.flush()
+
+    def _publish(self, events: List[Dict]):
+        now = self.clock()
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._expire_idle(now)
+            subscribers = list(self._subscribers)
+        # Encoded once and shared by every subscriber
+        data = json.dumps({'seq': seq, 'events': events}, separators=(',', ':'))
+        batch = FeedBatch(seq, events, f'id: {seq}\nevent: assessments\ndata: {data}\n\n'.encode('utf-8'))
+        self.published += len(events)
+        self.batches += 1
+        for subscription in subscribers:
+            subscription.offer(batch)
+
+    def _expire_idle(self, now: float):
+        """Drop subscriptions that have not polled within their idle_timeout; called with the lock held"""
+        idle = [s for s in self._subscribers
+                if s.idle_timeout is not None and now - s.last_active > s.idle_timeout]
+        for subscription in idle:
+            self._subscribers.discard(subscription)
+            subscription.closed = True
+        self.expired += len(idle)
+
+    def subscribe(self, loop: Optional[asyncio.AbstractEventLoop] = None,
+                  max_batches: Optional[int] = None, idle_timeout: Optional[float] = None) -> Subscription:
+        """New subscription; with idle_timeout it is dropped after that many seconds without a poll"""
+        subscription = Subscription(self, max_batches or self.client_buffer, loop, idle_timeout)
+        with self._lock:
+            self._expire_idle(subscription.last_active)
+            subscription.last_seq = self._seq
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            subscription.closed = True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'seen': self.seen,
+            'published': self.published,
+            'batches': self.batches,
+            'subscribers': len(subscribers),
+            'expired_subscribers': self.expired,
+            'dropped_batches': sum(s.dropped for s in subscribers),
+        }
+
+class LiveFeedServer:
+    """Minimal HTTP server for the hub: GET /events (SSE) and GET /stats (JSON)"""
+
+    def __init__(self, hub: FeedHub, host: str = '127.0.0.1', port: int = 0):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    def start(self) -> 'LiveFeedServer':
+        """Serve from a daemon thread; returns once the port is bound"""
+        self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self):
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        loop.create_task(self._flush_loop())
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    async def _flush_loop(self):
+        # Time-based coalescing: a partial batch goes out after max_delay
+        while True:
+            await asyncio.sleep(self.hub.max_delay)
+            self.hub.flush_due()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request.decode('latin-1').split()
+            path = parts[1].split('?')[0] if len(parts) > 1 else ''
+            if path == '/events':
+                await self._stream(writer)
+            elif path == '/stats':
+                body = json.dumps(self.hub.stats()).encode('utf-8')
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+                await writer.drain()
+            else:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; finishing normally keeps the stream protocol's done-callback quiet
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+        writer.transport.set_write_buffer_limits(high=SOCKET_BUFFER)
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                     b'Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\n')
+        await writer.drain()
+        subscription = self.hub.subscribe(loop=asyncio.get_running_loop())
+        reported = 0
+        try:
+            while True:
+                batches = await subscription.next_batches(KEEPALIVE_SECONDS)
+                if not batches:
+                    writer.write(b': keepalive\n\n')
+                elif subscription.dropped != reported:
+                    gap = subscription.dropped - reported
+                    reported = subscription.dropped
+                    writer.write(f'event: dropped\ndata: {{"batches":{gap}}}\n\n'.encode('utf-8'))
+                writer.write(b''.join(batch.frame for batch in batches))
+                # A slow client waits here; the hub keeps dropping its oldest batches meanwhile
+                await writer.drain()
+        finally:
+            subscription.close()
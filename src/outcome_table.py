@@ -0,0 +1,138 @@
+"""
+Memoised outcome table over the indicator combination space.
+
+With evidence text set aside, an assessment is a pure function of which
+indicators are present. The winning fraud type depends only on the
+per-type scores, and each type's score only on that type's own indicator
+mask, so the outcome is keyed by (winning type, that type's mask, error
+mask) - about 14k combinations for the default patterns. Scoring a case is
+then: build its masks, pick the winning type from small per-type score
+tables, look the outcome up, and attach the case's evidence.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from assessment_cache import CachedOutcome
+from compiled_detector import CompiledDetector
+from fraud_detector import CouncilTaxFraudDetector, FraudAssessment, indicator_present, run_batch
+
+NO_TYPE = -1
+
+class OutcomeTable:
+    """Drop-in detector that scores by table lookup; entries are filled lazily or all up front"""
+
+    def __init__(self, detector=None, eager: bool = False):
+        detector = detector or CouncilTaxFraudDetector()
+        self.detector: CompiledDetector = detector.compile()
+        self.reference_data = self.detector.reference_data
+        self.fingerprint = self.detector.fingerprint
+        self.fraud_types = tuple(self.detector.fraud_patterns)
+
+        # indicator name -> (type code or NO_TYPE for error indicators, bit)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._type_scores: List[Tuple[float, ...]] = []
+        self._type_names: List[Tuple[str, ...]] = []
+        for code, indicators in enumerate(self.detector.fraud_patterns.values()):
+            names = tuple(ind.indicator_type for ind in indicators)
+            for bit, name in enumerate(names):
+                self._add_index(name, code, bit)
+            self._type_names.append(names)
+            self._type_scores.append(tuple(
+                self._mask_score(mask, [ind.weight for ind in indicators]) for mask in range(1 << len(names))
+            ))
+        self._error_names = tuple(ind.indicator_type for ind in self.detector.error_patterns)
+        for bit, name in enumerate(self._error_names):
+            self._add_index(name, NO_TYPE, bit)
+        self._names = frozenset(self._index)
+
+        self._outcomes: Dict[Tuple[int, int, int], CachedOutcome] = {}
+        if eager:
+            self.precompute()
+
+    def _add_index(self, name: str, code: int, bit: int):
+        if name in self._index:
+            raise ValueError(f"indicator '{name}' appears in more than one pattern; "
+                             f"outcome tables need each indicator to belong to one pattern")
+        self._index[name] = (code, 1 << bit)
+
+    @staticmethod
+    def _mask_score(mask: int, weights: List[float]) -> float:
+        # Same summation order as detect_fraud so scores (and ties) match exactly
+        score = 0
+        for bit, weight in enumerate(weights):
+            if mask & (1 << bit):
+                score += weight
+        return score
+
+    @property
+    def capacity(self) -> int:
+        """Number of distinct outcomes for this configuration"""
+        error_combinations = 1 << len(self._error_names)
+        return (1 + sum(len(scores) - 1 for scores in self._type_scores)) * error_combinations
+
+    def key(self, case_data: Dict) -> Tuple[int, int, int]:
+        """(winning type code, its indicator mask, error mask) for a case"""
+        type_masks = [0] * len(self._type_scores)
+        error_mask = 0
+        index = self._index
+        for name in self._names.intersection(case_data):
+            if not indicator_present(case_data[name]):
+                continue
+            code, bit = index[name]
+            if code == NO_TYPE:
+                error_mask |= bit
+            else:
+                type_masks[code] |= bit
+
+        best_code = NO_TYPE
+        best_mask = 0
+        max_type_score = 0
+        for code, mask in enumerate(type_masks):
+            if mask:
+                score = self._type_scores[code][mask]
+                if score > max_type_score:
+                    max_type_score = score
+                    best_code = code
+                    best_mask = mask
+        return best_code, best_mask, error_mask
+
+    def outcome(self, key: Tuple[int, int, int]) -> CachedOutcome:
+        outcome = self._outcomes.get(key)
+        if outcome is None:
+            # Concurrent misses may both compute; the results are identical
+            outcome = self._outcomes.setdefault(key, self._compute(key))
+        return outcome
+
+    def _compute(self, key: Tuple[int, int, int]) -> CachedOutcome:
+        code, mask, error_mask = key
+        case = {}
+        if code != NO_TYPE:
+            for bit, name in enumerate(self._type_names[code]):
+                if mask & (1 << bit):
+                    case[name] = True
+        for bit, name in enumerate(self._error_names):
+            if error_mask & (1 << bit):
+                case[name] = True
+        return CachedOutcome.from_assessment(self.detector.detect_enriched(case))
+
+    def precompute(self) -> int:
+        """Fill every (type, mask, error mask) entry; returns the table size"""
+        keys = [(NO_TYPE, 0)]
+        for code, scores in enumerate(self._type_scores):
+            keys.extend((code, mask) for mask in range(1, len(scores)))
+        for code, mask in keys:
+            for error_mask in range(1 << len(self._error_names)):
+                self.outcome((code, mask, error_mask))
+        return len(self._outcomes)
+
+    def detect_fraud(self, case_data: Dict) -> FraudAssessment:
+        if self.reference_data is not None:
+            case_data = self.reference_data.enrich(case_data)
+        return self.outcome(self.key(case_data)).materialise(case_data)
+
+    def batch_analyze(self, cases: List[Dict], listeners: Optional[List[Callable]] = None,
+                      profiler=None) -> Dict:
+        return run_batch(self.detect_fraud, cases, listeners, profiler)
+
+    def __len__(self):
+        return len(self._outcomes)
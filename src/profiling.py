@@ -0,0 +1,314 @@
+"""
+Opt-in profiling for batch scoring and ingestion.
+
+A BatchProfiler is passed to batch_analyze (or IngestionPipeline) and
+times every case, keeping a latency sketch and the slowest cases together
+with their indicator signatures. A configurable fraction of cases is run
+under cProfile; their timings are inflated by the profiler, so they are
+kept out of the latency sketch and the outliers. Alternatively a sampling thread records the scoring
+thread's stack at a fixed interval for the whole run. Results export as
+collapsed stacks (flamegraph.pl / speedscope) and Chrome trace-event JSON
+(chrome://tracing, Perfetto).
+
+    with BatchProfiler(sample_rate=0.01) as profiler:
+        detector.batch_analyze(cases, profiler=profiler)
+    profiler.write_collapsed('run.collapsed')
+    profiler.write_chrome_trace('run.trace.json')
+"""
+
+import cProfile
+import heapq
+import itertools
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from streaming_stats import KLLSketch
+
+MODES = ('cprofile', 'sampling')
+
+class CaseTiming(NamedTuple):
+    latency: float
+    case_id: str
+    fraud_type: Optional[str]
+    risk_level: str
+    signature: Tuple[str, ...]
+    start: float
+
+def indicator_signature(assessment) -> Tuple[str, ...]:
+    """Names of the indicators detected in an assessment"""
+    return tuple(ind.indicator_type for ind in assessment.indicators if ind.detected)
+
+def _frame_label(filename: str, name: str) -> str:
+    if filename == '~':
+        return name.replace(';', ':')
+    return f'{os.path.basename(filename)}:{name}'.replace(';', ':')
+
+class BatchProfiler:
+    """Per-case latency, outliers and sampled profiles for batch runs"""
+
+    def __init__(self, sample_rate: float = 0.01, mode: str = 'cprofile', outliers: int = 20,
+                 interval: float = 0.005, seed: Optional[int] = None, max_trace_events: int = 100000):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.max_outliers = outliers
+        self.interval = interval
+        self.max_trace_events = max_trace_events
+        self._random = random.Random(seed)
+        self._origin = time.perf_counter()
+        self._sequence = itertools.count()
+
+        self.cases = 0
+        self.sampled = 0
+        self.total_latency = 0.0
+        self.latencies = KLLSketch(seed=seed)
+        self._outliers: List[Tuple[float, int, CaseTiming]] = []
+        self._trace_events: List[Dict] = []
+        self.dropped_events = 0
+
+        self._profile = cProfile.Profile() if mode == 'cprofile' else None
+        self._stacks: Dict[str, int] = {}
+        self._target_thread: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __enter__(self) -> 'BatchProfiler':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the sampling thread, if one is running"""
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    # -- recording --------------------------------------------------------
+
+    def wrap(self, detect: Callable) -> Callable:
+        """Wrap a detect_fraud callable so every call is timed and a sample is profiled"""
+        if self.mode == 'sampling':
+            self._start_sampler()
+        rate = self.sample_rate
+        chance = self._random.random
+        clock = time.perf_counter
+        profile = self._profile
+        record = self.record
+
+        def profiled(case: Dict):
+            sampled = rate and chance() < rate
+            if sampled and profile is not None:
+                start = clock()
+                profile.enable()
+                try:
+                    assessment = detect(case)
+                finally:
+                    profile.disable()
+                record(case, assessment, start, clock(), sampled, profiled=True)
+            else:
+                start = clock()
+                assessment = detect(case)
+                record(case, assessment, start, clock(), sampled)
+            return assessment
+        return profiled
+
+    def record(self, case: Dict, assessment, start: float, end: float, sampled: bool = False,
+               profiled: bool = False):
+        """Record one case; profiled (cProfile-timed) cases are traced but not counted as latencies"""
+        latency = end - start
+        self.cases += 1
+        outliers = self._outliers
+        if profiled:
+            is_outlier = False
+        else:
+            self.total_latency += latency
+            self.latencies.update(latency)
+            is_outlier = len(outliers) < self.max_outliers or latency > outliers[0][0]
+        if not (sampled or is_outlier):
+            return
+        timing = CaseTiming(latency, str(case.get('case_id', 'UNKNOWN')),
+                            assessment.fraud_type.value if assessment.fraud_type else None,
+                            assessment.risk_level.value, indicator_signature(assessment), start)
+        if is_outlier:
+            item = (latency, next(self._sequence), timing)
+            if len(outliers) < self.max_outliers:
+                heapq.heappush(outliers, item)
+            else:
+                heapq.heapreplace(outliers, item)
+        if sampled:
+            self.sampled += 1
+            self._case_event(timing, 'sampled')
+
+    def _case_event(self, timing: CaseTiming, category: str):
+        self._add_event({
+            'name': timing.case_id, 'cat': category, 'ph': 'X',
+            'ts': (timing.start - self._origin) * 1e6, 'dur': timing.latency * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': {'fraud_type': timing.fraud_type, 'risk_level': timing.risk_level,
+                     'signature': list(timing.signature)},
+        })
+
+    def _add_event(self, event: Dict):
+        if len(self._trace_events) < self.max_trace_events:
+            self._trace_events.append(event)
+        else:
+            self.dropped_events += 1
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        """Record a named stage (e.g. an ingestion batch) as a trace event"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_event({
+                'name': name, 'cat': 'stage', 'ph': 'X',
+                'ts': (start - self._origin) * 1e6, 'dur': (time.perf_counter() - start) * 1e6,
+                'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args,
+            })
+
+    # -- sampling profiler ------------------------------------------------
+
+    def _start_sampler(self):
+        self._target_thread = threading.get_ident()
+        if self._sampler is not None:
+            return
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='batch-profiler', daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame_label(code.co_filename, code.co_name))
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self._stacks[key] = self._stacks.get(key, 0) + 1
+
+    # -- results ----------------------------------------------------------
+
+    def outliers(self) -> List[CaseTiming]:
+        """Slowest cases seen, slowest first"""
+        return [timing for _, _, timing in sorted(self._outliers, reverse=True)]
+
+    def stats(self) -> Optional[pstats.Stats]:
+        if self._profile is None or not self.sampled:
+            return None
+        return pstats.Stats(self._profile)
+
+    def top_functions(self, limit: int = 15, sort: str = 'tottime') -> List[Dict]:
+        """Most expensive functions in the sampled cases"""
+        stats = self.stats()
+        if stats is None:
+            return []
+        column = {'tottime': 2, 'cumtime': 3, 'ncalls': 1}[sort]
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+        return [{'function': _frame_label(filename, f'{name}' if filename == '~' else f'{name}:{line}'),
+                 'ncalls': nc, 'tottime': tt, 'cumtime': ct}
+                for (filename, line, name), (cc, nc, tt, ct, callers) in rows]
+
+    def collapsed_stacks(self) -> Dict[str, int]:
+        """Stack -> weight; sample counts in sampling mode, microseconds of self time in cProfile mode"""
+        if self.mode == 'sampling':
+            return dict(self._stacks)
+        stats = self.stats()
+        if stats is None:
+            return {}
+        return _collapse_call_graph(stats.stats)
+
+    def write_collapsed(self, path: str) -> int:
+        stacks = self.collapsed_stacks()
+        with open(path, 'w', encoding='utf-8') as fh:
+            for stack, weight in sorted(stacks.items()):
+                fh.write(f'{stack} {weight}\n')
+        return len(stacks)
+
+    def chrome_trace(self) -> Dict:
+        """Trace-event document with sampled cases, outliers and recorded stages"""
+        events = list(self._trace_events)
+        for timing in self.outliers():
+            event = {
+                'name': timing.case_id, 'cat': 'outlier', 'ph': 'X',
+                'ts': (timing.start - self._origin) * 1e6, 'dur': timing.latency * 1e6,
+                'pid': os.getpid(), 'tid': 0,
+                'args': {'fraud_type': timing.fraud_type, 'risk_level': timing.risk_level,
+                         'signature': list(timing.signature)},
+            }
+            events.append(event)
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': 0,
+                       'args': {'name': 'latency outliers'}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'summary': self.summary()}}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.chrome_trace(), fh)
+
+    def summary(self) -> Dict:
+        p50, p99, p999 = self.latencies.quantiles((0.5, 0.99, 0.999))
+        return {
+            'mode': self.mode,
+            'cases': self.cases,
+            'timed': self.latencies.count,
+            'sampled': self.sampled,
+            'mean_latency_us': self.total_latency / self.latencies.count * 1e6 if self.latencies.count else None,
+            'p50_latency_us': p50 * 1e6 if p50 is not None else None,
+            'p99_latency_us': p99 * 1e6 if p99 is not None else None,
+            'p999_latency_us': p999 * 1e6 if p999 is not None else None,
+            'max_latency_us': self.latencies.max * 1e6 if self.latencies.count else None,
+            'dropped_trace_events': self.dropped_events,
+        }
+
+def _collapse_call_graph(raw: Dict, max_depth: int = 64, min_us: int = 1) -> Dict[str, int]:
+    """Approximate collapsed stacks from cProfile's caller/callee edges.
+
+    cProfile keeps one level of callers per function, so a callee's time is
+    split across the paths reaching it in proportion to each caller edge.
+    """
+    callees: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+    for func, (cc, nc, tt, ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in raw.items() if not any(caller in raw for caller in entry[4])]
+    labels = {func: _frame_label(func[0], func[2]) for func in raw}
+    stacks: Dict[str, int] = {}
+
+    def walk(func, path: List[str], on_path: set, share: float):
+        tt, ct = raw[func][2], raw[func][3]
+        path.append(labels[func])
+        on_path.add(func)
+        weight = int(round(tt * share * 1e6))
+        if weight >= min_us:
+            key = ';'.join(path)
+            stacks[key] = stacks.get(key, 0) + weight
+        if len(path) < max_depth:
+            for callee, edge_ct in callees.get(func, ()):
+                callee_ct = raw[callee][3]
+                if callee in on_path or callee_ct <= 0:
+                    continue
+                child_share = share * edge_ct / callee_ct
+                if edge_ct * share * 1e6 >= min_us:
+                    walk(callee, path, on_path, min(child_share, 1.0))
+        path.pop()
+        on_path.discard(func)
+
+    for root in roots:
+        walk(root, [], set(), 1.0)
+    return stacks
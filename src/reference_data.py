@@ -0,0 +1,195 @@
+"""
+Reference data for property banding and council tax reduction checks.
+
+Band tables and neighbourhood statistics are held as sorted numpy arrays
+(optionally memory-mapped from disk) so that each case is compared against
+its neighbours with a binary search rather than a scan over comparables.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from address_normaliser import normalise_address
+
+BAND_ORDER = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'H')
+BAND_INDEX = {band: i for i, band in enumerate(BAND_ORDER)}
+
+# England: upper bounds of the April 1991 valuation for bands A-G (H is open-ended)
+ENGLAND_BAND_UPPER_BOUNDS = (40000, 52000, 68000, 88000, 120000, 160000, 320000)
+
+# Charge for each band as a proportion of Band D
+BAND_D_RATIOS = (6 / 9, 7 / 9, 8 / 9, 1.0, 11 / 9, 13 / 9, 15 / 9, 18 / 9)
+
+def neighbourhood_key(case_data: Dict) -> Optional[str]:
+    """Key used to group comparable properties: explicit neighbourhood, postcode sector or street"""
+    key = case_data.get('neighbourhood')
+    if key:
+        return str(key).upper()
+    address = normalise_address(case_data.get('address'), case_data.get('postcode'))
+    if address.postcode:
+        return address.sector
+    if address.street and address.locality:
+        return f'{address.street}, {address.locality}'
+    return address.street
+
+class BandTable:
+    """Valuation band boundaries and band charges for one council"""
+
+    def __init__(self, band_d_charge: float = 2171.0,
+                 upper_bounds: Sequence[float] = ENGLAND_BAND_UPPER_BOUNDS,
+                 ratios: Sequence[float] = BAND_D_RATIOS):
+        self.band_d_charge = band_d_charge
+        self.upper_bounds = np.asarray(upper_bounds, dtype=np.float64)
+        self.charges = np.asarray(ratios, dtype=np.float64) * band_d_charge
+
+    def band_for_value(self, value: float) -> str:
+        return BAND_ORDER[int(np.searchsorted(self.upper_bounds, value, side='left'))]
+
+    def expected_charge(self, band: str) -> float:
+        return float(self.charges[BAND_INDEX[band]])
+
+class NeighbourhoodIndex:
+    """Per-neighbourhood medians stored in key-sorted arrays"""
+
+    STAT_COLUMNS = ('count', 'median_band', 'median_charge', 'median_income')
+    KEYS_FILE = 'neighbourhood_keys.npy'
+    STATS_FILE = 'neighbourhood_stats.npy'
+
+    def __init__(self, keys: np.ndarray, stats: np.ndarray):
+        self.keys = keys
+        self.stats = stats
+
+    @classmethod
+    def build(cls, comparables: Iterable[Dict]) -> 'NeighbourhoodIndex':
+        groups = {}
+        for case in comparables:
+            key = neighbourhood_key(case)
+            band = BAND_INDEX.get(case.get('council_tax_band'))
+            if key is None or band is None:
+                continue
+            bands, charges, incomes = groups.setdefault(key, ([], [], []))
+            bands.append(band)
+            charges.append(case.get('annual_charge', np.nan))
+            incomes.append(case.get('declared_income', np.nan))
+
+        keys = sorted(groups)
+        stats = np.empty((len(keys), len(cls.STAT_COLUMNS)), dtype=np.float64)
+        for row, key in enumerate(keys):
+            bands, charges, incomes = groups[key]
+            stats[row, 0] = len(bands)
+            stats[row, 1] = np.median(bands)
+            stats[row, 2] = _nanmedian(charges)
+            stats[row, 3] = _nanmedian(incomes)
+        return cls(np.array(keys, dtype=str), stats)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'NeighbourhoodIndex':
+        mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(directory, cls.KEYS_FILE), mmap_mode=mode),
+                   np.load(os.path.join(directory, cls.STATS_FILE), mmap_mode=mode))
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, self.KEYS_FILE), self.keys)
+        np.save(os.path.join(directory, self.STATS_FILE), self.stats)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, key: Optional[str]) -> Optional[np.ndarray]:
+        if key is None or not len(self.keys):
+            return None
+        row = int(np.searchsorted(self.keys, key))
+        if row < len(self.keys) and self.keys[row] == key:
+            return self.stats[row]
+        return None
+
+def _nanmedian(values) -> float:
+    values = np.asarray(values, dtype=np.float64)
+    if np.isnan(values).all():
+        return np.nan
+    return float(np.nanmedian(values))
+
+class ReferenceData:
+    """Derives property banding and council tax reduction indicators from reference data"""
+
+    def __init__(self, band_table: Optional[BandTable] = None,
+                 neighbourhoods: Optional[NeighbourhoodIndex] = None,
+                 min_comparables: int = 5,
+                 band_gap: int = 2,
+                 charge_ratio: float = 0.6,
+                 income_ratio: float = 0.25):
+        self.band_table = band_table or BandTable()
+        self.neighbourhoods = neighbourhoods
+        self.min_comparables = min_comparables
+        self.band_gap = band_gap
+        self.charge_ratio = charge_ratio
+        self.income_ratio = income_ratio
+
+    @classmethod
+    def load(cls, directory: str, band_table: Optional[BandTable] = None, **kwargs) -> 'ReferenceData':
+        return cls(band_table, NeighbourhoodIndex.load(directory), **kwargs)
+
+    def derive_indicators(self, case_data: Dict) -> Dict:
+        derived = {}
+        band = case_data.get('council_tax_band')
+        band_index = BAND_INDEX.get(band)
+        if band_index is None:
+            return derived
+
+        value = case_data.get('property_value')
+        if value:
+            valued_band = self.band_table.band_for_value(value)
+            if BAND_INDEX[valued_band] > band_index:
+                derived['valuation_band_mismatch'] = True
+                derived['valuation_band_mismatch_evidence'] = (
+                    f'Valuation of £{value:,.0f} falls in band {valued_band}, property is band {band}'
+                )
+
+        if self.neighbourhoods is None:
+            return derived
+        stats = self.neighbourhoods.lookup(neighbourhood_key(case_data))
+        if stats is None or stats[0] < self.min_comparables:
+            return derived
+        count, median_band, median_charge, median_income = (float(v) for v in stats)
+
+        if median_band - band_index >= self.band_gap:
+            derived['band_below_neighbours'] = True
+            derived['band_below_neighbours_evidence'] = (
+                f'Band {band} against neighbourhood median band '
+                f'{BAND_ORDER[int(round(median_band))]} ({int(count)} comparables)'
+            )
+
+        charge = case_data.get('annual_charge')
+        if charge and median_charge == median_charge and charge < median_charge * self.charge_ratio:
+            derived['charge_below_neighbours'] = True
+            derived['charge_below_neighbours_evidence'] = (
+                f'Annual charge £{charge:,.0f} against neighbourhood median £{median_charge:,.0f}'
+            )
+
+        income = case_data.get('declared_income')
+        if (income is not None and median_income == median_income
+                and band_index >= median_band and income < median_income * self.income_ratio):
+            derived['income_below_neighbourhood'] = True
+            derived['income_below_neighbourhood_evidence'] = (
+                f'Declared income £{income:,.0f} against neighbourhood median £{median_income:,.0f}'
+            )
+        return derived
+
+    def enrich(self, case_data: Dict) -> Dict:
+        """Return the case with derived indicators added; unchanged cases are returned as-is"""
+        derived = self.derive_indicators(case_data)
+        if not derived:
+            return case_data
+        enriched = dict(case_data)
+        for key, value in derived.items():
+            if not enriched.get(key):
+                enriched[key] = value
+        return enriched
+
+    def enrich_cases(self, cases: Iterable[Dict]) -> Iterator[Dict]:
+        enrich = self.enrich
+        for case in cases:
+            yield enrich(case)
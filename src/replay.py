@@ -0,0 +1,293 @@
+"""
+Deterministic replay of a stored case corpus under two detector configurations.
+
+A ReplayCorpus holds case inputs as a uint8 indicator-flag matrix (one
+column per indicator name) plus case ids, saved as .npy files that are
+memory-mapped on load. It is built once from a case file or from seeded
+generate_sample_cases chunks, so the same corpus replays identically on
+every configuration change.
+
+replay() scores the corpus under an old and a new configuration with the
+vectorised case-matrix scorer (identical scores to detect_fraud), slice by
+slice on a thread pool with both configurations in flight side by side,
+and reports how outcomes moved: risk-level and fraud-type transitions,
+escalations per fraud type, likely-fraud flags gained and lost, and each
+configuration's throughput. Changed cases can be streamed as JSONL.
+
+    corpus = ReplayCorpus.generate(1000000, seed=7)
+    report = replay(corpus, CouncilTaxFraudDetector(), TenantConfig.from_dict(...).compile())
+    report.changed, report.level_transitions, report.throughput
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from case_matrix import NO_FRAUD_TYPE, IndicatorLayout, MatrixScores, RISK_LEVELS
+from data_generator import generate_sample_cases
+from fraud_detector import CouncilTaxFraudDetector, detector_fingerprint, indicator_present
+
+CORPUS_VERSION = 1
+META = 'corpus.json'
+DEFAULT_SLICE_ROWS = 100000
+GENERATE_CHUNK = 50000
+# Chunk k of a generated corpus uses seed * SEED_STRIDE + k, so chunks never share a stream
+SEED_STRIDE = 1 << 20
+
+_LEVEL_NAMES = tuple(level.value for level in RISK_LEVELS)
+
+class ReplayCorpus:
+    """Case inputs as an indicator-flag matrix; every indicator name seen in the cases gets a column"""
+
+    def __init__(self, columns: Sequence[str], flags: np.ndarray, case_ids: np.ndarray, seed: Optional[int] = None):
+        self.columns = tuple(columns)
+        self.flags = flags
+        self.case_ids = case_ids
+        self.seed = seed
+        self.index = {name: position for position, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.flags)
+
+    @classmethod
+    def from_cases(cls, chunks: Iterable[Sequence[Dict]], seed: Optional[int] = None) -> 'ReplayCorpus':
+        """Corpus from chunks of case dicts; boolean fields and the default detector's indicators become columns"""
+        columns = {name: None for name in IndicatorLayout().columns}
+        packed, ids = [], []
+        for chunk in chunks:
+            chunk = list(chunk)
+            for case in chunk[:1000]:
+                for name, value in case.items():
+                    if isinstance(value, bool) and name not in columns:
+                        columns[name] = None
+            names = tuple(columns)
+            block = np.zeros((len(chunk), len(names)), dtype=np.uint8)
+            for j, name in enumerate(names):
+                block[:, j] = np.fromiter((indicator_present(case.get(name, False)) for case in chunk), dtype=bool, count=len(chunk))
+            packed.append(block)
+            ids.extend(str(case.get('case_id', 'UNKNOWN')) for case in chunk)
+        names = tuple(columns)
+        flags = np.zeros((sum(len(block) for block in packed), len(names)), dtype=np.uint8)
+        row = 0
+        for block in packed:
+            flags[row:row + len(block), :block.shape[1]] = block
+            row += len(block)
+        return cls(names, flags, np.array(ids, dtype=bytes), seed)
+
+    @classmethod
+    def generate(cls, count: int, seed: int = 0, chunk_size: int = GENERATE_CHUNK) -> 'ReplayCorpus':
+        """Seeded synthetic corpus; the same (count, seed, chunk_size) always gives the same corpus"""
+        def chunks():
+            for k, start in enumerate(range(0, count, chunk_size)):
+                cases = generate_sample_cases(min(chunk_size, count - start), seed=seed * SEED_STRIDE + k)
+                for offset, case in enumerate(cases):
+                    case['case_id'] = f'REPLAY-{seed}-{start + offset:07d}'
+                yield cases
+        return cls.from_cases(chunks(), seed=seed)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'flags.npy'), self.flags)
+        np.save(os.path.join(directory, 'case_ids.npy'), self.case_ids)
+        meta = {'version': CORPUS_VERSION, 'rows': len(self), 'columns': list(self.columns), 'seed': self.seed}
+        # Written last: a directory without it is not a complete corpus
+        with open(os.path.join(directory, META), 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+
+    @classmethod
+    def load(cls, directory: str) -> 'ReplayCorpus':
+        with open(os.path.join(directory, META), encoding='utf-8') as fh:
+            meta = json.load(fh)
+        if meta.get('version') != CORPUS_VERSION:
+            raise ValueError(f"{directory}: unsupported corpus version {meta.get('version')}")
+        flags = np.load(os.path.join(directory, 'flags.npy'), mmap_mode='r')
+        case_ids = np.load(os.path.join(directory, 'case_ids.npy'), mmap_mode='r')
+        return cls(meta['columns'], flags, case_ids, meta.get('seed'))
+
+    def matrix(self, layout: IndicatorLayout, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Rows start:stop in the layout's column order; indicators the corpus never saw are absent"""
+        stop = len(self) if stop is None else stop
+        present = [(j, self.index[name]) for j, name in enumerate(layout.columns) if name in self.index]
+        matrix = np.zeros((stop - start, layout.width), dtype=np.uint8)
+        if present:
+            target, source = zip(*present)
+            matrix[:, list(target)] = self.flags[start:stop][:, list(source)]
+        return matrix
+
+class OutcomeChange(NamedTuple):
+    case_id: str
+    old_level: str
+    new_level: str
+    old_type: Optional[str]
+    new_type: Optional[str]
+    old_score: float
+    new_score: float
+    old_likely_fraud: bool
+    new_likely_fraud: bool
+
+@dataclass
+class ReplayReport:
+    """Outcome differences between two configurations over one corpus"""
+    rows: int
+    old_fingerprint: str
+    new_fingerprint: str
+    changed: int
+    score_changed: int
+    level_transitions: Dict[str, int]
+    type_transitions: Dict[str, int]
+    by_type: Dict[str, Dict[str, int]]
+    fraud_flags: Dict[str, int]
+    throughput: Dict[str, float]
+    elapsed: float
+    old: MatrixScores = field(repr=False)
+    new: MatrixScores = field(repr=False)
+    old_types: tuple = field(repr=False)
+    new_types: tuple = field(repr=False)
+    case_ids: np.ndarray = field(repr=False)
+
+    def to_dict(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'old_fingerprint': self.old_fingerprint,
+            'new_fingerprint': self.new_fingerprint,
+            'changed': self.changed,
+            'score_changed': self.score_changed,
+            'level_transitions': self.level_transitions,
+            'type_transitions': self.type_transitions,
+            'by_type': self.by_type,
+            'fraud_flags': self.fraud_flags,
+            'throughput': self.throughput,
+            'elapsed': self.elapsed,
+        }
+
+    def _changed_mask(self) -> np.ndarray:
+        old, new = self.old, self.new
+        return ((old.risk_level != new.risk_level) | (_type_names(old, self.old_types) != _type_names(new, self.new_types))
+                | (old.is_likely_fraud != new.is_likely_fraud))
+
+    def changes(self, limit: Optional[int] = None) -> Iterator[OutcomeChange]:
+        """Cases whose risk level, fraud type or likely-fraud flag changed, in corpus order"""
+        old, new = self.old, self.new
+        rows = np.flatnonzero(self._changed_mask())[:limit]
+        old_names, new_names = _type_names(old, self.old_types), _type_names(new, self.new_types)
+        for i in rows.tolist():
+            yield OutcomeChange(
+                self.case_ids[i].decode('utf-8'), _LEVEL_NAMES[old.risk_level[i]], _LEVEL_NAMES[new.risk_level[i]],
+                old_names[i] or None, new_names[i] or None, float(old.risk_score[i]), float(new.risk_score[i]),
+                bool(old.is_likely_fraud[i]), bool(new.is_likely_fraud[i]),
+            )
+
+    def write_jsonl(self, fh, limit: Optional[int] = None) -> int:
+        written = 0
+        for change in self.changes(limit):
+            fh.write(json.dumps(change._asdict()))
+            fh.write('\n')
+            written += 1
+        return written
+
+def _type_names(scores: MatrixScores, fraud_types: tuple) -> np.ndarray:
+    """Fraud type values per case ('' for none), comparable across layouts with different type orders"""
+    names = np.array([fraud_type.value for fraud_type in fraud_types] + [''], dtype=object)
+    return names[np.where(scores.fraud_type == NO_FRAUD_TYPE, len(fraud_types), scores.fraud_type)]
+
+def _layout(detector) -> IndicatorLayout:
+    if getattr(detector, 'reference_data', None) is not None:
+        # Derived indicators depend on the full case record, which the corpus does not keep
+        raise ValueError("replay scores stored indicator flags; detectors with reference data are not supported")
+    return IndicatorLayout(detector)
+
+def replay(corpus: ReplayCorpus, old=None, new=None, workers: int = 2,
+           slice_rows: int = DEFAULT_SLICE_ROWS) -> ReplayReport:
+    """Score the corpus under both configurations side by side and diff the outcomes"""
+    layouts = {'old': _layout(old or CouncilTaxFraudDetector()), 'new': _layout(new or CouncilTaxFraudDetector())}
+    rows = len(corpus)
+    scores = {name: MatrixScores.empty(rows) for name in layouts}
+    busy = dict.fromkeys(layouts, 0.0)
+
+    def score_slice(name: str, start: int, stop: int) -> float:
+        began = time.perf_counter()
+        layout = layouts[name]
+        out = MatrixScores(**{key: value[start:stop] for key, value in vars(scores[name]).items()})
+        layout.score(corpus.matrix(layout, start, stop), out=out)
+        return time.perf_counter() - began
+
+    started = time.perf_counter()
+    # Slices of both configurations are interleaved so they progress side by side
+    tasks = [(name, start, min(start + slice_rows, rows))
+             for start in range(0, rows, slice_rows) for name in layouts]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for (name, _, _), seconds in zip(tasks, pool.map(lambda task: score_slice(*task), tasks)):
+            busy[name] += seconds
+    elapsed = time.perf_counter() - started
+    return _report(corpus, layouts, scores, busy, elapsed, old, new)
+
+def _report(corpus, layouts, scores, busy, elapsed, old, new) -> ReplayReport:
+    old_scores, new_scores = scores['old'], scores['new']
+    old_types, new_types = layouts['old'].fraud_types, layouts['new'].fraud_types
+    levels = len(RISK_LEVELS)
+    old_level = old_scores.risk_level.astype(np.intp)
+    new_level = new_scores.risk_level.astype(np.intp)
+    transitions = np.bincount(old_level * levels + new_level, minlength=levels * levels).reshape(levels, levels)
+    old_names, new_names = _type_names(old_scores, old_types), _type_names(new_scores, new_types)
+    type_moved = old_names != new_names
+    changed = (old_level != new_level) | type_moved | (old_scores.is_likely_fraud != new_scores.is_likely_fraud)
+
+    type_transitions: Dict[str, int] = {}
+    if type_moved.any():
+        pairs, counts = np.unique(np.stack([old_names[type_moved], new_names[type_moved]]).astype(str),
+                                  axis=1, return_counts=True)
+        for (before, after), count in zip(pairs.T, counts):
+            type_transitions[f'{before or "none"}->{after or "none"}'] = int(count)
+
+    by_type: Dict[str, Dict[str, int]] = {}
+    for name in sorted(set(new_names[changed].tolist()) | set(old_names[changed].tolist())):
+        mine = new_names == name
+        by_type[name or 'none'] = {
+            'escalated': int(np.count_nonzero(mine & (new_level > old_level))),
+            'de_escalated': int(np.count_nonzero(mine & (new_level < old_level))),
+            'gained': int(np.count_nonzero(mine & type_moved)),
+            'lost': int(np.count_nonzero((old_names == name) & type_moved)),
+        }
+
+    return ReplayReport(
+        rows=len(corpus),
+        old_fingerprint=detector_fingerprint((old or CouncilTaxFraudDetector()).compile()),
+        new_fingerprint=detector_fingerprint((new or CouncilTaxFraudDetector()).compile()),
+        changed=int(np.count_nonzero(changed)),
+        score_changed=int(np.count_nonzero(old_scores.risk_score != new_scores.risk_score)),
+        level_transitions={
+            f'{_LEVEL_NAMES[i]}->{_LEVEL_NAMES[j]}': int(transitions[i, j])
+            for i in range(levels) for j in range(levels) if i != j and transitions[i, j]
+        },
+        type_transitions=type_transitions,
+        by_type=by_type,
+        fraud_flags={
+            'gained': int(np.count_nonzero(new_scores.is_likely_fraud & ~old_scores.is_likely_fraud)),
+            'lost': int(np.count_nonzero(old_scores.is_likely_fraud & ~new_scores.is_likely_fraud)),
+        },
+        throughput={name: (len(corpus) / seconds if seconds else 0.0) for name, seconds in busy.items()},
+        elapsed=elapsed,
+        old=old_scores,
+        new=new_scores,
+        old_types=old_types,
+        new_types=new_types,
+        case_ids=corpus.case_ids,
+    )
+
+def load_config(path: Optional[str]):
+    """Compiled detector from a JSON file in the tenant-config format (council_id optional); None for the default"""
+    from tenants import TenantConfig
+
+    if path is None:
+        return CouncilTaxFraudDetector().compile()
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object with weights/disabled_indicators/thresholds")
+    data.setdefault('council_id', os.path.basename(path))
+    return TenantConfig.from_dict(data).compile()
@@ -0,0 +1,390 @@
+"""
+Columnar run snapshots and streaming diffs between scoring runs.
+
+A snapshot is a directory of memory-mapped column files (case_id,
+risk_level, risk_score, confidence, fraud_type) sorted by case_id, plus a
+small meta.json. SnapshotWriter collects assessments within a memory
+budget, spilling sorted runs and merging them into the final columns, so
+writing is bounded by the budget however large the run. If a case is
+written more than once, the last assessment wins.
+
+SnapshotDiff merge-joins two snapshots block by block. Counts are
+computed with vectorised comparisons on each block, and changes are
+streamed as events (escalated, de-escalated, new, closed), so neither
+snapshot is ever loaded whole.
+
+    writer = SnapshotWriter('snapshots/2024-05-02')
+    detector.batch_analyze(cases, listeners=[writer])
+    writer.close()
+    diff = SnapshotDiff(Snapshot('snapshots/2024-05-01'), Snapshot('snapshots/2024-05-02'))
+    diff.counts()            # {'escalated': 120, 'de_escalated': 85, 'new': 40, 'closed': 12, ...}
+    for change in diff.changes(('escalated',)):
+        ...
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from external_ranking import FRAUD_TYPES, RISK_LEVELS
+from fraud_detector import FraudAssessment
+
+SNAPSHOT_VERSION = 1
+META = 'meta.json'
+COLUMNS = ('case_id', 'risk_level', 'risk_score', 'confidence', 'fraud_type')
+CHANGE_KINDS = ('escalated', 'de_escalated', 'new', 'closed')
+DEFAULT_MEMORY_BUDGET = 64 << 20
+DEFAULT_BLOCK_ROWS = 1 << 16
+STAGE_ROWS = 4096
+
+_RISK_LEVEL_CODES = {value: code for code, value in enumerate(RISK_LEVELS)}
+_FRAUD_TYPE_CODES = {value: code for code, value in enumerate(FRAUD_TYPES)}
+
+def snapshot_dtype(id_width: int = 32) -> np.dtype:
+    return np.dtype([
+        ('case_id', f'S{id_width}'),
+        ('seq', '<u8'),
+        ('risk_level', 'u1'),
+        ('risk_score', '<f8'),
+        ('confidence', '<f8'),
+        ('fraud_type', 'i1'),
+    ])
+
+class Change(NamedTuple):
+    kind: str
+    case_id: str
+    old_level: Optional[str]
+    new_level: Optional[str]
+    old_score: Optional[float]
+    new_score: Optional[float]
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+def _last_of_each_id(block: np.ndarray) -> np.ndarray:
+    """Drop all but the latest write of each case_id from a (case_id, seq)-sorted block"""
+    if len(block) < 2:
+        return block
+    keep = np.empty(len(block), dtype=bool)
+    keep[:-1] = block['case_id'][:-1] != block['case_id'][1:]
+    keep[-1] = True
+    return block[keep]
+
+class SnapshotWriter:
+    """Writes a case_id-sorted columnar snapshot within a memory budget; usable as a batch_analyze listener"""
+
+    def __init__(self, directory: str, memory_budget: int = DEFAULT_MEMORY_BUDGET, id_width: int = 32,
+                 fingerprint: Optional[str] = None, label: Optional[str] = None):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.id_width = id_width
+        self.fingerprint = fingerprint
+        self.label = label
+        self.dtype = snapshot_dtype(id_width)
+        self.buffer_rows = max(256, memory_budget // 2 // self.dtype.itemsize)
+        self._staged: List[tuple] = []
+        self._stage_rows = min(STAGE_ROWS, self.buffer_rows)
+        self._buffer = np.empty(self.buffer_rows, dtype=self.dtype)
+        self._filled = 0
+        self._tmp = tempfile.TemporaryDirectory(prefix='snapshot-runs-')
+        self._runs: List[str] = []
+        self.count = 0
+        self.closed = False
+        # Largest number of bytes held by the final merge at once (run buffers plus the merged block)
+        self.merge_peak = 0
+
+    def __call__(self, case: Dict, assessment: FraudAssessment):
+        self.add(assessment)
+
+    def __enter__(self) -> 'SnapshotWriter':
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._tmp.cleanup()
+
+    def add(self, assessment: FraudAssessment):
+        self.add_record(assessment.case_id, assessment.risk_level.value, assessment.risk_score,
+                        assessment.confidence, assessment.fraud_type.value if assessment.fraud_type else None)
+
+    def add_record(self, case_id: str, risk_level: str, risk_score: float, confidence: float,
+                   fraud_type: Optional[str] = None):
+        encoded = str(case_id).encode('utf-8')
+        if len(encoded) > self.id_width:
+            raise ValueError(f"case_id {case_id!r} is longer than id_width={self.id_width} bytes")
+        self._staged.append((encoded, self.count, _RISK_LEVEL_CODES[risk_level], risk_score, confidence,
+                             _FRAUD_TYPE_CODES[fraud_type] if fraud_type else -1))
+        self.count += 1
+        if len(self._staged) == self._stage_rows:
+            self._unstage()
+
+    def extend(self, records: Iterable[Dict]):
+        """Add assessment records (FraudAssessment.to_dict() shape)"""
+        for record in records:
+            self.add_record(record['case_id'], record['risk_level'], record['risk_score'],
+                            record['confidence'], record.get('fraud_type'))
+
+    def _unstage(self):
+        staged = self._staged
+        while staged:
+            if self._filled == self.buffer_rows:
+                self._spill()
+            take = min(len(staged), self.buffer_rows - self._filled)
+            self._buffer[self._filled:self._filled + take] = np.array(staged[:take], dtype=self.dtype)
+            self._filled += take
+            del staged[:take]
+
+    def _spill(self):
+        if not self._filled:
+            return
+        block = self._buffer[:self._filled]
+        path = os.path.join(self._tmp.name, f'run-{len(self._runs):05d}.npy')
+        np.save(path, _last_of_each_id(block[np.lexsort((block['seq'], block['case_id']))]))
+        self._runs.append(path)
+        self._filled = 0
+
+    def close(self) -> 'Snapshot':
+        """Merge the spilled runs into the snapshot's columns and write its metadata"""
+        if self.closed:
+            return Snapshot(self.directory)
+        self._unstage()
+        self._spill()
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            rows = self._merge()
+        finally:
+            self._tmp.cleanup()
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'count': rows,
+            'written': self.count,
+            'id_width': self.id_width,
+            'fingerprint': self.fingerprint,
+            'label': self.label,
+            'created': time.time(),
+        }
+        # meta.json last: a snapshot without it is incomplete
+        with open(os.path.join(self.directory, META), 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh, indent=1)
+        self.closed = True
+        return Snapshot(self.directory)
+
+    def _merge(self) -> int:
+        """k-way merge of the sorted runs straight into the column files; returns the row count"""
+        runs = [np.load(path, mmap_mode='r') for path in self._runs]
+        upper = sum(len(run) for run in runs)
+        if not upper:
+            for name in COLUMNS:
+                np.save(os.path.join(self.directory, f'{name}.npy'), np.empty(0, dtype=self.dtype[name]))
+            return 0
+        # Sized for every run row; repeated case ids leave unused rows past meta['count']
+        columns = {name: np.lib.format.open_memmap(os.path.join(self.directory, f'{name}.npy'), mode='w+',
+                                                   dtype=self.dtype[name], shape=(upper,))
+                   for name in COLUMNS}
+        block_rows = max(256, self.memory_budget // 3 // (len(runs) + 1) // self.dtype.itemsize)
+        positions = [0] * len(runs)
+        buffers: List[np.ndarray] = [np.empty(0, dtype=self.dtype)] * len(runs)
+        self.merge_peak = 0
+        written = 0
+
+        def refill(i: int):
+            block = np.asarray(runs[i][positions[i]:positions[i] + block_rows])
+            positions[i] += len(block)
+            buffers[i] = np.concatenate((buffers[i], block)) if len(buffers[i]) else block
+
+        for i in range(len(runs)):
+            refill(i)
+        while True:
+            # Runs are sorted and unique per id, so below the smallest frontier of a partly read run
+            # every write of an id is buffered and duplicates across runs can be resolved
+            bound = min((buffers[i]['case_id'][-1] for i in range(len(runs)) if positions[i] < len(runs[i])),
+                        default=None)
+            parts = []
+            for i, buffer in enumerate(buffers):
+                ready = len(buffer) if bound is None else int(np.searchsorted(buffer['case_id'], bound, 'left'))
+                if ready:
+                    parts.append(buffer[:ready])
+                    buffers[i] = buffer[ready:]
+            merged = np.concatenate(parts) if parts else np.empty(0, dtype=self.dtype)
+            self.merge_peak = max(self.merge_peak, merged.nbytes + sum(buffer.nbytes for buffer in buffers))
+            out = _last_of_each_id(merged[np.lexsort((merged['seq'], merged['case_id']))])
+            for name, column in columns.items():
+                column[written:written + len(out)] = out[name]
+            written += len(out)
+            if bound is None:
+                break
+            # Only the runs at the frontier have run dry below it; every other buffer still has rows to give
+            for i in range(len(runs)):
+                if positions[i] < len(runs[i]) and buffers[i]['case_id'][-1] == bound:
+                    refill(i)
+        for column in columns.values():
+            column.flush()
+        del columns
+        return written
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, META), encoding='utf-8') as fh:
+                self.meta = json.load(fh)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{directory}: not a complete snapshot (no {META})") from None
+        if self.meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"{directory}: unsupported snapshot version {self.meta.get('version')}")
+        count = self.meta['count']
+        self.columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')[:count]
+                        for name in COLUMNS}
+
+    def __len__(self):
+        return self.meta['count']
+
+    @property
+    def case_ids(self) -> np.ndarray:
+        return self.columns['case_id']
+
+    def lookup(self, case_id: str) -> Optional[Dict]:
+        """One case's row by binary search on the sorted case_id column"""
+        key = case_id.encode('utf-8')
+        position = int(np.searchsorted(self.case_ids, key))
+        if position == len(self) or self.case_ids[position] != key:
+            return None
+        fraud_type = int(self.columns['fraud_type'][position])
+        return {
+            'case_id': case_id,
+            'risk_level': RISK_LEVELS[int(self.columns['risk_level'][position])],
+            'risk_score': float(self.columns['risk_score'][position]),
+            'confidence': float(self.columns['confidence'][position]),
+            'fraud_type': FRAUD_TYPES[fraud_type] if fraud_type >= 0 else None,
+        }
+
+    def by_risk_level(self, block_rows: int = DEFAULT_BLOCK_ROWS) -> Dict[str, int]:
+        counts = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        levels = self.columns['risk_level']
+        for start in range(0, len(self), block_rows):
+            counts += np.bincount(levels[start:start + block_rows], minlength=len(RISK_LEVELS))
+        return {level: int(count) for level, count in zip(RISK_LEVELS, counts)}
+
+class _Block(NamedTuple):
+    ids: np.ndarray
+    levels: np.ndarray
+    scores: np.ndarray
+
+class _Joined(NamedTuple):
+    old: _Block
+    new: _Block
+    old_index: np.ndarray
+    new_index: np.ndarray
+    closed: np.ndarray
+    opened: np.ndarray
+
+class SnapshotDiff:
+    """Streaming merge-join of two snapshots"""
+
+    def __init__(self, old: Snapshot, new: Snapshot, block_rows: int = DEFAULT_BLOCK_ROWS):
+        if old.case_ids.dtype != new.case_ids.dtype:
+            raise ValueError("snapshots were written with different id widths")
+        self.old = old
+        self.new = new
+        self.block_rows = block_rows
+
+    def _block(self, snapshot: Snapshot, start: int, stop: int) -> _Block:
+        columns = snapshot.columns
+        return _Block(np.asarray(columns['case_id'][start:stop]), np.asarray(columns['risk_level'][start:stop]),
+                      np.asarray(columns['risk_score'][start:stop]))
+
+    def _joined(self) -> Iterator[_Joined]:
+        """Aligned pieces of both snapshots: every id below the frontier is in exactly one piece"""
+        old_ids, new_ids = self.old.case_ids, self.new.case_ids
+        old_pos = new_pos = 0
+        step = self.block_rows
+        while old_pos < len(old_ids) or new_pos < len(new_ids):
+            old_end = min(old_pos + step, len(old_ids))
+            new_end = min(new_pos + step, len(new_ids))
+            # The frontier is the smaller last id of the sides that have more to read
+            bound = None
+            if old_end < len(old_ids):
+                bound = old_ids[old_end - 1]
+            if new_end < len(new_ids) and (bound is None or new_ids[new_end - 1] < bound):
+                bound = new_ids[new_end - 1]
+            if bound is not None:
+                old_end = old_pos + int(np.searchsorted(old_ids[old_pos:old_end], bound, 'right'))
+                new_end = new_pos + int(np.searchsorted(new_ids[new_pos:new_end], bound, 'right'))
+            old = self._block(self.old, old_pos, old_end)
+            new = self._block(self.new, new_pos, new_end)
+            _, old_index, new_index = np.intersect1d(old.ids, new.ids, assume_unique=True, return_indices=True)
+            closed = np.ones(len(old.ids), dtype=bool)
+            closed[old_index] = False
+            opened = np.ones(len(new.ids), dtype=bool)
+            opened[new_index] = False
+            yield _Joined(old, new, old_index, new_index, closed, opened)
+            old_pos, new_pos = old_end, new_end
+
+    def counts(self) -> Dict[str, int]:
+        """Summary counts without materialising any change"""
+        totals = dict.fromkeys(CHANGE_KINDS, 0)
+        totals.update(unchanged=0, score_changed=0)
+        transitions = np.zeros((len(RISK_LEVELS), len(RISK_LEVELS)), dtype=np.int64)
+        for piece in self._joined():
+            old_levels = piece.old.levels[piece.old_index].astype(np.int64)
+            new_levels = piece.new.levels[piece.new_index].astype(np.int64)
+            totals['escalated'] += int(np.count_nonzero(new_levels > old_levels))
+            totals['de_escalated'] += int(np.count_nonzero(new_levels < old_levels))
+            same = new_levels == old_levels
+            totals['unchanged'] += int(np.count_nonzero(same))
+            totals['score_changed'] += int(np.count_nonzero(
+                same & (piece.old.scores[piece.old_index] != piece.new.scores[piece.new_index])))
+            totals['new'] += int(np.count_nonzero(piece.opened))
+            totals['closed'] += int(np.count_nonzero(piece.closed))
+            np.add.at(transitions, (old_levels, new_levels), 1)
+        totals['transitions'] = {
+            f'{RISK_LEVELS[i]}->{RISK_LEVELS[j]}': int(transitions[i, j])
+            for i in range(len(RISK_LEVELS)) for j in range(len(RISK_LEVELS)) if i != j and transitions[i, j]
+        }
+        return totals
+
+    def changes(self, kinds: Sequence[str] = CHANGE_KINDS) -> Iterator[Change]:
+        """Changed cases in case_id order, one block of each snapshot in memory at a time"""
+        unknown = set(kinds) - set(CHANGE_KINDS)
+        if unknown:
+            raise ValueError(f"unknown change kinds {sorted(unknown)}; expected some of {CHANGE_KINDS}")
+        want = set(kinds)
+        for piece in self._joined():
+            events = []
+            if want & {'escalated', 'de_escalated'}:
+                old_levels = piece.old.levels[piece.old_index]
+                new_levels = piece.new.levels[piece.new_index]
+                moved = np.flatnonzero(old_levels != new_levels)
+                for k in moved.tolist():
+                    i, j = int(piece.old_index[k]), int(piece.new_index[k])
+                    kind = 'escalated' if new_levels[k] > old_levels[k] else 'de_escalated'
+                    if kind in want:
+                        events.append(Change(kind, piece.new.ids[j].decode('utf-8'),
+                                             RISK_LEVELS[old_levels[k]], RISK_LEVELS[new_levels[k]],
+                                             float(piece.old.scores[i]), float(piece.new.scores[j])))
+            if 'new' in want:
+                for j in np.flatnonzero(piece.opened).tolist():
+                    events.append(Change('new', piece.new.ids[j].decode('utf-8'), None,
+                                         RISK_LEVELS[piece.new.levels[j]], None, float(piece.new.scores[j])))
+            if 'closed' in want:
+                for i in np.flatnonzero(piece.closed).tolist():
+                    events.append(Change('closed', piece.old.ids[i].decode('utf-8'),
+                                         RISK_LEVELS[piece.old.levels[i]], None, float(piece.old.scores[i]), None))
+            events.sort(key=lambda change: change.case_id)
+            yield from events
+
+    def write_jsonl(self, fh, kinds: Sequence[str] = CHANGE_KINDS) -> int:
+        written = 0
+        for change in self.changes(kinds):
+            fh.write(json.dumps(change.to_dict()))
+            fh.write('\n')
+            written += 1
+        return written
@@ -0,0 +1,195 @@
+"""
+Zero-copy multi-process scoring over shared memory.
+
+The indicator matrix, numeric metadata and score outputs live in
+multiprocessing.shared_memory blocks. Workers receive the detector's
+layout once, when the pool starts, and then per slice only a small
+descriptor (block names and shapes) plus a row range; they attach to the
+blocks, score their slice in place and write straight into the shared
+outputs, so fan-out cost does not depend on how wide the case records are.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from case_matrix import IndicatorLayout, MatrixScores, METADATA_COLUMNS
+from fraud_detector import CouncilTaxFraudDetector
+
+# One 1-D output block per MatrixScores field
+_OUTPUT_BLOCKS = {
+    'fraud_type': np.int8,
+    'risk_score': np.float64,
+    'risk_level': np.int8,
+    'is_likely_fraud': np.bool_,
+    'is_likely_error': np.bool_,
+    'confidence': np.float64,
+}
+
+def _block_layout(name: str, rows: int, width: int):
+    if name == 'indicators':
+        return np.uint8, (rows, width)
+    if name == 'metadata':
+        return np.float64, (rows, len(METADATA_COLUMNS))
+    return _OUTPUT_BLOCKS[name], (rows,)
+
+# pid -> whether that process shares the creating process's resource tracker
+_tracker_inherited: Dict[int, bool] = {}
+
+def _attach_block(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the block with this process's resource tracker.
+    # A worker that did not inherit the creator's tracker would unlink the block (and
+    # warn about a "leak") when it exits, so only the creating process keeps it registered.
+    pid = os.getpid()
+    inherited = _tracker_inherited.get(pid)
+    if inherited is None:
+        inherited = getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+        _tracker_inherited[pid] = inherited
+    block = shared_memory.SharedMemory(name=name)
+    if not inherited:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+@dataclass(frozen=True)
+class SharedMatrixDescriptor:
+    """Picklable handle workers use to attach to a SharedCaseMatrix"""
+    rows: int
+    width: int
+    blocks: Tuple[Tuple[str, str], ...]  # (array name, shared memory block name)
+
+class SharedCaseMatrix:
+    """Indicator matrix, metadata and outputs for a batch, held in shared memory"""
+
+    def __init__(self, rows: int, width: int, blocks: Dict[str, shared_memory.SharedMemory], owner: bool):
+        self.rows = rows
+        self.width = width
+        self._blocks = blocks
+        self._owner = owner
+        self.arrays = {name: self._view(name, block) for name, block in blocks.items()}
+
+    def _view(self, name: str, block: shared_memory.SharedMemory) -> np.ndarray:
+        dtype, shape = _block_layout(name, self.rows, self.width)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @classmethod
+    def create(cls, cases: List[Dict], layout: IndicatorLayout) -> 'SharedCaseMatrix':
+        rows, width = len(cases), layout.width
+        names = ['indicators', 'metadata'] + list(_OUTPUT_BLOCKS)
+        blocks = {}
+        try:
+            for name in names:
+                dtype, shape = _block_layout(name, rows, width)
+                size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+                blocks[name] = shared_memory.SharedMemory(create=True, size=size)
+        except BaseException:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+            raise
+        shared = cls(rows, width, blocks, owner=True)
+        layout.build_matrix(cases, out=shared.arrays['indicators'])
+        layout.build_metadata(cases, out=shared.arrays['metadata'])
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor: SharedMatrixDescriptor) -> 'SharedCaseMatrix':
+        blocks = {name: _attach_block(block_name) for name, block_name in descriptor.blocks}
+        return cls(descriptor.rows, descriptor.width, blocks, owner=False)
+
+    def descriptor(self) -> SharedMatrixDescriptor:
+        return SharedMatrixDescriptor(
+            self.rows, self.width, tuple((name, block.name) for name, block in self._blocks.items())
+        )
+
+    def scores(self, start: int = 0, stop: Optional[int] = None) -> MatrixScores:
+        """Views onto (a slice of) the shared output arrays"""
+        stop = self.rows if stop is None else stop
+        return MatrixScores(**{name: self.arrays[name][start:stop] for name in _OUTPUT_BLOCKS})
+
+    def score_slice(self, layout: IndicatorLayout, start: int, stop: int):
+        layout.score(self.arrays['indicators'][start:stop], out=self.scores(start, stop))
+
+    def copy_scores(self) -> MatrixScores:
+        return MatrixScores(**{name: self.arrays[name].copy() for name in _OUTPUT_BLOCKS})
+
+    def close(self):
+        # Views must be dropped before the underlying buffers can be released
+        self.arrays = {}
+        for block in self._blocks.values():
+            block.close()
+        if self._owner:
+            for block in self._blocks.values():
+                block.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Per-process attachment cache so a worker maps each batch's blocks only once
+_attached: Dict[Tuple, SharedCaseMatrix] = {}
+# Layout a worker scores with, set once by the pool initializer
+_worker_layout: Optional[IndicatorLayout] = None
+
+def _init_worker(layout: IndicatorLayout):
+    global _worker_layout
+    _worker_layout = layout
+
+def _score_shared_slice(descriptor: SharedMatrixDescriptor, start: int, stop: int) -> int:
+    if _worker_layout is None:
+        raise RuntimeError("shared scoring workers must be started by scoring_pool()")
+    shared = _attached.get(descriptor.blocks)
+    if shared is None:
+        for stale in _attached.values():
+            stale.close()
+        _attached.clear()
+        shared = _attached[descriptor.blocks] = SharedCaseMatrix.attach(descriptor)
+    shared.score_slice(_worker_layout, start, stop)
+    return stop - start
+
+def scoring_pool(detector: Optional[CouncilTaxFraudDetector] = None,
+                 workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Process pool whose workers hold the detector's layout, reusable across score_cases_shared calls"""
+    return _pool(IndicatorLayout(detector), workers or os.cpu_count() or 1)
+
+def _pool(layout: IndicatorLayout, workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(layout,))
+
+def score_cases_shared(cases: List[Dict], detector: Optional[CouncilTaxFraudDetector] = None,
+                       workers: Optional[int] = None, slice_size: int = 100000,
+                       executor: Optional[ProcessPoolExecutor] = None) -> Dict:
+    """Score cases across worker processes that share the matrix instead of receiving pickled cases;
+    an executor must come from scoring_pool() for the same detector"""
+    layout = IndicatorLayout(detector)
+    workers = workers or os.cpu_count() or 1
+    with SharedCaseMatrix.create(cases, layout) as shared:
+        if shared.rows:
+            descriptor = shared.descriptor()
+            slices = [(start, min(start + slice_size, shared.rows))
+                      for start in range(0, shared.rows, slice_size)]
+            own_executor = executor is None
+            pool = executor or _pool(layout, min(workers, len(slices)))
+            try:
+                futures = [pool.submit(_score_shared_slice, descriptor, start, stop) for start, stop in slices]
+                for future in futures:
+                    future.result()
+            finally:
+                if own_executor:
+                    pool.shutdown()
+        scores = shared.copy_scores()
+        metadata = shared.arrays['metadata'].copy()
+    return {
+        'scores': scores,
+        'metadata': metadata,
+        'statistics': layout.statistics(scores),
+        'layout': layout,
+    }
@@ -0,0 +1,272 @@
+"""
+Streaming aggregate statistics for monitoring.
+
+StreamingStatistics is fed one assessment at a time (it can be passed to
+batch_analyze as a listener) and keeps the batch_analyze counters, a KLL
+quantile sketch of risk scores, and per-day and per-fraud-type buckets.
+Reads are O(1) in the number of assessments seen, and every piece is
+mergeable, so workers and days can be aggregated after the fact.
+"""
+
+import math
+import random
+from collections import deque
+from datetime import date
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from fraud_detector import FraudAssessment, RiskLevel
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin-Lang-Liberty) over floats"""
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: Optional[int] = None):
+        self.k = k
+        self.c = c
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._random = random.Random(seed)
+        self._compactors: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self._compactors) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _grow(self):
+        self._compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self._compactors)))
+
+    def update(self, value: float):
+        self._compactors[0].append(value)
+        self._size += 1
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        for height, items in enumerate(self._compactors):
+            if len(items) >= self._capacity(height):
+                if height + 1 >= len(self._compactors):
+                    self._grow()
+                items.sort()
+                # Keep one of every pair (random offset) at double weight; an odd item stays
+                keep = [items.pop()] if len(items) % 2 else []
+                self._compactors[height + 1].extend(items[self._random.randint(0, 1)::2])
+                self._compactors[height] = keep
+                self._size = sum(map(len, self._compactors))
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Fold another sketch into this one"""
+        while len(self._compactors) < len(other._compactors):
+            self._grow()
+        for height, items in enumerate(other._compactors):
+            self._compactors[height].extend(items)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._size = sum(map(len, self._compactors))
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def _weighted(self) -> Tuple[List[float], List[int]]:
+        pairs = sorted((value, 1 << height)
+                       for height, items in enumerate(self._compactors) for value in items)
+        values = [value for value, _ in pairs]
+        cumulative = []
+        total = 0
+        for _, weight in pairs:
+            total += weight
+            cumulative.append(total)
+        return values, cumulative
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+        values, cumulative = self._weighted()
+        total = cumulative[-1]
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min)
+            elif q >= 1:
+                result.append(self.max)
+            else:
+                target = q * total
+                index = next((i for i, weight in enumerate(cumulative) if weight >= target), len(values) - 1)
+                result.append(values[index])
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of values <= value"""
+        if not self.count:
+            return 0.0
+        weight = sum(1 << height for height, items in enumerate(self._compactors)
+                     for item in items if item <= value)
+        return weight / sum(len(items) << height for height, items in enumerate(self._compactors))
+
+class StatisticsBucket:
+    """Counters and a risk-score sketch for one slice of the assessment stream"""
+
+    def __init__(self, k: int = 200):
+        self.total_cases = 0
+        self.high_risk = 0
+        self.likely_fraud = 0
+        self.likely_error = 0
+        self.by_type: Dict[str, int] = {}
+        self.by_risk_level: Dict[str, int] = {level.value: 0 for level in RiskLevel}
+        self.risk_scores = KLLSketch(k)
+
+    def add(self, assessment: FraudAssessment):
+        self.total_cases += 1
+        if assessment.risk_level in (RiskLevel.HIGH, RiskLevel.CRITICAL):
+            self.high_risk += 1
+        if assessment.is_likely_fraud:
+            self.likely_fraud += 1
+        if assessment.is_likely_error:
+            self.likely_error += 1
+        if assessment.fraud_type:
+            fraud_type = assessment.fraud_type.value
+            self.by_type[fraud_type] = self.by_type.get(fraud_type, 0) + 1
+        self.by_risk_level[assessment.risk_level.value] += 1
+        self.risk_scores.update(assessment.risk_score)
+
+    def merge(self, other: 'StatisticsBucket') -> 'StatisticsBucket':
+        self.total_cases += other.total_cases
+        self.high_risk += other.high_risk
+        self.likely_fraud += other.likely_fraud
+        self.likely_error += other.likely_error
+        for fraud_type, count in other.by_type.items():
+            self.by_type[fraud_type] = self.by_type.get(fraud_type, 0) + count
+        for level, count in other.by_risk_level.items():
+            self.by_risk_level[level] = self.by_risk_level.get(level, 0) + count
+        self.risk_scores.merge(other.risk_scores)
+        return self
+
+    def statistics(self) -> Dict:
+        """Counters in the same shape as batch_analyze's 'statistics'"""
+        return {
+            'total_cases': self.total_cases,
+            'high_risk': self.high_risk,
+            'likely_fraud': self.likely_fraud,
+            'likely_error': self.likely_error,
+            'by_type': dict(self.by_type),
+        }
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict:
+        quantiles = tuple(quantiles)
+        summary = self.statistics()
+        summary['by_risk_level'] = dict(self.by_risk_level)
+        summary['risk_score_quantiles'] = dict(zip(quantiles, self.risk_scores.quantiles(quantiles)))
+        return summary
+
+class StreamingStatistics:
+    """Incrementally maintained monitoring statistics, usable as a batch_analyze listener"""
+
+    def __init__(self, day_field: Optional[str] = None, max_days: Optional[int] = None,
+                 recent_limit: int = 20, k: int = 200,
+                 today: Callable[[], date] = date.today):
+        self.day_field = day_field
+        self.max_days = max_days
+        self.k = k
+        self.today = today
+        self.totals = StatisticsBucket(k)
+        self.days: Dict[str, StatisticsBucket] = {}
+        self.types: Dict[str, StatisticsBucket] = {}
+        self.recent_high_risk: Deque[FraudAssessment] = deque(maxlen=recent_limit)
+        self._version = 0
+        self._snapshot: Optional[Dict] = None
+        self._snapshot_version = -1
+
+    def _day_of(self, case: Dict) -> str:
+        day = case.get(self.day_field) if self.day_field else None
+        if isinstance(day, date):
+            return day.isoformat()
+        if day:
+            return str(day)[:10]
+        return self.today().isoformat()
+
+    def _bucket(self, buckets: Dict[str, StatisticsBucket], key: str) -> Optional[StatisticsBucket]:
+        """Bucket for key, created if missing; None for a day older than every retained day"""
+        bucket = buckets.get(key)
+        if bucket is None:
+            if buckets is self.days and self.max_days and len(buckets) >= self.max_days:
+                oldest = min(buckets)
+                if key < oldest:
+                    return None
+                del buckets[oldest]
+            bucket = buckets[key] = StatisticsBucket(self.k)
+        return bucket
+
+    def observe(self, case: Dict, assessment: FraudAssessment):
+        self.totals.add(assessment)
+        day = self._bucket(self.days, self._day_of(case))
+        if day is not None:
+            day.add(assessment)
+        if assessment.fraud_type:
+            self._bucket(self.types, assessment.fraud_type.value).add(assessment)
+        if assessment.risk_level in (RiskLevel.HIGH, RiskLevel.CRITICAL):
+            self.recent_high_risk.append(assessment)
+        self._version += 1
+
+    __call__ = observe
+
+    def observe_batch(self, cases: List[Dict], assessments: List[FraudAssessment]):
+        for case, assessment in zip(cases, assessments):
+            self.observe(case, assessment)
+
+    def merge(self, other: 'StreamingStatistics') -> 'StreamingStatistics':
+        """Fold another worker's (or period's) statistics into this one"""
+        self.totals.merge(other.totals)
+        for buckets, other_buckets in ((self.days, other.days), (self.types, other.types)):
+            for key, bucket in other_buckets.items():
+                target = self._bucket(buckets, key)
+                if target is not None:
+                    target.merge(bucket)
+        self.recent_high_risk.extend(other.recent_high_risk)
+        self._version += 1
+        return self
+
+    def statistics(self) -> Dict:
+        return self.totals.statistics()
+
+    def quantile(self, q: float, day: Optional[str] = None, fraud_type: Optional[str] = None) -> Optional[float]:
+        if day is not None:
+            bucket = self.days.get(day)
+        elif fraud_type is not None:
+            bucket = self.types.get(fraud_type)
+        else:
+            bucket = self.totals
+        return bucket.risk_scores.quantile(q) if bucket else None
+
+    def daily_series(self, metric: str = 'total_cases') -> Tuple[List[str], List[int]]:
+        """(days, values) for one counter, oldest day first"""
+        days = sorted(self.days)
+        return days, [getattr(self.days[day], metric) for day in days]
+
+    def snapshot(self) -> Dict:
+        """Current statistics; rebuilt only when new assessments have arrived"""
+        if self._snapshot_version != self._version:
+            snapshot = self.totals.summary()
+            snapshot['by_type_quantiles'] = {
+                fraud_type: dict(zip(DEFAULT_QUANTILES, bucket.risk_scores.quantiles(DEFAULT_QUANTILES)))
+                for fraud_type, bucket in self.types.items()
+            }
+            snapshot['days'] = sorted(self.days)
+            self._snapshot = snapshot
+            self._snapshot_version = self._version
+        return self._snapshot
@@ -0,0 +1,233 @@
+"""
+Multi-council tenant partitioning.
+
+Each council (tenant) may override indicator weights, remove indicators,
+and set its own risk thresholds and error weight factor. Tenant configs are
+compiled once into CompiledDetectors and deduplicated by fingerprint, so
+memory grows with the number of distinct configurations rather than the
+number of councils or cases. Cases are routed by their council_id.
+
+TenantScheduler splits each tenant's cases into fixed-size slices and
+feeds them to a worker pool round-robin across tenants with a bounded
+number in flight, so one large council cannot queue ahead of every slice
+of a small one. Per-tenant statistics roll up into a combined view.
+"""
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from compiled_detector import CompiledDetector
+from fraud_detector import CouncilTaxFraudDetector, RiskLevel, merge_statistics
+
+TENANT_FIELD = 'council_id'
+DEFAULT_TENANT = 'default'
+
+@dataclass
+class TenantConfig:
+    """Per-council overrides applied on top of the default detector configuration"""
+    council_id: str
+    weights: Dict[str, float] = field(default_factory=dict)
+    disabled_indicators: List[str] = field(default_factory=list)
+    thresholds: Dict[str, float] = field(default_factory=dict)
+    error_weight_factor: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TenantConfig':
+        unknown = set(data) - {'council_id', 'weights', 'disabled_indicators', 'thresholds', 'error_weight_factor'}
+        if unknown:
+            raise ValueError(f"tenant {data.get('council_id')}: unknown config keys {sorted(unknown)}")
+        return cls(
+            council_id=str(data['council_id']),
+            weights=dict(data.get('weights') or {}),
+            disabled_indicators=list(data.get('disabled_indicators') or []),
+            thresholds=dict(data.get('thresholds') or {}),
+            error_weight_factor=data.get('error_weight_factor'),
+        )
+
+    def compile(self, base: Optional[CompiledDetector] = None) -> CompiledDetector:
+        builder = (base or CouncilTaxFraudDetector().compile()).builder()
+        for indicator_type, weight in self.weights.items():
+            builder.set_weight(indicator_type, weight)
+        for indicator_type in self.disabled_indicators:
+            builder.remove_indicator(indicator_type)
+        for level, value in self.thresholds.items():
+            builder.set_threshold(RiskLevel(level), value)
+        if self.error_weight_factor is not None:
+            builder.set_error_weight_factor(self.error_weight_factor)
+        return builder.build()
+
+class TenantRegistry:
+    """Compiled detectors per council, shared between councils with identical configurations"""
+
+    def __init__(self, base=None, strict: bool = False):
+        self.base: CompiledDetector = (base or CouncilTaxFraudDetector()).compile()
+        self.strict = strict
+        self._by_fingerprint: Dict[str, CompiledDetector] = {self.base.fingerprint: self.base}
+        self._tenants: Dict[str, CompiledDetector] = {}
+
+    @classmethod
+    def from_configs(cls, configs: Iterable[Dict], **kwargs) -> 'TenantRegistry':
+        registry = cls(**kwargs)
+        for config in configs:
+            registry.register(TenantConfig.from_dict(config))
+        return registry
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'TenantRegistry':
+        """Registry from a JSON file holding a list of tenant configs"""
+        with open(path, encoding='utf-8') as fh:
+            configs = json.load(fh)
+        if not isinstance(configs, list):
+            raise ValueError(f"{path}: expected a JSON array of tenant configs")
+        return cls.from_configs(configs, **kwargs)
+
+    def register(self, config: TenantConfig) -> CompiledDetector:
+        compiled = config.compile(self.base)
+        # Identical configurations share one compiled detector
+        compiled = self._by_fingerprint.setdefault(compiled.fingerprint, compiled)
+        self._tenants[config.council_id] = compiled
+        return compiled
+
+    def detector_for(self, council_id: Optional[str]) -> CompiledDetector:
+        detector = self._tenants.get(council_id)
+        if detector is None:
+            if self.strict:
+                raise KeyError(f"no configuration registered for council '{council_id}'")
+            return self.base
+        return detector
+
+    @property
+    def tenants(self) -> List[str]:
+        return sorted(self._tenants)
+
+    @property
+    def distinct_configs(self) -> int:
+        return len(self._by_fingerprint)
+
+def tenant_of(case: Dict) -> str:
+    return str(case.get(TENANT_FIELD) or DEFAULT_TENANT)
+
+def partition(cases: Iterable[Dict]) -> Dict[str, List[int]]:
+    """Input positions of each tenant's cases, in input order"""
+    positions: Dict[str, List[int]] = {}
+    for position, case in enumerate(cases):
+        tenant = tenant_of(case)
+        bucket = positions.get(tenant)
+        if bucket is None:
+            bucket = positions[tenant] = []
+        bucket.append(position)
+    return positions
+
+def _score_slice(detector, cases: List[Dict]) -> Dict:
+    return detector.batch_analyze(cases)
+
+@dataclass
+class TenantProgress:
+    cases: int = 0
+    slices: int = 0
+    finished_at: Optional[float] = None
+
+class TenantScheduler:
+    """Scores a mixed-tenant batch on a worker pool, interleaving tenants slice by slice"""
+
+    def __init__(self, registry: Optional[TenantRegistry] = None, workers: int = 4, slice_size: int = 500,
+                 executor: Optional[Executor] = None, fair: bool = True):
+        if slice_size < 1:
+            raise ValueError("slice_size must be at least 1")
+        self.registry = registry or TenantRegistry()
+        self.workers = workers
+        self.slice_size = slice_size
+        self.executor = executor
+        self.fair = fair
+        self.progress: Dict[str, TenantProgress] = {}
+        self.completion_order: List[str] = []
+
+    def _slices(self, positions: Dict[str, List[int]]):
+        """Round-robin over tenants: one slice from each tenant in turn (or tenant by tenant if not fair)"""
+        if not self.fair:
+            for tenant, indices in positions.items():
+                for start in range(0, len(indices), self.slice_size):
+                    yield tenant, indices[start:start + self.slice_size]
+            return
+        cursors = {tenant: 0 for tenant in positions}
+        while cursors:
+            for tenant in list(cursors):
+                start = cursors[tenant]
+                chunk = positions[tenant][start:start + self.slice_size]
+                cursors[tenant] = start + len(chunk)
+                if cursors[tenant] >= len(positions[tenant]):
+                    del cursors[tenant]
+                yield tenant, chunk
+
+    def run(self, cases: List[Dict], listeners: Optional[List[Callable]] = None) -> Dict:
+        """batch_analyze over all tenants; assessments come back in input order.
+
+        Listeners run on the calling thread as slices complete, so they need no locking.
+        """
+        positions = partition(cases)
+        assessments: List = [None] * len(cases)
+        by_tenant: Dict[str, Dict] = {tenant: {} for tenant in positions}
+        remaining = {tenant: len(indices) for tenant, indices in positions.items()}
+        self.progress = {tenant: TenantProgress() for tenant in positions}
+        self.completion_order = []
+
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.workers)
+        start = time.perf_counter()
+        try:
+            pending = {}
+            slices = self._slices(positions)
+            # Bounded in-flight work keeps later tenants' slices from queueing behind a large tenant
+            limit = max(1, self.workers) * 2
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < limit:
+                    item = next(slices, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    tenant, chunk = item
+                    future = executor.submit(_score_slice, self.registry.detector_for(tenant),
+                                             [cases[i] for i in chunk])
+                    pending[future] = (tenant, chunk)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tenant, chunk = pending.pop(future)
+                    result = future.result()
+                    for position, assessment in zip(chunk, result['assessments']):
+                        assessments[position] = assessment
+                        if listeners:
+                            for listener in listeners:
+                                listener(cases[position], assessment)
+                    by_tenant[tenant] = merge_statistics(by_tenant[tenant], result['statistics'])
+                    progress = self.progress[tenant]
+                    progress.cases += len(chunk)
+                    progress.slices += 1
+                    remaining[tenant] -= len(chunk)
+                    if not remaining[tenant]:
+                        progress.finished_at = time.perf_counter() - start
+                        self.completion_order.append(tenant)
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+
+        return {
+            'assessments': assessments,
+            'statistics': rollup(by_tenant),
+            'by_tenant': by_tenant,
+        }
+
+def rollup(by_tenant: Dict[str, Dict]) -> Dict:
+    """Combined batch_analyze-style statistics across tenants"""
+    combined = merge_statistics(*by_tenant.values()) if by_tenant else {}
+    combined.setdefault('total_cases', 0)
+    combined.setdefault('high_risk', 0)
+    combined.setdefault('likely_fraud', 0)
+    combined.setdefault('likely_error', 0)
+    combined.setdefault('by_type', {})
+    combined['tenants'] = len(by_tenant)
+    return combined